@@ -10,9 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
-import environ
 from pathlib import Path
 
+import environ
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -53,6 +54,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'documents',
     'rest_framework',
 ]
@@ -137,6 +139,39 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'  # collectstatic 收集目标
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# AgentCard 静态发布目录（.well-known/agent.json，由 Caddy 直接提供服务）
+# 为空时不发布（开发环境默认），生产/测试环境由 docker-compose 设置为 /app/published
+AGENTCARD_PUBLISH_ROOT = env.str('AGENTCARD_PUBLISH_ROOT', default='')
+
+# 能力路由（/api/route/）进程内索引的刷新间隔（秒）
+# 每隔 POLL_INTERVAL 读取一次变更流增量刷新，每隔 REBUILD_INTERVAL 全量重建
+AGENTCARD_ROUTING_POLL_INTERVAL = env.float('AGENTCARD_ROUTING_POLL_INTERVAL', default=1.0)
+AGENTCARD_ROUTING_REBUILD_INTERVAL = env.float('AGENTCARD_ROUTING_REBUILD_INTERVAL', default=300.0)
+
+# 缓存（版本解析结果、Schema 目录等）
+# 默认为进程内缓存；多进程部署建议配置共享缓存，如 CACHE_URL=redis://redis:6379/1
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# 版本解析（/api/agentcards/resolve/）缓存时间（秒）。写入后会主动删除缓存，
+# 此值只是进程内缓存在其他进程中的最长过期时间
+AGENTCARD_RESOLVE_CACHE_TIMEOUT = env.int('AGENTCARD_RESOLVE_CACHE_TIMEOUT', default=300)
+
+# Schema 目录（/api/schemas/catalog/）缓存时间（秒），含义同上
+AGENTCARD_SCHEMA_CATALOG_CACHE_TIMEOUT = env.int('AGENTCARD_SCHEMA_CATALOG_CACHE_TIMEOUT', default=300)
+
+# Schema / 字段变更后重新验证已有扩展（见 documents/revalidation.py）
+# ASYNC=False 时在事务提交后同步执行；CHUNK_SIZE 为每次读取和写入的扩展数
+AGENTCARD_SCHEMA_REVALIDATION_ASYNC = env.bool('AGENTCARD_SCHEMA_REVALIDATION_ASYNC', default=True)
+AGENTCARD_SCHEMA_REVALIDATION_CHUNK_SIZE = env.int('AGENTCARD_SCHEMA_REVALIDATION_CHUNK_SIZE', default=500)
+
+# 批量试验证（/api/agentcards/validate/）：默认（WORKERS=1）在请求进程内验证；
+# WORKERS>1 时载荷数不少于 PARALLEL_MIN 的请求在进程池（WORKERS 个进程）中并行验证。
+# 进程池属于每个 Web 工作进程（gunicorn --workers W 时最多 W×WORKERS 个验证进程），按主机的 CPU 和内存选择
+AGENTCARD_VALIDATE_WORKERS = env.int('AGENTCARD_VALIDATE_WORKERS', default=1)
+AGENTCARD_VALIDATE_PARALLEL_MIN = env.int('AGENTCARD_VALIDATE_PARALLEL_MIN', default=200)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
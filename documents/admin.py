@@ -3,15 +3,28 @@ Django Admin 配置
 提供友好的可视化界面管理 AgentCard、Schema 和字段定义
 """
 
+import json
+
+from django import forms
 from django.contrib import admin
-from django.utils.html import format_html
 from django.db.models import Count
 from django.urls import reverse
-from django import forms
-import json
-
-from .models import Namespace, SchemaRegistry, SchemaField, AgentCard, AgentExtension, AgentCase
+from django.utils.html import format_html
 
+from .models import (
+    SEMVER_DESC_ORDERING,
+    AgentCard,
+    AgentCase,
+    AgentExtension,
+    ExtensionViolation,
+    Namespace,
+    SchemaField,
+    SchemaRegistry,
+)
+from .rendering import AgentCardRenderer
+from .revalidation import violation_count_subquery
+from .search import search
+from .signals import children_changes_coalesced
 
 # ========================================
 # Namespace Admin
@@ -19,10 +32,12 @@ from .models import Namespace, SchemaRegistry, SchemaField, AgentCard, AgentExte
 
 @admin.register(Namespace)
 class NamespaceAdmin(admin.ModelAdmin):
-    list_display = ['id', 'name', 'is_active', 'agent_card_count', 'created_at']
+    list_display = ['id', 'name', 'is_active', 'agent_card_count', 'case_count', 'created_at']
     list_filter = ['is_active', 'created_at']
     search_fields = ['id', 'name', 'description']
     ordering = ['id']
+    # 计数来自 NamespaceStats，随列表一次 JOIN 取回
+    list_select_related = ['stats']
 
     fieldsets = [
         ('基本信息', {
@@ -37,13 +52,21 @@ class NamespaceAdmin(admin.ModelAdmin):
     readonly_fields = ['created_at', 'updated_at']
 
     def agent_card_count(self, obj):
-        count = obj.agent_cards.count()
+        counts = obj.card_counts()
+        count = counts['agent_card_count']
         if count > 0:
             url = reverse('admin:documents_agentcard_changelist') + f'?namespace__id__exact={obj.id}'
-            return format_html('<a href="{}">{} 个 AgentCard</a>', url, count)
+            return format_html(
+                '<a href="{}">{} 个 AgentCard</a>（启用 {}，默认版本 {}）',
+                url, count, counts['active_card_count'], counts['default_card_count']
+            )
         return '0'
     agent_card_count.short_description = 'AgentCard 数量'
 
+    def case_count(self, obj):
+        return obj.card_counts()['case_count']
+    case_count.short_description = 'Case 数量'
+
 
 # ========================================
 # Schema Admin（带内联字段编辑）
@@ -59,7 +82,8 @@ class SchemaFieldInline(admin.TabularInline):
     fields = [
         'order', 'field_name', 'field_type', 'is_required',
         'description', 'default_value', 'enum_choices',
-        'min_length', 'max_length', 'min_value', 'max_value', 'pattern'
+        'min_length', 'max_length', 'min_value', 'max_value', 'pattern',
+        'nested_schema'
     ]
     ordering = ['order', 'field_name']
 
@@ -76,7 +100,8 @@ class SchemaFieldInline(admin.TabularInline):
                     'default_value', 'enum_choices',
                     ('min_length', 'max_length'),
                     ('min_value', 'max_value'),
-                    'pattern'
+                    'pattern',
+                    'nested_schema'
                 ],
                 'classes': ['collapse']
             }),
@@ -87,7 +112,7 @@ class SchemaFieldInline(admin.TabularInline):
 class SchemaRegistryAdmin(admin.ModelAdmin):
     list_display = [
         'schema_type', 'version', 'is_active',
-        'field_count', 'usage_count', 'created_at'
+        'field_count', 'usage_count', 'violation_badge', 'created_at'
     ]
     list_filter = ['is_active', 'schema_type', 'created_at']
     search_fields = ['schema_uri', 'schema_type', 'description']
@@ -116,6 +141,9 @@ class SchemaRegistryAdmin(admin.ModelAdmin):
 
     inlines = [SchemaFieldInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(violation_count=violation_count_subquery())
+
     def field_count(self, obj):
         count = obj.fields.count()
         return f'{count} 个字段'
@@ -142,6 +170,24 @@ class SchemaRegistryAdmin(admin.ModelAdmin):
         return '0'
     usage_count.short_description = '使用情况'
 
+    def violation_badge(self, obj):
+        """后台重新验证发现的无效扩展数量（链接到违规记录列表）"""
+        count = getattr(obj, 'violation_count', None)
+        if count is None:
+            count = obj.violations.count()
+        if obj.revalidated_at is None:
+            return format_html('<span style="color:#6c757d;" title="运行 revalidate_extensions 命令验证已有扩展">未验证</span>')
+        if obj.revalidated_at != obj.updated_at:
+            return format_html('<span style="color:#856404;" title="Schema 已修改，正在重新验证已有扩展">验证中</span>')
+        if count == 0:
+            return format_html('<span style="color:green;">✓</span>')
+        url = reverse('admin:documents_extensionviolation_changelist') + f'?schema__id__exact={obj.pk}'
+        return format_html(
+            '<a href="{}" style="color:white;background:#dc3545;padding:2px 8px;border-radius:10px;">{} 个无效扩展</a>',
+            url, count
+        )
+    violation_badge.short_description = '数据验证'
+
     def json_schema_preview(self, obj):
         """显示自动生成的 JSON Schema"""
         if obj.pk:
@@ -183,6 +229,41 @@ class SchemaRegistryAdmin(admin.ModelAdmin):
             self.message_user(request, f'Schema "{obj.schema_type} {obj.version}" 已创建。现在可以添加字段了。')
 
 
+@admin.register(ExtensionViolation)
+class ExtensionViolationAdmin(admin.ModelAdmin):
+    """
+    扩展违规记录（只读，由后台重新验证维护，见 revalidation.py）
+    """
+    list_display = ['extension_card', 'extension_uri', 'schema', 'error_summary', 'checked_at']
+    list_filter = ['schema']
+    list_select_related = ['extension__agent_card', 'schema']
+    ordering = ['schema', 'extension']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def extension_card(self, obj):
+        card = obj.extension.agent_card
+        url = reverse('admin:documents_agentcard_change', args=[card.pk])
+        return format_html('<a href="{}">{}::{}@{}</a>', url, card.namespace_id, card.name, card.version)
+    extension_card.short_description = 'AgentCard'
+
+    def extension_uri(self, obj):
+        return obj.extension.uri
+    extension_uri.short_description = '扩展 URI'
+
+    def error_summary(self, obj):
+        lines = [
+            f"字段 '{error['path']}': {error['message']}" if error['path'] else error['message']
+            for error in obj.errors
+        ]
+        return format_html('<pre style="margin:0;">{}</pre>', '\n'.join(lines))
+    error_summary.short_description = '验证错误'
+
+
 # SchemaField 不单独注册到 Admin，只通过 SchemaRegistry 的 inline 编辑
 # 这样可以简化侧边栏，避免导航混乱
 #
@@ -302,8 +383,10 @@ class AgentCardAdmin(admin.ModelAdmin):
         'is_active', 'extension_count', 'updated_at'
     ]
     list_filter = ['namespace', 'is_default_version', 'is_active', 'preferred_transport', 'created_at']
-    search_fields = ['name', 'description', 'url']
-    ordering = ['namespace', 'name', '-version']
+    # 实际检索由 get_search_results 在 search_vector 上执行
+    search_fields = ['name', 'description', 'skills']
+    search_help_text = '全文检索：名称、描述、技能名称/标签/描述/示例（按词前缀匹配）'
+    ordering = ['namespace', 'name', *SEMVER_DESC_ORDERING]
 
     fieldsets = [
         ('标识', {
@@ -357,6 +440,12 @@ class AgentCardAdmin(admin.ModelAdmin):
 
     inlines = [AgentExtensionInline]
 
+    def get_search_results(self, request, queryset, search_term):
+        """搜索框（含 AgentCase 的自动补全）使用 search_vector 全文检索（GIN 索引）"""
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, search_term), False
+
     def extension_count(self, obj):
         count = obj.extensions.count()
         if count > 0:
@@ -377,23 +466,11 @@ class AgentCardAdmin(admin.ModelAdmin):
         if obj.pk:
             try:
                 # 预览模式：validate=False，允许显示不完整的数据
-                card_json = obj.to_agentcard_json(include_metadata=True, validate=False)
+                card_json = AgentCardRenderer([obj]).render(obj, include_metadata=True, validate=False)
                 json_str = json.dumps(card_json, indent=2, ensure_ascii=False)
 
                 # 检查是否缺少必填字段（提示但不阻止显示）
-                warnings = []
-                if not obj.name or not obj.name.strip():
-                    warnings.append('name')
-                if not obj.description or not obj.description.strip():
-                    warnings.append('description')
-                if not obj.url or not obj.url.strip():
-                    warnings.append('url')
-                if not obj.default_input_modes or len(obj.default_input_modes) == 0:
-                    warnings.append('defaultInputModes')
-                if not obj.default_output_modes or len(obj.default_output_modes) == 0:
-                    warnings.append('defaultOutputModes')
-                if not obj.skills or len(obj.skills) == 0:
-                    warnings.append('skills')
+                warnings = list(obj.get_a2a_errors().keys())
 
                 warning_html = ''
                 if warnings:
@@ -426,6 +503,11 @@ class AgentCardAdmin(admin.ModelAdmin):
         obj.updated_by = request.user
         super().save_model(request, obj, form, change)
 
+    def save_related(self, request, form, formsets, change):
+        """内联扩展逐条保存，卡片的快照和变更记录在同一事务内只刷新一次"""
+        with children_changes_coalesced():
+            super().save_related(request, form, formsets, change)
+
 
 # ========================================
 # AgentExtension Admin（独立管理）
@@ -476,10 +558,9 @@ class AgentCaseAdmin(admin.ModelAdmin):
         'is_ground_truth', 'outcome_type', 'agent_card',
         'created_at', 'agent_version'
     ]
-    search_fields = [
-        'case_name', 'query_key', 'query_description',
-        'agent_card__name', 'agent_card__namespace__id'
-    ]
+    # 实际检索由 get_search_results 在 search_vector 上执行
+    search_fields = ['case_name', 'query_key', 'query_description']
+    search_help_text = '全文检索：Case 名称、查询问题、补充说明（按词前缀匹配）'
     ordering = ['-created_at']
     autocomplete_fields = ['agent_card']
 
@@ -504,6 +585,12 @@ class AgentCaseAdmin(admin.ModelAdmin):
 
     readonly_fields = ['created_at', 'updated_at', 'created_by', 'updated_by']
 
+    def get_search_results(self, request, queryset, search_term):
+        """搜索框使用 search_vector 全文检索（GIN 索引）"""
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, search_term), False
+
     def agent_card_link(self, obj):
         """显示关联的AgentCard链接"""
         if obj.agent_card:
@@ -0,0 +1,103 @@
+"""
+Schema 目录与使用统计
+
+GET /api/schemas/catalog/ 是 Agent 启动时的发现调用，整个目录按固定次数的查询构建并缓存：
+
+1. 活跃的 SchemaRegistry
+2. SchemaField（prefetch_related，一次取回全部 Schema 的字段）
+3. 使用统计：AgentExtension 按 schema_id 分组，统计引用该 Schema 的 AgentCard 数量
+
+使用统计以 AgentExtension.schema 为准（domain_extensions 列已弃用，不再参与统计）。
+Schema、字段或扩展写入后，在事务提交后删除目录缓存（见 signals.py）；
+使用进程内缓存（locmem）时其他进程最多在 AGENTCARD_SCHEMA_CATALOG_CACHE_TIMEOUT 秒后看到变更。
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AgentExtension, SchemaField, SchemaRegistry
+
+CATALOG_CACHE_KEY = 'schemas:catalog'
+
+
+def usage_counts(schema_ids=None) -> dict:
+    """
+    Schema ID -> 使用该 Schema 的 AgentCard 数量（一次 GROUP BY 查询）
+
+    没有被使用的 Schema 不在结果中。
+    """
+    queryset = AgentExtension.objects.filter(schema__isnull=False)
+    if schema_ids is not None:
+        queryset = queryset.filter(schema_id__in=schema_ids)
+    return dict(
+        queryset.order_by().values('schema_id').annotate(
+            usage=Count('agent_card', distinct=True)
+        ).values_list('schema_id', 'usage')
+    )
+
+
+def usage_count_subquery():
+    """usage_count 注解（相关子查询，供列表 / 详情查询集使用）"""
+    usage = AgentExtension.objects.filter(schema=OuterRef('pk')).order_by().values('schema').annotate(
+        usage=Count('agent_card', distinct=True)
+    ).values('usage')
+    return Coalesce(Subquery(usage, output_field=IntegerField()), 0)
+
+
+def field_count_subquery():
+    """field_count 注解（相关子查询）"""
+    count = SchemaField.objects.filter(schema=OuterRef('pk')).order_by().values('schema').annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+
+def build_catalog() -> dict:
+    """
+    构建 Schema 目录（固定 3 次查询）
+
+    Returns:
+        {'catalog': {schema_type: [...]}, 'categories': [...], 'total_schemas': n}
+    """
+    schemas = list(
+        SchemaRegistry.objects.filter(is_active=True)
+        .prefetch_related('fields')
+        .order_by('schema_type', '-version')
+    )
+    usage = usage_counts([schema.pk for schema in schemas])
+
+    catalog = {}
+    for schema in schemas:
+        catalog.setdefault(schema.schema_type, []).append({
+            'uri': schema.schema_uri,
+            'version': schema.version,
+            'description': schema.description,
+            'fields': schema.get_field_definitions(),
+            'usage_count': usage.get(schema.pk, 0),
+            'example_data': schema.example_data,
+        })
+
+    return {
+        'catalog': catalog,
+        'categories': list(catalog.keys()),
+        'total_schemas': len(schemas),
+    }
+
+
+def get_catalog() -> dict:
+    """Schema 目录（带缓存）"""
+    data = cache.get(CATALOG_CACHE_KEY)
+    if data is None:
+        data = build_catalog()
+        cache.set(
+            CATALOG_CACHE_KEY, data,
+            getattr(settings, 'AGENTCARD_SCHEMA_CATALOG_CACHE_TIMEOUT', 300)
+        )
+    return data
+
+
+def invalidate_catalog():
+    """删除 Schema 目录缓存"""
+    cache.delete(CATALOG_CACHE_KEY)
@@ -0,0 +1,147 @@
+"""
+AgentCard 变更流（增量同步）
+
+镜像方保存游标，定期拉取游标之后的变更：
+
+    GET /api/agentcards/changes/?since=<cursor>
+
+变更来自 AgentCardChange 变更日志，按 (txid, seq) 排序。PostgreSQL 上只读取
+txid < 当前快照 xmin 的行：这些事务都已提交或回滚，之后不会再有更小的 (txid, seq)
+出现，因此并发事务不会导致镜像方漏掉变更（直接使用 updated_at 或 seq 做游标会漏）。
+
+代价：任何事务（包括其他应用、长时间运行的导入、idle in transaction 的会话）保持打开期间，
+xmin 不再前进，之后提交的变更都要等它结束才出现在变更流中（路由索引的增量轮询同样读取变更流）。
+
+同一页内同一卡片的多次变更合并为一条：
+- upsert：返回卡片的当前数据（原始格式 + _metadata，可直接用于 import 端点）
+- delete：墓碑（卡片已删除），扩展删除也会产生扩展墓碑；卡片移动到其他命名空间时，
+  原命名空间记录卡片墓碑，随后是新命名空间的 upsert
+"""
+
+import base64
+import binascii
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import AgentCard, AgentCardChange
+from .rendering import AgentCardRenderer
+
+
+def encode_change_cursor(change) -> str:
+    """变更记录 -> 游标（txid:seq）"""
+    txid = '' if change.txid is None else str(change.txid)
+    return base64.urlsafe_b64encode(f'{txid}:{change.id}'.encode('ascii')).decode('ascii')
+
+
+def decode_change_cursor(cursor: str) -> tuple:
+    """
+    游标 -> (txid, seq)，txid 可能为 None（非 PostgreSQL）
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        txid, sep, seq = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').partition(':')
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"无效的游标：'{cursor}'") from e
+    if not sep or not seq.isdigit() or (txid and not txid.isdigit()):
+        raise ValueError(f"无效的游标：'{cursor}'")
+    return (int(txid) if txid else None), int(seq)
+
+
+def stable_changes():
+    """
+    只包含已结束事务写入的变更记录（PostgreSQL：txid < 快照 xmin）
+    """
+    queryset = AgentCardChange.objects.order_by('txid', 'id')
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(
+            txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', [])
+        )
+    return queryset
+
+
+def changes_after(queryset, txid, seq):
+    """过滤出位置 (txid, seq) 之后的变更记录（txid 为 None 时只按 seq 比较）"""
+    if txid is None:
+        return queryset.filter(id__gt=seq)
+    return queryset.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=seq))
+
+
+def head_cursor(namespace_id: str = None):
+    """当前最新的游标（全量同步后从这里开始增量拉取），没有变更时返回 None"""
+    queryset = stable_changes()
+    if namespace_id:
+        queryset = queryset.filter(namespace_id=namespace_id)
+    last = queryset.order_by('-txid', '-id').only('id', 'txid').first()
+    return encode_change_cursor(last) if last else None
+
+
+def read_changes(since: str = None, namespace_id: str = None, limit: int = 100) -> dict:
+    """
+    读取游标之后的一页变更
+
+    Args:
+        since: 上一页返回的游标（为空时从保留的最早变更开始）
+        namespace_id: 只读取指定命名空间
+        limit: 每页最多读取的变更记录数（合并后返回的条目可能更少）
+
+    Returns:
+        {'cursor': 下一页游标, 'has_more': bool, 'results': [...]}
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    queryset = stable_changes()
+    if namespace_id:
+        queryset = queryset.filter(namespace_id=namespace_id)
+    if since:
+        queryset = changes_after(queryset, *decode_change_cursor(since))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    # 合并：每个卡片只保留页内最后一次 upsert；页内最后一次变更是删除的卡片只返回墓碑
+    # （移动命名空间的墓碑之后还有 upsert，卡片仍然存在）
+    last_upsert = {}
+    last_op = {}
+    for row in rows:
+        if row.object_type != AgentCardChange.TYPE_AGENTCARD:
+            continue
+        last_op[row.agent_card_id] = row.op
+        if row.op == AgentCardChange.OP_UPSERT:
+            last_upsert[row.agent_card_id] = row.id
+
+    upsert_ids = [card_id for card_id in last_upsert if last_op[card_id] == AgentCardChange.OP_UPSERT]
+    renderer = AgentCardRenderer(AgentCard.objects.filter(pk__in=upsert_ids))
+    cards = {card.pk: card for card in renderer.cards}
+
+    results = []
+    for row in rows:
+        entry = {
+            'seq': row.id,
+            'op': row.op,
+            'type': row.object_type,
+            'id': row.agent_card_id,
+            'key': f"{row.namespace_id}::{row.name}@{row.version}",
+            'changed_at': row.created_at.isoformat(),
+        }
+        if row.object_type == AgentCardChange.TYPE_EXTENSION:
+            entry['uri'] = row.extension_uri
+        elif row.op == AgentCardChange.OP_UPSERT:
+            card = cards.get(row.agent_card_id)
+            if card is None or last_upsert[row.agent_card_id] != row.id:
+                # 被页内后续变更覆盖，或卡片已删除（墓碑在之后的变更中）
+                continue
+            entry['key'] = f"{card.namespace_id}::{card.name}@{card.version}"
+            entry['data'] = renderer.render(card, raw=True, include_metadata=True)
+        results.append(entry)
+
+    return {
+        'cursor': encode_change_cursor(rows[-1]) if rows else since,
+        'has_more': has_more,
+        'results': results,
+    }
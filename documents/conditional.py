@@ -0,0 +1,163 @@
+"""
+条件请求支持（ETag / Last-Modified / 304 Not Modified）
+
+轮询客户端携带 If-None-Match 或 If-Modified-Since 重复获取未变化的资源时，
+只执行一次轻量查询（只读取时间戳列），在加载完整记录和序列化之前直接返回 304。
+
+子表变更会同步更新父记录的 updated_at（见 signals.py）：
+- AgentExtension 增删改 -> AgentCard.updated_at
+- SchemaField 增删改 -> SchemaRegistry.updated_at
+因此 ETag 只需基于父记录（及其关联记录）的时间戳计算。
+
+写操作（PUT / PATCH）使用同一 ETag 做乐观并发控制：If-Match 与资源当前详情表示的 ETag 不一致时
+返回 412 Precondition Failed（见 conditional_write）。
+"""
+
+import functools
+import hashlib
+
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .signals import children_changes_coalesced
+
+
+class ConditionalGetMixin:
+    """
+    为 ViewSet 提供条件请求所需的资源状态查询
+
+    子类通过 conditional_fields 声明参与 ETag 计算的字段（可跨关联，如 'namespace__updated_at'），
+    第一个字段同时作为 Last-Modified。
+    """
+    conditional_fields = ['updated_at']
+
+    def get_conditional_state(self, pk, lock: bool = False):
+        """
+        查询资源的版本状态（不加载完整记录）
+
+        Args:
+            lock: 锁定资源行直到事务结束（SELECT ... FOR UPDATE，只锁定本表的行）
+
+        Returns:
+            字段值元组；资源不存在时返回 None
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if lock:
+            queryset = queryset.select_for_update(of=('self',))
+        return queryset.filter(pk=pk).values_list(*self.conditional_fields).first()
+
+    def get_conditional_validators(self, request, pk):
+        """
+        计算强 ETag 与 Last-Modified
+
+        ETag 同时包含表示形式（action、响应格式、查询参数），
+        保证同一资源的不同表示拥有不同的 ETag。
+
+        Returns:
+            (etag, last_modified_timestamp)；资源不存在时返回 (None, None)
+        """
+        state = self.get_conditional_state(pk)
+        if state is None:
+            return None, None
+
+        renderer = getattr(request, 'accepted_renderer', None)
+        query = '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.items()))
+        return self.make_conditional_validators(
+            pk, state, self.action or '', getattr(renderer, 'format', '') or '', query
+        )
+
+    def make_conditional_validators(self, pk, state, action: str, renderer_format: str = 'json',
+                                    query: str = ''):
+        """由资源状态和表示形式计算 (etag, last_modified_timestamp)"""
+        variant = [self.basename or '', str(pk), action, renderer_format, query]
+        variant.extend(value.isoformat() if hasattr(value, 'isoformat') else str(value) for value in state)
+        etag = quote_etag(hashlib.sha256('|'.join(variant).encode('utf-8')).hexdigest()[:32])
+
+        timestamps = [value for value in state if hasattr(value, 'timestamp')]
+        last_modified = int(max(timestamps).timestamp()) if timestamps else None
+        return etag, last_modified
+
+    def get_write_validators(self, pk, lock: bool = False):
+        """
+        写操作前提条件使用的 ETag：资源详情（GET /{id}/，JSON，无查询参数）的 ETag
+
+        Returns:
+            (etag, last_modified_timestamp)；资源不存在时返回 (None, None)
+        """
+        state = self.get_conditional_state(pk, lock=lock)
+        if state is None:
+            return None, None
+        return self.make_conditional_validators(pk, state, 'retrieve')
+
+
+def _set_validator_headers(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+def conditional_get(view_method):
+    """
+    详情类 action 的条件请求装饰器
+
+    1. 读取资源时间戳，计算 ETag / Last-Modified
+    2. 命中 If-None-Match / If-Modified-Since 时直接返回 304（不执行 view_method）
+    3. 否则执行 view_method，并在成功响应上附加 ETag / Last-Modified
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        etag, last_modified = self.get_conditional_validators(request, pk)
+        if etag is None:
+            raise Http404
+
+        # 304 Not Modified（或 If-Match 不满足时的 412）
+        short_circuit = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if short_circuit is not None:
+            _set_validator_headers(short_circuit, etag, last_modified)
+            return short_circuit
+
+        response = view_method(self, request, *args, **kwargs)
+        if 200 <= response.status_code < 300:
+            _set_validator_headers(response, etag, last_modified)
+        return response
+
+    return wrapper
+
+
+def conditional_write(view_method):
+    """
+    写操作（PUT / PATCH）的条件请求装饰器（乐观并发控制）
+
+    1. 在事务中锁定资源行，计算资源详情表示的 ETag（与 GET /{id}/ 返回的 ETag 相同）
+    2. If-Match / If-Unmodified-Since 不满足时返回 412 Precondition Failed（不执行 view_method）
+    3. 否则在同一事务中执行 view_method，成功响应附加修改后的 ETag / Last-Modified
+
+    行锁保证检查前提条件与写入之间没有其他写入提交；不带前提条件的请求照常执行（最后写入生效）。
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        pk = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        with transaction.atomic():
+            etag, last_modified = self.get_write_validators(pk, lock=True)
+            if etag is None:
+                raise Http404
+
+            precondition_failed = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if precondition_failed is not None:
+                _set_validator_headers(precondition_failed, etag, last_modified)
+                return precondition_failed
+
+            # 扩展变更引起的卡片刷新合并为一次，在事务内完成（下面计算的 ETag 即最终表示的）
+            with children_changes_coalesced():
+                response = view_method(self, request, *args, **kwargs)
+
+        if 200 <= response.status_code < 300:
+            etag, last_modified = self.get_write_validators(pk)
+            if etag is not None:
+                _set_validator_headers(response, etag, last_modified)
+        return response
+
+    return wrapper
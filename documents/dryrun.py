@@ -0,0 +1,191 @@
+"""
+AgentCard 载荷试验证（POST /api/agentcards/validate/，不写入数据库）
+
+CI 在发布前批量验证 Agent 清单：每个载荷执行与保存 / 导出相同的规则，并报告全部错误：
+
+1. 结构：AgentCard.parse_agentcard_json()
+2. 字段格式：clean_fields()、URL 协议、A2A 字段格式（与 AgentCard.clean() 相同，见 importing.card_errors()）
+3. A2A 必填字段：get_a2a_errors()（与 to_agentcard_json(validate=True) 相同）
+4. 扩展数据：domainExtensions 和 capabilities.extensions 中已注册 Schema 的扩展（编译的验证器，错误带数据路径）
+
+需要查询数据库的规则（命名空间是否存在、版本唯一、默认版本冲突）不在此检查，
+请使用 import 端点的 dry_run=true。
+
+Schema 在主进程中一次查询加载（含字段），验证本身不访问数据库。默认在本进程内验证；
+AGENTCARD_VALIDATE_WORKERS 大于 1 时，载荷数不少于 AGENTCARD_VALIDATE_PARALLEL_MIN 的请求分块分发到进程池
+（AGENTCARD_VALIDATE_WORKERS 个 spawn 进程，首次使用时创建并在本进程内复用，进程退出时关闭），
+各工作进程按 Schema 版本缓存编译结果；进程池不可用时在本进程内验证。
+"""
+
+import atexit
+import logging
+import math
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+
+from .importing import _error_messages, card_errors
+from .models import AgentCard, SchemaRegistry
+
+logger = logging.getLogger(__name__)
+
+
+def _schema_uris(data) -> set:
+    """载荷中引用的扩展 URI（结构无效时忽略，由验证报告）"""
+    if not isinstance(data, dict):
+        return set()
+    uris = set(data['domainExtensions']) if isinstance(data.get('domainExtensions'), dict) else set()
+    capabilities = data.get('capabilities')
+    if isinstance(capabilities, dict) and isinstance(capabilities.get('extensions'), list):
+        uris.update(
+            ext['uri'] for ext in capabilities['extensions']
+            if isinstance(ext, dict) and isinstance(ext.get('uri'), str)
+        )
+    return uris
+
+
+def load_schemas(payloads) -> dict:
+    """一次查询加载载荷引用的 Schema（含字段定义）：{uri: SchemaRegistry}"""
+    uris = set()
+    for data in payloads:
+        uris.update(_schema_uris(data))
+    if not uris:
+        return {}
+    return {
+        schema.schema_uri: schema
+        for schema in SchemaRegistry.objects.filter(schema_uri__in=uris).prefetch_related('fields')
+    }
+
+
+def validate_payload(data, schemas: dict, active_schemas: dict = None, url_validator=None) -> dict:
+    """
+    验证单个 AgentCard 载荷（不查询数据库）
+
+    Args:
+        schemas: load_schemas() 的结果
+        active_schemas: schemas 中启用的部分（批量验证时预先计算）
+
+    Returns:
+        {字段: [错误信息]}，为空表示有效
+    """
+    try:
+        fields, extensions = AgentCard.parse_agentcard_json(data)
+    except ValidationError as e:
+        return _error_messages(e)
+
+    if active_schemas is None:
+        active_schemas = {uri: schema for uri, schema in schemas.items() if schema.is_active}
+    card = AgentCard(**fields)
+    errors = card_errors(card, extensions, schemas, active_schemas, url_validator)
+    for field, message in card.get_a2a_errors().items():
+        errors.setdefault(field, []).append(message)
+    return errors
+
+
+def validate_chunk(items, schemas: dict) -> list:
+    """
+    验证一块载荷（进程池的任务入口）
+
+    Args:
+        items: [(index, data), ...]
+
+    Returns:
+        [report, ...]
+    """
+    url_validator = URLValidator()
+    active_schemas = {uri: schema for uri, schema in schemas.items() if schema.is_active}
+    reports = []
+    for index, data in items:
+        errors = validate_payload(data, schemas, active_schemas, url_validator)
+        reports.append({
+            'index': index,
+            'key': _payload_key(data),
+            'valid': not errors,
+            'errors': errors,
+        })
+    return reports
+
+
+def _payload_key(data):
+    if isinstance(data, dict) and data.get('name') is not None:
+        return f"{data.get('name')}@{data.get('version')}"
+    return None
+
+
+# ========================================
+# 进程池
+# ========================================
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _worker_count() -> int:
+    return getattr(settings, 'AGENTCARD_VALIDATE_WORKERS', 1)
+
+
+def _get_executor():
+    """进程池（spawn：不继承父进程的数据库连接和线程；工作进程启动时执行 django.setup()）"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=_worker_count(),
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        return _executor
+
+
+def _discard_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# 服务进程退出时结束验证进程（否则 spawn 的子进程在 Web 工作进程重启后残留）
+atexit.register(_discard_executor)
+
+
+def validate_payloads(payloads) -> list:
+    """
+    验证一批 AgentCard 载荷
+
+    Args:
+        payloads: 载荷列表（已解析的 JSON）；解析失败的项可以预先放入 ValidationError
+
+    Returns:
+        每个载荷一个 report：{'index', 'key', 'valid', 'errors'}，按输入顺序
+    """
+    reports = {}
+    items = []
+    for index, data in enumerate(payloads):
+        if isinstance(data, ValidationError):
+            reports[index] = {'index': index, 'key': None, 'valid': False, 'errors': _error_messages(data)}
+        else:
+            items.append((index, data))
+
+    schemas = load_schemas(data for _, data in items)
+    workers = _worker_count()
+    if workers > 1 and len(items) >= getattr(settings, 'AGENTCARD_VALIDATE_PARALLEL_MIN', 200):
+        size = math.ceil(len(items) / workers)
+        chunks = [items[start:start + size] for start in range(0, len(items), size)]
+        try:
+            executor = _get_executor()
+            for chunk_reports in executor.map(validate_chunk, chunks, [schemas] * len(chunks)):
+                reports.update((report['index'], report) for report in chunk_reports)
+            items = []
+        except BrokenProcessPool:
+            logger.exception('验证进程池不可用，改为在本进程内验证')
+            _discard_executor()
+    if items:
+        reports.update((report['index'], report) for report in validate_chunk(items, schemas))
+    return [reports[index] for index in range(len(payloads))]
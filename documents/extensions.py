@@ -0,0 +1,174 @@
+"""
+AgentExtension 子资源的写入（/api/agentcards/{id}/extensions/）
+
+- URI 与已注册的 Schema 匹配时自动关联，params 用编译并缓存的验证器验证（validation.get_validators()，
+  与 Admin、批量导入的规则相同）；description 为空时从 Schema 填充（与 AgentExtension.save() 相同）
+- 单个扩展的增删改通过模型 save() / delete()，派生数据由信号维护
+- 整组替换（replace_extensions）按 URI 与当前扩展比较，在一个事务中 bulk_create 新增的、
+  bulk_update 有变化的、一次 DELETE 删除多余的，没有变化的扩展不写入；
+  卡片的派生数据（updated_at、快照、变更日志、发布文件、路由索引）只刷新一次；
+  批量 upsert 用 sync_extensions() 在一组语句中同步多张卡片的扩展
+"""
+
+from typing import NamedTuple
+
+from django.db.models import Max
+
+from .models import AgentCardChange, AgentExtension, ExtensionViolation, SchemaRegistry
+from .signals import (
+    agentcard_children_changed,
+    extension_deletes_handled,
+    schedule_catalog_invalidation,
+)
+from .validation import get_validators
+
+# 整组替换时比较和更新的字段
+SYNC_FIELDS = ['description', 'required', 'params', 'order', 'schema']
+
+
+class ReplaceResult(NamedTuple):
+    extensions: list
+    created: int
+    updated: int
+    deleted: int
+    unchanged: int
+
+
+def load_schemas(uris) -> dict:
+    """一次查询加载 URI 对应的已注册 Schema：{uri: SchemaRegistry}"""
+    uris = set(uris)
+    if not uris:
+        return {}
+    return {schema.schema_uri: schema for schema in SchemaRegistry.objects.filter(schema_uri__in=uris)}
+
+
+def params_errors(items, schemas: dict) -> list:
+    """
+    按 URI 关联的 Schema 验证一组扩展的 params（编译的验证器，需要编译的 Schema 一次查询加载字段）
+
+    Args:
+        items: [{'uri': ..., 'params': ...}, ...]
+        schemas: load_schemas() 的结果
+
+    Returns:
+        与 items 一一对应的错误信息列表（有效时为空列表）
+    """
+    validators = get_validators(schemas[item['uri']] for item in items if item['uri'] in schemas)
+    results = []
+    for item in items:
+        schema = schemas.get(item['uri'])
+        errors = validators[schema.pk].errors(item.get('params') or {}) if schema is not None else []
+        results.append([str(error) for error in errors])
+    return results
+
+
+def build_extension(card, item: dict, schemas: dict, order: int) -> AgentExtension:
+    """由已验证的数据构建扩展实例（未保存）"""
+    schema = schemas.get(item['uri'])
+    description = item.get('description') or ''
+    if schema is not None and not description:
+        description = schema.description or f"{schema.schema_type} {schema.version}"
+    return AgentExtension(
+        agent_card=card,
+        uri=item['uri'],
+        description=description,
+        required=bool(item.get('required', False)),
+        params=item.get('params') or {},
+        order=item.get('order', order),
+        schema=schema,
+    )
+
+
+def save_extension(card, item: dict, schemas: dict, extension: AgentExtension = None) -> AgentExtension:
+    """
+    新建或修改单个扩展（通过 save()，派生数据由信号维护；item 已通过 params_errors() 验证）
+
+    新建且未指定 order 时排在最后。
+    """
+    if extension is None:
+        last = card.extensions.aggregate(last=Max('order'))['last']
+        extension = build_extension(card, item, schemas, 0 if last is None else last + 1)
+    else:
+        target = build_extension(card, item, schemas, extension.order)
+        for field in ['uri', *SYNC_FIELDS]:
+            attname = AgentExtension._meta.get_field(field).attname
+            setattr(extension, attname, getattr(target, attname))
+    extension.save()
+    return extension
+
+
+def sync_extensions(targets, schemas: dict) -> list:
+    """
+    把多张卡片的扩展同步为目标列表（调用方负责事务和卡片派生数据的刷新，items 已验证且 URI 不重复）
+
+    一次查询加载当前扩展，合计一次 DELETE、一次 bulk_create、一次 bulk_update，没有变化的扩展不写入。
+    列表顺序即 A2A capabilities.extensions 的顺序（未指定 order 时使用下标）。
+
+    Args:
+        targets: [(card, items), ...]，card 已保存
+        schemas: load_schemas() 的结果
+
+    Returns:
+        与 targets 一一对应的 ReplaceResult
+    """
+    current = {card.pk: {} for card, _ in targets}
+    for extension in AgentExtension.objects.filter(agent_card_id__in=current):
+        current[extension.agent_card_id][extension.uri] = extension
+
+    created, updated, removed = [], [], []
+    results = []
+    for card, items in targets:
+        existing = current[card.pk]
+        counts = {'created': 0, 'updated': 0, 'unchanged': 0}
+        extensions = []
+        for index, item in enumerate(items):
+            target = build_extension(card, item, schemas, index)
+            extension = existing.pop(item['uri'], None)
+            if extension is None:
+                created.append(target)
+                extensions.append(target)
+                counts['created'] += 1
+                continue
+            changed = False
+            for field in SYNC_FIELDS:
+                attname = AgentExtension._meta.get_field(field).attname
+                if getattr(extension, attname) != getattr(target, attname):
+                    setattr(extension, attname, getattr(target, attname))
+                    changed = True
+            if changed:
+                updated.append(extension)
+                counts['updated'] += 1
+            else:
+                counts['unchanged'] += 1
+            extensions.append(extension)
+        for extension in existing.values():
+            extension.agent_card = card
+            removed.append(extension)
+        results.append(ReplaceResult(extensions, deleted=len(existing), **counts))
+
+    if removed:
+        AgentCardChange.record_extensions_deleted(removed)
+        # 墓碑已统一记录，卡片由调用方统一刷新：扩展的 post_delete 信号跳过逐个处理
+        with extension_deletes_handled():
+            AgentExtension.objects.filter(pk__in=[extension.pk for extension in removed]).delete()
+    if created:
+        AgentExtension.objects.bulk_create(created)
+    if updated:
+        AgentExtension.objects.bulk_update(updated, SYNC_FIELDS)
+        # 新数据已通过验证，删除之前的违规记录
+        ExtensionViolation.objects.filter(extension__in=updated).delete()
+    if created or updated or removed:
+        schedule_catalog_invalidation()
+    return results
+
+
+def replace_extensions(card, items: list, schemas: dict) -> ReplaceResult:
+    """
+    用 items 替换卡片的全部扩展（调用方负责事务，items 已通过 params_errors() 验证且 URI 不重复）
+
+    有变化时卡片的派生数据（updated_at、快照、变更日志、发布文件、路由索引）只刷新一次。
+    """
+    result, = sync_extensions([(card, items)], schemas)
+    if result.created or result.updated or result.deleted:
+        agentcard_children_changed([card.pk])
+    return result
@@ -0,0 +1,612 @@
+"""
+AgentCard 批量导入（NDJSON）
+
+每行一个 AgentCard JSON（A2A 标准格式，可带 domainExtensions 和导出时的 _metadata），
+按批次处理，每批的数据库访问次数固定：
+
+1. Namespace：首次遇到的命名空间一次查询（跨批次缓存）
+2. SchemaRegistry：首次遇到的 Schema URI 一次查询（含字段定义，跨批次缓存）
+3. 已存在的 AgentCard：(namespace, name) 一次查询，同时得到已存在的版本和默认版本
+4. 写入：bulk_create AgentCard、bulk_create AgentExtension、bulk_update 快照、
+   bulk_create 技能 / 标签索引、bulk_create 变更日志、更新命名空间计数（同一事务）
+
+验证复用模型的 clean_fields() 和 AgentCard._clean_*()（见 card_errors()，报告每行的全部错误），
+需要查询的部分（默认版本唯一、Schema 验证、唯一性）改为使用批次共享的查询结果，
+因此不会逐个调用 save() / full_clean()。
+
+已存在的 namespace::name@version 跳过（不覆盖）。
+
+按自然键覆盖写入（幂等的整体同步）见 AgentCardUpserter（POST /api/agentcards/bulk-upsert/）。
+"""
+
+import hashlib
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.validators import URLValidator
+from django.db import IntegrityError, transaction
+
+from .extensions import build_extension, sync_extensions
+from .models import (
+    AgentCard,
+    AgentCardChange,
+    AgentExtension,
+    AgentSkill,
+    Namespace,
+    NamespaceStats,
+    SchemaRegistry,
+    violated_constraint,
+)
+from .rendering import refresh_snapshots
+from .signals import (
+    schedule_catalog_invalidation,
+    schedule_publish,
+    schedule_resolution_invalidation,
+    schedule_routing_refresh,
+)
+
+# clean_fields() 跳过的字段：外键在批次内统一解析，快照在写入后生成
+CLEAN_FIELDS_EXCLUDE = ['namespace', 'created_by', 'updated_by', *AgentCard.SNAPSHOT_FIELDS]
+
+
+def _error_messages(error: ValidationError) -> dict:
+    """ValidationError -> {字段: [消息]}"""
+    if hasattr(error, 'error_dict'):
+        return error.message_dict
+    return {'non_field_errors': error.messages}
+
+
+def extension_errors(extensions, schemas: dict, url_validator=None) -> list:
+    """
+    检查 capabilities.extensions（不查询数据库）
+
+    Args:
+        extensions: parse_agentcard_json() 解析出的扩展列表
+        schemas: {uri: SchemaRegistry}，URI 匹配的扩展按该 Schema 验证 params
+
+    Returns:
+        全部错误信息（为空表示有效）
+    """
+    url_validator = url_validator or URLValidator()
+    messages = []
+    seen_uris = set()
+    for order, ext in enumerate(extensions):
+        uri = ext['uri']
+        prefix = f'capabilities.extensions[{order}]'
+        if uri in seen_uris:
+            messages.append(f"{prefix}: 重复的扩展 URI '{uri}'")
+        seen_uris.add(uri)
+        try:
+            url_validator(uri)
+        except ValidationError:
+            messages.append(f"{prefix}: 无效的 URI '{uri}'")
+
+        params = ext.get('params') or {}
+        if not isinstance(params, dict):
+            messages.append(f'{prefix}.params 必须是一个对象')
+            continue
+
+        schema = schemas.get(uri)
+        if schema is not None:
+            is_valid, error_msg = schema.validate_extension_data(params)
+            if not is_valid:
+                messages.append(f"{prefix}.params 不符合 Schema '{uri}' 的定义:\n{error_msg}")
+    return messages
+
+
+def card_errors(card, extensions, schemas: dict, active_schemas: dict, url_validator=None) -> dict:
+    """
+    AgentCard 中不查询数据库的全部验证规则（收集全部错误，不在第一个错误处停止）
+
+    字段格式（clean_fields）、URL 协议、domainExtensions、A2A 字段格式、capabilities.extensions。
+
+    Args:
+        schemas: {uri: SchemaRegistry}，用于 capabilities.extensions
+        active_schemas: {uri: 启用的 SchemaRegistry}，用于 domainExtensions
+
+    Returns:
+        {字段: [错误信息]}，为空表示有效
+    """
+    errors = {}
+    checks = [
+        lambda: card.clean_fields(exclude=CLEAN_FIELDS_EXCLUDE),
+        card._clean_url_scheme,
+        lambda: card._clean_domain_extensions(schemas=active_schemas),
+        card._clean_a2a_fields,
+    ]
+    for check in checks:
+        try:
+            check()
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+    messages = extension_errors(extensions, schemas, url_validator)
+    if messages:
+        errors.setdefault('capabilities', []).extend(messages)
+    return ValidationError(errors).message_dict if errors else {}
+
+
+class AgentCardImporter:
+    """
+    NDJSON 批量导入器
+
+    用法：
+        importer = AgentCardImporter(namespace_id='dev', created_by=user, dry_run=True)
+        result = importer.import_lines(open('cards.ndjson', 'rb'))
+        # result = {'stats': {...}, 'errors': [{'line': 3, 'key': ..., 'errors': {...}}]}
+    """
+
+    def __init__(self, namespace_id: str = None, created_by=None, dry_run: bool = False,
+                 batch_size: int = 500, progress=None):
+        """
+        Args:
+            namespace_id: 目标命名空间（为空时使用每行 _metadata.namespace）
+            created_by: 创建者（同时作为更新者）
+            dry_run: 只验证，不写入数据库
+            batch_size: 每批（每个事务）处理的行数
+            progress: 每批完成后的回调 progress(stats)
+        """
+        self.namespace_id = namespace_id
+        self.created_by = created_by
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.progress = progress
+
+        self.stats = {'total': 0, 'created': 0, 'skipped': 0, 'invalid': 0, 'extensions': 0}
+        self.errors = []
+
+        # 跨批次缓存
+        self._namespaces = {}
+        self._schemas = {}
+        self._active_schemas = {}
+        self._url_validator = URLValidator()
+        # 本次导入已接受的键（dry-run 不写库，后续批次需要据此判断重复和默认版本冲突）
+        self._accepted_keys = set()
+        self._accepted_defaults = set()
+
+    # ========================================
+    # 入口
+    # ========================================
+
+    def import_lines(self, lines) -> dict:
+        """
+        导入 NDJSON 行（可迭代的 str 或 bytes，空行忽略）
+
+        Returns:
+            {'stats': 统计, 'errors': 逐行错误列表}
+        """
+        batch = []
+        for line_no, line in enumerate(lines, start=1):
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            if not line.strip():
+                continue
+            batch.append((line_no, line))
+            if len(batch) >= self.batch_size:
+                self._import_batch(batch)
+                batch = []
+        if batch:
+            self._import_batch(batch)
+        return {'stats': self.stats, 'errors': self.errors}
+
+    def _import_batch(self, batch):
+        items = [self._parse(line_no, line) for line_no, line in batch]
+        self.stats['total'] += len(items)
+
+        valid = [item for item in items if 'errors' not in item]
+        self._load_namespaces(valid)
+        self._load_schemas(valid)
+        for item in valid:
+            self._build(item)
+
+        valid = [item for item in valid if 'errors' not in item]
+        self._check_existing(valid)
+
+        accepted = [item for item in valid if 'errors' not in item and not item.get('skipped')]
+        if accepted and not self.dry_run:
+            self._write(accepted)
+
+        for item in items:
+            if 'errors' in item:
+                self.stats['invalid'] += 1
+                self.errors.append({
+                    'line': item['line'],
+                    'key': item.get('key'),
+                    'errors': item['errors'],
+                })
+            elif item.get('skipped'):
+                self.stats['skipped'] += 1
+        self.stats['created'] += len(accepted)
+        self.stats['extensions'] += sum(len(item['extensions']) for item in accepted)
+
+        if self.progress:
+            self.progress(dict(self.stats))
+
+    # ========================================
+    # 解析与验证
+    # ========================================
+
+    def _parse(self, line_no: int, line: str) -> dict:
+        """解析一行 JSON（不查询数据库）"""
+        item = {'line': line_no}
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            item['errors'] = {'non_field_errors': [f'无效的 JSON：{e}']}
+            return item
+        self._parse_data(item, data)
+        return item
+
+    def _parse_data(self, item: dict, data):
+        """解析一个 AgentCard JSON 对象到 item（fields、extensions、命名空间和元数据；失败时写入 errors）"""
+        try:
+            item['fields'], item['extensions'] = AgentCard.parse_agentcard_json(data)
+        except ValidationError as e:
+            item['errors'] = _error_messages(e)
+            return
+
+        metadata = data.get('_metadata') if isinstance(data.get('_metadata'), dict) else {}
+        item['namespace_id'] = self.namespace_id or metadata.get('namespace')
+        item['is_default_version'] = bool(metadata.get('isDefaultVersion', False))
+        item['is_active'] = bool(metadata.get('isActive', True))
+        item['key'] = f"{item['namespace_id']}::{data.get('name')}@{data.get('version')}"
+        if not item['namespace_id']:
+            item['errors'] = {'namespace': ['未指定命名空间（请指定目标命名空间，或在 _metadata.namespace 中提供）']}
+
+    def _load_namespaces(self, items):
+        """一次查询加载本批新出现的命名空间"""
+        missing = {item['namespace_id'] for item in items} - self._namespaces.keys()
+        if missing:
+            found = Namespace.objects.in_bulk(list(missing))
+            for namespace_id in missing:
+                self._namespaces[namespace_id] = found.get(namespace_id)
+
+    def _load_schemas(self, items):
+        """一次查询加载本批新出现的 Schema（含字段定义）"""
+        uris = set()
+        for item in items:
+            uris.update(item['fields'].get('domain_extensions') or {})
+            uris.update(ext['uri'] for ext in item['extensions'])
+        missing = uris - self._schemas.keys()
+        if missing:
+            found = {
+                schema.schema_uri: schema
+                for schema in SchemaRegistry.objects.filter(
+                    schema_uri__in=missing
+                ).prefetch_related('fields')
+            }
+            for uri in missing:
+                self._schemas[uri] = found.get(uri)
+            self._active_schemas = {
+                uri: schema for uri, schema in self._schemas.items()
+                if schema is not None and schema.is_active
+            }
+
+    def _build(self, item):
+        """构建未保存的 AgentCard / AgentExtension 实例并验证（使用批次共享的查询结果）"""
+        namespace = self._namespaces.get(item['namespace_id'])
+        if namespace is None:
+            item['errors'] = {'namespace': [f"命名空间 '{item['namespace_id']}' 不存在"]}
+            return
+
+        card = AgentCard(
+            namespace=namespace,
+            is_default_version=item['is_default_version'],
+            is_active=item['is_active'],
+            created_by=self.created_by,
+            updated_by=self.created_by,
+            **item['fields']
+        )
+        card.set_version_components()
+        errors = card_errors(
+            card, item['extensions'], self._schemas, self._active_schemas, self._url_validator
+        )
+        if errors:
+            item['errors'] = errors
+            return
+        item['extensions'] = self._build_extensions(card, item['extensions'])
+        item['card'] = card
+
+    def _build_extensions(self, card, extensions) -> list:
+        """构建扩展实例（已通过 card_errors() 验证）：URI 匹配已注册的 Schema 时关联"""
+        return [build_extension(card, ext, self._schemas, order) for order, ext in enumerate(extensions)]
+
+    def _check_existing(self, items):
+        """
+        唯一性与默认版本检查：一次查询取回本批涉及的 namespace::name 的全部版本
+        """
+        if not items:
+            return
+        existing_keys = set()
+        existing_defaults = {}
+        rows = AgentCard.objects.filter(
+            namespace_id__in={item['namespace_id'] for item in items},
+            name__in={item['card'].name for item in items},
+        ).values_list('namespace_id', 'name', 'version', 'is_default_version')
+        for namespace_id, name, version, is_default in rows:
+            existing_keys.add((namespace_id, name, version))
+            if is_default:
+                existing_defaults[(namespace_id, name)] = version
+
+        for item in items:
+            card = item['card']
+            key = (card.namespace_id, card.name, card.version)
+            if key in existing_keys:
+                item['skipped'] = True
+                continue
+            if key in self._accepted_keys:
+                item['errors'] = {'version': [f"与前面的行重复：{item['key']}"]}
+                continue
+            if card.is_default_version:
+                name_key = (card.namespace_id, card.name)
+                if name_key in existing_defaults or name_key in self._accepted_defaults:
+                    current = existing_defaults.get(name_key, '（本次导入的其他行）')
+                    item['errors'] = {'is_default_version': [
+                        f"Agent '{card.name}' 在命名空间 '{card.namespace_id}' "
+                        f"已存在默认版本 '{current}'。请先取消原默认版本。"
+                    ]}
+                    continue
+                self._accepted_defaults.add(name_key)
+            self._accepted_keys.add(key)
+
+    # ========================================
+    # 写入
+    # ========================================
+
+    def _write(self, items):
+        """单个事务内批量写入卡片、扩展和快照"""
+        cards = [item['card'] for item in items]
+        with transaction.atomic():
+            AgentCard.objects.bulk_create(cards)
+            extensions = []
+            for item in items:
+                for ext in item['extensions']:
+                    ext.agent_card = item['card']
+                    extensions.append(ext)
+            AgentExtension.objects.bulk_create(extensions)
+            if extensions:
+                schedule_catalog_invalidation()
+            refresh_snapshots(cards)
+            AgentSkill.sync_cards(cards)
+            AgentCardChange.record_cards(cards)
+            NamespaceStats.apply(NamespaceStats.merge(*(
+                NamespaceStats.card_deltas(card.namespace_id, card.is_active, card.is_default_version)
+                for card in cards
+            )))
+            schedule_publish(
+                (card.namespace_id, card.name) for card in cards if card.is_default_version
+            )
+            schedule_resolution_invalidation((card.namespace_id, card.name) for card in cards)
+            schedule_routing_refresh()
+
+
+# ========================================
+# 批量 upsert
+# ========================================
+
+# bulk-upsert 用提交的内容覆盖的卡片字段（自然键、外键、审计字段和派生字段除外）
+UPSERT_FIELDS = [
+    field.name for field in AgentCard._meta.concrete_fields
+    if field.editable and not field.primary_key and not field.is_relation
+    and field.name not in ('name', 'version')
+]
+
+# 已存在的 namespace::name@version 冲突时更新的列（created_by / created_at 保留；
+# 版本号不变，语义化版本分量无需更新；快照在写入后统一刷新）
+UPSERT_UPDATE_FIELDS = [*UPSERT_FIELDS, 'updated_by', 'updated_at', 'content_digest']
+
+
+def content_digest(card, extensions) -> str:
+    """
+    bulk-upsert 写入内容的摘要（SHA-256）：UPSERT_FIELDS 和扩展（含关联的 Schema）
+
+    与卡片上保存的 content_digest 相同时该卡片不需要写入。
+    """
+    content = {
+        'card': {field: getattr(card, field) for field in UPSERT_FIELDS},
+        'extensions': [
+            [ext.uri, ext.description, ext.required, ext.params, ext.order, ext.schema_id]
+            for ext in extensions
+        ],
+    }
+    encoded = json.dumps(content, sort_keys=True, ensure_ascii=False, cls=DjangoJSONEncoder)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class AgentCardUpserter(AgentCardImporter):
+    """
+    按自然键 (namespace, name, version) 批量 upsert（幂等：重复提交相同内容不写入）
+
+    用法：
+        upserter = AgentCardUpserter(namespace_id='dev', created_by=user)
+        result = upserter.upsert(payloads)
+        # result = {'stats': {...}, 'results': [{'index': 0, 'key': ..., 'status': 'created', 'errors': {}}]}
+
+    解析和验证规则与导入相同，区别：
+    - 已存在的版本用提交的内容覆盖，扩展整组替换（见 extensions.sync_extensions）
+    - 内容摘要与卡片上保存的 content_digest 相同时跳过（unchanged），不写入也不刷新派生数据
+    - 需要写入的卡片每 batch_size 个一个事务，卡片用 INSERT ... ON CONFLICT DO UPDATE 写入
+    """
+
+    STATUS_CREATED = 'created'
+    STATUS_UPDATED = 'updated'
+    STATUS_UNCHANGED = 'unchanged'
+    STATUS_INVALID = 'invalid'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = {'total': 0, 'created': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+
+    def upsert(self, payloads) -> dict:
+        """
+        Args:
+            payloads: AgentCard JSON 对象列表（可带 _metadata）；解析失败的项可以预先放入 ValidationError
+
+        Returns:
+            {'stats': 统计, 'results': 每个载荷一项，按输入顺序}
+        """
+        items = []
+        for index, data in enumerate(payloads):
+            item = {'index': index}
+            if isinstance(data, ValidationError):
+                item['errors'] = _error_messages(data)
+            else:
+                self._parse_data(item, data)
+            items.append(item)
+
+        valid = [item for item in items if 'errors' not in item]
+        self._load_namespaces(valid)
+        self._load_schemas(valid)
+        for item in valid:
+            # 解析出的扩展数据，写入时与卡片的当前扩展比较
+            item['extension_items'] = item['extensions']
+            self._build(item)
+        self._plan([item for item in valid if 'errors' not in item])
+
+        pending = [
+            item for item in items
+            if 'errors' not in item and item['status'] != self.STATUS_UNCHANGED
+        ]
+        if pending and not self.dry_run:
+            # 不是默认版本的卡片先写入：同一 namespace::name 切换默认版本时，取消原默认版本在设置新默认版本之前
+            pending.sort(key=lambda item: item['card'].is_default_version)
+            for start in range(0, len(pending), self.batch_size):
+                self._write_chunk(pending[start:start + self.batch_size])
+
+        results = []
+        for item in items:
+            if 'errors' in item:
+                item['status'] = self.STATUS_INVALID
+            self.stats[item['status']] += 1
+            results.append({
+                'index': item['index'],
+                'key': item.get('key'),
+                'status': item['status'],
+                'errors': item.get('errors', {}),
+            })
+        self.stats['total'] = len(items)
+        return {'stats': self.stats, 'results': results}
+
+    def _plan(self, items):
+        """
+        与已存在的版本比较（一次查询取回涉及的 namespace::name 的全部版本）：
+        确定每项新建、更新还是未变化，并检查写入后每个 namespace::name 是否最多一个默认版本
+        """
+        if not items:
+            return
+        existing = {}
+        defaults = {}
+        rows = AgentCard.objects.filter(
+            namespace_id__in={item['namespace_id'] for item in items},
+            name__in={item['card'].name for item in items},
+        ).values_list('namespace_id', 'name', 'version', 'is_default_version', 'content_digest')
+        for namespace_id, name, version, is_default, digest in rows:
+            existing[(namespace_id, name, version)] = digest
+            if is_default:
+                defaults[(namespace_id, name)] = version
+
+        submitted = {}
+        for item in items:
+            card = item['card']
+            versions = submitted.setdefault((card.namespace_id, card.name), {})
+            if card.version in versions:
+                item['errors'] = {'version': [f"与前面的载荷重复：{item['key']}"]}
+                continue
+            versions[card.version] = item
+            item['digest'] = content_digest(card, item['extensions'])
+            key = (card.namespace_id, card.name, card.version)
+            if key not in existing:
+                item['status'] = self.STATUS_CREATED
+            elif existing[key] == item['digest']:
+                item['status'] = self.STATUS_UNCHANGED
+            else:
+                item['status'] = self.STATUS_UPDATED
+
+        # 未提交的版本保持原状态：原默认版本未被取消时，不能再设置其他默认版本
+        for (namespace_id, name), versions in submitted.items():
+            current = defaults.get((namespace_id, name))
+            keeps_current = current is not None and (
+                current not in versions or versions[current]['card'].is_default_version
+            )
+            promoted = [
+                item for version, item in versions.items()
+                if item['card'].is_default_version and version != current
+            ]
+            if len(promoted) + keeps_current <= 1:
+                continue
+            if keeps_current:
+                message = (
+                    f"Agent '{name}' 在命名空间 '{namespace_id}' 已存在默认版本 '{current}'。"
+                    f"请在同一请求中取消原默认版本，或使用 make-default 切换默认版本。"
+                )
+            else:
+                message = f"Agent '{name}' 在命名空间 '{namespace_id}' 的多个版本同时被设为默认版本。"
+            for item in promoted:
+                item['errors'] = {'is_default_version': [message]}
+
+    def _write_chunk(self, items):
+        """
+        单个事务内写入一块卡片
+
+        卡片：INSERT ... ON CONFLICT (namespace, name, version) DO UPDATE，本块同时包含两种默认版本标志时
+        分为两条（不是默认版本的在前）；随后同步扩展、刷新快照，重建技能索引，记录变更并更新命名空间计数。
+        与并发写入的默认版本冲突时本块不写入，各项报告错误。
+        """
+        cards = [item['card'] for item in items]
+        for item in items:
+            item['card'].content_digest = item['digest']
+        try:
+            with transaction.atomic():
+                # 锁定将被覆盖的行并读取原状态（命名空间计数的增量）
+                keys = {(card.namespace_id, card.name, card.version) for card in cards}
+                previous = {}
+                rows = AgentCard.objects.select_for_update().filter(
+                    namespace_id__in={key[0] for key in keys},
+                    name__in={key[1] for key in keys},
+                    version__in={key[2] for key in keys},
+                ).order_by('pk').values_list('namespace_id', 'name', 'version', 'is_active', 'is_default_version')
+                for namespace_id, name, version, is_active, is_default in rows:
+                    if (namespace_id, name, version) in keys:
+                        previous[(namespace_id, name, version)] = (is_active, is_default)
+
+                for is_default in (False, True):
+                    group = [card for card in cards if card.is_default_version == is_default]
+                    if group:
+                        AgentCard.objects.bulk_create(
+                            group,
+                            update_conflicts=True,
+                            unique_fields=['namespace', 'name', 'version'],
+                            update_fields=UPSERT_UPDATE_FIELDS,
+                        )
+
+                sync_extensions([(item['card'], item['extension_items']) for item in items], self._schemas)
+                refresh_snapshots(cards)
+                AgentSkill.sync_cards(cards)
+                AgentCardChange.record_cards(cards)
+
+                deltas = []
+                for card in cards:
+                    deltas.append(NamespaceStats.card_deltas(
+                        card.namespace_id, card.is_active, card.is_default_version
+                    ))
+                    state = previous.get((card.namespace_id, card.name, card.version))
+                    if state is not None:
+                        deltas.append(NamespaceStats.card_deltas(card.namespace_id, *state, sign=-1))
+                NamespaceStats.apply(NamespaceStats.merge(*deltas))
+
+                names = {(card.namespace_id, card.name) for card in cards}
+                schedule_publish(names)
+                schedule_resolution_invalidation(names)
+                schedule_routing_refresh()
+        except IntegrityError as e:
+            if violated_constraint(e) != AgentCard.DEFAULT_VERSION_CONSTRAINT:
+                raise
+            for item in items:
+                item['errors'] = {'is_default_version': ['与并发写入的默认版本冲突，本块未写入，请重试']}
+            return
+
+        # 以加锁后的状态为准（检查之后被其他请求创建或删除的版本）
+        for item in items:
+            card = item['card']
+            exists = (card.namespace_id, card.name, card.version) in previous
+            item['status'] = self.STATUS_UPDATED if exists else self.STATUS_CREATED
@@ -0,0 +1,74 @@
+"""
+从 NDJSON 文件批量导入 AgentCard
+
+使用方法：
+    python manage.py import_agentcards cards.ndjson --namespace dev
+    python manage.py import_agentcards cards.ndjson.gz            # 使用每行 _metadata.namespace
+    python manage.py import_agentcards - --namespace dev < cards.ndjson
+    python manage.py import_agentcards cards.ndjson --namespace dev --dry-run
+"""
+
+import gzip
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.importing import AgentCardImporter
+
+
+class Command(BaseCommand):
+    help = '从 NDJSON（每行一个 AgentCard JSON，可为 export 端点的输出）批量导入 AgentCard'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="NDJSON 文件路径（.gz 自动解压，'-' 表示标准输入）")
+        parser.add_argument('--namespace', help='目标命名空间（默认使用每行 _metadata.namespace）')
+        parser.add_argument('--dry-run', action='store_true', help='只验证，不写入数据库')
+        parser.add_argument('--batch-size', type=int, default=500, help='每批（每个事务）的行数，默认 500')
+        parser.add_argument('--user', help='记录为创建者的用户名')
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['user']:
+            try:
+                created_by = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"用户 '{options['user']}' 不存在")
+
+        importer = AgentCardImporter(
+            namespace_id=options['namespace'],
+            created_by=created_by,
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+            progress=self._report_progress,
+        )
+
+        path = options['path']
+        if path == '-':
+            result = importer.import_lines(sys.stdin.buffer)
+        else:
+            opener = gzip.open if path.endswith('.gz') else open
+            try:
+                with opener(path, 'rb') as f:
+                    result = importer.import_lines(f)
+            except FileNotFoundError:
+                raise CommandError(f"文件不存在：{path}")
+
+        for error in result['errors']:
+            messages = '; '.join(
+                f"{field}: {' '.join(msgs)}" for field, msgs in error['errors'].items()
+            )
+            self.stderr.write(f"第 {error['line']} 行 {error['key'] or ''}：{messages}")
+
+        stats = result['stats']
+        prefix = '[dry-run] 将创建' if options['dry_run'] else '已创建'
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {stats['created']} 个 AgentCard（{stats['extensions']} 个扩展），"
+            f"跳过已存在 {stats['skipped']} 个，无效 {stats['invalid']} 行，共 {stats['total']} 行"
+        ))
+
+    def _report_progress(self, stats):
+        self.stdout.write(
+            f"  已处理 {stats['total']} 行：创建 {stats['created']}，"
+            f"跳过 {stats['skipped']}，无效 {stats['invalid']}"
+        )
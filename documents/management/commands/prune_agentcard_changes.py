@@ -0,0 +1,31 @@
+"""
+清理过期的 AgentCard 变更日志
+
+使用方法：
+    python manage.py prune_agentcard_changes            # 保留最近 30 天
+    python manage.py prune_agentcard_changes --days 90
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from documents.models import AgentCardChange
+
+
+class Command(BaseCommand):
+    help = '删除超过保留期的 AgentCard 变更日志（镜像方需在保留期内拉取，否则需要全量同步）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help='保留天数，默认 30')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days 必须大于 0')
+
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = AgentCardChange.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"已删除 {deleted} 条 {cutoff:%Y-%m-%d %H:%M} 之前的变更记录"
+        ))
@@ -0,0 +1,29 @@
+"""
+全量同步静态发布的 agent.json
+
+使用方法：
+    python manage.py publish_agentcards
+    python manage.py publish_agentcards --namespace prod
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from documents.publishing import publish_all, publish_root
+
+
+class Command(BaseCommand):
+    help = '将所有默认版本的 AgentCard 发布为静态 .well-known/agent.json（并清理不再发布的文件）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', help='只处理指定命名空间')
+
+    def handle(self, *args, **options):
+        root = publish_root()
+        if root is None:
+            raise CommandError('未配置 AGENTCARD_PUBLISH_ROOT，静态发布未启用')
+
+        stats = publish_all(options['namespace'])
+        self.stdout.write(self.style.SUCCESS(
+            f"发布目录 {root}：写入 {stats['written']}，未变化 {stats['unchanged']}，"
+            f"撤下 {stats['removed']}，跳过 {stats['skipped']}（名称不能作为路径）"
+        ))
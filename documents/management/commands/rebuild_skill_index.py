@@ -0,0 +1,39 @@
+"""
+重建 AgentCard 的技能 / 标签索引（AgentSkill / AgentSkillTag）
+
+保存 AgentCard 和批量导入时会自动同步；绕过模型直接修改 skills
+（如 QuerySet.update() 或手工 SQL）后使用此命令重建。
+
+使用方法：
+    python manage.py rebuild_skill_index
+    python manage.py rebuild_skill_index --namespace dev
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from documents.models import AgentCard, AgentSkill
+
+
+class Command(BaseCommand):
+    help = '根据 AgentCard.skills 重建技能 / 标签索引（/api/skills/ 与 skill_id、tag 过滤使用）'
+
+    chunk_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', help='只处理指定命名空间')
+
+    def handle(self, *args, **options):
+        queryset = AgentCard.objects.order_by('pk')
+        if options['namespace']:
+            queryset = queryset.filter(namespace__id=options['namespace'])
+
+        card_ids = list(queryset.values_list('pk', flat=True))
+        for start in range(0, len(card_ids), self.chunk_size):
+            chunk = list(AgentCard.objects.filter(
+                pk__in=card_ids[start:start + self.chunk_size]
+            ).only('id', 'skills'))
+            with transaction.atomic():
+                AgentSkill.sync_cards(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f'已重建 {len(card_ids)} 个 AgentCard 的技能索引'))
@@ -0,0 +1,28 @@
+"""
+校正命名空间计数（NamespaceStats）
+
+AgentCard / AgentCase 通过模型和批量导入写入时计数会自动维护；绕过模型直接修改
+（如 QuerySet.update()、手工 SQL、数据库恢复）后使用此命令重新统计。
+
+使用方法：
+    python manage.py reconcile_namespace_stats
+    python manage.py reconcile_namespace_stats --namespace dev
+"""
+
+from django.core.management.base import BaseCommand
+
+from documents.models import NamespaceStats
+
+
+class Command(BaseCommand):
+    help = '重新统计命名空间的 AgentCard / Case 数量并校正 NamespaceStats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', action='append', help='只处理指定命名空间（可重复）')
+
+    def handle(self, *args, **options):
+        changed = NamespaceStats.reconcile(options['namespace'])
+        if changed:
+            self.stdout.write(self.style.WARNING(f"已校正 {len(changed)} 个命名空间：{', '.join(changed)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('命名空间计数一致，无需校正'))
@@ -0,0 +1,46 @@
+"""
+重新生成所有 AgentCard 的 A2A 快照
+
+使用方法：
+    python manage.py refresh_agentcard_snapshots
+    python manage.py refresh_agentcard_snapshots --namespace dev
+    python manage.py refresh_agentcard_snapshots --missing-only
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from documents.models import AgentCard
+from documents.rendering import refresh_snapshots
+
+
+class Command(BaseCommand):
+    help = '重新生成 AgentCard 的物化 A2A 快照（standard-json 端点直接返回的数据）'
+
+    chunk_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument('--namespace', help='只处理指定命名空间')
+        parser.add_argument(
+            '--missing-only',
+            action='store_true',
+            help='只处理尚未生成快照的 AgentCard',
+        )
+
+    def handle(self, *args, **options):
+        queryset = AgentCard.objects.order_by('pk')
+        if options['namespace']:
+            queryset = queryset.filter(namespace__id=options['namespace'])
+        if options['missing_only']:
+            queryset = queryset.filter(Q(a2a_snapshot_bytes__isnull=True) & Q(a2a_snapshot_error=''))
+
+        card_ids = list(queryset.values_list('pk', flat=True))
+        invalid = 0
+        for start in range(0, len(card_ids), self.chunk_size):
+            chunk = list(AgentCard.objects.filter(pk__in=card_ids[start:start + self.chunk_size]))
+            refresh_snapshots(chunk)
+            invalid += sum(1 for card in chunk if card.a2a_snapshot_error)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已刷新 {len(card_ids)} 个 AgentCard 快照（其中 {invalid} 个数据不完整，standard-json 将返回 400）'
+        ))
@@ -0,0 +1,50 @@
+"""
+用 Schema 的当前定义重新验证已有扩展，更新违规记录（ExtensionViolation）
+
+Schema / 字段通过模型修改时会自动在后台重新验证（见 documents/revalidation.py）；
+升级后首次使用、绕过模型修改 Schema，或进程在后台任务完成前退出时使用此命令补跑。
+
+使用方法：
+    python manage.py revalidate_extensions
+    python manage.py revalidate_extensions --schema https://my-org.com/schemas/physicalAsset/v1
+    python manage.py revalidate_extensions --stale
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, Q
+
+from documents.models import SchemaRegistry
+from documents.revalidation import revalidate_schema
+
+
+class Command(BaseCommand):
+    help = '用 Schema 的当前定义重新验证引用它的扩展，并更新违规记录'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--schema', action='append', help='只处理指定 Schema（URI 或 ID，可重复）')
+        parser.add_argument('--stale', action='store_true', help='只处理修改后尚未完成重新验证的 Schema')
+        parser.add_argument('--chunk-size', type=int, help='每批读取的扩展数')
+
+    def handle(self, *args, **options):
+        schemas = SchemaRegistry.objects.order_by('pk')
+        if options['schema']:
+            ids = [value for value in options['schema'] if value.isdigit()]
+            schemas = schemas.filter(Q(schema_uri__in=options['schema']) | Q(pk__in=ids))
+            if not schemas.exists():
+                raise CommandError(f"Schema 不存在：{', '.join(options['schema'])}")
+        if options['stale']:
+            schemas = schemas.filter(Q(revalidated_at__isnull=True) | ~Q(revalidated_at=F('updated_at')))
+
+        total_invalid = 0
+        for schema_id, label in schemas.values_list('pk', 'schema_uri'):
+            result = revalidate_schema(schema_id, options['chunk_size'])
+            if result is None:
+                continue
+            total_invalid += result.invalid
+            style = self.style.WARNING if result.invalid else self.style.SUCCESS
+            self.stdout.write(style(f"{label}：检查 {result.checked} 个扩展，{result.invalid} 个无效"))
+
+        if total_invalid:
+            self.stdout.write(self.style.WARNING(f"共 {total_invalid} 个扩展不符合 Schema 定义"))
+        else:
+            self.stdout.write(self.style.SUCCESS('所有扩展均符合 Schema 定义'))
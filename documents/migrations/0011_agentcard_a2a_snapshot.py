@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-16 23:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0010_alter_agentcase_outcome_data_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentcard',
+            name='a2a_snapshot',
+            field=models.JSONField(blank=True, editable=False, help_text='写入时生成的标准 AgentCard JSON（validate=True，不含元数据）；数据不完整时为空', null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='a2a_snapshot_bytes',
+            field=models.BinaryField(blank=True, help_text='a2a_snapshot 的预编码 UTF-8 JSON 字节（standard-json 端点直接返回）', null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='a2a_snapshot_error',
+            field=models.TextField(blank=True, default='', editable=False, help_text='生成快照时的 A2A 协议验证错误（为空表示快照有效或尚未生成）'),
+        ),
+    ]
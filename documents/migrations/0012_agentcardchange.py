@@ -0,0 +1,37 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:00
+
+from django.db import migrations, models
+
+import documents.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0011_agentcard_a2a_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentCardChange',
+            fields=[
+                ('id', models.BigAutoField(help_text='变更序号（seq）', primary_key=True, serialize=False)),
+                ('txid', models.BigIntegerField(db_default=documents.models.TxidCurrent(), editable=False, help_text='写入事务 ID（PostgreSQL txid_current()）', null=True)),
+                ('op', models.CharField(choices=[('upsert', '创建/更新'), ('delete', '删除')], max_length=16)),
+                ('object_type', models.CharField(choices=[('agentcard', 'AgentCard'), ('extension', 'AgentExtension')], max_length=16)),
+                ('agent_card_id', models.BigIntegerField(help_text='AgentCard ID')),
+                ('namespace_id', models.CharField(max_length=128)),
+                ('name', models.CharField(max_length=64)),
+                ('version', models.CharField(max_length=32)),
+                ('extension_uri', models.CharField(blank=True, help_text='扩展 URI（object_type=extension 时）', max_length=512)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'AgentCard 变更',
+                'verbose_name_plural': 'AgentCard 变更',
+                'db_table': 'agent_card_changes',
+                'ordering': ['txid', 'id'],
+                'indexes': [models.Index(fields=['txid', 'id'], name='agent_card__txid_a01b88_idx'), models.Index(fields=['namespace_id', 'txid', 'id'], name='agent_card__namespa_0eac49_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0012_agentcardchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agentcase',
+            index=models.Index(fields=['created_at', 'id'], name='agent_cases_created_b35a36_idx'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:05
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+# 全文检索向量由 BEFORE INSERT/UPDATE 触发器维护，所有写入路径（save、bulk_create、
+# 原始 SQL）都会更新，应用层不需要额外处理。使用 'simple' 配置：不做词干提取和停用词过滤，
+# 中英文混合内容按原词匹配。
+# 权重：A 名称 / B 技能名称、标签 / C 描述、技能描述 / D 技能示例
+AGENT_CARDS_SEARCH_SQL = """
+CREATE OR REPLACE FUNCTION agent_cards_search_vector_update() RETURNS trigger AS $$
+DECLARE
+    skills jsonb := COALESCE(NEW.skills, '[]'::jsonb);
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', COALESCE(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('simple', jsonb_path_query_array(skills, '$[*].name')), 'B') ||
+        setweight(to_tsvector('simple', jsonb_path_query_array(skills, '$[*].tags[*]')), 'B') ||
+        setweight(to_tsvector('simple', COALESCE(NEW.description, '')), 'C') ||
+        setweight(to_tsvector('simple', jsonb_path_query_array(skills, '$[*].description')), 'C') ||
+        setweight(to_tsvector('simple', jsonb_path_query_array(skills, '$[*].examples[*]')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER agent_cards_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description, skills ON agent_cards
+    FOR EACH ROW EXECUTE FUNCTION agent_cards_search_vector_update();
+
+-- 回填已有数据（触发器在 UPDATE OF name 时重新计算）
+UPDATE agent_cards SET name = name;
+"""
+
+AGENT_CASES_SEARCH_SQL = """
+CREATE OR REPLACE FUNCTION agent_cases_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('simple', COALESCE(NEW.case_name, '')), 'A') ||
+        setweight(to_tsvector('simple', COALESCE(NEW.query_key, '')), 'A') ||
+        setweight(to_tsvector('simple', COALESCE(NEW.query_description, '')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER agent_cases_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF case_name, query_key, query_description ON agent_cases
+    FOR EACH ROW EXECUTE FUNCTION agent_cases_search_vector_update();
+
+UPDATE agent_cases SET query_key = query_key;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0013_agentcase_created_at_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentcard',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='由数据库触发器维护：name、description、skills 的 name/tags/description/examples', null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcase',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='由数据库触发器维护：case_name、query_key、query_description', null=True),
+        ),
+        migrations.RunSQL(
+            sql=AGENT_CARDS_SEARCH_SQL,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS agent_cards_search_vector_trigger ON agent_cards;
+                DROP FUNCTION IF EXISTS agent_cards_search_vector_update();
+            """,
+        ),
+        migrations.RunSQL(
+            sql=AGENT_CASES_SEARCH_SQL,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS agent_cases_search_vector_trigger ON agent_cases;
+                DROP FUNCTION IF EXISTS agent_cases_search_vector_update();
+            """,
+        ),
+        # 回填之后再建索引
+        migrations.AddIndex(
+            model_name='agentcard',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='agent_cards_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='agentcase',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='agent_cases_search_gin'),
+        ),
+    ]
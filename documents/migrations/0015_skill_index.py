@@ -0,0 +1,89 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# 从 agent_cards.skills 回填（规则与 AgentSkill.project 一致）
+BACKFILL_SQL = """
+INSERT INTO agent_skills (agent_card_id, skill_id, name)
+SELECT DISTINCT ON (c.id, s.value->>'id')
+       c.id,
+       s.value->>'id',
+       CASE WHEN jsonb_typeof(s.value->'name') = 'string' THEN s.value->>'name' ELSE '' END
+FROM agent_cards c
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(c.skills) = 'array' THEN c.skills ELSE '[]'::jsonb END
+) WITH ORDINALITY AS s(value, position)
+WHERE jsonb_typeof(s.value) = 'object'
+  AND jsonb_typeof(s.value->'id') = 'string'
+  AND s.value->>'id' <> ''
+ORDER BY c.id, s.value->>'id', s.position;
+
+INSERT INTO agent_skill_tags (agent_card_id, skill_id, tag)
+SELECT DISTINCT sk.agent_card_id, sk.skill_id, t.value #>> '{}'
+FROM agent_skills sk
+JOIN agent_cards c ON c.id = sk.agent_card_id
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(c.skills) = 'array' THEN c.skills ELSE '[]'::jsonb END
+) WITH ORDINALITY AS s(value, position)
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(s.value->'tags') = 'array' THEN s.value->'tags' ELSE '[]'::jsonb END
+) AS t(value)
+WHERE jsonb_typeof(s.value) = 'object'
+  AND s.value->>'id' = sk.skill_id
+  AND jsonb_typeof(t.value) = 'string'
+  -- 重复的技能 id 只取第一个（与 agent_skills 一致）
+  AND s.position = (
+      SELECT min(s2.position)
+      FROM jsonb_array_elements(
+          CASE WHEN jsonb_typeof(c.skills) = 'array' THEN c.skills ELSE '[]'::jsonb END
+      ) WITH ORDINALITY AS s2(value, position)
+      WHERE jsonb_typeof(s2.value) = 'object' AND s2.value->>'id' = sk.skill_id
+  );
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0014_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgentSkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill_id', models.TextField(help_text='AgentSkill.id')),
+                ('name', models.TextField(blank=True, help_text='AgentSkill.name')),
+                ('agent_card', models.ForeignKey(help_text='所属 AgentCard', on_delete=django.db.models.deletion.CASCADE, related_name='skill_index', to='documents.agentcard')),
+            ],
+            options={
+                'verbose_name': 'Agent 技能索引',
+                'verbose_name_plural': 'Agent 技能索引',
+                'db_table': 'agent_skills',
+                'indexes': [models.Index(fields=['skill_id', 'agent_card'], name='agent_skill_skill_i_5c0428_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agent_card', 'skill_id'), name='unique_agent_skill')],
+            },
+        ),
+        migrations.CreateModel(
+            name='AgentSkillTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('skill_id', models.TextField(help_text='AgentSkill.id')),
+                ('tag', models.TextField(help_text='AgentSkill.tags 中的一个标签')),
+                ('agent_card', models.ForeignKey(help_text='所属 AgentCard', on_delete=django.db.models.deletion.CASCADE, related_name='skill_tags', to='documents.agentcard')),
+            ],
+            options={
+                'verbose_name': 'Agent 技能标签索引',
+                'verbose_name_plural': 'Agent 技能标签索引',
+                'db_table': 'agent_skill_tags',
+                'indexes': [models.Index(fields=['tag', 'agent_card'], name='agent_skill_tag_1b2786_idx'), models.Index(fields=['skill_id', 'tag'], name='agent_skill_skill_i_ff07ac_idx')],
+                'constraints': [models.UniqueConstraint(fields=('agent_card', 'skill_id', 'tag'), name='unique_agent_skill_tag')],
+            },
+        ),
+        migrations.RunSQL(
+            sql=BACKFILL_SQL,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+from documents.versioning import parse_semver
+
+
+def backfill_version_components(apps, schema_editor):
+    """解析已有 AgentCard 的 version"""
+    AgentCard = apps.get_model('documents', 'AgentCard')
+    cards = []
+    for card in AgentCard.objects.only('id', 'version').iterator(chunk_size=1000):
+        components = parse_semver(card.version)
+        if components is None:
+            continue
+        card.version_major, card.version_minor, card.version_patch, card.version_prerelease = components
+        cards.append(card)
+    AgentCard.objects.bulk_update(
+        cards,
+        ['version_major', 'version_minor', 'version_patch', 'version_prerelease'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0015_skill_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='agentcard',
+            options={'ordering': ['namespace', 'name', models.OrderBy(models.F('version_major'), descending=True, nulls_last=True), models.OrderBy(models.F('version_minor'), descending=True, nulls_last=True), models.OrderBy(models.F('version_patch'), descending=True, nulls_last=True), models.OrderBy(models.F('version_prerelease'), descending=True, nulls_first=True), '-version'], 'verbose_name': 'AgentCard', 'verbose_name_plural': 'AgentCards'},
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='version_major',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='version_minor',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='version_patch',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='agentcard',
+            name='version_prerelease',
+            field=models.CharField(blank=True, editable=False, help_text="预发布标识（如 'beta.1'），正式版为空", max_length=32, null=True),
+        ),
+        migrations.RunPython(backfill_version_components, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='agentcard',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_default_version', True)), fields=['namespace', 'name'], name='agent_cards_default_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agentcard',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['namespace', 'name', '-version_major', '-version_minor', '-version_patch'], name='agent_cards_active_semver_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_namespace_stats(apps, schema_editor):
+    """统计已有命名空间的 AgentCard / Case 数量"""
+    Namespace = apps.get_model('documents', 'Namespace')
+    NamespaceStats = apps.get_model('documents', 'NamespaceStats')
+    AgentCard = apps.get_model('documents', 'AgentCard')
+    AgentCase = apps.get_model('documents', 'AgentCase')
+
+    stats = {pk: NamespaceStats(namespace_id=pk) for pk in Namespace.objects.values_list('pk', flat=True)}
+    for row in AgentCard.objects.order_by().values('namespace_id').annotate(
+        total=models.Count('id'),
+        active=models.Count('id', filter=models.Q(is_active=True)),
+        default=models.Count('id', filter=models.Q(is_default_version=True)),
+    ):
+        row_stats = stats[row['namespace_id']]
+        row_stats.agent_card_count = row['total']
+        row_stats.active_card_count = row['active']
+        row_stats.default_card_count = row['default']
+    for row in AgentCase.objects.filter(agent_card__isnull=False).order_by().values(
+        'agent_card__namespace_id'
+    ).annotate(total=models.Count('id')):
+        stats[row['agent_card__namespace_id']].case_count = row['total']
+    NamespaceStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0016_agentcard_semver'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NamespaceStats',
+            fields=[
+                ('namespace', models.OneToOneField(help_text='所属命名空间', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='documents.namespace')),
+                ('agent_card_count', models.IntegerField(default=0, help_text='AgentCard 总数')),
+                ('active_card_count', models.IntegerField(default=0, help_text='启用的 AgentCard 数量')),
+                ('default_card_count', models.IntegerField(default=0, help_text='默认版本的 AgentCard 数量')),
+                ('case_count', models.IntegerField(default=0, help_text='关联到本命名空间 AgentCard 的 Case 数量')),
+            ],
+            options={
+                'verbose_name': '命名空间计数',
+                'verbose_name_plural': '命名空间计数',
+                'db_table': 'namespace_stats',
+            },
+        ),
+        migrations.RunPython(backfill_namespace_stats, migrations.RunPython.noop),
+    ]
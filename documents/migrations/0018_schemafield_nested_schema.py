@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0017_namespace_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schemafield',
+            name='nested_schema',
+            field=models.JSONField(blank=True, help_text='【仅适用于 object / array 类型】\n嵌套结构定义（JSON Schema draft-07 片段，合并到该字段生成的 JSON Schema 中）。\nobject 示例：{"properties": {"building": {"type": "string"}, "room": {"type": "string"}}, "required": ["building"]}\narray 示例：{"items": {"type": "number"}, "minItems": 1}\n支持的关键字见 documents/validation.py。', null=True),
+        ),
+    ]
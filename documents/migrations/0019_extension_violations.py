@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0018_schemafield_nested_schema'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schemaregistry',
+            name='revalidated_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='最近一次完成扩展重新验证时的 Schema 版本（updated_at），与 updated_at 一致表示违规记录是最新的', null=True),
+        ),
+        migrations.CreateModel(
+            name='ExtensionViolation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('schema_version', models.DateTimeField(help_text='验证时的 Schema 版本（SchemaRegistry.updated_at）')),
+                ('errors', models.JSONField(default=list, help_text='验证错误 [{"path": ..., "message": ...}]')),
+                ('checked_at', models.DateTimeField(auto_now=True, help_text='验证时间')),
+                ('extension', models.OneToOneField(help_text='违规的扩展', on_delete=django.db.models.deletion.CASCADE, related_name='violation', to='documents.agentextension')),
+                ('schema', models.ForeignKey(help_text='验证时使用的 Schema', on_delete=django.db.models.deletion.CASCADE, related_name='violations', to='documents.schemaregistry')),
+            ],
+            options={
+                'verbose_name': '扩展违规',
+                'verbose_name_plural': '扩展违规',
+                'db_table': 'extension_violations',
+                'indexes': [models.Index(fields=['schema', 'extension'], name='extension_v_schema__9d876b_idx')],
+            },
+        ),
+    ]
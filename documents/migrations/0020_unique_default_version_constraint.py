@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0019_extension_violations'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # 0002 中手工创建的部分唯一索引改为由模型声明的 UniqueConstraint 管理（同一定义）
+        migrations.RunSQL(
+            sql="DROP INDEX IF EXISTS idx_unique_default_version;",
+            reverse_sql="""
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_unique_default_version
+                ON agent_cards (namespace_id, name)
+                WHERE is_default_version = true;
+            """,
+        ),
+        migrations.AddConstraint(
+            model_name='agentcard',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default_version', True)), fields=('namespace', 'name'), name='agent_cards_unique_default_version', violation_error_message='该 Agent 在此命名空间已存在默认版本，请使用 make-default 切换默认版本。'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 00:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0020_unique_default_version_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentcard',
+            name='content_digest',
+            field=models.CharField(blank=True, default='', editable=False, help_text='最近一次 bulk-upsert 写入内容的摘要（卡片字段、默认/启用状态和扩展，见 importing.content_digest()），相同内容再次提交时跳过写入；通过其他途径修改卡片或扩展时清空', max_length=64),
+        ),
+    ]
@@ -9,11 +9,24 @@ AgentCard 数据模型
 4. PostgreSQL JSONB 用于灵活存储嵌套对象
 """
 
-from django.db import models
-from django.core.validators import URLValidator, RegexValidator
-from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
 import json
+import re
+
+from django.contrib.auth.models import User
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.validators import RegexValidator, URLValidator
+from django.db import IntegrityError, models, transaction
+
+from .validation import SchemaCompileError, compile_schema, get_validator
+from .versioning import parse_semver
+
+
+def violated_constraint(error: IntegrityError) -> str:
+    """IntegrityError 违反的约束名（PostgreSQL 驱动提供；无法识别时返回空字符串）"""
+    diag = getattr(error.__cause__, 'diag', None)
+    return getattr(diag, 'constraint_name', None) or ''
 
 
 class Namespace(models.Model):
@@ -62,15 +75,30 @@ class Namespace(models.Model):
     def delete(self, *args, **kwargs):
         """
         删除前检查：如果有关联的 AgentCard，禁止删除
+
+        AgentCard 随命名空间级联删除，因此以 EXISTS 查询为准，不依赖计数器。
         """
-        card_count = self.agent_cards.count()
-        if card_count > 0:
+        if self.agent_cards.exists():
             raise ValidationError(
-                f"无法删除命名空间 '{self.id}'：该命名空间下有 {card_count} 个 AgentCard。"
+                f"无法删除命名空间 '{self.id}'：该命名空间下有 {self.card_counts()['agent_card_count']} 个 AgentCard。"
                 f"请先删除或移动所有 AgentCard。"
             )
         super().delete(*args, **kwargs)
 
+    def card_counts(self) -> dict:
+        """
+        AgentCard / Case 计数（NamespaceStats）
+
+        列表查询应 select_related('stats')，此时不产生额外查询；
+        计数行缺失时（迁移前创建、尚未校正）直接统计。
+        """
+        try:
+            stats = self.stats
+        except NamespaceStats.DoesNotExist:
+            counts = NamespaceStats.compute([self.pk]).get(self.pk, {})
+            return {field: counts.get(field, 0) for field in NamespaceStats.COUNTER_FIELDS}
+        return {field: getattr(stats, field) for field in NamespaceStats.COUNTER_FIELDS}
+
 
 class SchemaRegistry(models.Model):
     """
@@ -114,6 +142,12 @@ class SchemaRegistry(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    revalidated_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="最近一次完成扩展重新验证时的 Schema 版本（updated_at），与 updated_at 一致表示违规记录是最新的"
+    )
 
     class Meta:
         db_table = 'schema_registry'
@@ -162,32 +196,12 @@ class SchemaRegistry(models.Model):
 
     def validate_extension_data(self, data: dict) -> tuple[bool, str]:
         """
-        验证扩展数据（简化版，基于 SchemaField 定义）
+        验证扩展数据（基于 SchemaField 定义，使用编译并缓存的验证器，见 validation.py）
 
         Returns:
             (is_valid, error_message)
         """
-        errors = []
-
-        # 检查必填字段
-        for field in self.fields.filter(is_required=True):
-            if field.field_name not in data:
-                errors.append(f"缺少必填字段：{field.field_name}")
-
-        # 类型检查（简单版本）
-        for field_name, value in data.items():
-            try:
-                field = self.fields.get(field_name=field_name)
-                is_valid, error = field.validate_value(value)
-                if not is_valid:
-                    errors.append(f"字段 '{field_name}': {error}")
-            except SchemaField.DoesNotExist:
-                # 允许额外字段（宽松模式）
-                pass
-
-        if errors:
-            return False, "\n".join(errors)
-        return True, ""
+        return get_validator(self).validate(data)
 
     def get_field_definitions(self) -> list[dict]:
         """
@@ -204,8 +218,10 @@ class SchemaRegistry(models.Model):
                 'description': field.description,
                 'default': field.default_value,
                 'constraints': field.get_field_constraints(),
+                'nested_schema': field.nested_schema,
             }
-            for field in self.fields.all().order_by('order', 'field_name')
+            # SchemaField 默认按 (schema, order, field_name) 排序，已 prefetch_related('fields') 时不再查询
+            for field in self.fields.all()
         ]
 
     def delete(self, *args, **kwargs):
@@ -338,6 +354,19 @@ class SchemaField(models.Model):
         )
     )
 
+    nested_schema = models.JSONField(
+        null=True,
+        blank=True,
+        help_text=(
+            "【仅适用于 object / array 类型】\n"
+            "嵌套结构定义（JSON Schema draft-07 片段，合并到该字段生成的 JSON Schema 中）。\n"
+            "object 示例：{\"properties\": {\"building\": {\"type\": \"string\"}, \"room\": {\"type\": \"string\"}}, "
+            "\"required\": [\"building\"]}\n"
+            "array 示例：{\"items\": {\"type\": \"number\"}, \"minItems\": 1}\n"
+            "支持的关键字见 documents/validation.py。"
+        )
+    )
+
     # 显示顺序
     order = models.IntegerField(
         default=0,
@@ -404,7 +433,29 @@ class SchemaField(models.Model):
             if any([self.min_length, self.max_length, self.min_value, self.max_value, self.pattern]):
                 raise ValidationError("枚举类型不能设置其他约束（长度、数值范围、正则）。")
 
-        # 验证4：布尔/数组/对象/日期类型不能设置任何约束
+        # 验证4：正则表达式必须可以编译
+        if self.pattern:
+            try:
+                re.compile(self.pattern)
+            except re.error as e:
+                raise ValidationError({'pattern': f"无效的正则表达式：{e}"})
+
+        # 验证5：嵌套结构只适用于 object / array，且必须能编译为验证器
+        if self.nested_schema is not None:
+            if self.field_type not in ['object', 'array']:
+                raise ValidationError({
+                    'nested_schema': f"{self.get_field_type_display()}类型不能设置嵌套结构。"
+                })
+            if not isinstance(self.nested_schema, dict):
+                raise ValidationError({'nested_schema': "嵌套结构必须是一个 JSON 对象。"})
+            if 'type' in self.nested_schema:
+                raise ValidationError({'nested_schema': "嵌套结构不能设置 type，类型由字段类型决定。"})
+            try:
+                compile_schema(self.to_json_schema_property())
+            except SchemaCompileError as e:
+                raise ValidationError({'nested_schema': f"无效的嵌套结构：{e}"})
+
+        # 验证6：布尔/数组/对象/日期类型不能设置任何约束
         if self.field_type in ['boolean', 'array', 'object', 'datetime', 'date']:
             if any([
                 self.min_length, self.max_length, self.min_value, self.max_value,
@@ -431,10 +482,13 @@ class SchemaField(models.Model):
             prop["format"] = self.field_type
             prop["type"] = "string"
 
-        # 枚举类型
+        # 枚举类型（枚举值不全是字符串时不限制类型）
         if self.field_type == 'enum' and self.enum_choices:
             prop["enum"] = self.enum_choices
-            prop["type"] = "string"
+            if all(isinstance(choice, str) for choice in self.enum_choices):
+                prop["type"] = "string"
+            else:
+                del prop["type"]
 
         # 字符串约束
         if self.field_type == 'string':
@@ -452,6 +506,10 @@ class SchemaField(models.Model):
             if self.max_value is not None:
                 prop["maximum"] = self.max_value
 
+        # 嵌套结构（object 的 properties / required，array 的 items 等）
+        if self.field_type in ['object', 'array'] and isinstance(self.nested_schema, dict):
+            prop.update({key: value for key, value in self.nested_schema.items() if key != 'type'})
+
         # 默认值
         if self.default_value is not None:
             prop["default"] = self.default_value
@@ -460,45 +518,19 @@ class SchemaField(models.Model):
 
     def validate_value(self, value) -> tuple[bool, str]:
         """
-        验证字段值（简化版）
+        验证字段值（含嵌套结构，返回全部错误；验证整个扩展数据时请使用
+        SchemaRegistry.validate_extension_data()，该方法使用缓存的编译结果）
 
         Returns:
             (is_valid, error_message)
         """
-        # 类型检查
-        type_checks = {
-            'string': lambda v: isinstance(v, str),
-            'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
-            'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
-            'boolean': lambda v: isinstance(v, bool),
-            'array': lambda v: isinstance(v, list),
-            'object': lambda v: isinstance(v, dict),
-        }
-
-        if self.field_type in type_checks:
-            if not type_checks[self.field_type](value):
-                return False, f"类型错误，期望 {self.get_field_type_display()}"
-
-        # 枚举检查
-        if self.field_type == 'enum' and self.enum_choices:
-            if value not in self.enum_choices:
-                return False, f"值必须是以下之一：{', '.join(map(str, self.enum_choices))}"
-
-        # 字符串长度检查
-        if self.field_type == 'string' and isinstance(value, str):
-            if self.min_length and len(value) < self.min_length:
-                return False, f"长度不能小于 {self.min_length}"
-            if self.max_length and len(value) > self.max_length:
-                return False, f"长度不能大于 {self.max_length}"
-
-        # 数值范围检查
-        if self.field_type in ['integer', 'number'] and isinstance(value, (int, float)):
-            if self.min_value is not None and value < self.min_value:
-                return False, f"值不能小于 {self.min_value}"
-            if self.max_value is not None and value > self.max_value:
-                return False, f"值不能大于 {self.max_value}"
-
-        return True, ""
+        try:
+            check = compile_schema(self.to_json_schema_property())
+        except SchemaCompileError as e:
+            return False, f"Schema 定义无效：{e}"
+        errors = []
+        check(value, self.field_name, errors)
+        return not errors, "\n".join(map(str, errors))
 
     def get_field_constraints(self) -> dict:
         """
@@ -525,6 +557,17 @@ class SchemaField(models.Model):
         return constraints
 
 
+# AgentCard 版本降序：按语义化版本分量排序（'10.0.0' 排在 '9.0.0' 之前），
+# 同一 major.minor.patch 下正式版在前；无法解析的版本排在最后，按字符串降序
+SEMVER_DESC_ORDERING = [
+    models.F('version_major').desc(nulls_last=True),
+    models.F('version_minor').desc(nulls_last=True),
+    models.F('version_patch').desc(nulls_last=True),
+    models.F('version_prerelease').desc(nulls_first=True),
+    '-version',
+]
+
+
 class AgentCard(models.Model):
     """
     AgentCard 主模型
@@ -561,6 +604,17 @@ class AgentCard(models.Model):
         max_length=32,
         help_text="Agent 版本号，建议使用语义化版本，如 '1.0.0', '2.1.3-beta'"
     )
+    # 语义化版本分量（保存时由 version 解析，用于排序和版本解析；无法解析时为空）
+    version_major = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    version_minor = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    version_patch = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    version_prerelease = models.CharField(
+        max_length=32,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="预发布标识（如 'beta.1'），正式版为空"
+    )
     is_default_version = models.BooleanField(
         default=False,
         db_index=True,
@@ -701,6 +755,54 @@ class AgentCard(models.Model):
         )
     )
 
+    # ========================================
+    # A2A 快照（写入时物化，读取时直接返回）
+    # ========================================
+
+    a2a_snapshot = models.JSONField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="写入时生成的标准 AgentCard JSON（validate=True，不含元数据）；数据不完整时为空"
+    )
+    a2a_snapshot_bytes = models.BinaryField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="a2a_snapshot 的预编码 UTF-8 JSON 字节（standard-json 端点直接返回）"
+    )
+    a2a_snapshot_error = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text="生成快照时的 A2A 协议验证错误（为空表示快照有效或尚未生成）"
+    )
+
+    # ========================================
+    # 批量 upsert
+    # ========================================
+
+    content_digest = models.CharField(
+        max_length=64,
+        blank=True,
+        default='',
+        editable=False,
+        help_text=(
+            "最近一次 bulk-upsert 写入内容的摘要（卡片字段、默认/启用状态和扩展，见 importing.content_digest()），"
+            "相同内容再次提交时跳过写入；通过其他途径修改卡片或扩展时清空"
+        )
+    )
+
+    # ========================================
+    # 全文检索
+    # ========================================
+
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="由数据库触发器维护：name、description、skills 的 name/tags/description/examples"
+    )
+
     # ========================================
     # 元数据与审计
     # ========================================
@@ -736,44 +838,115 @@ class AgentCard(models.Model):
         unique_together = [
             ('namespace', 'name', 'version')  # Nacos 的唯一性约束
         ]
+        constraints = [
+            # 每个 namespace::name 只能有一个默认版本（部分唯一索引，并发写入由数据库保证）
+            models.UniqueConstraint(
+                fields=['namespace', 'name'],
+                condition=models.Q(is_default_version=True),
+                name='agent_cards_unique_default_version',
+                violation_error_message='该 Agent 在此命名空间已存在默认版本，请使用 make-default 切换默认版本。',
+            ),
+        ]
         indexes = [
             models.Index(fields=['namespace', 'name', 'is_default_version']),
             models.Index(fields=['namespace', 'is_active']),
             models.Index(fields=['created_at']),
             models.Index(fields=['updated_at']),
+            GinIndex(fields=['search_vector'], name='agent_cards_search_gin'),
+            # 版本解析（resolve 端点）：默认版本 / 按语义化版本取最新（只索引启用的版本）
+            models.Index(
+                fields=['namespace', 'name'],
+                condition=models.Q(is_default_version=True, is_active=True),
+                name='agent_cards_default_active_idx',
+            ),
+            models.Index(
+                fields=['namespace', 'name', '-version_major', '-version_minor', '-version_patch'],
+                condition=models.Q(is_active=True),
+                name='agent_cards_active_semver_idx',
+            ),
             # PostgreSQL GIN 索引用于 JSONB 查询（需在迁移中手动添加）
             # CREATE INDEX idx_domain_extensions_gin ON agent_cards USING GIN (domain_extensions jsonb_path_ops);
         ]
-        ordering = ['namespace', 'name', '-version']
+        ordering = ['namespace', 'name', *SEMVER_DESC_ORDERING]
 
     def __str__(self):
         default_marker = " [默认]" if self.is_default_version else ""
         return f"{self.namespace.id}::{self.name}@{self.version}{default_marker}"
 
-    def clean(self):
+    # A2A 协议格式验证（验证4-10）涉及的字段
+    A2A_FORMAT_FIELDS = frozenset([
+        'default_input_modes', 'default_output_modes', 'skills', 'provider',
+        'additional_interfaces', 'security_schemes', 'security',
+    ])
+
+    def clean(self, fields=None):
         """
         模型级别的数据验证（A2A 协议严格模式）
+
+        各项验证拆分为独立方法，批量导入（importing.py）复用不查询数据库的部分，
+        需要查询的部分（Schema）由导入器按批次共享查询结果。
+
+        "每个 namespace::name 只能有一个默认版本"由部分唯一约束 DEFAULT_VERSION_CONSTRAINT 保证，
+        save() 将违反约束的 IntegrityError 转换为 ValidationError；切换默认版本使用 make_default()。
+
+        Args:
+            fields: 只执行涉及这些字段的验证（部分更新，见 clean_update()）；为空时执行全部验证
         """
         super().clean()
+        checks = []
+        if fields is None or 'url' in fields:
+            checks.append(self._clean_url_scheme)
+        if fields is None or 'domain_extensions' in fields:
+            checks.append(self._clean_domain_extensions)
+        if fields is None or self.A2A_FORMAT_FIELDS.intersection(fields):
+            checks.append(lambda: self._clean_a2a_fields(fields))
+
+        # 各项验证的错误合并后一起抛出（不在第一个错误处停止）
+        errors = {}
+        for check in checks:
+            try:
+                check()
+            except ValidationError as e:
+                errors = e.update_error_dict(errors)
+        if errors:
+            raise ValidationError(errors)
 
-        # 验证1：每个 namespace::name 只能有一个默认版本
-        if self.is_default_version:
-            existing_default = AgentCard.objects.filter(
-                namespace=self.namespace,
-                name=self.name,
-                is_default_version=True
-            ).exclude(pk=self.pk)
+    def clean_update(self, update_fields):
+        """
+        部分更新的验证（save(update_fields=...) 时代替 full_clean()）
 
-            if existing_default.exists():
-                raise ValidationError({
-                    'is_default_version': (
-                        f"Agent '{self.name}' 在命名空间 '{self.namespace.id}' "
-                        f"已存在默认版本 '{existing_default.first().version}'。"
-                        f"请先取消原默认版本。"
-                    )
-                })
+        只验证被更新的字段，以及涉及这些字段的模型级验证和 unique_together；
+        未更新的字段已在之前的保存中验证过，不再重复检查（例如只更新 domain_extensions 时不验证 skills）。
+        """
+        fields = {self._meta.get_field(name).name for name in update_fields}
+        exclude = {field.name for field in self._meta.fields if field.name not in fields}
+
+        errors = {}
+        try:
+            self.clean_fields(exclude=exclude)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+        try:
+            self.clean(fields)
+        except ValidationError as e:
+            errors = e.update_error_dict(errors)
+
+        # unique_together 中任一字段被更新时检查整组；验证失败的字段不再检查唯一性（与 full_clean() 相同）
+        for group in self._meta.unique_together:
+            if fields.intersection(group):
+                exclude.difference_update(group)
+        exclude.update(name for name in errors if name != NON_FIELD_ERRORS)
+        if fields - exclude:
+            try:
+                self.validate_unique(exclude=exclude)
+            except ValidationError as e:
+                errors = e.update_error_dict(errors)
 
-        # 验证2：生产环境必须使用 HTTPS（符合 A2A 协议 Section 4.1）
+        if errors:
+            raise ValidationError(errors)
+
+    def _clean_url_scheme(self):
+        """验证2：生产环境必须使用 HTTPS（符合 A2A 协议 Section 4.1）"""
         from django.conf import settings
         if not settings.DEBUG:  # 仅在生产环境（DEBUG=False）检查
             if not self.url.startswith('https://'):
@@ -781,23 +954,32 @@ class AgentCard(models.Model):
                     'url': "生产环境的 Agent URL 必须使用 HTTPS（符合 A2A 协议 Section 4.1 要求）"
                 })
 
-        # 验证3：domain_extensions 中的 schema_uri 是否已注册（可选检查）
+    def _clean_domain_extensions(self, schemas: dict = None):
+        """
+        验证3：domain_extensions 中的 schema_uri 是否已注册（可选检查）
+
+        Args:
+            schemas: 批量验证时预先加载的 {schema_uri: 启用的 SchemaRegistry}
+                     （建议 prefetch_related('fields')）；为空时逐个查询
+        """
+        messages = []
         for schema_uri in self.domain_extensions.keys():
             try:
-                schema = SchemaRegistry.objects.get(
-                    schema_uri=schema_uri,
-                    is_active=True
-                )
+                if schemas is not None:
+                    schema = schemas.get(schema_uri)
+                    if schema is None:
+                        raise SchemaRegistry.DoesNotExist
+                else:
+                    schema = SchemaRegistry.objects.get(
+                        schema_uri=schema_uri,
+                        is_active=True
+                    )
 
-                # 可选：验证数据是否符合 Schema 定义
+                # 可选：验证数据是否符合 Schema 定义（每个 Schema 的全部错误）
                 extension_data = self.domain_extensions[schema_uri]
                 is_valid, error_msg = schema.validate_extension_data(extension_data)
                 if not is_valid:
-                    raise ValidationError({
-                        'domain_extensions': (
-                            f"扩展数据不符合 Schema '{schema_uri}' 的定义:\n{error_msg}"
-                        )
-                    })
+                    messages.append(f"扩展数据不符合 Schema '{schema_uri}' 的定义:\n{error_msg}")
             except SchemaRegistry.DoesNotExist:
                 # 选项A：严格模式 - 要求所有 schema_uri 必须注册
                 # raise ValidationError({
@@ -805,7 +987,29 @@ class AgentCard(models.Model):
                 # })
                 # 选项B：宽松模式 - 允许未注册的 schema_uri（当前采用）
                 pass
+        if messages:
+            raise ValidationError({'domain_extensions': messages})
+
+    def _clean_a2a_fields(self, fields=None):
+        """
+        验证4-10：A2A 协议字段格式验证（不查询数据库）
+
+        收集全部格式错误后一起抛出（每个字段可能有多条错误）
+        """
+        errors = self.a2a_format_errors(fields)
+        if errors:
+            raise ValidationError(errors)
 
+    def a2a_format_errors(self, fields=None) -> dict:
+        """
+        A2A 协议字段格式检查（验证4-10，不查询数据库）
+
+        Args:
+            fields: 只检查这些字段（部分更新）；为空时检查 A2A_FORMAT_FIELDS 中的全部字段
+
+        Returns:
+            {字段名: [错误信息, ...]}，为空表示格式正确
+        """
         # ========================================
         # A2A 协议字段格式验证（宽松模式 - 允许渐进式录入）
         # ========================================
@@ -813,235 +1017,323 @@ class AgentCard(models.Model):
         # - 数据库层：只验证格式，不强制必填（方便分步录入）
         # - 输出层：to_agentcard_json() 严格验证必填字段
         # ========================================
-
-        # 验证4：defaultInputModes（格式验证，允许为空）
-        if not isinstance(self.default_input_modes, list):
-            raise ValidationError({
-                'default_input_modes': "defaultInputModes 必须是一个数组"
-            })
-
-        # 如果有值，验证格式
-        if self.default_input_modes:
-            for mode in self.default_input_modes:
+        errors = {}
+        fields = self.A2A_FORMAT_FIELDS if fields is None else self.A2A_FORMAT_FIELDS.intersection(fields)
+
+        def add(field, message):
+            errors.setdefault(field, []).append(message)
+
+        # 验证4-5：defaultInputModes / defaultOutputModes（格式验证，允许为空）
+        for field, label in [('default_input_modes', 'defaultInputModes'),
+                             ('default_output_modes', 'defaultOutputModes')]:
+            if field not in fields:
+                continue
+            modes = getattr(self, field)
+            if not isinstance(modes, list):
+                add(field, f"{label} 必须是一个数组")
+                continue
+            for mode in modes:
                 if not isinstance(mode, str):
-                    raise ValidationError({
-                        'default_input_modes': f"defaultInputModes 中的每个元素必须是字符串（MIME 类型），发现: {type(mode).__name__}"
-                    })
+                    add(field, f"{label} 中的每个元素必须是字符串（MIME 类型），发现: {type(mode).__name__}")
                 # 简单的 MIME 类型格式检查
-                if '/' not in mode:
-                    raise ValidationError({
-                        'default_input_modes': f"'{mode}' 不是有效的 MIME 类型格式（应为 'type/subtype'）"
-                    })
-
-        # 验证5：defaultOutputModes（格式验证，允许为空）
-        if not isinstance(self.default_output_modes, list):
-            raise ValidationError({
-                'default_output_modes': "defaultOutputModes 必须是一个数组"
-            })
-
-        # 如果有值，验证格式
-        if self.default_output_modes:
-            for mode in self.default_output_modes:
-                if not isinstance(mode, str):
-                    raise ValidationError({
-                        'default_output_modes': f"defaultOutputModes 中的每个元素必须是字符串（MIME 类型），发现: {type(mode).__name__}"
-                    })
-                if '/' not in mode:
-                    raise ValidationError({
-                        'default_output_modes': f"'{mode}' 不是有效的 MIME 类型格式（应为 'type/subtype'）"
-                    })
+                elif '/' not in mode:
+                    add(field, f"'{mode}' 不是有效的 MIME 类型格式（应为 'type/subtype'）")
 
         # 验证6：skills（格式验证，允许为空）
-        if not isinstance(self.skills, list):
-            raise ValidationError({
-                'skills': "skills 必须是一个数组"
-            })
+        if 'skills' in fields:
+            if not isinstance(self.skills, list):
+                add('skills', "skills 必须是一个数组")
+            else:
+                for idx, skill in enumerate(self.skills):
+                    self._skill_errors(idx, skill, add)
 
-        # 如果有 skills，验证结构
-        if self.skills:
-            for idx, skill in enumerate(self.skills):
-                if not isinstance(skill, dict):
-                    raise ValidationError({
-                        'skills': f"skills[{idx}] 必须是一个对象，发现: {type(skill).__name__}"
-                    })
-
-                # 必填字段检查（根据 A2A 协议，AgentSkill 的必填字段）
-                # 注意：examples 是可选的，不在必填列表中
-                required_skill_fields = ['id', 'name', 'description', 'tags']
-                for field in required_skill_fields:
-                    if field not in skill:
-                        raise ValidationError({
-                            'skills': f"skills[{idx}] 缺少必填字段 '{field}'（A2A 协议要求）"
-                        })
-
-                # 字段类型检查
-                if not isinstance(skill.get('id'), str):
-                    raise ValidationError({
-                        'skills': f"skills[{idx}].id 必须是字符串"
-                    })
+        # 验证7：provider（可选，但如果存在必须符合 AgentProvider 结构）
+        if 'provider' in fields and self.provider:
+            if not isinstance(self.provider, dict):
+                add('provider', "provider 必须是一个对象")
+            else:
+                for key in ['organization', 'url']:
+                    if key not in self.provider:
+                        add('provider', f"provider 必须包含 '{key}' 字段")
+                    elif not isinstance(self.provider[key], str):
+                        add('provider', f"provider.{key} 必须是字符串")
 
-                if not isinstance(skill.get('name'), str):
-                    raise ValidationError({
-                        'skills': f"skills[{idx}].name 必须是字符串"
-                    })
+        # 验证8：additionalInterfaces（可选，AgentInterface 对象数组）
+        if 'additional_interfaces' in fields and self.additional_interfaces:
+            if not isinstance(self.additional_interfaces, list):
+                add('additional_interfaces', "additionalInterfaces 必须是一个数组")
+            else:
+                # transport 必须是有效值
+                valid_transports = ['JSONRPC', 'GRPC', 'HTTP+JSON']
+                for idx, interface in enumerate(self.additional_interfaces):
+                    if not isinstance(interface, dict):
+                        add('additional_interfaces', f"additionalInterfaces[{idx}] 必须是一个对象")
+                        continue
+                    if 'url' not in interface:
+                        add('additional_interfaces', f"additionalInterfaces[{idx}] 必须包含 'url' 字段")
+                    if 'transport' not in interface:
+                        add('additional_interfaces', f"additionalInterfaces[{idx}] 必须包含 'transport' 字段")
+                    elif interface['transport'] not in valid_transports:
+                        add('additional_interfaces', (
+                            f"additionalInterfaces[{idx}].transport 必须是以下值之一: "
+                            f"{', '.join(valid_transports)}"
+                        ))
 
-                if not isinstance(skill.get('description'), str):
-                    raise ValidationError({
-                        'skills': f"skills[{idx}].description 必须是字符串"
-                    })
+        # 验证9：securitySchemes（可选，但如果存在必须是对象）
+        if 'security_schemes' in fields and self.security_schemes:
+            if not isinstance(self.security_schemes, dict):
+                add('security_schemes', "securitySchemes 必须是一个对象")
+            else:
+                # 每个 scheme 应该有 type 字段
+                valid_security_types = ['APIKey', 'HTTPAuth', 'OAuth2', 'OpenIdConnect', 'MutualTLS']
+                for scheme_name, scheme_def in self.security_schemes.items():
+                    if not isinstance(scheme_def, dict):
+                        add('security_schemes', f"securitySchemes['{scheme_name}'] 必须是一个对象")
+                    elif 'type' not in scheme_def:
+                        add('security_schemes', f"securitySchemes['{scheme_name}'] 必须包含 'type' 字段")
+                    elif scheme_def['type'] not in valid_security_types:
+                        add('security_schemes', (
+                            f"securitySchemes['{scheme_name}'].type 必须是以下值之一: "
+                            f"{', '.join(valid_security_types)}"
+                        ))
 
-                if not isinstance(skill.get('tags'), list):
-                    raise ValidationError({
-                        'skills': f"skills[{idx}].tags 必须是字符串数组"
-                    })
+        # 验证10：security（可选，但如果存在必须是数组）
+        if 'security' in fields and self.security:
+            if not isinstance(self.security, list):
+                add('security', "security 必须是一个数组")
+            else:
+                for idx, requirement in enumerate(self.security):
+                    if not isinstance(requirement, dict):
+                        add('security', f"security[{idx}] 必须是一个对象")
+
+        return errors
+
+    @staticmethod
+    def _skill_errors(idx, skill, add):
+        """验证6：单个 AgentSkill 的结构"""
+        if not isinstance(skill, dict):
+            add('skills', f"skills[{idx}] 必须是一个对象，发现: {type(skill).__name__}")
+            return
+
+        # 必填字段检查（根据 A2A 协议，AgentSkill 的必填字段）
+        # 注意：examples 是可选的，不在必填列表中
+        for field in ['id', 'name', 'description', 'tags']:
+            if field not in skill:
+                add('skills', f"skills[{idx}] 缺少必填字段 '{field}'（A2A 协议要求）")
+
+        # 字段类型检查
+        for field in ['id', 'name', 'description']:
+            if field in skill and not isinstance(skill[field], str):
+                add('skills', f"skills[{idx}].{field} 必须是字符串")
+
+        if 'tags' in skill:
+            if not isinstance(skill['tags'], list):
+                add('skills', f"skills[{idx}].tags 必须是字符串数组")
+            elif not all(isinstance(tag, str) for tag in skill['tags']):
+                add('skills', f"skills[{idx}].tags 中的每个元素必须是字符串")
+
+        # 可选字段验证（如果存在）
+        if 'examples' in skill:
+            if not isinstance(skill['examples'], list):
+                add('skills', f"skills[{idx}].examples 必须是数组")
+            elif not all(isinstance(example, str) for example in skill['examples']):
+                add('skills', f"skills[{idx}].examples 中的每个元素必须是字符串")
+
+        for key in ['inputModes', 'outputModes']:
+            if key not in skill:
+                continue
+            if not isinstance(skill[key], list):
+                add('skills', f"skills[{idx}].{key} 必须是字符串数组")
+                continue
+            for mode in skill[key]:
+                if not isinstance(mode, str) or '/' not in mode:
+                    add('skills', f"skills[{idx}].{key} 包含无效的 MIME 类型: {mode}")
+
+    DEFAULT_VERSION_CONSTRAINT = 'agent_cards_unique_default_version'
 
-                for tag in skill.get('tags', []):
-                    if not isinstance(tag, str):
-                        raise ValidationError({
-                            'skills': f"skills[{idx}].tags 中的每个元素必须是字符串"
-                        })
-
-                # 可选字段验证（如果存在）
-                if 'examples' in skill:
-                    if not isinstance(skill['examples'], list):
-                        raise ValidationError({
-                            'skills': f"skills[{idx}].examples 必须是数组"
-                        })
-                    for example in skill['examples']:
-                        if not isinstance(example, str):
-                            raise ValidationError({
-                                'skills': f"skills[{idx}].examples 中的每个元素必须是字符串"
-                            })
-                if 'inputModes' in skill:
-                    if not isinstance(skill['inputModes'], list):
-                        raise ValidationError({
-                            'skills': f"skills[{idx}].inputModes 必须是字符串数组"
-                        })
-                    for mode in skill['inputModes']:
-                        if not isinstance(mode, str) or '/' not in mode:
-                            raise ValidationError({
-                                'skills': f"skills[{idx}].inputModes 包含无效的 MIME 类型: {mode}"
-                            })
-
-                if 'outputModes' in skill:
-                    if not isinstance(skill['outputModes'], list):
-                        raise ValidationError({
-                            'skills': f"skills[{idx}].outputModes 必须是字符串数组"
-                        })
-                    for mode in skill['outputModes']:
-                        if not isinstance(mode, str) or '/' not in mode:
-                            raise ValidationError({
-                                'skills': f"skills[{idx}].outputModes 包含无效的 MIME 类型: {mode}"
-                            })
+    def save(self, *args, **kwargs):
+        """
+        保存前的处理逻辑
 
-        # 验证7：provider（可选，但如果存在必须符合 AgentProvider 结构）
-        if self.provider:
-            if not isinstance(self.provider, dict):
-                raise ValidationError({
-                    'provider': "provider 必须是一个对象"
-                })
+        Raises:
+            ValidationError: 验证失败，或与其他版本同时为默认版本（违反 DEFAULT_VERSION_CONSTRAINT）
+        """
+        # 默认版本唯一性不预先查询，由数据库约束保证
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.full_clean(validate_constraints=False)
+        else:
+            # 部分更新只验证被更新的字段及涉及它们的规则
+            update_fields = list(update_fields)
+            self.clean_update(update_fields)
+
+        # 语义化版本分量
+        self.set_version_components()
+
+        # 物化 A2A 快照（与卡片本身在同一条 UPDATE/INSERT 中写入）；
+        # 只更新元数据字段（默认版本、启用状态等）时快照内容不变，不重新生成
+        refresh = update_fields is None or not self.METADATA_FIELDS.issuperset(update_fields) \
+            or not self.has_snapshot()
+        if refresh:
+            self.refresh_snapshot(commit=False)
+
+        # 内容已不再是 bulk-upsert 提交的版本，下次 upsert 时重新写入
+        self.content_digest = ''
+        if update_fields is not None:
+            derived = (self.SNAPSHOT_FIELDS if refresh else []) \
+                + (self.VERSION_FIELDS if 'version' in update_fields else []) + ['content_digest']
+            kwargs['update_fields'] = update_fields + [
+                f for f in derived if f not in update_fields
+            ]
+
+        # post_save 中维护的派生数据（变更日志、技能索引、命名空间计数）与卡片在同一事务中写入；
+        # 违反约束时只回滚到该保存点，调用方的事务仍可继续使用
+        try:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+        except IntegrityError as e:
+            if violated_constraint(e) != self.DEFAULT_VERSION_CONSTRAINT:
+                raise
+            raise ValidationError({
+                'is_default_version': (
+                    f"Agent '{self.name}' 在命名空间 '{self.namespace_id}' 已存在默认版本。"
+                    f"请使用 make-default 切换默认版本。"
+                )
+            }) from e
 
-            if 'organization' not in self.provider:
-                raise ValidationError({
-                    'provider': "provider 必须包含 'organization' 字段"
-                })
+    def make_default(self, updated_by=None):
+        """
+        将本版本设为 namespace::name 的默认版本（单个事务内取消原默认版本并设置本版本）
 
-            if 'url' not in self.provider:
-                raise ValidationError({
-                    'provider': "provider 必须包含 'url' 字段"
-                })
+        锁定该 namespace::name 的全部版本行（按主键顺序，并发切换同一 Agent 时依次执行），
+        两次保存都经过 save()，派生数据（快照、变更日志、命名空间计数、发布文件、缓存）照常维护。
 
-            if not isinstance(self.provider['organization'], str):
-                raise ValidationError({
-                    'provider': "provider.organization 必须是字符串"
-                })
+        Returns:
+            (本版本的最新实例, 被取消默认的版本列表)
+        """
+        with transaction.atomic():
+            rows = AgentCard.objects.select_for_update().filter(
+                namespace_id=self.namespace_id, name=self.name
+            ).order_by('pk').values_list('pk', 'is_default_version')
+            previous_ids = [pk for pk, is_default in rows if is_default and pk != self.pk]
+
+            demoted = list(AgentCard.objects.filter(pk__in=previous_ids))
+            for card in demoted:
+                card.is_default_version = False
+                if updated_by is not None:
+                    card.updated_by = updated_by
+                card.save(update_fields=['is_default_version', 'updated_by', 'updated_at'])
+
+            card = AgentCard.objects.select_related('namespace').get(pk=self.pk)
+            if not card.is_default_version:
+                card.is_default_version = True
+                if updated_by is not None:
+                    card.updated_by = updated_by
+                card.save(update_fields=['is_default_version', 'updated_by', 'updated_at'])
+        return card, demoted
 
-            if not isinstance(self.provider['url'], str):
-                raise ValidationError({
-                    'provider': "provider.url 必须是字符串"
-                })
+    # ========================================
+    # 语义化版本
+    # ========================================
 
-        # 验证8：additionalInterfaces（可选，AgentInterface 对象数组）
-        if self.additional_interfaces:
-            if not isinstance(self.additional_interfaces, list):
-                raise ValidationError({
-                    'additional_interfaces': "additionalInterfaces 必须是一个数组"
-                })
+    VERSION_FIELDS = ['version_major', 'version_minor', 'version_patch', 'version_prerelease']
 
-            for idx, interface in enumerate(self.additional_interfaces):
-                if not isinstance(interface, dict):
-                    raise ValidationError({
-                        'additional_interfaces': f"additionalInterfaces[{idx}] 必须是一个对象"
-                    })
+    def set_version_components(self):
+        """由 version 解析语义化版本分量（无法解析时全部置空）"""
+        components = parse_semver(self.version)
+        (self.version_major, self.version_minor,
+         self.version_patch, self.version_prerelease) = components or (None, None, None, None)
 
-                if 'url' not in interface:
-                    raise ValidationError({
-                        'additional_interfaces': f"additionalInterfaces[{idx}] 必须包含 'url' 字段"
-                    })
+    # ========================================
+    # A2A 快照
+    # ========================================
 
-                if 'transport' not in interface:
-                    raise ValidationError({
-                        'additional_interfaces': f"additionalInterfaces[{idx}] 必须包含 'transport' 字段"
-                    })
+    SNAPSHOT_FIELDS = ['a2a_snapshot', 'a2a_snapshot_bytes', 'a2a_snapshot_error']
 
-                # transport 必须是有效值
-                valid_transports = ['JSONRPC', 'GRPC', 'HTTP+JSON']
-                if interface['transport'] not in valid_transports:
-                    raise ValidationError({
-                        'additional_interfaces': (
-                            f"additionalInterfaces[{idx}].transport 必须是以下值之一: "
-                            f"{', '.join(valid_transports)}"
-                        )
-                    })
+    # 不出现在快照中的字段（只在 include_metadata 时输出，读取时由实例生成）
+    METADATA_FIELDS = frozenset([
+        'is_default_version', 'is_active', 'updated_by', 'updated_by_id', 'updated_at',
+    ])
 
-        # 验证9：securitySchemes（可选，但如果存在必须是对象）
-        if self.security_schemes:
-            if not isinstance(self.security_schemes, dict):
-                raise ValidationError({
-                    'security_schemes': "securitySchemes 必须是一个对象"
-                })
+    @staticmethod
+    def encode_snapshot(card: dict) -> bytes:
+        """
+        将 AgentCard JSON 编码为字节
 
-            # 每个 scheme 应该有 type 字段
-            valid_security_types = ['APIKey', 'HTTPAuth', 'OAuth2', 'OpenIdConnect', 'MutualTLS']
-            for scheme_name, scheme_def in self.security_schemes.items():
-                if not isinstance(scheme_def, dict):
-                    raise ValidationError({
-                        'security_schemes': f"securitySchemes['{scheme_name}'] 必须是一个对象"
-                    })
+        编码参数与 DRF JSONRenderer 的默认输出一致（紧凑分隔符、保留 Unicode），
+        保证直接返回快照字节与经过渲染器输出的响应体完全相同。
+        """
+        text = json.dumps(card, ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+        return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode('utf-8')
 
-                if 'type' not in scheme_def:
-                    raise ValidationError({
-                        'security_schemes': f"securitySchemes['{scheme_name}'] 必须包含 'type' 字段"
-                    })
+    def has_snapshot(self) -> bool:
+        """快照是否已生成（有效快照或已记录验证错误）"""
+        return self.a2a_snapshot_bytes is not None or bool(self.a2a_snapshot_error)
 
-                if scheme_def['type'] not in valid_security_types:
-                    raise ValidationError({
-                        'security_schemes': (
-                            f"securitySchemes['{scheme_name}'].type 必须是以下值之一: "
-                            f"{', '.join(valid_security_types)}"
-                        )
-                    })
+    def refresh_snapshot(self, commit: bool = True, renderer=None):
+        """
+        重新生成 A2A 快照
 
-        # 验证10：security（可选，但如果存在必须是数组）
-        if self.security:
-            if not isinstance(self.security, list):
-                raise ValidationError({
-                    'security': "security 必须是一个数组"
-                })
+        Args:
+            commit: 是否立即写回数据库（使用 QuerySet.update，不触发 save()）
+            renderer: 批量刷新时共享的 AgentCardRenderer（为空时单独渲染本卡片）
+        """
+        from .rendering import AgentCardRenderer
+        renderer = renderer or AgentCardRenderer([self])
+        try:
+            card = renderer.render(self, validate=True)
+        except ValidationError as e:
+            self.a2a_snapshot = None
+            self.a2a_snapshot_bytes = None
+            self.a2a_snapshot_error = '\n'.join(e.messages)
+        else:
+            self.a2a_snapshot = card
+            self.a2a_snapshot_bytes = self.encode_snapshot(card)
+            self.a2a_snapshot_error = ''
+
+        if commit and self.pk:
+            AgentCard.objects.filter(pk=self.pk).update(
+                **{field: getattr(self, field) for field in self.SNAPSHOT_FIELDS}
+            )
 
-            for idx, requirement in enumerate(self.security):
-                if not isinstance(requirement, dict):
-                    raise ValidationError({
-                        'security': f"security[{idx}] 必须是一个对象"
-                    })
+    def ensure_snapshot(self):
+        """
+        确保快照已生成（兼容快照字段上线前写入的历史数据）
 
-    def save(self, *args, **kwargs):
+        如果实例使用了 only()/defer() 加载，先完整加载一次再生成，
+        避免逐个字段延迟查询。
         """
-        保存前的处理逻辑
+        if self.has_snapshot():
+            return
+        card = AgentCard.objects.get(pk=self.pk) if self.get_deferred_fields() else self
+        card.refresh_snapshot(commit=True)
+        for field in self.SNAPSHOT_FIELDS:
+            setattr(self, field, getattr(card, field))
+
+    def get_a2a_snapshot(self, include_metadata: bool = False) -> dict:
         """
-        # 完整验证
-        self.full_clean()
-        super().save(*args, **kwargs)
+        返回物化的标准 AgentCard JSON
+
+        Args:
+            include_metadata: 是否附加内部元数据（元数据不进入快照，读取时拼接）
+
+        Raises:
+            ValidationError: 如果 AgentCard 不符合 A2A 协议必填字段要求
+        """
+        self.ensure_snapshot()
+        if self.a2a_snapshot_error:
+            raise ValidationError(self.a2a_snapshot_error)
+
+        card = dict(self.a2a_snapshot)
+        if include_metadata:
+            card['_metadata'] = {
+                'namespace': self.namespace_id,
+                'isDefaultVersion': self.is_default_version,
+                'isActive': self.is_active,
+                'createdAt': self.created_at.isoformat(),
+                'updatedAt': self.updated_at.isoformat(),
+            }
+        return card
 
     # ========================================
     # 业务方法
@@ -1110,90 +1402,59 @@ class AgentCard(models.Model):
         - to_dict_raw(): 数据库有什么就导出什么，不验证 A2A 协议
         - to_agentcard_json(): 严格验证 A2A 协议，只导出完整的 AgentCard
 
+        批量导出请直接使用 documents.rendering.AgentCardRenderer（查询次数固定）。
+
         Args:
             include_metadata: 是否包含内部元数据（namespace, created_at 等）
 
         Returns:
             包含所有数据库字段的字典（可能不完整，不保证符合 A2A 协议）
         """
-        # 基本字段（按照 A2A 协议结构组织，但不验证）
-        card = {
-            'protocolVersion': self.protocol_version,
-            'name': self.name,
-            'description': self.description,
-            'url': self.url,
-            'preferredTransport': self.preferred_transport,
-            'version': self.version,
-            'defaultInputModes': self.default_input_modes,
-            'defaultOutputModes': self.default_output_modes,
-            'skills': self.skills,
-        }
+        from .rendering import AgentCardRenderer
+        return AgentCardRenderer([self]).render(self, raw=True, include_metadata=include_metadata)
 
-        # 组装 capabilities 对象
-        capabilities = {}
-
-        # 布尔能力
-        if self.capability_streaming:
-            capabilities['streaming'] = True
-        if self.capability_push_notifications:
-            capabilities['pushNotifications'] = True
-        if self.capability_state_transition_history:
-            capabilities['stateTransitionHistory'] = True
-
-        # extensions 数组
-        extensions = []
-        for ext in self.extensions.order_by('order', 'uri'):
-            ext_dict = {'uri': ext.uri}
-            if ext.description:
-                ext_dict['description'] = ext.description
-            if ext.required:
-                ext_dict['required'] = True
-            if ext.params:
-                ext_dict['params'] = ext.params
-            extensions.append(ext_dict)
-
-        if extensions:
-            capabilities['extensions'] = extensions
-
-        # capabilities（即使为空也输出）
-        card['capabilities'] = capabilities
-
-        # 可选字段（仅在有值时添加）
-        if self.provider:
-            card['provider'] = self.provider
-        if self.icon_url:
-            card['iconUrl'] = self.icon_url
-        if self.documentation_url:
-            card['documentationUrl'] = self.documentation_url
-        if self.additional_interfaces:
-            card['additionalInterfaces'] = self.additional_interfaces
-        if self.security_schemes:
-            card['securitySchemes'] = self.security_schemes
-        if self.security:
-            card['security'] = self.security
-        if self.supports_authenticated_extended_card:
-            card['supportsAuthenticatedExtendedCard'] = True
-        if self.signatures:
-            card['signatures'] = self.signatures
-
-        # 可选：添加内部元数据
-        if include_metadata:
-            card['_metadata'] = {
-                'namespace': self.namespace.id,
-                'isDefaultVersion': self.is_default_version,
-                'isActive': self.is_active,
-                'createdAt': self.created_at.isoformat() if self.created_at else None,
-                'updatedAt': self.updated_at.isoformat() if self.updated_at else None,
-                'createdBy': self.created_by.username if self.created_by else None,
-                'updatedBy': self.updated_by.username if self.updated_by else None,
-            }
+    def get_a2a_errors(self) -> dict:
+        """
+        检查 A2A 协议必填字段（不查询数据库）
 
-        return card
+        策略：
+        - 数据库层（clean）：允许渐进式录入，只验证格式
+        - 预览层（validate=False）：显示当前数据状态，允许不完整
+        - 导出层（validate=True）：严格验证必填字段，确保符合 A2A 协议
+
+        Returns:
+            {字段名: 错误信息}，为空表示必填字段完整
+        """
+        errors = {}
+
+        # 1. 基本字段（字符串类型，不能为空）
+        if not self.name or not self.name.strip():
+            errors['name'] = "name 是 A2A 协议必填字段，不能为空"
+        if not self.description or not self.description.strip():
+            errors['description'] = "description 是 A2A 协议必填字段，不能为空"
+        if not self.url or not self.url.strip():
+            errors['url'] = "url 是 A2A 协议必填字段，不能为空"
+
+        # 2. defaultInputModes（必填，不能为空数组）
+        if not self.default_input_modes or len(self.default_input_modes) == 0:
+            errors['defaultInputModes'] = "defaultInputModes 是 A2A 协议必填字段，不能为空数组"
+
+        # 3. defaultOutputModes（必填，不能为空数组）
+        if not self.default_output_modes or len(self.default_output_modes) == 0:
+            errors['defaultOutputModes'] = "defaultOutputModes 是 A2A 协议必填字段，不能为空数组"
+
+        # 4. skills（必填，不能为空数组）
+        if not self.skills or len(self.skills) == 0:
+            errors['skills'] = "skills 是 A2A 协议必填字段，不能为空数组"
+
+        return errors
 
     def to_agentcard_json(self, include_metadata: bool = False, validate: bool = False) -> dict:
         """
         导出为标准 AgentCard JSON 格式（用于 API 响应和预览）
 
+        批量导出请直接使用 documents.rendering.AgentCardRenderer（查询次数固定）。
+
         Args:
             include_metadata: 是否包含内部元数据（namespace, created_at 等）
             validate: 是否严格验证 A2A 协议必填字段
@@ -1206,118 +1467,75 @@ class AgentCard(models.Model):
         Raises:
             ValidationError: 如果 validate=True 且 AgentCard 不符合 A2A 协议必填字段要求
         """
-        # ========================================
-        # 严格 A2A 协议验证（仅在 validate=True 时）
-        # ========================================
-        # 策略：
-        # - 数据库层（clean）：允许渐进式录入，只验证格式
-        # - 预览层（validate=False）：显示当前数据状态，允许不完整
-        # - 导出层（validate=True）：严格验证必填字段，确保符合 A2A 协议
+        from .rendering import AgentCardRenderer
+        return AgentCardRenderer([self]).render(
+            self, include_metadata=include_metadata, validate=validate
+        )
 
-        if validate:
-            errors = {}
-
-            # 1. 基本字段（字符串类型，不能为空）
-            if not self.name or not self.name.strip():
-                errors['name'] = "name 是 A2A 协议必填字段，不能为空"
-            if not self.description or not self.description.strip():
-                errors['description'] = "description 是 A2A 协议必填字段，不能为空"
-            if not self.url or not self.url.strip():
-                errors['url'] = "url 是 A2A 协议必填字段，不能为空"
-
-            # 2. defaultInputModes（必填，不能为空数组）
-            if not self.default_input_modes or len(self.default_input_modes) == 0:
-                errors['defaultInputModes'] = "defaultInputModes 是 A2A 协议必填字段，不能为空数组"
-
-            # 3. defaultOutputModes（必填，不能为空数组）
-            if not self.default_output_modes or len(self.default_output_modes) == 0:
-                errors['defaultOutputModes'] = "defaultOutputModes 是 A2A 协议必填字段，不能为空数组"
-
-            # 4. skills（必填，不能为空数组）
-            if not self.skills or len(self.skills) == 0:
-                errors['skills'] = "skills 是 A2A 协议必填字段，不能为空数组"
-
-            # 如果有错误，抛出异常
-            if errors:
-                error_msg = "AgentCard 不符合 A2A 协议要求，无法导出：\n"
-                for field, msg in errors.items():
-                    error_msg += f"  - {field}: {msg}\n"
-                error_msg += "\n请先在 Django Admin 中补充完整所有必填字段。"
-                raise ValidationError(error_msg)
+    # AgentCard JSON（camelCase）-> 模型字段（snake_case）
+    JSON_FIELD_MAPPING = {
+        'protocolVersion': 'protocol_version',
+        'preferredTransport': 'preferred_transport',
+        'defaultInputModes': 'default_input_modes',
+        'defaultOutputModes': 'default_output_modes',
+        'iconUrl': 'icon_url',
+        'documentationUrl': 'documentation_url',
+        'additionalInterfaces': 'additional_interfaces',
+        'securitySchemes': 'security_schemes',
+        'supportsAuthenticatedExtendedCard': 'supports_authenticated_extended_card',
+        'domainExtensions': 'domain_extensions',
+    }
+    JSON_DIRECT_FIELDS = ['name', 'version', 'description', 'url', 'skills',
+                          'provider', 'security', 'signatures']
+    JSON_CAPABILITY_MAPPING = {
+        'streaming': 'capability_streaming',
+        'pushNotifications': 'capability_push_notifications',
+        'stateTransitionHistory': 'capability_state_transition_history',
+    }
 
-        # ========================================
-        # 构建 AgentCard JSON
-        # ========================================
-        card = {
-            'protocolVersion': self.protocol_version,
-            'name': self.name,
-            'description': self.description,
-            'url': self.url,
-            'preferredTransport': self.preferred_transport,
-            'version': self.version,
-            'defaultInputModes': self.default_input_modes,
-            'defaultOutputModes': self.default_output_modes,
-            'skills': self.skills,
-        }
+    @classmethod
+    def parse_agentcard_json(cls, data: dict) -> tuple[dict, list[dict]]:
+        """
+        解析 AgentCard JSON（不修改传入的 data，不查询数据库）
 
-        # 组装 capabilities 对象（使用新字段结构）
-        capabilities = {}
-
-        # 布尔能力
-        if self.capability_streaming:
-            capabilities['streaming'] = True
-        if self.capability_push_notifications:
-            capabilities['pushNotifications'] = True
-        if self.capability_state_transition_history:
-            capabilities['stateTransitionHistory'] = True
-
-        # extensions 数组
-        extensions = []
-        for ext in self.extensions.order_by('order', 'uri'):
-            ext_dict = {'uri': ext.uri}
-            if ext.description:
-                ext_dict['description'] = ext.description
-            if ext.required:
-                ext_dict['required'] = True
-            if ext.params:
-                ext_dict['params'] = ext.params
-            extensions.append(ext_dict)
-
-        if extensions:
-            capabilities['extensions'] = extensions
-
-        # capabilities 是 A2A 协议必填字段，必须始终输出（即使为空对象）
-        card['capabilities'] = capabilities
-
-        # 添加可选字段（仅在有值时添加）
-        if self.provider:
-            card['provider'] = self.provider
-        if self.icon_url:
-            card['iconUrl'] = self.icon_url
-        if self.documentation_url:
-            card['documentationUrl'] = self.documentation_url
-        if self.additional_interfaces:
-            card['additionalInterfaces'] = self.additional_interfaces
-        if self.security_schemes:
-            card['securitySchemes'] = self.security_schemes
-        if self.security:
-            card['security'] = self.security
-        if self.supports_authenticated_extended_card:
-            card['supportsAuthenticatedExtendedCard'] = True
-        if self.signatures:
-            card['signatures'] = self.signatures
-
-        # 可选：添加内部元数据（非 A2A 标准，用于内部系统）
-        if include_metadata:
-            card['_metadata'] = {
-                'namespace': self.namespace.id,
-                'isDefaultVersion': self.is_default_version,
-                'isActive': self.is_active,
-                'createdAt': self.created_at.isoformat(),
-                'updatedAt': self.updated_at.isoformat(),
-            }
+        Returns:
+            (模型字段 kwargs, capabilities.extensions 列表)
 
-        return card
+        Raises:
+            ValidationError: data 或 capabilities 结构无效
+        """
+        if not isinstance(data, dict):
+            raise ValidationError('AgentCard JSON 必须是一个对象')
+
+        kwargs = {}
+        for json_key, model_key in cls.JSON_FIELD_MAPPING.items():
+            if json_key in data:
+                kwargs[model_key] = data[json_key]
+        for key in cls.JSON_DIRECT_FIELDS:
+            if key in data:
+                kwargs[key] = data[key]
+
+        if not isinstance(kwargs.get('domain_extensions', {}), dict):
+            raise ValidationError({'domain_extensions': 'domainExtensions 必须是一个对象'})
+
+        # capabilities：布尔能力映射到 capability_* 字段，extensions 映射到 AgentExtension
+        capabilities = data.get('capabilities') or {}
+        if not isinstance(capabilities, dict):
+            raise ValidationError({'capabilities': 'capabilities 必须是一个对象'})
+        for json_key, model_key in cls.JSON_CAPABILITY_MAPPING.items():
+            if json_key in capabilities:
+                kwargs[model_key] = bool(capabilities[json_key])
+
+        extensions = capabilities.get('extensions') or []
+        if not isinstance(extensions, list) or not all(
+            isinstance(ext, dict) and isinstance(ext.get('uri'), str) and ext.get('uri')
+            for ext in extensions
+        ):
+            raise ValidationError({
+                'capabilities': 'capabilities.extensions 必须是对象数组，且每个扩展都包含 uri'
+            })
+
+        return kwargs, extensions
 
     @classmethod
     def from_agentcard_json(cls, data: dict, namespace_id: str, created_by=None):
@@ -1330,48 +1548,43 @@ class AgentCard(models.Model):
             created_by: 创建者
 
         Returns:
-            AgentCard 实例（未保存）
+            AgentCard 实例（未保存）。capabilities.extensions 保存在
+            instance.pending_extensions 中，保存卡片后通过 save_pending_extensions() 写入。
+            批量导入请使用 documents.importing（共享查询、bulk_create）。
         """
         namespace = Namespace.objects.get(id=namespace_id)
+        kwargs, extensions = cls.parse_agentcard_json(data)
 
-        # 提取 L2 扩展（如果存在）
-        domain_extensions = data.pop('domainExtensions', {})
-
-        # 字段名映射（JSON camelCase -> Django snake_case）
-        field_mapping = {
-            'protocolVersion': 'protocol_version',
-            'preferredTransport': 'preferred_transport',
-            'defaultInputModes': 'default_input_modes',
-            'defaultOutputModes': 'default_output_modes',
-            'iconUrl': 'icon_url',
-            'documentationUrl': 'documentation_url',
-            'additionalInterfaces': 'additional_interfaces',
-            'securitySchemes': 'security_schemes',
-            'supportsAuthenticatedExtendedCard': 'supports_authenticated_extended_card',
-        }
-
-        # 转换字段名
-        kwargs = {}
-        for json_key, model_key in field_mapping.items():
-            if json_key in data:
-                kwargs[model_key] = data[json_key]
-
-        # 直接映射的字段
-        for key in ['name', 'version', 'description', 'url', 'capabilities',
-                    'skills', 'provider', 'security', 'signatures']:
-            if key in data:
-                kwargs[key] = data[key]
-
-        # 创建实例
         instance = cls(
             namespace=namespace,
-            domain_extensions=domain_extensions,
             created_by=created_by,
             **kwargs
         )
-
+        instance.pending_extensions = extensions
         return instance
 
+    def save_pending_extensions(self):
+        """
+        写入 from_agentcard_json() 解析出的扩展（卡片必须已保存）
+
+        扩展 URI 与已注册的 Schema 匹配时自动关联。
+        """
+        extensions = getattr(self, 'pending_extensions', None) or []
+        schemas = SchemaRegistry.objects.in_bulk(
+            [ext['uri'] for ext in extensions], field_name='schema_uri'
+        ) if extensions else {}
+        for order, ext in enumerate(extensions):
+            AgentExtension.objects.create(
+                agent_card=self,
+                uri=ext['uri'],
+                description=ext.get('description', ''),
+                required=bool(ext.get('required', False)),
+                params=ext.get('params') or {},
+                order=order,
+                schema=schemas.get(ext['uri']),
+            )
+        self.pending_extensions = []
+
 
 class AgentExtension(models.Model):
     """
@@ -1518,6 +1731,152 @@ class AgentExtension(models.Model):
         super().save(*args, **kwargs)
 
 
+class ExtensionViolation(models.Model):
+    """
+    扩展数据违规记录
+
+    修改 Schema / 字段后，后台任务用新的定义重新验证引用该 Schema 的扩展（见 revalidation.py），
+    不符合定义的扩展在此记录全部错误；扩展重新变为有效后删除记录。每个扩展最多一条记录。
+    """
+
+    extension = models.OneToOneField(
+        AgentExtension,
+        on_delete=models.CASCADE,
+        related_name='violation',
+        help_text="违规的扩展"
+    )
+    schema = models.ForeignKey(
+        SchemaRegistry,
+        on_delete=models.CASCADE,
+        related_name='violations',
+        help_text="验证时使用的 Schema"
+    )
+    schema_version = models.DateTimeField(help_text="验证时的 Schema 版本（SchemaRegistry.updated_at）")
+    errors = models.JSONField(default=list, help_text="验证错误 [{\"path\": ..., \"message\": ...}]")
+    checked_at = models.DateTimeField(auto_now=True, help_text="验证时间")
+
+    class Meta:
+        db_table = 'extension_violations'
+        verbose_name = '扩展违规'
+        verbose_name_plural = '扩展违规'
+        indexes = [
+            models.Index(fields=['schema', 'extension']),
+        ]
+
+    def __str__(self):
+        return f"{self.extension_id}: {len(self.errors)} 个错误"
+
+
+class AgentSkill(models.Model):
+    """
+    AgentCard.skills 的关系化索引（只读投影）
+
+    skills 以 JSON 数组保存在 AgentCard 上，"哪些 Agent 提供技能 X / 标签 Y" 需要逐个扫描。
+    每次保存 AgentCard（及批量导入）时将技能和标签同步为带索引的行（见 sync_cards），
+    查询时通过索引反查 AgentCard。
+
+    只索引带字符串 id 的技能（A2A 协议要求 AgentSkill.id），同一卡片内重复的 id 只保留第一个。
+    """
+
+    agent_card = models.ForeignKey(
+        AgentCard,
+        on_delete=models.CASCADE,
+        related_name='skill_index',
+        help_text="所属 AgentCard"
+    )
+    skill_id = models.TextField(help_text="AgentSkill.id")
+    name = models.TextField(blank=True, help_text="AgentSkill.name")
+
+    class Meta:
+        db_table = 'agent_skills'
+        verbose_name = 'Agent 技能索引'
+        verbose_name_plural = 'Agent 技能索引'
+        constraints = [
+            models.UniqueConstraint(fields=['agent_card', 'skill_id'], name='unique_agent_skill'),
+        ]
+        indexes = [
+            models.Index(fields=['skill_id', 'agent_card']),
+        ]
+
+    def __str__(self):
+        return f"{self.skill_id} ({self.agent_card_id})"
+
+    @staticmethod
+    def project(skills) -> list:
+        """
+        skills JSON -> [(skill_id, name, [tag, ...]), ...]
+
+        与迁移 0015 中的 SQL 回填规则一致：跳过非对象和没有字符串 id 的技能，
+        只保留字符串标签，同一技能内的重复标签去重。
+        """
+        rows = []
+        seen = set()
+        for skill in skills if isinstance(skills, list) else []:
+            if not isinstance(skill, dict):
+                continue
+            skill_id = skill.get('id')
+            if not isinstance(skill_id, str) or not skill_id or skill_id in seen:
+                continue
+            seen.add(skill_id)
+            name = skill.get('name') if isinstance(skill.get('name'), str) else ''
+            tags = skill.get('tags') if isinstance(skill.get('tags'), list) else []
+            rows.append((skill_id, name, list(dict.fromkeys(t for t in tags if isinstance(t, str)))))
+        return rows
+
+    @classmethod
+    def sync_cards(cls, cards):
+        """
+        重建一组 AgentCard 的技能和标签行（固定 4 次查询：2 次删除 + 2 次 bulk_create）
+        """
+        card_ids = [card.pk for card in cards]
+        if not card_ids:
+            return
+        AgentSkillTag.objects.filter(agent_card_id__in=card_ids).delete()
+        cls.objects.filter(agent_card_id__in=card_ids).delete()
+
+        skills = []
+        tags = []
+        for card in cards:
+            for skill_id, name, skill_tags in cls.project(card.skills):
+                skills.append(cls(agent_card_id=card.pk, skill_id=skill_id, name=name))
+                tags.extend(
+                    AgentSkillTag(agent_card_id=card.pk, skill_id=skill_id, tag=tag)
+                    for tag in skill_tags
+                )
+        cls.objects.bulk_create(skills)
+        AgentSkillTag.objects.bulk_create(tags)
+
+
+class AgentSkillTag(models.Model):
+    """
+    AgentSkill.tags 的关系化索引（每个 卡片 × 技能 × 标签 一行，由 AgentSkill.sync_cards 维护）
+    """
+
+    agent_card = models.ForeignKey(
+        AgentCard,
+        on_delete=models.CASCADE,
+        related_name='skill_tags',
+        help_text="所属 AgentCard"
+    )
+    skill_id = models.TextField(help_text="AgentSkill.id")
+    tag = models.TextField(help_text="AgentSkill.tags 中的一个标签")
+
+    class Meta:
+        db_table = 'agent_skill_tags'
+        verbose_name = 'Agent 技能标签索引'
+        verbose_name_plural = 'Agent 技能标签索引'
+        constraints = [
+            models.UniqueConstraint(fields=['agent_card', 'skill_id', 'tag'], name='unique_agent_skill_tag'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'agent_card']),
+            models.Index(fields=['skill_id', 'tag']),
+        ]
+
+    def __str__(self):
+        return f"{self.skill_id}#{self.tag} ({self.agent_card_id})"
+
+
 class AgentCase(models.Model):
     """
     Agent测试用例（Test Case）
@@ -1578,6 +1937,12 @@ class AgentCase(models.Model):
         help_text="结构化的查询结果（JSON）"
     )
 
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="由数据库触发器维护：case_name、query_key、query_description"
+    )
+
     # 执行结果字段
     outcome_type = models.CharField(
         max_length=32,
@@ -1652,10 +2017,12 @@ class AgentCase(models.Model):
         verbose_name_plural = 'Agent Test Cases'
         ordering = ['-created_at']
         indexes = [
+            models.Index(fields=['created_at', 'id']),  # 列表默认排序 / 键集分页
             models.Index(fields=['agent_card', 'is_ground_truth']),
             models.Index(fields=['agent_card', 'case_score']),
             models.Index(fields=['agent_card', 'agent_version']),
             models.Index(fields=['query_key']),
+            GinIndex(fields=['search_vector'], name='agent_cases_search_gin'),
             models.Index(fields=['outcome_type']),
             models.Index(fields=['is_ground_truth']),
         ]
@@ -1664,6 +2031,11 @@ class AgentCase(models.Model):
         agent_info = f"{self.agent_card.name}" if self.agent_card else "未分配"
         return f"{self.case_name} ({agent_info})"
 
+    def save(self, *args, **kwargs):
+        # post_save 中维护的命名空间计数与 Case 在同一事务中写入
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     def clean(self):
         super().clean()
 
@@ -1705,3 +2077,278 @@ class AgentCase(models.Model):
                             f"可用版本: {version_list}"
                         )
                     })
+
+
+class NamespaceStats(models.Model):
+    """
+    命名空间计数器（反规范化）
+
+    命名空间列表和 Admin 通过 select_related('stats') 读取计数，不再逐行 COUNT。
+    计数在 AgentCard / AgentCase 写入的同一事务中以增量 UPDATE 维护（见 signals.py、importing.py），
+    行锁保证并发写入不丢失增量；绕过模型的写入（QuerySet.update()、手工 SQL）后
+    使用 reconcile_namespace_stats 命令校正。
+
+    单独建表而不是放在 Namespace 上：保存 Namespace 时不会用旧值覆盖计数。
+    """
+
+    COUNTER_FIELDS = ['agent_card_count', 'active_card_count', 'default_card_count', 'case_count']
+
+    namespace = models.OneToOneField(
+        Namespace,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        help_text="所属命名空间"
+    )
+    agent_card_count = models.IntegerField(default=0, help_text="AgentCard 总数")
+    active_card_count = models.IntegerField(default=0, help_text="启用的 AgentCard 数量")
+    default_card_count = models.IntegerField(default=0, help_text="默认版本的 AgentCard 数量")
+    case_count = models.IntegerField(default=0, help_text="关联到本命名空间 AgentCard 的 Case 数量")
+
+    class Meta:
+        db_table = 'namespace_stats'
+        verbose_name = '命名空间计数'
+        verbose_name_plural = '命名空间计数'
+
+    def __str__(self):
+        return f"{self.namespace_id}: {self.agent_card_count} AgentCard, {self.case_count} Case"
+
+    @staticmethod
+    def card_deltas(namespace_id, is_active, is_default_version, sign: int = 1) -> dict:
+        """一个 AgentCard 对计数的贡献（sign=-1 表示移除）"""
+        return {namespace_id: {
+            'agent_card_count': sign,
+            'active_card_count': sign if is_active else 0,
+            'default_card_count': sign if is_default_version else 0,
+        }}
+
+    @staticmethod
+    def merge(*deltas) -> dict:
+        """合并多个 {namespace_id: {field: delta}}"""
+        merged = {}
+        for delta in deltas:
+            for namespace_id, changes in delta.items():
+                target = merged.setdefault(namespace_id, {})
+                for field, value in changes.items():
+                    target[field] = target.get(field, 0) + value
+        return merged
+
+    @classmethod
+    def apply(cls, deltas: dict):
+        """
+        增量更新计数（调用方应处于事务中）
+
+        按命名空间 ID 顺序更新，避免并发事务交叉加锁死锁；
+        计数行不存在时（如迁移前创建的命名空间）改为重新统计该命名空间。
+
+        Args:
+            deltas: {namespace_id: {field: delta}}
+        """
+        for namespace_id in sorted(deltas):
+            changes = {
+                field: models.F(field) + value
+                for field, value in deltas[namespace_id].items() if value
+            }
+            if changes and not cls.objects.filter(pk=namespace_id).update(**changes):
+                cls.reconcile([namespace_id])
+
+    @classmethod
+    def compute(cls, namespace_ids=None) -> dict:
+        """
+        从 AgentCard / AgentCase 重新统计（两次 GROUP BY 查询）
+
+        Returns:
+            {namespace_id: {field: count}}，没有任何记录的命名空间不在结果中
+        """
+        cards = AgentCard.objects.order_by()
+        cases = AgentCase.objects.filter(agent_card__isnull=False).order_by()
+        if namespace_ids is not None:
+            cards = cards.filter(namespace_id__in=namespace_ids)
+            cases = cases.filter(agent_card__namespace_id__in=namespace_ids)
+
+        counts = {}
+        for row in cards.values('namespace_id').annotate(
+            total=models.Count('id'),
+            active=models.Count('id', filter=models.Q(is_active=True)),
+            default=models.Count('id', filter=models.Q(is_default_version=True)),
+        ):
+            counts[row['namespace_id']] = {
+                'agent_card_count': row['total'],
+                'active_card_count': row['active'],
+                'default_card_count': row['default'],
+            }
+        for row in cases.values('agent_card__namespace_id').annotate(total=models.Count('id')):
+            counts.setdefault(row['agent_card__namespace_id'], {})['case_count'] = row['total']
+        return counts
+
+    @classmethod
+    def reconcile(cls, namespace_ids=None) -> list:
+        """
+        重新统计并校正计数
+
+        先锁定计数行（SELECT ... FOR NO KEY UPDATE）再统计：并发写入的增量会等待本事务提交后
+        在校正后的值上累加，已持有行锁的写入事务提交后才会被统计，两种情况都不会丢失或重复。
+
+        Returns:
+            计数被校正的命名空间 ID 列表
+        """
+        with transaction.atomic():
+            namespaces = Namespace.objects.all()
+            if namespace_ids is not None:
+                namespaces = namespaces.filter(pk__in=namespace_ids)
+            namespace_ids = sorted(namespaces.values_list('pk', flat=True))
+            cls.objects.bulk_create(
+                [cls(namespace_id=namespace_id) for namespace_id in namespace_ids],
+                ignore_conflicts=True,
+            )
+            rows = list(
+                cls.objects.select_for_update(no_key=True).filter(pk__in=namespace_ids).order_by('pk')
+            )
+            counts = cls.compute(namespace_ids)
+
+            changed = []
+            for row in rows:
+                actual = counts.get(row.pk, {})
+                if any(getattr(row, field) != actual.get(field, 0) for field in cls.COUNTER_FIELDS):
+                    for field in cls.COUNTER_FIELDS:
+                        setattr(row, field, actual.get(field, 0))
+                    changed.append(row)
+            cls.objects.bulk_update(changed, cls.COUNTER_FIELDS)
+        return [row.pk for row in changed]
+
+
+class TxidCurrent(models.Func):
+    """
+    PostgreSQL txid_current()：当前事务 ID（用作 AgentCardChange.txid 的数据库默认值）
+
+    其他数据库没有事务 ID，默认值为 NULL，变更流退化为按 seq 排序。
+    """
+    function = 'txid_current'
+    template = '%(function)s()'
+    output_field = models.BigIntegerField()
+
+    def as_sql(self, compiler, connection, **extra_context):
+        if connection.vendor != 'postgresql':
+            return 'NULL', []
+        return super().as_sql(compiler, connection, **extra_context)
+
+
+class AgentCardChange(models.Model):
+    """
+    AgentCard 变更日志（增量同步 / 变更流）
+
+    每次 AgentCard 或 AgentExtension 的写入追加一行，删除操作留下墓碑（tombstone），
+    镜像方通过 GET /api/agentcards/changes/?since=<cursor> 增量拉取。
+
+    游标为 (txid, seq) 而不是 updated_at：
+    - seq 是自增主键，但并发事务的 seq 分配顺序与提交顺序不一致
+    - txid 是写入事务的 ID（数据库默认值 txid_current()）。读取时只返回
+      txid < 当前快照 xmin 的行（这些事务都已结束），因此游标之前不会再出现新提交的行
+    """
+
+    OP_UPSERT = 'upsert'
+    OP_DELETE = 'delete'
+    OP_CHOICES = [
+        (OP_UPSERT, '创建/更新'),
+        (OP_DELETE, '删除'),
+    ]
+
+    TYPE_AGENTCARD = 'agentcard'
+    TYPE_EXTENSION = 'extension'
+    TYPE_CHOICES = [
+        (TYPE_AGENTCARD, 'AgentCard'),
+        (TYPE_EXTENSION, 'AgentExtension'),
+    ]
+
+    id = models.BigAutoField(primary_key=True, help_text="变更序号（seq）")
+    txid = models.BigIntegerField(
+        null=True,
+        editable=False,
+        db_default=TxidCurrent(),
+        help_text="写入事务 ID（PostgreSQL txid_current()）"
+    )
+    op = models.CharField(max_length=16, choices=OP_CHOICES)
+    object_type = models.CharField(max_length=16, choices=TYPE_CHOICES)
+
+    # 不使用外键：卡片删除后变更记录（墓碑）需要保留
+    agent_card_id = models.BigIntegerField(help_text="AgentCard ID")
+    namespace_id = models.CharField(max_length=128)
+    name = models.CharField(max_length=64)
+    version = models.CharField(max_length=32)
+    extension_uri = models.CharField(
+        max_length=512,
+        blank=True,
+        help_text="扩展 URI（object_type=extension 时）"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'agent_card_changes'
+        verbose_name = 'AgentCard 变更'
+        verbose_name_plural = 'AgentCard 变更'
+        ordering = ['txid', 'id']
+        indexes = [
+            models.Index(fields=['txid', 'id']),
+            models.Index(fields=['namespace_id', 'txid', 'id']),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.op} {self.object_type} {self.namespace_id}::{self.name}@{self.version}"
+
+    @classmethod
+    def record_cards(cls, cards, op: str = OP_UPSERT):
+        """
+        为一组 AgentCard 追加变更记录（一次 bulk_create）
+
+        Args:
+            cards: AgentCard 实例，或 (id, namespace_id, name, version) 元组
+        """
+        rows = []
+        for card in cards:
+            if isinstance(card, AgentCard):
+                card = (card.pk, card.namespace_id, card.name, card.version)
+            card_id, namespace_id, name, version = card
+            rows.append(cls(
+                op=op,
+                object_type=cls.TYPE_AGENTCARD,
+                agent_card_id=card_id,
+                namespace_id=namespace_id,
+                name=name,
+                version=version,
+            ))
+        if rows:
+            cls.objects.bulk_create(rows)
+
+    @classmethod
+    def record_extension_deleted(cls, extension):
+        """为删除的扩展追加墓碑"""
+        card = AgentCard.objects.filter(pk=extension.agent_card_id).values_list(
+            'namespace_id', 'name', 'version'
+        ).first()
+        if card is None:
+            return
+        cls.objects.create(
+            op=cls.OP_DELETE,
+            object_type=cls.TYPE_EXTENSION,
+            agent_card_id=extension.agent_card_id,
+            namespace_id=card[0],
+            name=card[1],
+            version=card[2],
+            extension_uri=extension.uri,
+        )
+
+    @classmethod
+    def record_extensions_deleted(cls, extensions):
+        """为删除的一组扩展追加墓碑（一次 bulk_create；extension.agent_card 应已加载）"""
+        cls.objects.bulk_create([
+            cls(
+                op=cls.OP_DELETE,
+                object_type=cls.TYPE_EXTENSION,
+                agent_card_id=extension.agent_card.pk,
+                namespace_id=extension.agent_card.namespace_id,
+                name=extension.agent_card.name,
+                version=extension.agent_card.version,
+                extension_uri=extension.uri,
+            )
+            for extension in extensions
+        ])
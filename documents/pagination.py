@@ -0,0 +1,185 @@
+"""
+分页
+
+默认仍使用全局的 PageNumberPagination（可浏览 API、需要总数的场景）。
+列表请求带上 ?cursor= 或 ?pagination=cursor 时切换为键集（keyset）分页：
+
+- 不执行 COUNT(*)，不使用 OFFSET：每页都是一次按索引的范围扫描，翻到多深都一样快
+- 游标是不透明的 base64 字符串，编码上一页最后一行的排序键
+- 排序键由视图的 keyset_ordering 声明，必须唯一且非空（通常以主键结尾），并有对应索引
+"""
+
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    游标值的 JSON 编码：datetime 保留微秒
+
+    DjangoJSONEncoder 把 datetime 截断到毫秒，以截断后的值定位会跳过与上一页最后一行
+    处于同一毫秒的行（如批量创建的 Case）。
+    """
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    """
+    键集分页（只向前翻页）
+
+    响应格式：
+        {"next": "http://.../?cursor=...", "results": [...]}
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    invalid_cursor_message = '无效的游标'
+
+    def __init__(self, ordering):
+        """
+        Args:
+            ordering: 排序字段元组，如 ('namespace_id', 'name', 'version', 'id') 或 ('-created_at', '-id')
+        """
+        self.ordering = tuple(ordering)
+        self.page_size = api_settings.PAGE_SIZE
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    # ========================================
+    # 游标编解码
+    # ========================================
+
+    def encode_cursor(self, obj) -> str:
+        values = [getattr(obj, field.lstrip('-')) for field in self.ordering]
+        raw = json.dumps(values, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, cursor: str, model) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values) -> Q:
+        """
+        (f1, f2, ..., fn) 在游标之后的条件（按各字段方向展开）：
+            f1 > v1 OR (f1 = v1 AND f2 > v2) OR ... OR (f1 = v1 AND ... AND fn > vn)
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    # ========================================
+    # 分页
+    # ========================================
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model)
+            # 首字段的闭区间条件：让数据库直接在索引上定位范围起点
+            first = self.ordering[0]
+            bound = 'lte' if first.startswith('-') else 'gte'
+            queryset = queryset.filter(
+                Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & self.after(values)
+            )
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    ViewSet 混入：按请求参数选择分页方式
+
+    - ?cursor=<游标> 或 ?pagination=cursor：键集分页（keyset_ordering）
+    - 否则，或带有 keyset_exclusive_params 中的参数时：全局默认分页（PageNumberPagination）
+    """
+    keyset_ordering = None
+
+    # 决定排序的参数：键集分页会把排序替换为 keyset_ordering，带上这些参数时改用页码分页
+    # （全文检索 q 按 ts_rank 相关度排序）
+    keyset_exclusive_params = ('q',)
+
+    def use_keyset_pagination(self):
+        params = self.request.query_params
+        if any(params.get(param) for param in self.keyset_exclusive_params):
+            return False
+        return bool(self.keyset_ordering) and (
+            KeysetPagination.cursor_query_param in params or params.get('pagination') == 'cursor'
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_keyset_pagination():
+                self._paginator = KeysetPagination(self.keyset_ordering)
+            else:
+                self._paginator = super().paginator
+        return self._paginator
+
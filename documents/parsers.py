@@ -0,0 +1,17 @@
+"""
+DRF 解析器
+"""
+
+from rest_framework.parsers import JSONParser
+
+from .patching import JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE
+
+
+class MergePatchParser(JSONParser):
+    """JSON Merge Patch（RFC 7386）请求体，见 patching.merge_patch()"""
+    media_type = MERGE_PATCH_MEDIA_TYPE
+
+
+class JSONPatchParser(JSONParser):
+    """JSON Patch（RFC 6902）请求体，见 patching.apply_json_patch()"""
+    media_type = JSON_PATCH_MEDIA_TYPE
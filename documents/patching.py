@@ -0,0 +1,172 @@
+"""
+JSON 文档补丁（服务端合并，避免客户端读取-修改-整体写回）
+
+- JSON Merge Patch（RFC 7386，application/merge-patch+json）：对象按键递归合并，null 删除键，
+  其他值（包括数组）整体替换
+- JSON Patch（RFC 6902，application/json-patch+json）：add / remove / replace / move / copy / test
+  操作序列，路径为 JSON Pointer（RFC 6901，如 /skills/3/description、/security_schemes/oauth）；
+  任何一个操作失败时整个补丁不生效
+
+补丁应用在调用方于事务中锁定的当前数据上（见 conditional.conditional_write），结果照常经过
+序列化器 / 模型验证后写入，因此并发的补丁不会互相覆盖。
+"""
+
+import copy
+import json
+
+MERGE_PATCH_MEDIA_TYPE = 'application/merge-patch+json'
+JSON_PATCH_MEDIA_TYPE = 'application/json-patch+json'
+
+
+class PatchError(ValueError):
+    """补丁文档格式错误（400）"""
+
+
+class PatchConflict(PatchError):
+    """补丁无法应用到当前数据：路径不存在或 test 操作不满足（409）"""
+
+
+def merge_patch(target, patch):
+    """
+    应用 JSON Merge Patch（RFC 7386）
+
+    Returns:
+        新的文档（不修改 target）
+    """
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+# ========================================
+# JSON Patch
+# ========================================
+
+JSON_PATCH_OPS = {'add', 'remove', 'replace', 'move', 'copy', 'test'}
+
+
+def parse_pointer(pointer) -> list:
+    """解析 JSON Pointer（RFC 6901）为路径分量列表"""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith('/')):
+        raise PatchError(f"无效的 JSON Pointer：{pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/')]
+
+
+def _array_index(container: list, token: str, pointer: str, allow_end: bool = False) -> int:
+    if allow_end and token == '-':
+        return len(container)
+    if not token.isdigit() or (token != '0' and token.startswith('0')):
+        raise PatchConflict(f"路径 {pointer} 中的数组下标无效：{token}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchConflict(f"路径 {pointer} 超出数组范围")
+    return index
+
+
+def _resolve(document, tokens: list, pointer: str):
+    """返回路径指向的值"""
+    value = document
+    for token in tokens:
+        if isinstance(value, dict):
+            if token not in value:
+                raise PatchConflict(f"路径不存在：{pointer}")
+            value = value[token]
+        elif isinstance(value, list):
+            value = value[_array_index(value, token, pointer)]
+        else:
+            raise PatchConflict(f"路径不存在：{pointer}")
+    return value
+
+
+def _parent(document, tokens: list, pointer: str):
+    if not tokens:
+        raise PatchError(f"操作不能作用于文档根：{pointer!r}")
+    parent = _resolve(document, tokens[:-1], pointer)
+    if not isinstance(parent, (dict, list)):
+        raise PatchConflict(f"路径不存在：{pointer}")
+    return parent, tokens[-1]
+
+
+def _add(document, tokens, pointer, value):
+    parent, token = _parent(document, tokens, pointer)
+    if isinstance(parent, dict):
+        parent[token] = value
+    else:
+        parent.insert(_array_index(parent, token, pointer, allow_end=True), value)
+
+
+def _remove(document, tokens, pointer):
+    parent, token = _parent(document, tokens, pointer)
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchConflict(f"路径不存在：{pointer}")
+        return parent.pop(token)
+    return parent.pop(_array_index(parent, token, pointer))
+
+
+def _json_equal(a, b) -> bool:
+    return json.dumps(a, sort_keys=True) == json.dumps(b, sort_keys=True)
+
+
+def apply_json_patch(document, operations):
+    """
+    应用 JSON Patch（RFC 6902）
+
+    Args:
+        document: 目标文档（对象），各操作的路径相对于它
+        operations: 操作列表
+
+    Returns:
+        新的文档（不修改 document）
+
+    Raises:
+        PatchError: 补丁格式错误
+        PatchConflict: 路径不存在或 test 不满足
+    """
+    if not isinstance(operations, list):
+        raise PatchError("JSON Patch 必须是操作数组")
+    document = copy.deepcopy(document)
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in JSON_PATCH_OPS:
+            raise PatchError(f"第 {index} 个操作无效：op 必须是 {', '.join(sorted(JSON_PATCH_OPS))} 之一")
+        op = operation['op']
+        pointer = operation.get('path')
+        tokens = parse_pointer(pointer)
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise PatchError(f"第 {index} 个操作（{op}）缺少 value")
+        if op in ('move', 'copy') and 'from' not in operation:
+            raise PatchError(f"第 {index} 个操作（{op}）缺少 from")
+
+        if op == 'add':
+            _add(document, tokens, pointer, copy.deepcopy(operation['value']))
+        elif op == 'remove':
+            _remove(document, tokens, pointer)
+        elif op == 'replace':
+            _remove(document, tokens, pointer)
+            _add(document, tokens, pointer, copy.deepcopy(operation['value']))
+        elif op == 'move':
+            source = parse_pointer(operation['from'])
+            if tokens[:len(source)] == source and tokens != source:
+                raise PatchError(f"第 {index} 个操作（move）不能把值移动到它自己的子路径")
+            _add(document, tokens, pointer, _remove(document, source, operation['from']))
+        elif op == 'copy':
+            value = _resolve(document, parse_pointer(operation['from']), operation['from'])
+            _add(document, tokens, pointer, copy.deepcopy(value))
+        elif not _json_equal(_resolve(document, tokens, pointer), operation['value']):
+            raise PatchConflict(f"test 操作失败：{pointer} 的当前值与期望值不同")
+    return document
+
+
+def apply_patch(document, media_type: str, patch):
+    """按请求的媒体类型应用补丁（MERGE_PATCH_MEDIA_TYPE 或 JSON_PATCH_MEDIA_TYPE）"""
+    if media_type == MERGE_PATCH_MEDIA_TYPE:
+        return merge_patch(document, patch)
+    return apply_json_patch(document, patch)
@@ -0,0 +1,210 @@
+"""
+AgentCard 静态发布
+
+将每个 namespace::name 当前的默认版本（启用、所属命名空间启用、通过 A2A 验证）
+写入磁盘，由 Caddy 直接提供服务，不经过 Gunicorn：
+
+    {AGENTCARD_PUBLISH_ROOT}/{namespace}/{name}/.well-known/agent.json
+    {AGENTCARD_PUBLISH_ROOT}/{namespace}/{name}/.well-known/agent.json.gz
+    {AGENTCARD_PUBLISH_ROOT}/{namespace}/{name}/.well-known/agent.json.zst   （需要 zstandard）
+
+文件内容即物化的 A2A 快照（与 to_agentcard_json(validate=True) 输出一致）。
+每次写入都是"临时文件 + rename"，读者不会看到写了一半的文件。
+
+发布以 namespace::name 为单位同步（sync_published）：查询当前应发布的版本，
+有则写入、无则删除，因此任意重复调用都是幂等的。信号处理器在事务提交后调用它。
+
+AGENTCARD_PUBLISH_ROOT 为空时不发布（开发环境默认）。
+"""
+
+import gzip
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from .models import AgentCard
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：缺失时只生成 gzip 压缩文件
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+WELL_KNOWN_PATH = Path('.well-known') / 'agent.json'
+
+
+def publish_root():
+    """发布根目录（未配置时返回 None）"""
+    root = getattr(settings, 'AGENTCARD_PUBLISH_ROOT', '')
+    return Path(root) if root else None
+
+
+def is_publishable_name(name: str) -> bool:
+    """名称能否安全地作为目录名（不能包含路径分隔符，不能是 . 或 ..）"""
+    return bool(name) and name not in ('.', '..') and '/' not in name and '\\' not in name
+
+
+def published_path(namespace_id: str, name: str):
+    """返回 namespace::name 对应的 agent.json 路径（未启用发布或名称不可发布时返回 None）"""
+    root = publish_root()
+    if root is None or not is_publishable_name(name):
+        return None
+    return root / namespace_id / name / WELL_KNOWN_PATH
+
+
+# ========================================
+# 文件写入
+# ========================================
+
+def _compressed_variants(data: bytes) -> dict:
+    """生成预压缩文件 {后缀: 内容}（供 Caddy file_server precompressed 使用）"""
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if zstandard is not None:
+        variants['.zst'] = zstandard.ZstdCompressor(level=19).compress(data)
+    return variants
+
+
+def _write_atomic(path: Path, data: bytes):
+    """写入临时文件后 rename 覆盖目标文件（同一目录内 rename 是原子操作）"""
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _remove(path: Path) -> bool:
+    """删除已发布文件及其压缩文件，返回是否删除了 agent.json"""
+    removed = False
+    for target in [path] + [path.with_name(path.name + suffix) for suffix in ('.gz', '.zst')]:
+        try:
+            target.unlink()
+        except FileNotFoundError:
+            continue
+        removed = removed or target == path
+    return removed
+
+
+def write_published(path: Path, data: bytes) -> bool:
+    """
+    写入 agent.json 及预压缩文件
+
+    内容未变化时不重写。先写压缩文件、最后写 agent.json，
+    旧的 .zst 在 zstandard 不可用时会被删除，避免与新内容不一致。
+
+    Returns:
+        是否写入了新内容
+    """
+    try:
+        if path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    variants = _compressed_variants(data)
+    for suffix in ('.gz', '.zst'):
+        sibling = path.with_name(path.name + suffix)
+        if suffix in variants:
+            _write_atomic(sibling, variants[suffix])
+        else:
+            sibling.unlink(missing_ok=True)
+    _write_atomic(path, data)
+    return True
+
+
+# ========================================
+# 同步
+# ========================================
+
+def published_card(namespace_id: str, name: str):
+    """返回 namespace::name 当前应发布的 AgentCard（没有时返回 None）"""
+    card = AgentCard.objects.filter(
+        namespace_id=namespace_id,
+        name=name,
+        is_default_version=True,
+        is_active=True,
+        namespace__is_active=True,
+    ).only('id', 'namespace', 'name', *AgentCard.SNAPSHOT_FIELDS).first()
+    if card is not None:
+        card.ensure_snapshot()
+    return card
+
+
+def sync_published(namespace_id: str, name: str) -> str:
+    """
+    同步单个 namespace::name 的发布文件（幂等）
+
+    Returns:
+        'written' / 'unchanged' / 'removed' / 'skipped'
+    """
+    path = published_path(namespace_id, name)
+    if path is None:
+        return 'skipped'
+
+    card = published_card(namespace_id, name)
+    if card is None or card.a2a_snapshot_bytes is None:
+        # 无默认版本、已禁用或未通过 A2A 验证：撤下已发布的文件
+        return 'removed' if _remove(path) else 'unchanged'
+
+    return 'written' if write_published(path, bytes(card.a2a_snapshot_bytes)) else 'unchanged'
+
+
+def sync_published_safely(namespace_id: str, name: str):
+    """
+    事务提交后调用的同步入口
+
+    任何错误（文件系统错误、查询或补写快照时的数据库错误、无效路径）只记录日志，
+    不影响已经提交的数据库写入，也不会把成功的请求变成 500；
+    可通过 publish_agentcards 命令重新同步。
+    """
+    try:
+        sync_published(namespace_id, name)
+    except Exception:
+        logger.exception('发布 AgentCard 失败: %s::%s', namespace_id, name)
+
+
+def publish_all(namespace_id: str = None) -> dict:
+    """
+    全量同步：发布所有应发布的 AgentCard，并清理不再应发布的文件
+
+    Returns:
+        {'written': n, 'unchanged': n, 'removed': n, 'skipped': n}
+    """
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0, 'skipped': 0}
+    root = publish_root()
+    if root is None:
+        return stats
+
+    keys = AgentCard.objects.all()
+    if namespace_id:
+        keys = keys.filter(namespace_id=namespace_id)
+    keys = set(keys.values_list('namespace_id', 'name').distinct())
+
+    # 磁盘上存在但数据库中已没有任何版本的目录（AgentCard 被删除）
+    namespace_dirs = [root / namespace_id] if namespace_id else (
+        [d for d in root.iterdir() if d.is_dir()] if root.is_dir() else []
+    )
+    for namespace_dir in namespace_dirs:
+        if not namespace_dir.is_dir():
+            continue
+        for agent_dir in namespace_dir.iterdir():
+            if (agent_dir / WELL_KNOWN_PATH).exists():
+                keys.add((namespace_dir.name, agent_dir.name))
+
+    for key in sorted(keys):
+        stats[sync_published(*key)] += 1
+    return stats
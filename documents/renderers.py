@@ -0,0 +1,24 @@
+"""
+DRF 渲染器
+"""
+
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    NDJSON（换行分隔的 JSON）渲染器
+
+    导出端点直接返回 StreamingHttpResponse，此渲染器用于内容协商（?format=ndjson）
+    以及错误响应（渲染为单行 JSON）。
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return (json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
@@ -0,0 +1,407 @@
+"""
+AgentCard 批量渲染
+
+将一组 AgentCard 渲染为 A2A 标准 JSON（to_agentcard_json）或原始字典（to_dict_raw），
+无论卡片数量多少，查询次数固定：
+
+1. AgentCard 本身（调用方传入的 QuerySet 或已加载的实例）
+2. AgentExtension（agent_card_id IN (...)，一次取回全部扩展）
+3. SchemaRegistry（按需：extension_schemas，一次取回全部引用的 Schema）
+4. User（按需：原始导出元数据中的 createdBy/updatedBy，一次取回）
+
+API、Admin、导出等所有渲染路径都通过 AgentCardRenderer 完成，
+模型上的 to_agentcard_json() / to_dict_raw() 只是单卡片的便捷封装。
+
+iter_ndjson() 在此基础上按块流式导出（NDJSON，每行一个卡片），内存占用与导出总量无关。
+"""
+
+import base64
+import binascii
+import json
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+
+from .models import AgentCard, AgentExtension, SchemaRegistry
+
+
+class AgentCardRenderer:
+    """
+    AgentCard 批量渲染器
+
+    用法：
+        renderer = AgentCardRenderer(AgentCard.objects.filter(namespace__id='dev'))
+        cards = renderer.render_all(validate=True)
+
+    扩展、Schema、用户名在第一次需要时批量加载并缓存，之后的渲染不再查询数据库。
+    """
+
+    def __init__(self, cards):
+        """
+        Args:
+            cards: AgentCard 的 QuerySet 或实例列表（QuerySet 会被立即求值）
+        """
+        self.cards = list(cards)
+        self._extensions = None
+        self._schemas = None
+        self._usernames = None
+
+    # ========================================
+    # 批量加载
+    # ========================================
+
+    def _load_extensions(self):
+        """一次查询加载所有卡片的扩展（已 prefetch 的卡片直接复用缓存）"""
+        self._extensions = {}
+        pending_ids = []
+        for card in self.cards:
+            if card.pk is None:
+                # 未保存的实例尚无扩展
+                self._extensions[card.pk] = []
+            elif 'extensions' in getattr(card, '_prefetched_objects_cache', {}):
+                self._extensions[card.pk] = list(card.extensions.all())
+            else:
+                self._extensions[card.pk] = []
+                pending_ids.append(card.pk)
+
+        if pending_ids:
+            queryset = AgentExtension.objects.filter(
+                agent_card_id__in=pending_ids
+            ).order_by('agent_card_id', 'order', 'uri')
+            for ext in queryset:
+                self._extensions[ext.agent_card_id].append(ext)
+
+    def _load_usernames(self):
+        """一次查询加载 created_by / updated_by 的用户名"""
+        user_ids = set()
+        for card in self.cards:
+            user_ids.update(filter(None, [card.created_by_id, card.updated_by_id]))
+        self._usernames = dict(
+            User.objects.filter(pk__in=user_ids).values_list('pk', 'username')
+        ) if user_ids else {}
+
+    def _load_schemas(self):
+        """一次查询加载所有卡片 domain_extensions 中引用的 Schema"""
+        schema_uris = set()
+        for card in self.cards:
+            schema_uris.update((card.domain_extensions or {}).keys())
+        self._schemas = {
+            schema.schema_uri: schema
+            for schema in SchemaRegistry.objects.filter(schema_uri__in=schema_uris)
+        } if schema_uris else {}
+
+    def extensions_for(self, card) -> list:
+        """返回卡片的扩展列表（按 order, uri 排序）"""
+        if self._extensions is None:
+            self._load_extensions()
+        return self._extensions.get(card.pk, [])
+
+    def extensions_json(self, card) -> list[dict]:
+        """返回卡片的扩展列表（A2A AgentExtension 格式）"""
+        extensions = []
+        for ext in self.extensions_for(card):
+            ext_dict = {'uri': ext.uri}
+            if ext.description:
+                ext_dict['description'] = ext.description
+            if ext.required:
+                ext_dict['required'] = True
+            if ext.params:
+                ext_dict['params'] = ext.params
+            extensions.append(ext_dict)
+        return extensions
+
+    def username(self, user_id):
+        """返回用户 ID 对应的用户名（未设置时返回 None）"""
+        if user_id is None:
+            return None
+        if self._usernames is None:
+            self._load_usernames()
+        return self._usernames.get(user_id)
+
+    # ========================================
+    # 渲染
+    # ========================================
+
+    def render(self, card, raw: bool = False, include_metadata: bool = False,
+               validate: bool = False) -> dict:
+        """
+        渲染单个 AgentCard
+
+        Args:
+            card: 本渲染器管理的 AgentCard 实例
+            raw: True 时按 to_dict_raw() 格式输出（不验证，元数据包含创建者/更新者）
+            include_metadata: 是否包含内部元数据（namespace, created_at 等）
+            validate: 是否严格验证 A2A 协议必填字段（raw=True 时忽略）
+
+        Raises:
+            ValidationError: 如果 validate=True 且 AgentCard 不符合 A2A 协议必填字段要求
+        """
+        if validate and not raw:
+            errors = card.get_a2a_errors()
+            if errors:
+                error_msg = "AgentCard 不符合 A2A 协议要求，无法导出：\n"
+                for field, msg in errors.items():
+                    error_msg += f"  - {field}: {msg}\n"
+                error_msg += "\n请先在 Django Admin 中补充完整所有必填字段。"
+                raise ValidationError(error_msg)
+
+        result = {
+            'protocolVersion': card.protocol_version,
+            'name': card.name,
+            'description': card.description,
+            'url': card.url,
+            'preferredTransport': card.preferred_transport,
+            'version': card.version,
+            'defaultInputModes': card.default_input_modes,
+            'defaultOutputModes': card.default_output_modes,
+            'skills': card.skills,
+        }
+
+        # 组装 capabilities 对象
+        capabilities = {}
+
+        # 布尔能力
+        if card.capability_streaming:
+            capabilities['streaming'] = True
+        if card.capability_push_notifications:
+            capabilities['pushNotifications'] = True
+        if card.capability_state_transition_history:
+            capabilities['stateTransitionHistory'] = True
+
+        # extensions 数组
+        extensions = self.extensions_json(card)
+        if extensions:
+            capabilities['extensions'] = extensions
+
+        # capabilities 是 A2A 协议必填字段，必须始终输出（即使为空对象）
+        result['capabilities'] = capabilities
+
+        # 可选字段（仅在有值时添加）
+        if card.provider:
+            result['provider'] = card.provider
+        if card.icon_url:
+            result['iconUrl'] = card.icon_url
+        if card.documentation_url:
+            result['documentationUrl'] = card.documentation_url
+        if card.additional_interfaces:
+            result['additionalInterfaces'] = card.additional_interfaces
+        if card.security_schemes:
+            result['securitySchemes'] = card.security_schemes
+        if card.security:
+            result['security'] = card.security
+        if card.supports_authenticated_extended_card:
+            result['supportsAuthenticatedExtendedCard'] = True
+        if card.signatures:
+            result['signatures'] = card.signatures
+
+        # 可选：添加内部元数据（非 A2A 标准，用于内部系统）
+        if include_metadata:
+            if raw:
+                result['_metadata'] = {
+                    'namespace': card.namespace_id,
+                    'isDefaultVersion': card.is_default_version,
+                    'isActive': card.is_active,
+                    'createdAt': card.created_at.isoformat() if card.created_at else None,
+                    'updatedAt': card.updated_at.isoformat() if card.updated_at else None,
+                    'createdBy': self.username(card.created_by_id),
+                    'updatedBy': self.username(card.updated_by_id),
+                }
+            else:
+                result['_metadata'] = {
+                    'namespace': card.namespace_id,
+                    'isDefaultVersion': card.is_default_version,
+                    'isActive': card.is_active,
+                    'createdAt': card.created_at.isoformat(),
+                    'updatedAt': card.updated_at.isoformat(),
+                }
+
+        return result
+
+    def render_all(self, raw: bool = False, include_metadata: bool = False,
+                   validate: bool = False) -> list[dict]:
+        """
+        渲染全部 AgentCard
+
+        Raises:
+            ValidationError: 任一卡片验证失败时抛出（需要逐项结果请使用 render_results()）
+        """
+        return [
+            self.render(card, raw=raw, include_metadata=include_metadata, validate=validate)
+            for card in self.cards
+        ]
+
+    def render_results(self, raw: bool = False, include_metadata: bool = False,
+                       validate: bool = False) -> list[tuple]:
+        """
+        逐项渲染，单个卡片失败不影响其他卡片
+
+        Returns:
+            [(card, data, error_message)] 列表；成功时 error_message 为 None，失败时 data 为 None
+        """
+        results = []
+        for card in self.cards:
+            try:
+                data = self.render(card, raw=raw, include_metadata=include_metadata, validate=validate)
+            except ValidationError as e:
+                results.append((card, None, '\n'.join(e.messages)))
+            else:
+                results.append((card, data, None))
+        return results
+
+    def extension_schemas(self, card) -> list[dict]:
+        """
+        返回卡片 domain_extensions 中使用的 Schema 信息（用于详情 API）
+        """
+        if not card.domain_extensions:
+            return []
+        if self._schemas is None:
+            self._load_schemas()
+
+        schema_infos = []
+        for schema_uri in card.domain_extensions.keys():
+            schema = self._schemas.get(schema_uri)
+            if schema is not None:
+                schema_infos.append({
+                    'schema_uri': schema_uri,
+                    'schema_type': schema.schema_type,
+                    'version': schema.version,
+                    'is_active': schema.is_active,
+                })
+            else:
+                schema_infos.append({
+                    'schema_uri': schema_uri,
+                    'schema_type': None,
+                    'version': None,
+                    'is_active': False,
+                    'warning': '未注册的 Schema'
+                })
+
+        return schema_infos
+
+
+# ========================================
+# 快照
+# ========================================
+
+def refresh_snapshots(cards):
+    """
+    批量刷新 AgentCard 的 A2A 快照
+
+    Args:
+        cards: AgentCard 的 QuerySet 或实例列表
+
+    Returns:
+        刷新的卡片数量
+    """
+    renderer = AgentCardRenderer(cards)
+    for card in renderer.cards:
+        card.refresh_snapshot(commit=False, renderer=renderer)
+    if renderer.cards:
+        AgentCard.objects.bulk_update(renderer.cards, AgentCard.SNAPSHOT_FIELDS)
+    return len(renderer.cards)
+
+
+def materialize_missing_snapshots(cards):
+    """
+    为尚未生成快照的历史数据批量生成快照（一次批量渲染，而不是逐个生成）
+
+    cards 可以是 only()/defer() 加载的实例：缺失快照的卡片会完整加载一次，
+    生成后把快照字段回填到传入的实例上。
+    """
+    missing_ids = [card.pk for card in cards if not card.has_snapshot()]
+    if not missing_ids:
+        return
+    refreshed = list(AgentCard.objects.filter(pk__in=missing_ids))
+    refresh_snapshots(refreshed)
+    by_id = {card.pk: card for card in refreshed}
+    for card in cards:
+        if card.pk in by_id:
+            for field in AgentCard.SNAPSHOT_FIELDS:
+                setattr(card, field, getattr(by_id[card.pk], field))
+
+
+# ========================================
+# 流式导出（NDJSON）
+# ========================================
+
+# 标准格式导出只需读取的列（快照 + 元数据），不加载 L1/L2 大字段
+EXPORT_STANDARD_FIELDS = (
+    'id', 'namespace', 'is_default_version', 'is_active',
+    'created_at', 'updated_at', *AgentCard.SNAPSHOT_FIELDS,
+)
+
+
+def encode_export_cursor(card_id: int) -> str:
+    """将最后导出的卡片 ID 编码为续传游标"""
+    return base64.urlsafe_b64encode(f'id:{card_id}'.encode('ascii')).decode('ascii')
+
+
+def decode_export_cursor(cursor: str) -> int:
+    """
+    解析续传游标
+
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        prefix, _, card_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii').partition(':')
+    except (binascii.Error, UnicodeError) as e:
+        raise ValueError(f"无效的游标：'{cursor}'") from e
+    if prefix != 'id' or not card_id.isdigit():
+        raise ValueError(f"无效的游标：'{cursor}'")
+    return int(card_id)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_ndjson(queryset, raw: bool = False, chunk_size: int = 500, limit: int = None):
+    """
+    按 ID 顺序流式导出 AgentCard，每个卡片一行 JSON（bytes，含换行符）
+
+    - 使用 QuerySet.iterator(chunk_size)：PostgreSQL 上为服务端游标，不会一次取回全部行
+    - 每块共享一个渲染器：扩展、用户名各一次查询
+    - 每行的 _metadata 包含 id 和 cursor，中断后可用最后一行的 cursor 续传
+
+    Args:
+        queryset: 待导出的 AgentCard QuerySet（已完成过滤，排序会被替换为按 ID）
+        raw: True 时按 to_dict_raw() 格式导出全部卡片（包括草稿）；
+             False 时导出 A2A 标准 JSON（来自快照），跳过不完整的卡片
+        chunk_size: 每块的卡片数量
+        limit: 最多读取的卡片数量（为空时不限制）
+    """
+    queryset = queryset.order_by('pk')
+    if raw:
+        queryset = queryset.select_related(None)
+    else:
+        queryset = queryset.select_related(None).only(*EXPORT_STANDARD_FIELDS)
+
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    for chunk in _chunks(queryset.iterator(chunk_size=chunk_size), chunk_size):
+        if raw:
+            renderer = AgentCardRenderer(chunk)
+            items = [(card, renderer.render(card, raw=True, include_metadata=True)) for card in chunk]
+        else:
+            materialize_missing_snapshots(chunk)
+            items = [
+                (card, card.get_a2a_snapshot(include_metadata=True))
+                for card in chunk if not card.a2a_snapshot_error
+            ]
+
+        lines = []
+        for card, data in items:
+            data['_metadata']['id'] = card.pk
+            data['_metadata']['cursor'] = encode_export_cursor(card.pk)
+            lines.append(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
@@ -0,0 +1,100 @@
+"""
+AgentCard 版本解析
+
+GET /api/agentcards/resolve/{namespace}/{name}/?version=default|latest|1.2.3|^1.2|~2.0
+
+每次调用 Agent 之前都需要先解析版本，因此按 (namespace, name) 缓存该 Agent 的全部启用版本
+（只包含解析需要的列），任意版本写法都在缓存的候选列表上用 Python 计算：
+
+- 缓存未命中时一次查询（命中部分索引 agent_cards_active_semver_idx：is_active=true）
+- AgentCard 写入/删除、命名空间变更、批量导入后，在事务提交后删除对应缓存（见 signals.py）
+- 缓存后端由 CACHES 配置；多进程部署应使用共享缓存（Redis / Memcached），
+  使用进程内缓存（locmem）时其他进程最多在 AGENTCARD_RESOLVE_CACHE_TIMEOUT 秒后看到变更
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import AgentCard
+from .versioning import in_range, parse_range, semver_key
+
+CANDIDATE_FIELDS = [
+    'id', 'version', 'is_default_version', 'url', 'preferred_transport', 'updated_at',
+    'version_major', 'version_minor', 'version_patch', 'version_prerelease',
+]
+
+
+def _cache_key(namespace_id: str, name: str) -> str:
+    # name 可以包含空格等字符，哈希后作为缓存键（兼容 Memcached 的键限制）
+    digest = hashlib.sha256(f'{namespace_id}\x00{name}'.encode('utf-8')).hexdigest()[:32]
+    return f'agentcard:versions:{digest}'
+
+
+def version_candidates(namespace_id: str, name: str) -> list:
+    """namespace::name 的全部启用版本（所属命名空间禁用时为空列表），带缓存"""
+    key = _cache_key(namespace_id, name)
+    candidates = cache.get(key)
+    if candidates is None:
+        candidates = list(AgentCard.objects.filter(
+            namespace_id=namespace_id,
+            name=name,
+            is_active=True,
+            namespace__is_active=True,
+        ).values(*CANDIDATE_FIELDS))
+        cache.set(key, candidates, getattr(settings, 'AGENTCARD_RESOLVE_CACHE_TIMEOUT', 300))
+    return candidates
+
+
+def invalidate_candidates(keys):
+    """删除 (namespace_id, name) 的版本缓存"""
+    cache.delete_many([_cache_key(namespace_id, name) for namespace_id, name in set(keys)])
+
+
+def _components(candidate):
+    if candidate['version_major'] is None:
+        return None
+    return (
+        candidate['version_major'], candidate['version_minor'],
+        candidate['version_patch'], candidate['version_prerelease'],
+    )
+
+
+def resolve_version(candidates, spec: str = 'default', include_prerelease: bool = False):
+    """
+    在候选版本中解析版本写法
+
+    - default：默认版本
+    - latest：最高的语义化版本
+    - 与某个版本字符串完全一致：该版本
+    - 范围（^1.2、~2.0、1.x、1.2 等）：范围内最高的语义化版本
+
+    latest 和范围默认不选择预发布版本（include_prerelease=True 时参与选择）；
+    无法解析为语义化版本的版本只能通过 default 或完全一致的版本字符串选择。
+
+    Returns:
+        候选版本 dict；没有满足的版本时返回 None
+
+    Raises:
+        ValueError: 无法识别的版本写法
+    """
+    spec = (spec or 'default').strip()
+    if spec == 'default':
+        return next((c for c in candidates if c['is_default_version']), None)
+
+    exact = next((c for c in candidates if c['version'] == spec), None)
+    if exact is not None:
+        return exact
+
+    bounds = None if spec == 'latest' else parse_range(spec)
+    matches = []
+    for candidate in candidates:
+        components = _components(candidate)
+        if components is None or (components[3] is not None and not include_prerelease):
+            continue
+        if bounds is None or in_range(components, bounds):
+            matches.append((semver_key(components), candidate))
+    if not matches:
+        return None
+    return max(matches, key=lambda match: match[0])[1]
@@ -0,0 +1,211 @@
+"""
+扩展数据后台重新验证
+
+修改 Schema 或其字段后，已有的 AgentExtension.params 可能不再符合新定义。
+Schema / 字段变更在事务提交后提交重新验证任务（见 signals.py），由后台线程执行：
+
+- 只检查引用该 Schema 的扩展（schema.agent_extensions），按主键分块读取 id 和 params
+  （每块 AGENTCARD_SCHEMA_REVALIDATION_CHUNK_SIZE 条），使用编译好的验证器（见 validation.py）
+- 每块在一个事务中更新违规记录 ExtensionViolation：无效的扩展写入全部错误，有效的扩展删除记录
+- 全部检查完后删除旧版本遗留的记录，并把 SchemaRegistry.revalidated_at 设为本次验证的 Schema 版本；
+  revalidated_at 与 updated_at 一致表示违规记录是最新的
+
+后台线程只在本进程内排队，同一 Schema 排队中的重复任务会合并；进程退出时未执行的任务丢失，
+可以用 revalidate_extensions 命令补跑。AGENTCARD_SCHEMA_REVALIDATION_ASYNC=False 时
+在事务提交后同步执行（测试、管理命令）。
+单个扩展通过模型保存时在同一事务中同步重新验证（见 revalidate_extension）。
+"""
+
+import logging
+import queue
+import threading
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AgentExtension, ExtensionViolation, SchemaRegistry
+from .validation import get_validator
+
+logger = logging.getLogger(__name__)
+
+# 后台线程空闲多久后退出（秒），有新任务时重新启动
+IDLE_TIMEOUT = 30
+
+UPSERT_FIELDS = ['schema', 'schema_version', 'errors', 'checked_at']
+
+
+class RevalidationResult(NamedTuple):
+    schema_id: int
+    checked: int
+    invalid: int
+
+
+def _error_rows(errors) -> list:
+    return [{'path': error.path, 'message': error.message} for error in errors]
+
+
+def _save_results(schema_id, schema_version, results):
+    """
+    保存一批验证结果（调用方负责事务）
+
+    Args:
+        results: [(extension_id, errors), ...]
+    """
+    violations = [
+        ExtensionViolation(
+            extension_id=extension_id,
+            schema_id=schema_id,
+            schema_version=schema_version,
+            errors=_error_rows(errors),
+        )
+        for extension_id, errors in results if errors
+    ]
+    valid_ids = [extension_id for extension_id, errors in results if not errors]
+    if valid_ids:
+        ExtensionViolation.objects.filter(extension_id__in=valid_ids).delete()
+    if violations:
+        ExtensionViolation.objects.bulk_create(
+            violations,
+            update_conflicts=True,
+            unique_fields=['extension'],
+            update_fields=UPSERT_FIELDS,
+        )
+
+
+def revalidate_schema(schema_id, chunk_size: int = None):
+    """
+    用 Schema 的当前定义重新验证引用它的全部扩展
+
+    Returns:
+        RevalidationResult；Schema 不存在时返回 None
+    """
+    schema = SchemaRegistry.objects.filter(pk=schema_id).first()
+    if schema is None:
+        return None
+    chunk_size = chunk_size or getattr(settings, 'AGENTCARD_SCHEMA_REVALIDATION_CHUNK_SIZE', 500)
+    validator = get_validator(schema)
+    version = schema.updated_at
+
+    checked = invalid = 0
+    last_id = 0
+    while True:
+        rows = list(
+            AgentExtension.objects.filter(schema_id=schema_id, pk__gt=last_id)
+            .order_by('pk').values_list('pk', 'params')[:chunk_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        results = [(extension_id, validator.errors(params)) for extension_id, params in rows]
+        with transaction.atomic():
+            _save_results(schema_id, version, results)
+        checked += len(results)
+        invalid += sum(1 for _, errors in results if errors)
+
+    with transaction.atomic():
+        # 已不再引用该 Schema 的扩展、以及验证时 Schema 版本更旧的记录
+        ExtensionViolation.objects.filter(schema_id=schema_id, schema_version__lt=version).delete()
+        SchemaRegistry.objects.filter(pk=schema_id, updated_at=version).update(revalidated_at=version)
+    return RevalidationResult(schema_id, checked, invalid)
+
+
+def revalidate_extension(extension):
+    """
+    重新验证单个扩展（扩展保存时调用，调用方应处于事务中）
+
+    未关联 Schema 的扩展删除违规记录。
+    """
+    if extension.schema_id is None:
+        ExtensionViolation.objects.filter(extension_id=extension.pk).delete()
+        return
+    schema = extension.schema
+    _save_results(schema.pk, schema.updated_at, [
+        (extension.pk, get_validator(schema).errors(extension.params))
+    ])
+
+
+def violation_count_subquery():
+    """violation_count 注解（相关子查询）"""
+    count = ExtensionViolation.objects.filter(schema=OuterRef('pk')).order_by().values('schema').annotate(
+        total=Count('pk')
+    ).values('total')
+    return Coalesce(Subquery(count, output_field=IntegerField()), 0)
+
+
+# ========================================
+# 后台执行
+# ========================================
+
+class Revalidator:
+    """
+    进程内的重新验证队列（单个后台线程顺序执行）
+
+    任务开始执行前移出排队集合：执行期间 Schema 再次变更会重新排队，保证最终按最新定义验证。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._thread = None
+
+    def submit(self, schema_id):
+        """提交 Schema 的重新验证任务"""
+        if not getattr(settings, 'AGENTCARD_SCHEMA_REVALIDATION_ASYNC', True):
+            self._run_one(schema_id)
+            return
+        with self._lock:
+            if schema_id in self._pending:
+                return
+            self._pending.add(schema_id)
+            self._queue.put(schema_id)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name='schema-revalidation', daemon=True
+                )
+                self._thread.start()
+
+    def pending(self) -> set:
+        """本进程中排队等待执行的 Schema ID"""
+        with self._lock:
+            return set(self._pending)
+
+    def _worker(self):
+        try:
+            while True:
+                try:
+                    schema_id = self._queue.get(timeout=IDLE_TIMEOUT)
+                except queue.Empty:
+                    with self._lock:
+                        if self._queue.empty():
+                            self._thread = None
+                            return
+                    continue
+                with self._lock:
+                    self._pending.discard(schema_id)
+                # 与请求处理相同：任务前后关闭失效或超过 CONN_MAX_AGE 的连接
+                close_old_connections()
+                try:
+                    self._run_one(schema_id)
+                finally:
+                    close_old_connections()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _run_one(schema_id):
+        try:
+            result = revalidate_schema(schema_id)
+            if result is not None:
+                logger.info(
+                    'Schema %s 重新验证完成：检查 %s 个扩展，%s 个无效',
+                    schema_id, result.checked, result.invalid
+                )
+        except Exception:
+            logger.exception('Schema %s 重新验证失败', schema_id)
+
+
+revalidator = Revalidator()
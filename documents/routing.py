@@ -0,0 +1,425 @@
+"""
+能力路由（进程内索引）
+
+GET/POST /api/route/ 根据任务描述（标签、输入/输出 MIME 类型、传输协议、扩展、能力）
+返回排序后的候选 Agent。路由位于调用方的请求热路径上，因此每个进程维护一份紧凑的内存索引，
+两次刷新之间的路由请求不访问数据库：
+
+- 只包含可发现的 Agent：默认版本、启用、所属命名空间启用
+- 倒排索引：命名空间 / 标签 / 技能 / 扩展 URI / MIME 主类型 / 能力 -> AgentCard ID 集合，
+  候选集由集合交集得到，再逐个检查 MIME 通配符匹配并打分
+- 增量刷新：每隔 AGENTCARD_ROUTING_POLL_INTERVAL 秒读取一次变更流（AgentCardChange），
+  只重新加载变更过的卡片；每隔 AGENTCARD_ROUTING_REBUILD_INTERVAL 秒全量重建一次
+  （覆盖命名空间启用/禁用等不进入变更流的变化）
+- 本进程内的写入在事务提交后标记索引过期，下一次路由请求立即刷新（见 signals.py）
+"""
+
+import heapq
+import threading
+import time
+from typing import NamedTuple
+
+from django.conf import settings
+
+from .changefeed import changes_after, stable_changes
+from .models import AgentCard, AgentExtension
+
+DEFAULT_TRANSPORT = 'JSONRPC'
+
+# 单次轮询最多读取的变更记录数，超过时直接全量重建
+POLL_MAX_CHANGES = 1000
+
+
+def normalize_mime(value) -> str:
+    """'Image/PNG; q=0.9' -> 'image/png'；不是 type/subtype 形式时返回空字符串"""
+    if not isinstance(value, str):
+        return ''
+    mime = value.split(';', 1)[0].strip().lower()
+    main, sep, sub = mime.partition('/')
+    return mime if sep and main and sub else ''
+
+
+def mime_match(modes: frozenset, mains: frozenset, wanted: str) -> float:
+    """
+    Agent 声明的 MIME 类型集合能否接受 wanted（两侧都可以是通配符，如 image/*、*/*）
+
+    Args:
+        modes: Agent 声明的 MIME 类型集合
+        mains: modes 的主类型集合（如 {'image', 'text'}）
+
+    Returns:
+        1.0 完全一致 / 0.5 通配符匹配 / 0 不匹配
+    """
+    if wanted in modes:
+        return 1.0
+    if not modes:
+        return 0
+    wanted_main, _, wanted_sub = wanted.partition('/')
+    if wanted_main == '*' or '*/*' in modes or f'{wanted_main}/*' in modes:
+        return 0.5
+    return 0.5 if wanted_sub == '*' and wanted_main in mains else 0
+
+
+class RouteEntry(NamedTuple):
+    """索引中的一个 Agent（只保留路由需要的字段）"""
+    id: int
+    namespace_id: str
+    name: str
+    version: str
+    preferred_transport: str
+    endpoints: dict          # 传输协议 -> URL（首选传输 + additionalInterfaces）
+    tags: frozenset
+    skill_ids: frozenset
+    input_modes: frozenset
+    input_mains: frozenset
+    output_modes: frozenset
+    output_mains: frozenset
+    extensions: frozenset
+    streaming: bool
+    push_notifications: bool
+
+    @classmethod
+    def from_card(cls, card, extension_uris):
+        transport = (card.preferred_transport or DEFAULT_TRANSPORT).upper()
+        endpoints = {}
+        for interface in card.additional_interfaces if isinstance(card.additional_interfaces, list) else []:
+            if isinstance(interface, dict) and interface.get('transport') and interface.get('url'):
+                endpoints.setdefault(str(interface['transport']).upper(), interface['url'])
+        endpoints[transport] = card.url
+
+        tags = set()
+        skill_ids = set()
+        for skill in card.skills if isinstance(card.skills, list) else []:
+            if not isinstance(skill, dict):
+                continue
+            if isinstance(skill.get('id'), str):
+                skill_ids.add(skill['id'])
+            if isinstance(skill.get('tags'), list):
+                tags.update(tag for tag in skill['tags'] if isinstance(tag, str))
+
+        def modes(values):
+            return frozenset(
+                mime for mime in map(normalize_mime, values if isinstance(values, list) else []) if mime
+            )
+
+        input_modes = modes(card.default_input_modes)
+        output_modes = modes(card.default_output_modes)
+
+        return cls(
+            id=card.pk,
+            namespace_id=card.namespace_id,
+            name=card.name,
+            version=card.version,
+            preferred_transport=transport,
+            endpoints=endpoints,
+            tags=frozenset(tags),
+            skill_ids=frozenset(skill_ids),
+            input_modes=input_modes,
+            input_mains=frozenset(mime.partition('/')[0] for mime in input_modes),
+            output_modes=output_modes,
+            output_mains=frozenset(mime.partition('/')[0] for mime in output_modes),
+            extensions=frozenset(extension_uris),
+            streaming=card.capability_streaming,
+            push_notifications=card.capability_push_notifications,
+        )
+
+    def posting_keys(self):
+        """该 Agent 出现在哪些倒排列表中"""
+        yield ('namespace', self.namespace_id)
+        for tag in self.tags:
+            yield ('tag', tag)
+        for skill_id in self.skill_ids:
+            yield ('skill', skill_id)
+        for uri in self.extensions:
+            yield ('extension', uri)
+        for main in self.input_mains:
+            yield ('input', main)
+        for main in self.output_mains:
+            yield ('output', main)
+        if self.streaming:
+            yield ('capability', 'streaming')
+        if self.push_notifications:
+            yield ('capability', 'push_notifications')
+
+
+class RouteQuery(NamedTuple):
+    """任务描述"""
+    namespace: str = None
+    tags: tuple = ()
+    skills: tuple = ()
+    input_modes: tuple = ()
+    output_modes: tuple = ()
+    transport: str = None
+    extensions: tuple = ()
+    streaming: bool = False
+    push_notifications: bool = False
+    limit: int = 10
+
+    MAX_LIMIT = 100
+
+    @classmethod
+    def parse(cls, data):
+        """
+        从请求数据解析任务描述（JSON 对象或查询参数；列表可用数组或逗号分隔字符串）
+
+        Raises:
+            ValueError: 参数格式无效
+        """
+        def as_list(key):
+            value = data.get(key)
+            if value in (None, ''):
+                return ()
+            if isinstance(value, str):
+                value = value.split(',')
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                raise ValueError(f'{key} 必须是字符串数组或逗号分隔的字符串')
+            return tuple(dict.fromkeys(v.strip() for v in value if v.strip()))
+
+        def as_bool(key):
+            value = data.get(key, False)
+            if isinstance(value, bool):
+                return value
+            if isinstance(value, str) and value.lower() in ('true', 'false', ''):
+                return value.lower() == 'true'
+            raise ValueError(f'{key} 必须是布尔值')
+
+        def as_modes(key):
+            modes = as_list(key)
+            invalid = [mode for mode in modes if not normalize_mime(mode)]
+            if invalid:
+                raise ValueError(f"{key} 包含无效的 MIME 类型：{', '.join(invalid)}")
+            return tuple(dict.fromkeys(map(normalize_mime, modes)))
+
+        limit = data.get('limit', 10)
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 0 < limit <= cls.MAX_LIMIT:
+            raise ValueError(f'limit 必须是 1 到 {cls.MAX_LIMIT} 之间的整数')
+
+        namespace = data.get('namespace') or None
+        transport = data.get('transport') or None
+        if not isinstance(namespace, (str, type(None))) or not isinstance(transport, (str, type(None))):
+            raise ValueError('namespace 和 transport 必须是字符串')
+
+        return cls(
+            namespace=namespace,
+            tags=as_list('tags'),
+            skills=as_list('skills'),
+            input_modes=as_modes('input_modes'),
+            output_modes=as_modes('output_modes'),
+            transport=transport.upper() if transport else None,
+            extensions=as_list('extensions'),
+            streaming=as_bool('streaming'),
+            push_notifications=as_bool('push_notifications'),
+            limit=limit,
+        )
+
+
+class RoutingIndex:
+    """
+    进程内路由索引
+
+    所有读写都在同一把锁内进行：索引更新是原地修改倒排集合，
+    锁保证路由查询不会看到更新了一半的索引（无竞争时加锁的开销可以忽略）。
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._postings = {}
+        self._cursor = None
+        self._built_at = None
+        self._polled_at = None
+        self._stale = False
+        self._rebuild_needed = True
+
+    # ========================================
+    # 标记
+    # ========================================
+
+    def mark_stale(self):
+        """有卡片变更：下一次路由前读取变更流"""
+        self._stale = True
+
+    def mark_rebuild(self):
+        """有不进入变更流的变更（如命名空间启用/禁用）：下一次路由前全量重建"""
+        self._rebuild_needed = True
+
+    # ========================================
+    # 加载
+    # ========================================
+
+    @staticmethod
+    def _load(card_ids=None) -> dict:
+        """从数据库加载可发现的 Agent（两次查询：卡片 + 扩展 URI）"""
+        cards = AgentCard.objects.filter(
+            is_default_version=True,
+            is_active=True,
+            namespace__is_active=True,
+        ).only(
+            'id', 'namespace', 'name', 'version', 'url', 'preferred_transport', 'additional_interfaces',
+            'skills', 'default_input_modes', 'default_output_modes',
+            'capability_streaming', 'capability_push_notifications',
+        )
+        if card_ids is not None:
+            cards = cards.filter(pk__in=card_ids)
+
+        extension_uris = {}
+        for card_id, uri in AgentExtension.objects.filter(
+            agent_card__in=cards.values('pk')
+        ).values_list('agent_card_id', 'uri'):
+            extension_uris.setdefault(card_id, []).append(uri)
+
+        return {
+            card.pk: RouteEntry.from_card(card, extension_uris.get(card.pk, ()))
+            for card in cards
+        }
+
+    @staticmethod
+    def _head():
+        """变更流当前位置 (txid, seq)"""
+        return stable_changes().order_by('-txid', '-id').values_list('txid', 'id').first() or (None, 0)
+
+    def _add(self, entry):
+        self._entries[entry.id] = entry
+        for key in entry.posting_keys():
+            self._postings.setdefault(key, set()).add(entry.id)
+
+    def _remove(self, card_id):
+        entry = self._entries.pop(card_id, None)
+        if entry is None:
+            return
+        for key in entry.posting_keys():
+            ids = self._postings.get(key)
+            if ids is not None:
+                ids.discard(card_id)
+                if not ids:
+                    del self._postings[key]
+
+    def rebuild(self):
+        """全量重建（先记录变更流位置，之后的变更由 poll 补上）"""
+        with self._lock:
+            cursor = self._head()
+            entries = self._load()
+            self._entries = {}
+            self._postings = {}
+            for entry in entries.values():
+                self._add(entry)
+            self._cursor = cursor
+            self._built_at = self._polled_at = time.monotonic()
+            self._stale = False
+            self._rebuild_needed = False
+
+    def poll(self):
+        """读取变更流，重新加载变更过的卡片（变更过多时全量重建）"""
+        with self._lock:
+            rows = list(
+                changes_after(stable_changes(), *self._cursor).values_list(
+                    'txid', 'id', 'agent_card_id'
+                )[:POLL_MAX_CHANGES + 1]
+            )
+            if len(rows) > POLL_MAX_CHANGES:
+                self.rebuild()
+                return
+
+            self._polled_at = time.monotonic()
+            self._stale = False
+            if not rows:
+                return
+            card_ids = {row[2] for row in rows}
+            entries = self._load(card_ids)
+            for card_id in card_ids:
+                self._remove(card_id)
+                if card_id in entries:
+                    self._add(entries[card_id])
+            self._cursor = rows[-1][:2]
+
+    def ensure_fresh(self):
+        """按需刷新：到期全量重建，或到期/被标记时增量轮询"""
+        now = time.monotonic()
+        rebuild_interval = getattr(settings, 'AGENTCARD_ROUTING_REBUILD_INTERVAL', 300)
+        poll_interval = getattr(settings, 'AGENTCARD_ROUTING_POLL_INTERVAL', 1.0)
+        with self._lock:
+            if self._rebuild_needed or now - self._built_at >= rebuild_interval:
+                self.rebuild()
+            elif self._stale or now - self._polled_at >= poll_interval:
+                self.poll()
+
+    # ========================================
+    # 路由
+    # ========================================
+
+    def _candidates(self, query: RouteQuery):
+        """倒排集合交集得到候选 ID（未指定任何可索引条件时返回全部）"""
+        empty = frozenset()
+        sets = []
+        if query.namespace:
+            sets.append(self._postings.get(('namespace', query.namespace), empty))
+        sets.extend(self._postings.get(('tag', tag), empty) for tag in query.tags)
+        sets.extend(self._postings.get(('skill', skill_id), empty) for skill_id in query.skills)
+        sets.extend(self._postings.get(('extension', uri), empty) for uri in query.extensions)
+        if query.streaming:
+            sets.append(self._postings.get(('capability', 'streaming'), empty))
+        if query.push_notifications:
+            sets.append(self._postings.get(('capability', 'push_notifications'), empty))
+        for kind, modes in (('input', query.input_modes), ('output', query.output_modes)):
+            for mime in modes:
+                main = mime.partition('/')[0]
+                if main != '*':
+                    # 同主类型或声明了 */* 的 Agent
+                    sets.append(self._postings.get((kind, main), empty) | self._postings.get((kind, '*'), empty))
+
+        if not sets:
+            return self._entries.keys()
+        sets.sort(key=len)
+        return sets[0].intersection(*sets[1:])
+
+    @staticmethod
+    def _score(entry: RouteEntry, query: RouteQuery):
+        """
+        MIME 和传输协议打分；MIME 不满足时返回 None
+
+        - 每个输入/输出 MIME 类型：完全一致 1 分，通配符匹配 0.5 分
+        - 传输协议：首选传输一致 2 分，通过 additionalInterfaces 支持 1 分
+        """
+        score = 0.0
+        for wanted in query.input_modes:
+            match = mime_match(entry.input_modes, entry.input_mains, wanted)
+            if not match:
+                return None
+            score += match
+        for wanted in query.output_modes:
+            match = mime_match(entry.output_modes, entry.output_mains, wanted)
+            if not match:
+                return None
+            score += match
+        if query.transport:
+            if entry.preferred_transport == query.transport:
+                score += 2
+            elif query.transport in entry.endpoints:
+                score += 1
+        return score
+
+    def route(self, query: RouteQuery):
+        """
+        Returns:
+            (匹配总数, [(score, RouteEntry), ...] 前 limit 个，按分数降序)
+        """
+        with self._lock:
+            self.ensure_fresh()
+            matches = []
+            for card_id in self._candidates(query):
+                entry = self._entries[card_id]
+                score = self._score(entry, query)
+                if score is not None:
+                    matches.append((score, entry))
+        top = heapq.nsmallest(
+            query.limit, matches, key=lambda match: (-match[0], match[1].namespace_id, match[1].name)
+        )
+        return len(matches), top
+
+
+# 进程级单例
+routing_index = RoutingIndex()
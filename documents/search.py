@@ -0,0 +1,51 @@
+"""
+全文检索（PostgreSQL tsvector + GIN）
+
+AgentCard.search_vector 与 AgentCase.search_vector 由数据库触发器维护（见迁移 0014），
+API 的 ?q= 参数和 Admin 搜索框共用这里的查询构造：
+
+- 搜索词按非字母数字字符切分，每个词做前缀匹配，词之间为 AND
+  例如 "hplc analy" -> 'hplc':* & 'analy':*
+- 结果按 ts_rank 相关度降序排列（名称 > 技能名称/标签 > 描述 > 技能示例）
+
+文本搜索配置为 'simple'（不做词干提取），中文按连续字符串整体分词，
+因此中文词需要从开头匹配（"光谱" 可以匹配 "光谱分析"，"分析" 不能）。
+"""
+
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F
+
+SEARCH_CONFIG = 'simple'
+
+# 只保留字母和数字，保证拼出的 tsquery 不含任何运算符
+_TERM_RE = re.compile(r'[^\W_]+')
+
+
+def build_search_query(text: str):
+    """
+    搜索文本 -> SearchQuery（前缀匹配，AND 连接）
+
+    Returns:
+        SearchQuery；文本中没有可搜索的词时返回 None
+    """
+    terms = _TERM_RE.findall((text or '').lower())
+    if not terms:
+        return None
+    raw = ' & '.join(f"'{term}':*" for term in terms)
+    return SearchQuery(raw, config=SEARCH_CONFIG, search_type='raw')
+
+
+def search(queryset, text: str):
+    """
+    在 queryset 上执行全文检索并按相关度排序（附加 search_rank 注解）
+
+    模型需要有 search_vector 字段（GIN 索引）。
+    """
+    query = build_search_query(text)
+    if query is None:
+        return queryset.none()
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query)
+    ).order_by('-search_rank', 'pk')
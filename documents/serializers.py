@@ -4,9 +4,20 @@ DRF Serializers for AgentCard Management System
 序列化器负责将 Django 模型转换为 JSON 格式（以及反向）
 """
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Namespace, SchemaRegistry, SchemaField, AgentCard, AgentCase
 
+from .catalog import usage_counts
+from .models import (
+    AgentCard,
+    AgentCase,
+    AgentExtension,
+    ExtensionViolation,
+    Namespace,
+    SchemaField,
+    SchemaRegistry,
+)
+from .rendering import AgentCardRenderer
 
 # ========================================
 # Namespace Serializer
@@ -15,26 +26,52 @@ from .models import Namespace, SchemaRegistry, SchemaField, AgentCard, AgentCase
 class NamespaceSerializer(serializers.ModelSerializer):
     """
     命名空间序列化器
+
+    计数来自 NamespaceStats，查询集应 select_related('stats')（不产生额外查询）。
     """
     agent_card_count = serializers.SerializerMethodField()
+    active_card_count = serializers.SerializerMethodField()
+    default_card_count = serializers.SerializerMethodField()
+    case_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Namespace
         fields = [
             'id', 'name', 'description', 'is_active',
-            'created_at', 'updated_at', 'agent_card_count'
+            'created_at', 'updated_at', 'agent_card_count',
+            'active_card_count', 'default_card_count', 'case_count',
         ]
         read_only_fields = ['created_at', 'updated_at']
 
     def get_agent_card_count(self, obj):
         """返回该命名空间下的 AgentCard 数量"""
-        return obj.agent_cards.count()
+        return obj.card_counts()['agent_card_count']
+
+    def get_active_card_count(self, obj):
+        """返回启用的 AgentCard 数量"""
+        return obj.card_counts()['active_card_count']
+
+    def get_default_card_count(self, obj):
+        """返回默认版本的 AgentCard 数量"""
+        return obj.card_counts()['default_card_count']
+
+    def get_case_count(self, obj):
+        """返回关联到该命名空间 AgentCard 的 Case 数量"""
+        return obj.card_counts()['case_count']
 
 
 # ========================================
 # Schema Serializers
 # ========================================
 
+def schema_usage_count(schema) -> int:
+    """使用 Schema 的 AgentCard 数量（按 AgentExtension.schema 统计）"""
+    count = getattr(schema, 'usage_count', None)
+    if count is None:
+        count = usage_counts([schema.pk]).get(schema.pk, 0)
+    return count
+
+
 class SchemaFieldSerializer(serializers.ModelSerializer):
     """
     Schema 字段序列化器（用于嵌套在 SchemaRegistry 中）
@@ -51,7 +88,7 @@ class SchemaFieldSerializer(serializers.ModelSerializer):
             'id', 'field_name', 'field_type', 'field_type_display',
             'is_required', 'description', 'default_value',
             'min_length', 'max_length', 'min_value', 'max_value',
-            'enum_choices', 'pattern', 'order', 'constraints'
+            'enum_choices', 'pattern', 'nested_schema', 'order', 'constraints'
         ]
 
     def get_constraints(self, obj):
@@ -76,14 +113,13 @@ class SchemaRegistryListSerializer(serializers.ModelSerializer):
         read_only_fields = ['created_at', 'updated_at']
 
     def get_field_count(self, obj):
-        """返回字段数量"""
-        return obj.fields.count()
+        """返回字段数量（优先使用视图的 field_count 注解）"""
+        count = getattr(obj, 'field_count', None)
+        return obj.fields.count() if count is None else count
 
     def get_usage_count(self, obj):
-        """返回使用此 Schema 的 AgentCard 数量"""
-        return AgentCard.objects.filter(
-            domain_extensions__has_key=obj.schema_uri
-        ).count()
+        """返回使用此 Schema 的 AgentCard 数量（优先使用视图的 usage_count 注解）"""
+        return schema_usage_count(obj)
 
 
 class SchemaRegistryDetailSerializer(serializers.ModelSerializer):
@@ -101,9 +137,9 @@ class SchemaRegistryDetailSerializer(serializers.ModelSerializer):
             'id', 'schema_uri', 'schema_type', 'version',
             'description', 'example_data', 'is_active',
             'fields', 'field_definitions', 'json_schema', 'usage_count',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'revalidated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at', 'revalidated_at']
 
     def get_field_definitions(self, obj):
         """返回字段定义（易读格式）"""
@@ -114,23 +150,107 @@ class SchemaRegistryDetailSerializer(serializers.ModelSerializer):
         return obj.generate_json_schema()
 
     def get_usage_count(self, obj):
-        """返回使用此 Schema 的 AgentCard 数量"""
-        return AgentCard.objects.filter(
-            domain_extensions__has_key=obj.schema_uri
-        ).count()
+        """返回使用此 Schema 的 AgentCard 数量（优先使用视图的 usage_count 注解）"""
+        return schema_usage_count(obj)
+
+
+class ExtensionViolationSerializer(serializers.ModelSerializer):
+    """
+    扩展违规记录序列化器（/api/schemas/{id}/violations/）
+    """
+    agent_card_id = serializers.IntegerField(source='extension.agent_card_id', read_only=True)
+    namespace_id = serializers.CharField(source='extension.agent_card.namespace_id', read_only=True)
+    name = serializers.CharField(source='extension.agent_card.name', read_only=True)
+    version = serializers.CharField(source='extension.agent_card.version', read_only=True)
+    uri = serializers.CharField(source='extension.uri', read_only=True)
+
+    class Meta:
+        model = ExtensionViolation
+        fields = [
+            'extension_id', 'agent_card_id', 'namespace_id', 'name', 'version', 'uri',
+            'errors', 'schema_version', 'checked_at'
+        ]
+
+
+# ========================================
+# 稀疏字段集
+# ========================================
+
+class SparseFieldsMixin:
+    """
+    稀疏字段集序列化器混入
+
+    - context['fields'] 为字段名列表时只输出这些字段（由视图根据 ?fields= / ?omit= / ?expand= 计算），
+      未提供时输出除可展开字段以外的全部字段
+    - Meta.expandable_fields：默认不输出、需要 ?expand= 或 ?fields= 显式请求的字段
+    - Meta.field_columns：序列化器字段 -> 依赖的模型列（供视图生成 .only()），
+      未声明的字段按同名模型字段处理，空列表表示不读取模型列（注解或关联查询）
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.context.get('fields')
+        if selected is None:
+            selected = self.select_fields()
+        for name in set(self.fields) - set(selected):
+            self.fields.pop(name)
+
+    @classmethod
+    def select_fields(cls, fields=None, omit=None, expand=None) -> list:
+        """
+        计算要输出的字段
+
+        Args:
+            fields / omit / expand: 字段名列表（为空表示未指定）
+
+        Raises:
+            serializers.ValidationError: 包含未知字段或不可展开的字段
+        """
+        available = list(cls.Meta.fields)
+        expandable = list(getattr(cls.Meta, 'expandable_fields', []))
+
+        errors = {}
+        for param, names, allowed in (
+            ('fields', fields, available),
+            ('omit', omit, available),
+            ('expand', expand, expandable),
+        ):
+            unknown = [name for name in names or [] if name not in allowed]
+            if unknown:
+                errors[param] = f"未知字段：{', '.join(unknown)}（可选：{', '.join(allowed)}）"
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if fields:
+            selected = [name for name in available if name in fields]
+        else:
+            selected = [name for name in available if name not in expandable or name in (expand or [])]
+        return [name for name in selected if name not in (omit or [])]
+
+    @classmethod
+    def model_columns(cls, field_names) -> list:
+        """字段列表依赖的模型列（传给 QuerySet.only()）"""
+        field_columns = getattr(cls.Meta, 'field_columns', {})
+        columns = ['id']
+        for name in field_names:
+            columns.extend(field_columns.get(name, [name]))
+        return list(dict.fromkeys(columns))
 
 
 # ========================================
 # AgentCard Serializers
 # ========================================
 
-class AgentCardListSerializer(serializers.ModelSerializer):
+class AgentCardListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     AgentCard 列表序列化器（精简版，不包含大字段）
+
+    extension_count 优先使用视图的 SQL 注解（不读取 domain_extensions）。
     """
-    namespace_id = serializers.CharField(source='namespace.id', read_only=True)
+    namespace_id = serializers.CharField(read_only=True)
     namespace_name = serializers.CharField(source='namespace.name', read_only=True)
     extension_count = serializers.SerializerMethodField()
+    extensions = serializers.SerializerMethodField()
 
     class Meta:
         model = AgentCard
@@ -138,20 +258,36 @@ class AgentCardListSerializer(serializers.ModelSerializer):
             'id', 'namespace_id', 'namespace_name', 'name', 'version',
             'is_default_version', 'is_active', 'protocol_version',
             'description', 'url', 'preferred_transport',
-            'extension_count', 'created_at', 'updated_at'
+            'extension_count', 'created_at', 'updated_at',
+            'extensions',
         ]
         read_only_fields = ['created_at', 'updated_at']
+        expandable_fields = ['extensions']
+        field_columns = {
+            'namespace_id': ['namespace'],
+            'namespace_name': ['namespace', 'namespace__name'],
+            'extension_count': [],
+            'extensions': [],
+        }
 
     def get_extension_count(self, obj):
         """返回 L2 扩展数量"""
+        count = getattr(obj, 'extension_count', None)
+        if count is not None:
+            return count
         return len(obj.domain_extensions) if obj.domain_extensions else 0
 
+    def get_extensions(self, obj):
+        """返回 AgentCapabilities.extensions（?expand=extensions，A2A 格式）"""
+        renderer = self.context.get('renderer') or AgentCardRenderer([obj])
+        return renderer.extensions_json(obj)
 
-class AgentCardDetailSerializer(serializers.ModelSerializer):
+
+class AgentCardDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     AgentCard 详情序列化器（完整信息）
     """
-    namespace_id = serializers.CharField(source='namespace.id', read_only=True)
+    namespace_id = serializers.CharField(read_only=True)
     namespace_name = serializers.CharField(source='namespace.name', read_only=True)
     created_by_username = serializers.CharField(
         source='created_by.username',
@@ -164,6 +300,7 @@ class AgentCardDetailSerializer(serializers.ModelSerializer):
         allow_null=True
     )
     extension_schemas = serializers.SerializerMethodField()
+    extensions = serializers.SerializerMethodField()
 
     class Meta:
         model = AgentCard
@@ -182,37 +319,35 @@ class AgentCardDetailSerializer(serializers.ModelSerializer):
             # L2 扩展
             'domain_extensions', 'extension_schemas',
             # 元数据
-            'created_at', 'updated_at', 'created_by_username', 'updated_by_username'
+            'created_at', 'updated_at', 'created_by_username', 'updated_by_username',
+            # 展开（?expand=extensions）
+            'extensions',
         ]
         read_only_fields = ['created_at', 'updated_at', 'created_by_username', 'updated_by_username']
+        expandable_fields = ['extensions']
+        field_columns = {
+            'namespace_id': ['namespace'],
+            'namespace_name': ['namespace', 'namespace__name'],
+            'created_by_username': ['created_by'],
+            'updated_by_username': ['updated_by'],
+            'extension_schemas': ['domain_extensions'],
+            'extensions': [],
+        }
 
     def get_extension_schemas(self, obj):
         """
         返回扩展中使用的 Schema 信息
+
+        序列化多个卡片时，调用方应在 context['renderer'] 中传入共享的
+        AgentCardRenderer，使所有卡片的 Schema 在一次查询中加载。
         """
-        if not obj.domain_extensions:
-            return []
-
-        schema_infos = []
-        for schema_uri in obj.domain_extensions.keys():
-            try:
-                schema = SchemaRegistry.objects.get(schema_uri=schema_uri)
-                schema_infos.append({
-                    'schema_uri': schema_uri,
-                    'schema_type': schema.schema_type,
-                    'version': schema.version,
-                    'is_active': schema.is_active,
-                })
-            except SchemaRegistry.DoesNotExist:
-                schema_infos.append({
-                    'schema_uri': schema_uri,
-                    'schema_type': None,
-                    'version': None,
-                    'is_active': False,
-                    'warning': '未注册的 Schema'
-                })
+        renderer = self.context.get('renderer') or AgentCardRenderer([obj])
+        return renderer.extension_schemas(obj)
 
-        return schema_infos
+    def get_extensions(self, obj):
+        """返回 AgentCapabilities.extensions（?expand=extensions，A2A 格式）"""
+        renderer = self.context.get('renderer') or AgentCardRenderer([obj])
+        return renderer.extensions_json(obj)
 
 
 class AgentCardCreateUpdateSerializer(serializers.ModelSerializer):
@@ -238,6 +373,17 @@ class AgentCardCreateUpdateSerializer(serializers.ModelSerializer):
             'domain_extensions'
         ]
 
+    def get_unique_together_validators(self):
+        """
+        不为默认版本的部分唯一约束生成预查询验证器
+
+        该约束由数据库保证，AgentCard.save() 将冲突转换为 is_default_version 字段的验证错误。
+        """
+        return [
+            validator for validator in super().get_unique_together_validators()
+            if validator.condition is None
+        ]
+
     def validate_domain_extensions(self, value):
         """
         验证 domain_extensions 格式
@@ -254,26 +400,89 @@ class AgentCardCreateUpdateSerializer(serializers.ModelSerializer):
 
         return value
 
+    def create(self, validated_data):
+        """模型验证失败（AgentCard.save()）时返回 400"""
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
+
+    def update(self, instance, validated_data):
+        """
+        PUT 保存并验证全部字段；PATCH 只保存值有变化的字段
+
+        PATCH 通过 save(update_fields=...) 保存，模型只验证涉及这些字段的规则（AgentCard.clean_update()），
+        一个字段的修改不再重新验证全部技能和接口；没有字段变化时不写入数据库。
+        模型验证失败（AgentCard.save()）时返回 400。
+        """
+        try:
+            if not self.partial:
+                return super().update(instance, validated_data)
+
+            changed = [
+                name for name, value in validated_data.items()
+                if name != 'updated_by' and self._value_changed(instance, name, value)
+            ]
+            if not changed:
+                return instance
+            for name in changed:
+                setattr(instance, name, validated_data[name])
+            update_fields = changed + ['updated_at']
+            if 'updated_by' in validated_data:
+                instance.updated_by = validated_data['updated_by']
+                update_fields.append('updated_by')
+            instance.save(update_fields=update_fields)
+            return instance
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(serializers.as_serializer_error(e))
+
+    @staticmethod
+    def _value_changed(instance, name, value) -> bool:
+        field = instance._meta.get_field(name)
+        if field.is_relation:
+            return getattr(instance, field.attname) != (value.pk if value is not None else None)
+        return getattr(instance, name) != value
+
+
+class AgentExtensionSerializer(serializers.ModelSerializer):
+    """
+    AgentExtension 序列化器（/api/agentcards/{id}/extensions/）
+
+    schema 为 URI 匹配的已注册 Schema（写入时自动关联，只读）；
+    params 的 Schema 验证和 URI 唯一性检查在写入时进行（见 documents/extensions.py）。
+    """
+    uri = serializers.URLField(max_length=512)
+    schema = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = AgentExtension
+        fields = ['id', 'uri', 'description', 'required', 'params', 'order', 'schema']
+
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("params 必须是一个对象")
+        return value
+
 
 class AgentCardStandardSerializer(serializers.Serializer):
     """
     符合 A2A 协议标准的 AgentCard JSON 序列化器
 
     用于 /api/agentcards/{id}/standard-json/ 端点
-    不基于 ModelSerializer，直接使用 to_agentcard_json() 方法
+    不基于 ModelSerializer，直接返回写入时物化的 A2A 快照（get_a2a_snapshot()）
 
     注意：此序列化器用于生产环境 API 导出，会进行严格的 A2A 协议验证。
     如果 AgentCard 数据不完整，会返回 400 错误。
     """
     def to_representation(self, instance):
         """
-        直接使用模型的 to_agentcard_json() 方法
+        直接使用模型的 get_a2a_snapshot() 方法
 
-        使用 validate=True 确保导出的 AgentCard 符合 A2A 协议要求
+        快照在保存时以 validate=True 生成，确保导出的 AgentCard 符合 A2A 协议要求
         """
         include_metadata = self.context.get('include_metadata', False)
         try:
-            return instance.to_agentcard_json(include_metadata=include_metadata, validate=True)
+            return instance.get_a2a_snapshot(include_metadata=include_metadata)
         except Exception as e:
             # 将 ValidationError 转换为 serializers.ValidationError
             # 这样 DRF 会返回 400 Bad Request 而不是 500 Internal Server Error
@@ -307,6 +516,19 @@ class SchemaCatalogSerializer(serializers.Serializer):
     total_schemas = serializers.IntegerField()
 
 
+class SkillCatalogSerializer(serializers.Serializer):
+    """
+    技能目录序列化器（基于 AgentSkill 索引的分组统计）
+
+    返回格式：
+    {skill_id, name, agent_count, tags: [{tag, agent_count}]}
+    """
+    skill_id = serializers.CharField()
+    name = serializers.CharField()
+    agent_count = serializers.IntegerField()
+    tags = serializers.ListField(child=serializers.DictField())
+
+
 # ========================================
 # AgentCase Serializers
 # ========================================
@@ -342,7 +564,7 @@ class AgentCaseDetailSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = AgentCase
-        fields = '__all__'
+        exclude = ['search_vector']
         read_only_fields = ['created_at', 'updated_at', 'created_by', 'updated_by']
 
     def get_outcome_file_url(self, obj):
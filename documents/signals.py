@@ -0,0 +1,350 @@
+"""
+模型信号处理
+
+子表变更需要同步维护父记录上的派生数据：
+- AgentExtension 增删改会改变所属 AgentCard 的 capabilities.extensions，
+  需要刷新 AgentCard 上物化的 A2A 快照，并更新 updated_at（ETag / Last-Modified）；
+  写路径中的多次扩展变更在同一事务内合并为每张卡片刷新一次（见 children_changes_coalesced()）
+- SchemaField 增删改会改变 Schema 定义，需要更新 SchemaRegistry.updated_at 并丢弃编译的验证器
+- AgentCard / 扩展 / 命名空间变更后，在事务提交后同步静态发布的 agent.json（见 publishing.py）
+- AgentCard / 扩展的写入和删除追加到变更日志 AgentCardChange（增量同步的变更流）
+- AgentCard.skills 变更后重建技能 / 标签索引 AgentSkill / AgentSkillTag
+- AgentCard / 扩展 / 命名空间变更后，在事务提交后标记本进程的路由索引过期（见 routing.py）
+- AgentCard / 命名空间变更后，在事务提交后删除版本解析缓存（见 resolution.py）
+- AgentCard / AgentCase 写入和删除时在同一事务中增量更新命名空间计数 NamespaceStats
+- Schema / 字段 / 扩展变更后，在事务提交后删除 Schema 目录缓存（见 catalog.py）
+- Schema / 字段变更后，在事务提交后提交后台任务重新验证引用该 Schema 的扩展；
+  扩展保存时在同一事务中重新验证该扩展（见 revalidation.py）
+"""
+
+import contextlib
+import functools
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .catalog import invalidate_catalog
+from .models import (
+    AgentCard,
+    AgentCardChange,
+    AgentCase,
+    AgentExtension,
+    AgentSkill,
+    Namespace,
+    NamespaceStats,
+    SchemaField,
+    SchemaRegistry,
+)
+from .publishing import publish_root, sync_published_safely
+from .rendering import refresh_snapshots
+from .resolution import invalidate_candidates
+from .revalidation import revalidate_extension, revalidator
+from .routing import routing_index
+from .validation import discard_validator
+
+
+def schedule_publish(keys):
+    """
+    事务提交后同步 (namespace_id, name) 的静态发布文件
+
+    未配置 AGENTCARD_PUBLISH_ROOT 时不做任何事。
+    """
+    if publish_root() is None:
+        return
+    for namespace_id, name in set(keys):
+        transaction.on_commit(functools.partial(sync_published_safely, namespace_id, name))
+
+
+def schedule_routing_refresh(rebuild: bool = False):
+    """
+    事务提交后标记本进程的路由索引过期（下一次路由请求前刷新）
+
+    其他进程的索引按轮询间隔从变更流刷新。
+    """
+    transaction.on_commit(routing_index.mark_rebuild if rebuild else routing_index.mark_stale)
+
+
+def schedule_resolution_invalidation(keys):
+    """事务提交后删除 (namespace_id, name) 的版本解析缓存"""
+    keys = set(keys)
+    if keys:
+        transaction.on_commit(functools.partial(invalidate_candidates, keys))
+
+
+def schedule_catalog_invalidation():
+    """事务提交后删除 Schema 目录缓存（字段定义和使用统计）"""
+    transaction.on_commit(invalidate_catalog)
+
+
+def schedule_revalidation(schema_id):
+    """事务提交后提交 Schema 的扩展重新验证任务（后台执行）"""
+    transaction.on_commit(functools.partial(revalidator.submit, schema_id))
+
+
+_state = threading.local()
+
+
+@contextlib.contextmanager
+def extension_deletes_handled():
+    """
+    调用方自行为删除的扩展记录墓碑并刷新卡片（如 extensions.sync_extensions() 的批量删除）：
+    其中删除扩展时 post_delete 信号不再逐个记录墓碑和刷新卡片
+    """
+    previous = getattr(_state, 'extension_deletes_handled', False)
+    _state.extension_deletes_handled = True
+    try:
+        yield
+    finally:
+        _state.extension_deletes_handled = previous
+
+
+def agentcard_children_changed(card_ids):
+    """
+    AgentCard 的子记录（扩展）发生变化：更新 updated_at（并清空 content_digest）、刷新快照、记录变更并同步发布文件
+    """
+    card_ids = set(card_ids)
+    AgentCard.objects.filter(pk__in=card_ids).update(updated_at=timezone.now(), content_digest='')
+    cards = list(AgentCard.objects.filter(pk__in=card_ids))
+    refresh_snapshots(cards)
+    AgentCardChange.record_cards(cards)
+    schedule_publish((card.namespace_id, card.name) for card in cards)
+    schedule_routing_refresh()
+
+
+@contextlib.contextmanager
+def children_changes_coalesced():
+    """
+    合并块内子记录（扩展）变更引起的卡片刷新
+
+    块内逐条保存 / 删除扩展时信号只登记卡片 id，块正常结束时（仍在调用方的事务中）对每张卡片
+    刷新一次；块内抛出异常时丢弃登记（事务随之回滚）。嵌套时只在最外层结束时刷新。
+    登记保存在线程局部状态中（每个线程一个数据库连接）。用于写路径：conditional_write、Admin 内联保存。
+    """
+    if getattr(_state, 'pending_children', None) is not None:
+        yield
+        return
+    _state.pending_children = pending = set()
+    try:
+        yield
+    finally:
+        _state.pending_children = None
+    if pending:
+        agentcard_children_changed(pending)
+
+
+def schedule_children_changed(card_ids):
+    """
+    逐条子记录变更（扩展保存 / 删除信号）后刷新卡片
+
+    在 children_changes_coalesced() 块内时登记到块结束时统一刷新，否则立即刷新。
+    """
+    pending = getattr(_state, 'pending_children', None)
+    if pending is None:
+        agentcard_children_changed(card_ids)
+    else:
+        pending.update(card_ids)
+
+
+# ========================================
+# AgentCard / Namespace
+# ========================================
+
+def card_stats_deltas(previous, instance) -> dict:
+    """
+    AgentCard 保存前后对命名空间计数的影响
+
+    Args:
+        previous: 保存前的 (namespace_id, name, is_active, is_default_version)，新建时为 None
+    """
+    deltas = NamespaceStats.card_deltas(
+        instance.namespace_id, instance.is_active, instance.is_default_version
+    )
+    if previous is None:
+        return deltas
+    namespace_id, _, is_active, is_default_version = previous
+    deltas = NamespaceStats.merge(
+        deltas, NamespaceStats.card_deltas(namespace_id, is_active, is_default_version, sign=-1)
+    )
+    # 卡片移动到其他命名空间时，其 Case 随之移动
+    if namespace_id != instance.namespace_id:
+        case_count = instance.test_cases.count()
+        deltas = NamespaceStats.merge(deltas, {
+            namespace_id: {'case_count': -case_count},
+            instance.namespace_id: {'case_count': case_count},
+        })
+    return deltas
+
+
+@receiver(pre_save, sender=AgentCard)
+def agent_card_pre_save(sender, instance, **kwargs):
+    # 记录修改前的 namespace::name@version：改名后需要撤下旧路径的发布文件、删除旧名称的版本缓存，
+    # 移动到其他命名空间时为原命名空间记录墓碑
+    # 以及修改前的启用 / 默认版本状态：计算命名空间计数的增量
+    instance._previous_key = None
+    instance._previous_state = None
+    instance._previous_version = None
+    if instance.pk:
+        row = AgentCard.objects.filter(pk=instance.pk).values_list(
+            'namespace_id', 'name', 'is_active', 'is_default_version', 'version'
+        ).first()
+        if row:
+            instance._previous_state = row[:4]
+            instance._previous_key = row[:2]
+            instance._previous_version = row[4]
+
+
+@receiver(post_save, sender=AgentCard)
+def agent_card_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'skills' in update_fields:
+        AgentSkill.sync_cards([instance])
+    previous_key = getattr(instance, '_previous_key', None)
+    if previous_key and previous_key[0] != instance.namespace_id:
+        # 移动到其他命名空间：原命名空间记录墓碑（按命名空间过滤的镜像方不会收到新命名空间的 upsert）
+        AgentCardChange.record_cards(
+            [(instance.pk, previous_key[0], previous_key[1], instance._previous_version)],
+            op=AgentCardChange.OP_DELETE,
+        )
+    AgentCardChange.record_cards([instance])
+    NamespaceStats.apply(card_stats_deltas(getattr(instance, '_previous_state', None), instance))
+    keys = [(instance.namespace_id, instance.name)]
+    if getattr(instance, '_previous_key', None):
+        keys.append(instance._previous_key)
+    schedule_publish(keys)
+    schedule_resolution_invalidation(keys)
+    schedule_routing_refresh()
+
+
+@receiver(pre_delete, sender=AgentCard)
+def agent_card_pre_delete(sender, instance, **kwargs):
+    # 删除卡片时其 Case 的 agent_card 置空（SET_NULL），需在置空前统计
+    instance._case_count = instance.test_cases.count()
+
+
+@receiver(post_delete, sender=AgentCard)
+def agent_card_deleted(sender, instance, **kwargs):
+    AgentCardChange.record_cards([instance], op=AgentCardChange.OP_DELETE)
+    NamespaceStats.apply(NamespaceStats.merge(
+        NamespaceStats.card_deltas(
+            instance.namespace_id, instance.is_active, instance.is_default_version, sign=-1
+        ),
+        {instance.namespace_id: {'case_count': -getattr(instance, '_case_count', 0)}},
+    ))
+    schedule_publish([(instance.namespace_id, instance.name)])
+    schedule_resolution_invalidation([(instance.namespace_id, instance.name)])
+    schedule_routing_refresh()
+
+
+@receiver(post_save, sender=Namespace)
+def namespace_saved(sender, instance, created=False, **kwargs):
+    if created:
+        NamespaceStats.objects.get_or_create(namespace=instance)
+    # 命名空间启用/禁用会影响其下所有 AgentCard 的发布状态和版本解析结果
+    if not created:
+        keys = list(instance.agent_cards.values_list('namespace_id', 'name').distinct())
+        schedule_publish(keys)
+        schedule_resolution_invalidation(keys)
+        schedule_routing_refresh(rebuild=True)
+
+
+# ========================================
+# 子记录
+# ========================================
+
+@receiver(post_save, sender=AgentExtension)
+def agent_extension_saved(sender, instance, **kwargs):
+    schedule_children_changed([instance.agent_card_id])
+    schedule_catalog_invalidation()
+    revalidate_extension(instance)
+
+
+@receiver(post_delete, sender=AgentExtension)
+def agent_extension_deleted(sender, instance, origin=None, **kwargs):
+    schedule_catalog_invalidation()
+    # 级联删除 AgentCard 时无需刷新（卡片本身即将被删除）；
+    # 批量删除扩展（见 extension_deletes_handled()）时墓碑和刷新由调用方统一处理
+    if isinstance(origin, AgentCard) or getattr(_state, 'extension_deletes_handled', False):
+        return
+    AgentCardChange.record_extension_deleted(instance)
+    schedule_children_changed([instance.agent_card_id])
+
+
+# ========================================
+# Schema
+# ========================================
+
+@receiver(post_save, sender=SchemaRegistry)
+def schema_saved(sender, instance, **kwargs):
+    discard_validator(instance.pk)
+    schedule_catalog_invalidation()
+    schedule_revalidation(instance.pk)
+
+
+@receiver(post_delete, sender=SchemaRegistry)
+def schema_deleted(sender, instance, **kwargs):
+    discard_validator(instance.pk)
+    schedule_catalog_invalidation()
+
+
+@receiver(post_save, sender=SchemaField)
+def schema_field_saved(sender, instance, **kwargs):
+    # updated_at 同时是编译验证器的版本号（其他进程据此重新编译）
+    SchemaRegistry.objects.filter(pk=instance.schema_id).update(updated_at=timezone.now())
+    discard_validator(instance.schema_id)
+    schedule_catalog_invalidation()
+    schedule_revalidation(instance.schema_id)
+
+
+@receiver(post_delete, sender=SchemaField)
+def schema_field_deleted(sender, instance, origin=None, **kwargs):
+    discard_validator(instance.schema_id)
+    schedule_catalog_invalidation()
+    if isinstance(origin, SchemaRegistry):
+        return
+    SchemaRegistry.objects.filter(pk=instance.schema_id).update(updated_at=timezone.now())
+    schedule_revalidation(instance.schema_id)
+
+
+# ========================================
+# AgentCase
+# ========================================
+
+def _case_namespaces(*card_ids) -> dict:
+    """AgentCard ID -> namespace_id（一次查询）"""
+    card_ids = set(filter(None, card_ids))
+    if not card_ids:
+        return {}
+    return dict(AgentCard.objects.filter(pk__in=card_ids).values_list('pk', 'namespace_id'))
+
+
+@receiver(pre_save, sender=AgentCase)
+def agent_case_pre_save(sender, instance, **kwargs):
+    # 记录修改前关联的 AgentCard：重新分配后需要在两个命名空间之间移动计数
+    instance._previous_card_id = None
+    if instance.pk:
+        instance._previous_card_id = AgentCase.objects.filter(
+            pk=instance.pk
+        ).values_list('agent_card_id', flat=True).first()
+
+
+@receiver(post_save, sender=AgentCase)
+def agent_case_saved(sender, instance, created=False, **kwargs):
+    previous_card_id = getattr(instance, '_previous_card_id', None)
+    if previous_card_id == instance.agent_card_id:
+        return
+    namespaces = _case_namespaces(previous_card_id, instance.agent_card_id)
+    deltas = {}
+    if previous_card_id in namespaces:
+        deltas = NamespaceStats.merge(deltas, {namespaces[previous_card_id]: {'case_count': -1}})
+    if instance.agent_card_id in namespaces:
+        deltas = NamespaceStats.merge(deltas, {namespaces[instance.agent_card_id]: {'case_count': 1}})
+    NamespaceStats.apply(deltas)
+
+
+@receiver(post_delete, sender=AgentCase)
+def agent_case_deleted(sender, instance, **kwargs):
+    namespaces = _case_namespaces(instance.agent_card_id)
+    if instance.agent_card_id in namespaces:
+        NamespaceStats.apply({namespaces[instance.agent_card_id]: {'case_count': -1}})
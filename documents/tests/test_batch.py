@@ -0,0 +1,67 @@
+"""
+批量获取（GET /api/agentcards/batch/）
+"""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from .utils import make_card, make_namespace
+
+
+class BatchTests(APITestCase):
+    url = '/api/agentcards/batch/'
+
+    def setUp(self):
+        namespace = make_namespace()
+        self.cards = [make_card(namespace, version=f'1.0.{patch}') for patch in range(3)]
+
+    def _get(self, **params):
+        return self.client.get(self.url, params)
+
+    def test_results_follow_request_order(self):
+        first, second, third = self.cards
+        response = self._get(ids=f'{third.pk},{first.pk}', keys='dev::hplc@1.0.1,dev::hplc@9.9.9')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertEqual(
+            [(item['ref'], item['status']) for item in results],
+            [(str(third.pk), 'ok'), (str(first.pk), 'ok'), ('dev::hplc@1.0.1', 'ok'), ('dev::hplc@9.9.9', 'not_found')],
+        )
+        self.assertEqual(results[2]['id'], second.pk)
+        self.assertEqual(results[0]['data']['version'], '1.0.2')
+
+    def test_invalid_refs_are_reported_per_item(self):
+        # '²'.isdigit() 为真但 int() 无法解析；超出 bigint 的 ID 无法查询
+        response = self._get(ids=f'{self.cards[0].pk},²,abc,{2 ** 63}', keys='no-version')
+
+        self.assertEqual(response.status_code, 200)
+        statuses = {item['ref']: item['status'] for item in response.data['results']}
+        self.assertEqual(statuses, {
+            str(self.cards[0].pk): 'ok', '²': 'error', 'abc': 'error', str(2 ** 63): 'error', 'no-version': 'error',
+        })
+
+    def test_detail_view_and_metadata(self):
+        card = self.cards[0]
+
+        detail = self._get(ids=str(card.pk), view='detail').data['results'][0]
+        standard = self._get(ids=str(card.pk), include_metadata='true').data['results'][0]
+
+        self.assertEqual(detail['data']['namespace_id'], 'dev')
+        self.assertEqual(standard['data']['_metadata']['namespace'], 'dev')
+
+    def test_request_errors(self):
+        self.assertEqual(self._get().status_code, 400)
+        self.assertEqual(self._get(ids='1', view='other').status_code, 400)
+        self.assertEqual(self._get(ids=','.join(str(i) for i in range(1, 1002))).status_code, 400)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        counts = []
+        for cards in (self.cards[:1], self.cards):
+            with CaptureQueriesContext(connection) as queries:
+                response = self._get(ids=','.join(str(card.pk) for card in cards), view='detail')
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+
+        self.assertEqual(counts[0], counts[1])
@@ -0,0 +1,108 @@
+"""
+变更流（GET /api/agentcards/changes/）
+
+变更流只返回已结束事务写入的变更（txid < 快照 xmin），TestCase 的外层事务在测试期间一直打开，
+因此使用 TransactionTestCase（每次写入单独提交）。
+"""
+
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from documents.models import AgentExtension, Namespace
+
+from .utils import make_card, make_namespace
+
+URL = '/api/agentcards/changes/'
+
+
+class ChangeFeedTests(TransactionTestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.namespace = make_namespace()
+
+    def read(self, **params):
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_changes_are_ordered_and_merged_per_card(self):
+        first = make_card(self.namespace, 'first')
+        second = make_card(self.namespace, 'second')
+        first.description = '修改后的描述'
+        first.save()
+        second_id = second.pk
+        second.delete()
+
+        data = self.read()
+
+        entries = [(entry['op'], entry['type'], entry['id']) for entry in data['results']]
+        # first 只返回最后一次 upsert；second 在页内被删除，只返回墓碑
+        self.assertEqual(entries, [('upsert', 'agentcard', first.pk), ('delete', 'agentcard', second_id)])
+        seqs = [entry['seq'] for entry in data['results']]
+        self.assertEqual(seqs, sorted(seqs))
+        self.assertEqual(data['results'][0]['data']['description'], '修改后的描述')
+        self.assertEqual(data['results'][1]['key'], 'dev::second@1.0.0')
+        self.assertFalse(data['has_more'])
+
+    def test_cursor_returns_only_later_changes(self):
+        make_card(self.namespace, 'first')
+        cursor = self.read(since='latest')['cursor']
+        self.assertEqual(self.read(since=cursor)['results'], [])
+
+        second = make_card(self.namespace, 'second')
+        data = self.read(since=cursor)
+
+        self.assertEqual([entry['id'] for entry in data['results']], [second.pk])
+        self.assertEqual(self.read(since=data['cursor'])['results'], [])
+
+    def test_paging_with_limit(self):
+        for index in range(5):
+            make_card(self.namespace, f'card-{index}')
+
+        seen, cursor = [], None
+        while True:
+            data = self.read(limit=2, **({'since': cursor} if cursor else {}))
+            seen.extend(entry['key'] for entry in data['results'])
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+
+        self.assertEqual(seen, [f'dev::card-{index}@1.0.0' for index in range(5)])
+
+    def test_invalid_limit_returns_400(self):
+        for limit in ['0', 'x', '²', '100000']:
+            with self.subTest(limit=limit):
+                self.assertEqual(self.client.get(URL, {'limit': limit}).status_code, 400)
+
+    def test_extension_delete_records_a_tombstone(self):
+        card = make_card(self.namespace)
+        extension = AgentExtension.objects.create(agent_card=card, uri='https://ext.example.com/a', params={})
+        cursor = self.read(since='latest')['cursor']
+
+        extension.delete()
+        data = self.read(since=cursor)
+
+        tombstones = [entry for entry in data['results'] if entry['type'] == 'extension']
+        self.assertEqual(len(tombstones), 1)
+        self.assertEqual(tombstones[0]['op'], 'delete')
+        self.assertEqual(tombstones[0]['uri'], 'https://ext.example.com/a')
+        # 卡片随之刷新
+        self.assertIn(('upsert', card.pk), [(entry['op'], entry['id']) for entry in data['results']])
+
+    def test_move_to_another_namespace_tombstones_the_old_namespace(self):
+        prod = Namespace.objects.create(id='prod', name='prod')
+        card = make_card(self.namespace)
+        cursor = self.read(since='latest')['cursor']
+
+        card.namespace = prod
+        card.save()
+
+        old = self.read(since=cursor, namespace='dev')['results']
+        self.assertEqual([(entry['op'], entry['key']) for entry in old], [('delete', 'dev::hplc@1.0.0')])
+        new = self.read(since=cursor, namespace='prod')['results']
+        self.assertEqual([(entry['op'], entry['key']) for entry in new], [('upsert', 'prod::hplc@1.0.0')])
+        # 未过滤的镜像方：先删除、再写入，卡片仍然存在
+        both = self.read(since=cursor)['results']
+        self.assertEqual([entry['op'] for entry in both], ['delete', 'upsert'])
+        self.assertEqual(both[1]['data']['_metadata']['namespace'], 'prod')
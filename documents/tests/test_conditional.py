@@ -0,0 +1,89 @@
+"""
+条件请求：ETag / If-None-Match（304）与 If-Match（412）
+"""
+
+from rest_framework.test import APITestCase
+
+from documents.models import AgentExtension
+from documents.revalidation import revalidate_schema
+
+from .utils import (
+    ASSET_SCHEMA_URI,
+    make_asset_schema,
+    make_card,
+    make_namespace,
+    make_user,
+)
+
+
+class SchemaConditionalGetTests(APITestCase):
+
+    def setUp(self):
+        self.schema = make_asset_schema()
+        self.card = make_card(make_namespace())
+        self.url = f'/api/schemas/{self.schema.pk}/'
+
+    def test_unchanged_schema_is_304(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_usage_count_change_invalidates_etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['usage_count'], 0)
+
+        AgentExtension.objects.create(
+            agent_card=self.card, uri=ASSET_SCHEMA_URI, schema=self.schema, params={'assetId': 'AB-1'}
+        )
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['usage_count'], 1)
+
+
+    def test_revalidation_invalidates_etag(self):
+        response = self.client.get(self.url)
+        self.assertIsNone(response.data['revalidated_at'])
+
+        revalidate_schema(self.schema.pk)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.data['revalidated_at'])
+
+
+class AgentCardConditionalTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.card = make_card(make_namespace())
+        self.url = f'/api/agentcards/{self.card.pk}/'
+
+    def test_if_none_match_is_304_until_the_card_changes(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.client.patch(self.url, {'description': '新的描述'}, format='json')
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_stale_if_match_is_412(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.patch(self.url, {'description': '第一次'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        new_etag = response['ETag']
+        self.assertNotEqual(new_etag, etag)
+
+        response = self.client.patch(self.url, {'description': '第二次'}, format='json', HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(response['ETag'], new_etag)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.description, '第一次')
+
+    def test_etag_returned_by_write_matches_next_read(self):
+        response = self.client.patch(self.url, {'description': '新的描述'}, format='json')
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
@@ -0,0 +1,70 @@
+"""
+默认版本（每个 namespace::name 只有一个，数据库部分唯一约束）与 make-default 端点
+"""
+
+from django.core.exceptions import ValidationError
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCard, NamespaceStats
+
+from .utils import make_card, make_namespace, make_user
+
+
+class MakeDefaultTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.namespace = make_namespace()
+        self.v1 = make_card(self.namespace, version='1.0.0', is_default_version=True)
+        self.v2 = make_card(self.namespace, version='2.0.0')
+
+    def _make_default(self, card):
+        return self.client.post(f'/api/agentcards/{card.pk}/make-default/')
+
+    def _defaults(self, namespace_id='dev', name='hplc'):
+        return list(
+            AgentCard.objects.filter(namespace_id=namespace_id, name=name, is_default_version=True)
+            .values_list('version', flat=True)
+        )
+
+    def test_switches_the_default_in_one_request(self):
+        response = self._make_default(self.v2)
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(response.data['is_default_version'])
+        self.assertEqual(response.data['previous_default'], [{'id': self.v1.pk, 'version': '1.0.0'}])
+        self.assertEqual(self._defaults(), ['2.0.0'])
+        self.assertEqual(NamespaceStats.objects.get(pk='dev').default_card_count, 1)
+
+    def test_already_default_is_a_no_op(self):
+        updated_at = AgentCard.objects.get(pk=self.v1.pk).updated_at
+
+        response = self._make_default(self.v1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['previous_default'], [])
+        self.assertEqual(AgentCard.objects.get(pk=self.v1.pk).updated_at, updated_at)
+
+    def test_other_namespaces_keep_their_default(self):
+        other = make_card(make_namespace('prod'), version='1.0.0', is_default_version=True)
+
+        self._make_default(self.v2)
+
+        self.assertEqual(self._defaults('prod'), ['1.0.0'])
+        self.assertTrue(AgentCard.objects.get(pk=other.pk).is_default_version)
+
+    def test_patch_to_a_second_default_is_rejected_by_the_constraint(self):
+        response = self.client.patch(
+            f'/api/agentcards/{self.v2.pk}/', {'is_default_version': True}, format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('is_default_version', response.data)
+        self.assertEqual(self._defaults(), ['1.0.0'])
+
+    def test_save_of_a_second_default_raises_validation_error(self):
+        with self.assertRaises(ValidationError) as cm:
+            make_card(self.namespace, version='3.0.0', is_default_version=True)
+
+        self.assertIn('is_default_version', cm.exception.message_dict)
+        self.assertEqual(self._defaults(), ['1.0.0'])
@@ -0,0 +1,60 @@
+"""
+流式导出（GET /api/agentcards/export/）
+"""
+
+import gzip
+import json
+
+from rest_framework.test import APITestCase
+
+from .utils import make_card, make_namespace
+
+
+class ExportTests(APITestCase):
+    url = '/api/agentcards/export/'
+
+    def setUp(self):
+        dev = make_namespace('dev')
+        self.cards = [make_card(dev, name=f'agent-{index}') for index in range(4)]
+        make_card(make_namespace('prod'), name='other')
+
+    def _export(self, **params):
+        response = self.client.get(self.url, {'namespace': 'dev', **params})
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    @staticmethod
+    def _lines(body):
+        return [json.loads(line) for line in body.decode('utf-8').splitlines()]
+
+    def test_one_card_per_line_in_id_order(self):
+        response, body = self._export()
+
+        self.assertTrue(response['Content-Type'].startswith('application/x-ndjson'))
+        self.assertIn('agentcards-dev.ndjson', response['Content-Disposition'])
+        lines = self._lines(body)
+        self.assertEqual([line['name'] for line in lines], [f'agent-{index}' for index in range(4)])
+        self.assertEqual([line['_metadata']['id'] for line in lines], [card.pk for card in self.cards])
+        self.assertTrue(all(line['_metadata']['cursor'] for line in lines))
+
+    def test_cursor_resumes_after_the_last_line(self):
+        first = self._lines(self._export(limit='2')[1])
+        self.assertEqual(len(first), 2)
+
+        rest = self._lines(self._export(cursor=first[-1]['_metadata']['cursor'])[1])
+
+        self.assertEqual([line['name'] for line in first + rest], [f'agent-{index}' for index in range(4)])
+
+    def test_gzip_matches_plain_output(self):
+        _, plain = self._export()
+        response, compressed = self._export(gzip='true')
+
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertIn('.ndjson.gz', response['Content-Disposition'])
+        self.assertEqual(gzip.decompress(compressed), plain)
+
+    def test_invalid_limit_and_cursor_return_400(self):
+        for params in [{'limit': '0'}, {'limit': 'x'}, {'limit': '²'}, {'cursor': 'not-a-cursor'}]:
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
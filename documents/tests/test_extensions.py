@@ -0,0 +1,158 @@
+"""
+AgentExtension 子资源（/api/agentcards/{id}/extensions/）
+"""
+
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCard, AgentCardChange, AgentExtension
+from documents.signals import children_changes_coalesced
+
+from .utils import (
+    ASSET_SCHEMA_URI,
+    make_asset_schema,
+    make_card,
+    make_namespace,
+    make_user,
+)
+
+
+class ExtensionReplaceTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        make_asset_schema()
+        self.card = make_card(make_namespace())
+        self.url = f'/api/agentcards/{self.card.pk}/extensions/'
+        for uri, params in [
+            (ASSET_SCHEMA_URI, {'assetId': 'AB-1'}),
+            ('https://ext.example.com/keep', {'k': 1}),
+            ('https://ext.example.com/drop-1', {}),
+            ('https://ext.example.com/drop-2', {}),
+        ]:
+            response = self.client.post(self.url, {'uri': uri, 'params': params}, format='json')
+            self.assertEqual(response.status_code, 201, response.data)
+
+    def test_put_reports_diff_counts_and_records_tombstones(self):
+        before = AgentCardChange.objects.count()
+        items = [
+            {'uri': 'https://ext.example.com/keep', 'params': {'k': 1}},
+            {'uri': ASSET_SCHEMA_URI, 'params': {'assetId': 'CD-2'}, 'required': True},
+            {'uri': 'https://ext.example.com/new', 'params': {'n': 1}},
+        ]
+
+        response = self.client.put(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        counts = {key: response.data[key] for key in ['created', 'updated', 'deleted', 'unchanged']}
+        # keep 的 order 从 1 变为 0，也算更新
+        self.assertEqual(counts, {'created': 1, 'updated': 2, 'deleted': 2, 'unchanged': 0})
+        self.assertEqual(
+            list(self.card.extensions.order_by('order').values_list('uri', flat=True)),
+            [item['uri'] for item in items],
+        )
+
+        changes = list(AgentCardChange.objects.order_by('id')[before:])
+        tombstones = sorted(c.extension_uri for c in changes if c.op == AgentCardChange.OP_DELETE)
+        self.assertEqual(tombstones, ['https://ext.example.com/drop-1', 'https://ext.example.com/drop-2'])
+        # 卡片只刷新一次
+        self.assertEqual(len([c for c in changes if c.op == AgentCardChange.OP_UPSERT]), 1)
+
+        self.card.refresh_from_db()
+        snapshot = self.card.a2a_snapshot['capabilities']['extensions']
+        self.assertEqual([ext['uri'] for ext in snapshot], [item['uri'] for item in items])
+        self.assertEqual(snapshot[1]['params'], {'assetId': 'CD-2'})
+
+    def test_put_same_list_again_is_unchanged(self):
+        items = [{'uri': ext.uri, 'params': ext.params} for ext in self.card.extensions.order_by('order')]
+        before = AgentCardChange.objects.count()
+
+        response = self.client.put(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['unchanged'], 4)
+        self.assertEqual(AgentCardChange.objects.count(), before)
+
+    def test_put_with_invalid_params_changes_nothing(self):
+        items = [{'uri': ASSET_SCHEMA_URI, 'params': {'assetId': 'bad'}}]
+
+        response = self.client.put(self.url, items, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AgentExtension.objects.filter(agent_card=self.card).count(), 4)
+
+    def test_single_delete_records_a_tombstone(self):
+        extension = self.card.extensions.get(uri='https://ext.example.com/drop-1')
+
+        response = self.client.delete(f'{self.url}{extension.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        tombstone = AgentCardChange.objects.filter(op=AgentCardChange.OP_DELETE).last()
+        self.assertEqual(tombstone.extension_uri, 'https://ext.example.com/drop-1')
+        self.card.refresh_from_db()
+        self.assertEqual(len(self.card.a2a_snapshot['capabilities']['extensions']), 3)
+
+
+class ExtensionSignalCoalescingTests(TestCase):
+    """逐条保存扩展：children_changes_coalesced() 块内在同一事务中每张卡片只刷新一次"""
+
+    def setUp(self):
+        self.card = make_card(make_namespace())
+        self.since = AgentCardChange.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def _upserts(self):
+        return AgentCardChange.objects.filter(pk__gt=self.since, op=AgentCardChange.OP_UPSERT)
+
+    def test_saves_in_a_block_refresh_the_card_once_before_commit(self):
+        updated_at = self.card.updated_at
+
+        with transaction.atomic():
+            with children_changes_coalesced():
+                for order in range(3):
+                    AgentExtension.objects.create(
+                        agent_card=self.card, uri=f'https://ext.example.com/{order}', order=order
+                    )
+                self.assertEqual(self._upserts().count(), 0)
+            # 块结束时（提交前）已刷新
+            self.assertEqual(self._upserts().count(), 1)
+            card = AgentCard.objects.get(pk=self.card.pk)
+
+        self.assertGreater(card.updated_at, updated_at)
+        self.assertEqual(
+            [ext['uri'] for ext in card.a2a_snapshot['capabilities']['extensions']],
+            [f'https://ext.example.com/{order}' for order in range(3)],
+        )
+
+    def test_block_with_an_error_does_not_refresh(self):
+        with self.assertRaises(RuntimeError), transaction.atomic(), children_changes_coalesced():
+            AgentExtension.objects.create(agent_card=self.card, uri='https://ext.example.com/x')
+            raise RuntimeError
+
+        self.assertEqual(self._upserts().count(), 0)
+        with children_changes_coalesced():
+            AgentExtension.objects.create(agent_card=self.card, uri='https://ext.example.com/y')
+        self.assertEqual(self._upserts().count(), 1)
+
+    def test_save_outside_a_block_refreshes_immediately(self):
+        with transaction.atomic():
+            AgentExtension.objects.create(agent_card=self.card, uri='https://ext.example.com/x')
+            self.assertEqual(self._upserts().count(), 1)
+
+
+class ExtensionWriteETagTests(APITestCase):
+    """扩展端点的写响应 ETag 即刷新后卡片的 ETag（刷新在写事务内完成）"""
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.card = make_card(make_namespace())
+        self.url = f'/api/agentcards/{self.card.pk}/extensions/'
+
+    def test_write_etag_matches_next_read(self):
+        response = self.client.post(self.url, {'uri': 'https://ext.example.com/a', 'params': {}}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        detail = self.client.get(f'/api/agentcards/{self.card.pk}/')
+        self.assertEqual(response['ETag'], detail['ETag'])
+        standard = self.client.get(f'/api/agentcards/{self.card.pk}/standard_json/')
+        self.assertEqual(standard.json()['capabilities']['extensions'][0]['uri'], 'https://ext.example.com/a')
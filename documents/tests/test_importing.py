@@ -0,0 +1,271 @@
+"""
+NDJSON 批量导入（importing.AgentCardImporter、import_agentcards 命令、POST /api/agentcards/import/）
+与 upsert 写入冲突的处理
+"""
+
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from documents.importing import AgentCardImporter, AgentCardUpserter
+from documents.models import AgentCard, AgentExtension, violated_constraint
+
+from .utils import (
+    ASSET_SCHEMA_URI,
+    card_payload,
+    make_asset_schema,
+    make_card,
+    make_namespace,
+    make_user,
+)
+
+
+def ndjson(*payloads) -> list:
+    return [json.dumps(payload) + '\n' for payload in payloads]
+
+
+def with_extension(payload, uri=ASSET_SCHEMA_URI, params=None) -> dict:
+    payload['capabilities'] = {
+        'streaming': False,
+        'extensions': [{'uri': uri, 'params': params or {'assetId': 'HPLC-1'}}],
+    }
+    return payload
+
+
+class ImporterTests(TestCase):
+
+    def setUp(self):
+        self.namespace = make_namespace()
+
+    def test_import_writes_cards_and_extensions(self):
+        schema = make_asset_schema()
+        lines = ndjson(
+            with_extension(card_payload('a')),
+            with_extension(card_payload('b'), uri='https://ext.example.com/other'),
+        )
+
+        result = AgentCardImporter(namespace_id='dev').import_lines(lines)
+
+        self.assertEqual(result['stats'], {'total': 2, 'created': 2, 'skipped': 0, 'invalid': 0, 'extensions': 2})
+        self.assertEqual(result['errors'], [])
+        card = AgentCard.objects.get(name='a')
+        self.assertEqual(card.a2a_snapshot['name'], 'a')
+        # URI 与已注册的 Schema 匹配时关联，否则不关联
+        self.assertEqual(AgentExtension.objects.get(agent_card=card).schema, schema)
+        self.assertIsNone(AgentExtension.objects.get(agent_card__name='b').schema)
+
+    def test_dry_run_writes_nothing(self):
+        lines = ndjson(card_payload('a'), card_payload('b'))
+
+        result = AgentCardImporter(namespace_id='dev', dry_run=True).import_lines(lines)
+
+        self.assertEqual(result['stats']['created'], 2)
+        self.assertFalse(AgentCard.objects.exists())
+
+    def test_dry_run_tracks_duplicates_and_defaults_across_batches(self):
+        default = {'_metadata': {'isDefaultVersion': True}}
+        lines = ndjson(
+            card_payload('a', '1.0.0', **default),
+            card_payload('a', '1.0.0'),
+            card_payload('a', '2.0.0', **default),
+        )
+
+        result = AgentCardImporter(namespace_id='dev', dry_run=True, batch_size=1).import_lines(lines)
+
+        self.assertEqual(result['stats']['created'], 1)
+        self.assertEqual([(error['line'], list(error['errors'])) for error in result['errors']], [
+            (2, ['version']),
+            (3, ['is_default_version']),
+        ])
+
+    def test_per_line_error_report(self):
+        make_card(self.namespace, 'existing', '1.0.0', is_default_version=True)
+        dev = {'namespace': 'dev'}
+        lines = [
+            *ndjson(card_payload('a', _metadata=dev)),
+            '{bad\n',
+            '\n',
+            *ndjson(
+                card_payload('b', _metadata={'namespace': 'missing'}),
+                card_payload('existing', '1.0.0', _metadata=dev),
+                card_payload('existing', '2.0.0', _metadata={**dev, 'isDefaultVersion': True}),
+                card_payload('a', _metadata=dev),
+            ),
+        ]
+
+        result = AgentCardImporter().import_lines(lines)
+
+        self.assertEqual(result['stats'], {'total': 6, 'created': 1, 'skipped': 1, 'invalid': 4, 'extensions': 0})
+        # 行号按输入计数（空行也计入）
+        self.assertEqual([(error['line'], list(error['errors'])) for error in result['errors']], [
+            (2, ['non_field_errors']),
+            (4, ['namespace']),
+            (6, ['is_default_version']),
+            (7, ['version']),
+        ])
+        self.assertEqual(result['errors'][1]['key'], 'missing::b@1.0.0')
+        self.assertIn("'1.0.0'", result['errors'][2]['errors']['is_default_version'][0])
+
+    def test_missing_namespace(self):
+        result = AgentCardImporter().import_lines(ndjson(card_payload('a')))
+
+        self.assertEqual(list(result['errors'][0]['errors']), ['namespace'])
+        self.assertFalse(AgentCard.objects.exists())
+
+    def test_extension_params_validated_against_schema(self):
+        make_asset_schema()
+
+        result = AgentCardImporter(namespace_id='dev').import_lines(
+            ndjson(with_extension(card_payload('a'), params={'assetId': 'bad'}))
+        )
+
+        self.assertEqual(result['stats']['invalid'], 1)
+        self.assertIn('capabilities', result['errors'][0]['errors'])
+        self.assertFalse(AgentCard.objects.exists())
+
+    def test_progress_called_per_batch(self):
+        reports = []
+
+        AgentCardImporter(namespace_id='dev', batch_size=2, progress=reports.append).import_lines(
+            ndjson(*(card_payload(f'card-{i}') for i in range(3)))
+        )
+
+        self.assertEqual([report['total'] for report in reports], [2, 3])
+
+
+class PendingExtensionsTests(TestCase):
+
+    def test_from_agentcard_json_keeps_extensions_until_saved(self):
+        namespace = make_namespace()
+        schema = make_asset_schema()
+
+        card = AgentCard.from_agentcard_json(with_extension(card_payload('a')), namespace.id)
+        self.assertEqual([ext['uri'] for ext in card.pending_extensions], [ASSET_SCHEMA_URI])
+        card.save()
+        card.save_pending_extensions()
+
+        extension = AgentExtension.objects.get(agent_card=card)
+        self.assertEqual((extension.schema, extension.params), (schema, {'assetId': 'HPLC-1'}))
+        self.assertEqual(card.pending_extensions, [])
+
+
+class UpsertConflictTests(TestCase):
+
+    def setUp(self):
+        self.namespace = make_namespace()
+
+    def test_violated_constraint_names_default_version_constraint(self):
+        make_card(self.namespace, 'a', '1.0.0', is_default_version=True)
+        duplicate = AgentCard(namespace=self.namespace, name='a', version='2.0.0', is_default_version=True)
+
+        with self.assertRaises(IntegrityError) as cm, transaction.atomic():
+            AgentCard.objects.bulk_create([duplicate])
+
+        self.assertEqual(violated_constraint(cm.exception), AgentCard.DEFAULT_VERSION_CONSTRAINT)
+
+    def test_concurrent_default_reported_per_item(self):
+        plan = AgentCardUpserter._plan
+
+        def plan_then_conflict(upserter, items):
+            plan(upserter, items)
+            # 检查之后、写入之前其他请求设置了默认版本
+            make_card(self.namespace, 'a', '0.9.0', is_default_version=True)
+
+        payloads = [
+            card_payload('a', '1.0.0', _metadata={'isDefaultVersion': True}),
+            card_payload('b', '1.0.0'),
+        ]
+        with mock.patch.object(AgentCardUpserter, '_plan', plan_then_conflict):
+            result = AgentCardUpserter(namespace_id='dev').upsert(payloads)
+
+        # 同一块整体回滚，每项报告冲突
+        self.assertEqual(result['stats']['invalid'], 2)
+        self.assertEqual(
+            [list(item['errors']) for item in result['results']], [['is_default_version'], ['is_default_version']]
+        )
+        self.assertEqual(list(AgentCard.objects.values_list('version', flat=True)), ['0.9.0'])
+
+
+class ImportCommandTests(TestCase):
+
+    def setUp(self):
+        make_namespace()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, filename, lines) -> str:
+        path = os.path.join(self.directory.name, filename)
+        opener = gzip.open if filename.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            f.writelines(lines)
+        return path
+
+    def call(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_agentcards', *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import_gzip_file(self):
+        path = self.write('cards.ndjson.gz', ndjson(card_payload('a'), card_payload('b')))
+
+        stdout, stderr = self.call(path, '--namespace', 'dev')
+
+        self.assertIn('已创建 2 个 AgentCard', stdout)
+        self.assertEqual(stderr, '')
+        self.assertEqual(AgentCard.objects.count(), 2)
+
+    def test_dry_run_reports_line_errors(self):
+        path = self.write('cards.ndjson', [*ndjson(card_payload('a')), '{bad\n'])
+
+        stdout, stderr = self.call(path, '--namespace', 'dev', '--dry-run')
+
+        self.assertIn('[dry-run] 将创建 1 个 AgentCard', stdout)
+        self.assertIn('无效 1 行', stdout)
+        self.assertIn('第 2 行', stderr)
+        self.assertFalse(AgentCard.objects.exists())
+
+    def test_missing_file_or_user(self):
+        with self.assertRaises(CommandError):
+            self.call(os.path.join(self.directory.name, 'missing.ndjson'))
+        path = self.write('cards.ndjson', ndjson(card_payload('a')))
+        with self.assertRaises(CommandError):
+            self.call(path, '--user', 'nobody')
+
+
+class ImportEndpointTests(APITestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        make_namespace()
+
+    def post(self, lines, query='namespace=dev'):
+        response = self.client.post(
+            f'/api/agentcards/import/?{query}', ''.join(lines).encode('utf-8'),
+            content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_import_sets_created_by(self):
+        data = self.post(ndjson(card_payload('a')))
+
+        self.assertEqual((data['dry_run'], data['stats']['created']), (False, 1))
+        self.assertEqual(AgentCard.objects.get().created_by, self.user)
+
+    def test_dry_run(self):
+        data = self.post([*ndjson(card_payload('a')), '{bad\n'], query='namespace=dev&dry_run=true')
+
+        self.assertTrue(data['dry_run'])
+        self.assertEqual(data['stats']['created'], 1)
+        self.assertEqual([error['line'] for error in data['errors']], [2])
+        self.assertFalse(data['errors_truncated'])
+        self.assertFalse(AgentCard.objects.exists())
@@ -0,0 +1,161 @@
+"""
+JSON Schema 编译验证器（validation.compile_schema）与 SchemaField 的嵌套定义
+"""
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+
+from documents.models import SchemaField, SchemaRegistry
+from documents.validation import SchemaCompileError, compile_schema, get_validator
+
+
+def errors_for(schema, value) -> list:
+    errors = []
+    compile_schema(schema)(value, '', errors)
+    return [(error.path, error.message) for error in errors]
+
+
+def paths_for(schema, value) -> list:
+    return [path for path, _ in errors_for(schema, value)]
+
+
+class KeywordTests(SimpleTestCase):
+
+    def test_type(self):
+        self.assertEqual(errors_for({'type': 'integer'}, 1), [])
+        self.assertEqual(len(errors_for({'type': 'integer'}, True)), 1)
+        self.assertEqual(len(errors_for({'type': 'integer'}, 1.5)), 1)
+        self.assertEqual(errors_for({'type': ['string', 'null']}, None), [])
+        self.assertEqual(len(errors_for({'type': ['string', 'null']}, 1)), 1)
+
+    def test_enum_and_const(self):
+        self.assertEqual(errors_for({'enum': ['a', 1]}, 1.0), [])
+        # true 与 1 是不同的值
+        self.assertEqual(len(errors_for({'enum': ['a', 1]}, True)), 1)
+        self.assertEqual(errors_for({'const': {'x': [1, 2]}}, {'x': [1, 2]}), [])
+        self.assertEqual(len(errors_for({'const': {'x': [1, 2]}}, {'x': [2, 1]})), 1)
+
+    def test_object_keywords(self):
+        schema = {
+            'properties': {'a': {'type': 'string'}},
+            'required': ['a', 'b'],
+            'additionalProperties': {'type': 'integer'},
+            'minProperties': 2,
+            'maxProperties': 3,
+        }
+
+        self.assertEqual(errors_for(schema, {'a': 'x', 'b': 1}), [])
+        self.assertEqual(paths_for(schema, {'a': 1}), ['', 'a', ''])
+        self.assertEqual(paths_for(schema, {'a': 'x', 'b': 'y', 'c': 1, 'd': 2}), ['b', ''])
+        self.assertEqual(paths_for({'additionalProperties': False}, {'z': 1}), [''])
+
+    def test_array_keywords(self):
+        schema = {'items': {'type': 'integer'}, 'minItems': 1, 'maxItems': 3, 'uniqueItems': True}
+
+        self.assertEqual(errors_for(schema, [1, 2]), [])
+        self.assertEqual(paths_for(schema, []), [''])
+        self.assertEqual(paths_for(schema, [1, 'x', 1, 2]), ['[1]', '', ''])
+        # 元组形式：按位置验证，多出的元素不限制
+        self.assertEqual(paths_for({'items': [{'type': 'string'}, {'type': 'integer'}]}, ['a', 'b', None]), ['[1]'])
+
+    def test_string_keywords(self):
+        schema = {'minLength': 2, 'maxLength': 4, 'pattern': r'\d'}
+
+        self.assertEqual(errors_for(schema, 'a1'), [])
+        # pattern 是搜索匹配，不要求整体匹配
+        self.assertEqual(errors_for(schema, 'ab1'), [])
+        self.assertEqual(len(errors_for(schema, 'abcde')), 2)
+        self.assertEqual(errors_for(schema, 5), [])
+
+    def test_number_keywords(self):
+        schema = {'minimum': 0, 'maximum': 10, 'exclusiveMinimum': 1, 'exclusiveMaximum': 9.5}
+
+        self.assertEqual(errors_for(schema, 5), [])
+        self.assertEqual(len(errors_for(schema, 1)), 1)
+        self.assertEqual(len(errors_for(schema, -1)), 2)
+        self.assertEqual(len(errors_for(schema, 9.5)), 1)
+        self.assertEqual(errors_for(schema, 'x'), [])
+
+    def test_annotations_are_ignored_and_booleans_are_schemas(self):
+        self.assertEqual(errors_for({'title': 't', 'format': 'date', '$comment': 'c'}, 'not a date'), [])
+        self.assertEqual(errors_for(True, object()), [])
+        self.assertEqual(len(errors_for(False, 1)), 1)
+
+    def test_unsupported_or_invalid_schemas_fail_to_compile(self):
+        for schema in [{'$ref': '#/x'}, {'oneOf': []}, {'type': 'date'}, {'pattern': '('}, {'enum': []},
+                       {'minimum': '1'}, {'properties': []}, {'items': {'anyOf': []}}]:
+            with self.subTest(schema=schema), self.assertRaises(SchemaCompileError):
+                compile_schema(schema)
+
+
+class NestedSchemaTests(SimpleTestCase):
+    schema = {
+        'type': 'object',
+        'required': ['location'],
+        'properties': {
+            'location': {
+                'type': 'object',
+                'required': ['building'],
+                'properties': {'building': {'type': 'string'}, 'floor': {'type': 'integer', 'minimum': 0}},
+            },
+            'readings': {
+                'type': 'array',
+                'items': {
+                    'type': 'object',
+                    'required': ['value'],
+                    'properties': {'value': {'type': 'number'}, 'tags': {'type': 'array', 'items': {'type': 'string'}}},
+                },
+            },
+        },
+    }
+
+    def test_all_errors_are_reported_with_paths(self):
+        data = {
+            'location': {'floor': -1},
+            'readings': [{'value': 1}, {'value': 'x', 'tags': ['ok', 3]}, {}],
+        }
+
+        self.assertEqual(
+            paths_for(self.schema, data),
+            ['location', 'location.floor', 'readings[1].value', 'readings[1].tags[1]', 'readings[2]'],
+        )
+
+    def test_valid_nested_data(self):
+        data = {'location': {'building': 'A', 'floor': 2}, 'readings': [{'value': 1.5, 'tags': ['t']}]}
+
+        self.assertEqual(errors_for(self.schema, data), [])
+
+
+class SchemaFieldNestedDefinitionTests(TestCase):
+
+    def setUp(self):
+        self.schema = SchemaRegistry.objects.create(
+            schema_uri='https://schemas.example.com/room/v1', schema_type='room', version='v1'
+        )
+
+    def test_nested_definitions_are_validated_through_the_schema(self):
+        SchemaField.objects.create(
+            schema=self.schema, field_name='location', field_type='object', is_required=True,
+            nested_schema={'properties': {'building': {'type': 'string'}}, 'required': ['building']},
+        )
+        SchemaField.objects.create(
+            schema=self.schema, field_name='sensors', field_type='array',
+            nested_schema={'items': {'type': 'string'}, 'uniqueItems': True},
+        )
+        schema = SchemaRegistry.objects.get(pk=self.schema.pk)
+
+        self.assertEqual(schema.validate_extension_data({'location': {'building': 'A'}, 'sensors': ['a']}), (True, ''))
+        errors = get_validator(schema).errors({'location': {}, 'sensors': ['a', 'a', 1]})
+        self.assertEqual(sorted(error.path for error in errors), ['location', 'sensors', 'sensors[2]'])
+
+    def test_invalid_nested_definitions_are_rejected(self):
+        for field_type, nested in [
+            ('object', {'properties': {'x': {'$ref': '#'}}}),
+            ('object', {'type': 'array'}),
+            ('string', {'minLength': 1}),
+            ('array', ['not', 'an', 'object']),
+        ]:
+            field = SchemaField(schema=self.schema, field_name='bad', field_type=field_type, nested_schema=nested)
+            with self.subTest(nested=nested), self.assertRaises(ValidationError) as cm:
+                field.full_clean()
+            self.assertIn('nested_schema', cm.exception.message_dict)
@@ -0,0 +1,72 @@
+"""
+键集分页（?pagination=cursor / ?cursor=）
+"""
+
+import datetime
+
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCase
+
+from .utils import make_card, make_namespace
+
+
+class KeysetPaginationTests(APITestCase):
+
+    def _walk(self, url):
+        """沿 next 链接翻完全部页，返回结果和页数"""
+        results, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            results.extend(response.data['results'])
+            url = response.data['next']
+            pages += 1
+        return results, pages
+
+    def test_agentcards_are_paged_by_natural_key(self):
+        namespace = make_namespace()
+        for name in ['c', 'a', 'b']:
+            for version in ['1.0.0', '2.0.0']:
+                make_card(namespace, name, version)
+
+        results, pages = self._walk('/api/agentcards/?pagination=cursor&page_size=4')
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(
+            [(card['name'], card['version']) for card in results],
+            [(name, version) for name in 'abc' for version in ['1.0.0', '2.0.0']],
+        )
+
+    def test_cases_created_in_the_same_millisecond_are_not_skipped(self):
+        AgentCase.objects.bulk_create([AgentCase(case_name=f'case-{i}', query_key='q') for i in range(7)])
+        base = datetime.datetime(2024, 1, 1, 12, 0, 0, 123000, tzinfo=datetime.timezone.utc)
+        for offset, case in enumerate(AgentCase.objects.order_by('pk')):
+            # 全部处于同一毫秒，只有微秒不同
+            AgentCase.objects.filter(pk=case.pk).update(
+                created_at=base + datetime.timedelta(microseconds=offset * 100)
+            )
+
+        results, pages = self._walk('/api/cases/?pagination=cursor&page_size=2')
+
+        self.assertEqual(pages, 4)
+        expected = list(AgentCase.objects.order_by('-created_at', '-id').values_list('pk', flat=True))
+        self.assertEqual([case['id'] for case in results], expected)
+        self.assertEqual(len(expected), 7)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get('/api/agentcards/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_keeps_rank_order_instead_of_cursor_paging(self):
+        namespace = make_namespace()
+        make_card(namespace, 'aaa', description='chromatography sample analysis report service')
+        make_card(namespace, 'zzz', description='chromatography chromatography chromatography')
+
+        response = self.client.get('/api/agentcards/?q=chromatography&pagination=cursor')
+
+        self.assertEqual(response.status_code, 200)
+        # 页码分页（带 count），按相关度而不是 namespace/name 排序
+        self.assertIn('count', response.data)
+        self.assertEqual([card['name'] for card in response.data['results']], ['zzz', 'aaa'])
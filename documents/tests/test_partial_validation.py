@@ -0,0 +1,65 @@
+"""
+部分保存只验证被更新的字段（AgentCard.clean_update()）
+"""
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.test import TestCase
+
+from documents.models import AgentCard
+
+from .utils import make_card, make_namespace
+
+INVALID_SKILLS = [{'id': 'analyze'}]
+
+
+class PartialSaveValidationTests(TestCase):
+
+    def setUp(self):
+        self.namespace = make_namespace()
+        card = make_card(self.namespace)
+        # 绕过模型写入不合法的技能（例如历史数据）
+        AgentCard.objects.filter(pk=card.pk).update(skills=INVALID_SKILLS)
+        self.card = AgentCard.objects.get(pk=card.pk)
+
+    def test_full_save_validates_every_field(self):
+        self.card.description = '新描述'
+
+        with self.assertRaises(ValidationError) as cm:
+            self.card.save()
+
+        self.assertIn('skills', cm.exception.message_dict)
+
+    def test_partial_save_skips_fields_that_were_not_updated(self):
+        self.card.description = '新描述'
+
+        self.card.save(update_fields=['description'])
+
+        card = AgentCard.objects.get(pk=self.card.pk)
+        self.assertEqual(card.description, '新描述')
+        self.assertEqual(card.skills, INVALID_SKILLS)
+
+    def test_partial_save_still_rejects_an_invalid_updated_field(self):
+        self.card.url = 'not a url'
+
+        with self.assertRaises(ValidationError) as cm:
+            self.card.save(update_fields=['url'])
+
+        self.assertEqual(list(cm.exception.message_dict), ['url'])
+        self.assertEqual(AgentCard.objects.get(pk=self.card.pk).url, 'https://agents.example.com/hplc')
+
+    def test_partial_save_of_the_invalid_field_itself_is_rejected(self):
+        self.card.skills = INVALID_SKILLS + [{'id': 'other'}]
+
+        with self.assertRaises(ValidationError) as cm:
+            self.card.save(update_fields=['skills'])
+
+        self.assertIn('skills', cm.exception.message_dict)
+
+    def test_unique_together_is_checked_when_a_member_is_updated(self):
+        make_card(self.namespace, version='2.0.0')
+        self.card.version = '2.0.0'
+
+        with self.assertRaises(ValidationError) as cm:
+            self.card.save(update_fields=['version'])
+
+        self.assertIn(NON_FIELD_ERRORS, cm.exception.message_dict)
@@ -0,0 +1,185 @@
+"""
+补丁语义（patching.py）与 PATCH 端点（merge-patch / json-patch）
+"""
+
+import json
+
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from documents.models import AgentExtension
+from documents.patching import (
+    JSON_PATCH_MEDIA_TYPE,
+    MERGE_PATCH_MEDIA_TYPE,
+    PatchConflict,
+    PatchError,
+    apply_json_patch,
+    merge_patch,
+)
+
+from .utils import (
+    ASSET_SCHEMA_URI,
+    make_asset_schema,
+    make_card,
+    make_namespace,
+    make_user,
+)
+
+
+class MergePatchTests(SimpleTestCase):
+
+    def test_objects_merge_recursively_and_null_removes(self):
+        target = {'a': {'b': 1, 'c': 2}, 'd': 3}
+
+        result = merge_patch(target, {'a': {'b': None, 'e': 4}, 'd': None})
+
+        self.assertEqual(result, {'a': {'c': 2, 'e': 4}})
+        self.assertEqual(target, {'a': {'b': 1, 'c': 2}, 'd': 3})
+
+    def test_arrays_are_replaced_whole(self):
+        self.assertEqual(merge_patch({'tags': ['x', 'y']}, {'tags': ['z']}), {'tags': ['z']})
+
+
+class JSONPatchTests(SimpleTestCase):
+
+    def test_operations_apply_in_order(self):
+        document = {'skills': [{'id': 'a'}, {'id': 'b'}], 'meta': {'x': 1}}
+
+        result = apply_json_patch(document, [
+            {'op': 'test', 'path': '/skills/1/id', 'value': 'b'},
+            {'op': 'replace', 'path': '/skills/1/id', 'value': 'c'},
+            {'op': 'add', 'path': '/skills/-', 'value': {'id': 'd'}},
+            {'op': 'move', 'from': '/meta/x', 'path': '/meta/y'},
+            {'op': 'copy', 'from': '/meta/y', 'path': '/meta/z'},
+            {'op': 'remove', 'path': '/skills/0'},
+        ])
+
+        self.assertEqual(result, {'skills': [{'id': 'c'}, {'id': 'd'}], 'meta': {'y': 1, 'z': 1}})
+        self.assertEqual(document['skills'][1], {'id': 'b'})
+
+    def test_pointer_escapes(self):
+        result = apply_json_patch({'a/b': {'c~d': 1}}, [{'op': 'replace', 'path': '/a~1b/c~0d', 'value': 2}])
+
+        self.assertEqual(result, {'a/b': {'c~d': 2}})
+
+    def test_failed_test_or_missing_path_is_a_conflict(self):
+        with self.assertRaises(PatchConflict):
+            apply_json_patch({'a': 1}, [{'op': 'test', 'path': '/a', 'value': 2}])
+        with self.assertRaises(PatchConflict):
+            apply_json_patch({'a': 1}, [{'op': 'remove', 'path': '/b'}])
+
+    def test_malformed_patch_is_an_error(self):
+        for patch in [{'op': 'add'}, [{'op': 'frobnicate', 'path': '/a'}], [{'op': 'add', 'path': 'a', 'value': 1}]]:
+            with self.subTest(patch=patch), self.assertRaises(PatchError):
+                apply_json_patch({}, patch)
+
+
+class CardPatchEndpointTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.card = make_card(make_namespace(), provider={'organization': 'Lab', 'url': 'https://lab.example.com'})
+        self.url = f'/api/agentcards/{self.card.pk}/'
+
+    def _patch(self, url, media_type, patch, **extra):
+        return self.client.patch(url, json.dumps(patch), content_type=media_type, **extra)
+
+    def test_merge_patch_changes_only_named_keys(self):
+        response = self._patch(self.url, MERGE_PATCH_MEDIA_TYPE, {
+            'description': '新描述', 'provider': {'organization': 'Lab 2'},
+        })
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.description, '新描述')
+        self.assertEqual(self.card.provider, {'organization': 'Lab 2', 'url': 'https://lab.example.com'})
+        self.assertEqual(self.card.skills[0]['id'], 'analyze')
+
+    def test_merge_patch_result_is_validated(self):
+        # null 删除 provider.url，结果不满足 A2A 的必填字段
+        response = self._patch(self.url, MERGE_PATCH_MEDIA_TYPE, {'provider': {'url': None}})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('provider', response.data)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.provider['url'], 'https://lab.example.com')
+
+    def test_json_patch_edits_one_skill(self):
+        response = self._patch(self.url, JSON_PATCH_MEDIA_TYPE, [
+            {'op': 'test', 'path': '/skills/0/id', 'value': 'analyze'},
+            {'op': 'replace', 'path': '/skills/0/description', 'value': '分析色谱数据'},
+        ])
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.skills[0]['description'], '分析色谱数据')
+        self.assertEqual(self.card.a2a_snapshot['skills'][0]['description'], '分析色谱数据')
+
+    def test_failed_test_operation_returns_409_and_writes_nothing(self):
+        updated_at = self.card.updated_at
+
+        response = self._patch(self.url, JSON_PATCH_MEDIA_TYPE, [
+            {'op': 'test', 'path': '/skills/0/id', 'value': 'other'},
+            {'op': 'replace', 'path': '/description', 'value': '不应写入'},
+        ])
+
+        self.assertEqual(response.status_code, 409)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.updated_at, updated_at)
+        self.assertNotEqual(self.card.description, '不应写入')
+
+    def test_malformed_patch_and_unknown_fields_return_400(self):
+        response = self._patch(self.url, JSON_PATCH_MEDIA_TYPE, [{'op': 'frobnicate', 'path': '/name'}])
+        self.assertEqual(response.status_code, 400)
+
+        response = self._patch(self.url, MERGE_PATCH_MEDIA_TYPE, {'no_such_field': 1})
+        self.assertEqual(response.status_code, 400)
+
+    def test_patch_honours_if_match(self):
+        etag = self.client.get(self.url)['ETag']
+        self._patch(self.url, MERGE_PATCH_MEDIA_TYPE, {'description': '先到的修改'})
+
+        response = self._patch(
+            self.url, MERGE_PATCH_MEDIA_TYPE, {'description': '后到的修改'}, HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, 412)
+        self.card.refresh_from_db()
+        self.assertEqual(self.card.description, '先到的修改')
+
+
+class ExtensionParamsPatchTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        schema = make_asset_schema()
+        self.card = make_card(make_namespace())
+        self.extension = AgentExtension.objects.create(
+            agent_card=self.card, uri=ASSET_SCHEMA_URI, schema=schema, params={'assetId': 'AB-1', 'meta': {'a': 1}}
+        )
+        self.url = f'/api/agentcards/{self.card.pk}/extensions/{self.extension.pk}/params/'
+
+    def test_merge_patch_is_validated_against_the_schema(self):
+        response = self.client.patch(
+            self.url, json.dumps({'meta': {'b': 2}}), content_type=MERGE_PATCH_MEDIA_TYPE
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['params'], {'assetId': 'AB-1', 'meta': {'a': 1, 'b': 2}})
+
+        response = self.client.patch(
+            self.url, json.dumps({'assetId': 'bad'}), content_type=MERGE_PATCH_MEDIA_TYPE
+        )
+        self.assertEqual(response.status_code, 400)
+        self.extension.refresh_from_db()
+        self.assertEqual(self.extension.params['assetId'], 'AB-1')
+
+    def test_json_patch_paths_are_relative_to_params(self):
+        response = self.client.patch(
+            self.url, json.dumps([{'op': 'remove', 'path': '/meta'}]), content_type=JSON_PATCH_MEDIA_TYPE
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.card.refresh_from_db()
+        self.assertEqual(
+            self.card.a2a_snapshot['capabilities']['extensions'][0]['params'], {'assetId': 'AB-1'}
+        )
@@ -0,0 +1,132 @@
+"""
+静态发布 .well-known/agent.json（publishing.py）
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from documents import publishing
+from documents.models import AgentCard
+from documents.publishing import (
+    is_publishable_name,
+    published_path,
+    sync_published,
+    sync_published_safely,
+    write_published,
+)
+
+from .utils import make_card, make_namespace
+
+
+class PublishableNameTests(SimpleTestCase):
+
+    def test_rejects_names_that_are_not_a_single_directory(self):
+        for name in ['', '.', '..', 'a/b', '/', 'a\\b']:
+            with self.subTest(name=name):
+                self.assertFalse(is_publishable_name(name))
+
+    def test_accepts_plain_names(self):
+        for name in ['hplc', 'hplc-agent', 'v1.2', '...']:
+            with self.subTest(name=name):
+                self.assertTrue(is_publishable_name(name))
+
+
+class PublishTestCase(TestCase):
+
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.root)
+        settings_override = override_settings(AGENTCARD_PUBLISH_ROOT=str(self.root))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class WritePublishedTests(PublishTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.path = self.root / 'dev' / 'hplc' / '.well-known' / 'agent.json'
+
+    def test_writes_file_and_compressed_variant(self):
+        self.assertTrue(write_published(self.path, b'{"a":1}'))
+
+        self.assertEqual(self.path.read_bytes(), b'{"a":1}')
+        self.assertEqual(gzip.decompress(self.path.with_name('agent.json.gz').read_bytes()), b'{"a":1}')
+        self.assertEqual(oct(self.path.stat().st_mode & 0o777), oct(0o644))
+        self.assertFalse(write_published(self.path, b'{"a":1}'))
+
+    def test_failed_replace_keeps_the_old_file_and_no_temp_files(self):
+        write_published(self.path, b'{"a":1}')
+
+        with mock.patch.object(publishing.os, 'replace', side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                write_published(self.path, b'{"a":2}')
+
+        self.assertEqual(self.path.read_bytes(), b'{"a":1}')
+        self.assertEqual(
+            sorted(os.listdir(self.path.parent)),
+            sorted(['agent.json'] + [f'agent.json{suffix}' for suffix in publishing._compressed_variants(b'')]),
+        )
+
+
+class SyncPublishedTests(PublishTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.card = make_card(make_namespace(), is_default_version=True)
+        self.path = published_path('dev', 'hplc')
+
+    def _save(self, **fields):
+        card = AgentCard.objects.get(pk=self.card.pk)
+        for name, value in fields.items():
+            setattr(card, name, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            card.save(update_fields=list(fields))
+
+    def test_default_version_is_published_with_snapshot_bytes(self):
+        self.assertEqual(sync_published('dev', 'hplc'), 'written')
+
+        self.assertEqual(self.path.read_bytes(), bytes(AgentCard.objects.get(pk=self.card.pk).a2a_snapshot_bytes))
+        self.assertEqual(sync_published('dev', 'hplc'), 'unchanged')
+
+    def test_save_publishes_after_commit(self):
+        self._save(description='新描述')
+
+        self.assertIn('新描述', self.path.read_text(encoding='utf-8'))
+
+    def test_un_default_removes_the_files(self):
+        sync_published('dev', 'hplc')
+
+        self._save(is_default_version=False)
+
+        self.assertFalse(self.path.exists())
+        self.assertFalse(self.path.with_name('agent.json.gz').exists())
+
+    def test_deactivate_removes_the_files(self):
+        sync_published('dev', 'hplc')
+
+        self._save(is_active=False)
+
+        self.assertFalse(self.path.exists())
+
+    def test_unpublishable_name_is_skipped(self):
+        self.assertEqual(sync_published('dev', '..'), 'skipped')
+
+
+class SyncPublishedSafelyTests(PublishTestCase):
+
+    def test_database_errors_are_logged_not_raised(self):
+        with mock.patch.object(publishing, 'published_card', side_effect=DatabaseError('gone')):
+            with self.assertLogs('documents.publishing', level='ERROR'):
+                sync_published_safely('dev', 'hplc')
+
+    def test_invalid_paths_are_logged_not_raised(self):
+        with self.assertLogs('documents.publishing', level='ERROR'):
+            sync_published_safely('dev', 'bad\x00name')
@@ -0,0 +1,130 @@
+"""
+能力路由（routing.py、/api/route/）
+
+增量轮询读取变更流（只包含已结束事务的变更），使用 TransactionTestCase。
+"""
+
+from unittest import mock
+
+from django.test import SimpleTestCase, TransactionTestCase
+from rest_framework.test import APIClient, APITestCase
+
+from documents.models import AgentCard
+from documents.routing import RouteQuery, RoutingIndex, mime_match, routing_index
+
+from .utils import make_card, make_namespace, make_user
+
+
+class RouteQueryParseTests(SimpleTestCase):
+
+    def test_lists_and_modes_are_normalized(self):
+        query = RouteQuery.parse({
+            'tags': 'hplc, lab,hplc', 'input_modes': ['Image/PNG; q=0.9'], 'transport': 'grpc', 'streaming': 'true',
+        })
+
+        self.assertEqual(query.tags, ('hplc', 'lab'))
+        self.assertEqual(query.input_modes, ('image/png',))
+        self.assertEqual(query.transport, 'GRPC')
+        self.assertTrue(query.streaming)
+        self.assertEqual(query.limit, 10)
+
+    def test_invalid_values_raise_value_error(self):
+        for data in [
+            {'tags': 3},
+            {'skills': ['ok', 1]},
+            {'input_modes': 'png'},
+            {'output_modes': ['text/']},
+            {'streaming': 'yes'},
+            {'limit': 0},
+            {'limit': RouteQuery.MAX_LIMIT + 1},
+            {'limit': 'many'},
+            {'namespace': ['dev']},
+            {'transport': 1},
+        ]:
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                RouteQuery.parse(data)
+
+
+class MimeMatchTests(SimpleTestCase):
+
+    @staticmethod
+    def _match(modes, wanted):
+        modes = frozenset(modes)
+        return mime_match(modes, frozenset(mode.partition('/')[0] for mode in modes), wanted)
+
+    def test_scores(self):
+        self.assertEqual(self._match({'image/png'}, 'image/png'), 1.0)
+        # 任务一侧的通配符
+        self.assertEqual(self._match({'image/png'}, 'image/*'), 0.5)
+        self.assertEqual(self._match({'image/png'}, '*/*'), 0.5)
+        # Agent 一侧的通配符
+        self.assertEqual(self._match({'image/*'}, 'image/jpeg'), 0.5)
+        self.assertEqual(self._match({'*/*'}, 'application/json'), 0.5)
+        self.assertEqual(self._match({'image/png'}, 'text/plain'), 0)
+        self.assertEqual(self._match({'image/png'}, 'text/*'), 0)
+        self.assertEqual(self._match(set(), '*/*'), 0)
+
+
+class RoutingIndexTests(TransactionTestCase):
+
+    def setUp(self):
+        self.namespace = make_namespace()
+        self.index = RoutingIndex()
+
+    def _route(self, **data):
+        return [entry.name for _, entry in self.index.route(RouteQuery.parse(data))[1]]
+
+    def test_ranks_exact_matches_above_wildcards(self):
+        make_card(self.namespace, name='png', is_default_version=True, default_input_modes=['image/png'])
+        make_card(self.namespace, name='any-image', is_default_version=True, default_input_modes=['image/*'])
+        make_card(self.namespace, name='text', is_default_version=True)
+
+        total, matches = self.index.route(RouteQuery.parse({'input_modes': 'image/png'}))
+
+        self.assertEqual(total, 2)
+        self.assertEqual([(score, entry.name) for score, entry in matches], [(1.0, 'png'), (0.5, 'any-image')])
+
+    def test_only_default_active_versions_are_indexed(self):
+        make_card(self.namespace, name='default', is_default_version=True)
+        make_card(self.namespace, name='draft')
+        make_card(self.namespace, name='inactive', is_default_version=True, is_active=False)
+
+        self.assertEqual(self._route(tags='hplc'), ['default'])
+
+    def test_poll_applies_changes_incrementally(self):
+        card = make_card(self.namespace, name='first', is_default_version=True)
+        self.assertEqual(self._route(), ['first'])
+
+        make_card(self.namespace, name='second', is_default_version=True)
+        card = AgentCard.objects.get(pk=card.pk)
+        card.is_active = False
+        card.save(update_fields=['is_active'])
+
+        with mock.patch.object(self.index, 'rebuild', wraps=self.index.rebuild) as rebuild, \
+                mock.patch.object(self.index, '_load', wraps=self.index._load) as load:
+            self.index.mark_stale()
+            self.assertEqual(self._route(), ['second'])
+
+        rebuild.assert_not_called()
+        # 只重新加载变更过的卡片
+        self.assertEqual(load.call_args.args[0], {card.pk, AgentCard.objects.get(name='second').pk})
+
+
+class RouteEndpointPermissionTests(APITestCase):
+    url = '/api/route/'
+
+    def setUp(self):
+        routing_index.mark_rebuild()
+
+    def test_anonymous_get_is_allowed(self):
+        self.assertEqual(self.client.get(self.url, {'tags': 'hplc'}).status_code, 200)
+
+    def test_post_requires_authentication(self):
+        anonymous = APIClient().post(self.url, {'tags': ['hplc']}, format='json')
+        self.assertIn(anonymous.status_code, (401, 403))
+
+        self.client.force_authenticate(make_user())
+        self.assertEqual(self.client.post(self.url, {'tags': ['hplc']}, format='json').status_code, 200)
+
+    def test_invalid_query_returns_400(self):
+        self.assertEqual(self.client.get(self.url, {'limit': '0'}).status_code, 400)
@@ -0,0 +1,105 @@
+"""
+物化的 A2A 快照（AgentCard.a2a_snapshot / a2a_snapshot_bytes）与 standard_json 端点
+"""
+
+import json
+from unittest import mock
+
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCard
+
+from .utils import make_card, make_namespace, make_user
+
+
+class SnapshotTests(APITestCase):
+
+    def setUp(self):
+        self.card = make_card(make_namespace())
+
+    def _stored(self):
+        return AgentCard.objects.get(pk=self.card.pk)
+
+    def test_create_materializes_the_snapshot(self):
+        card = self._stored()
+
+        self.assertEqual(card.a2a_snapshot['name'], 'hplc')
+        self.assertEqual(card.a2a_snapshot['skills'][0]['id'], 'analyze')
+        self.assertEqual(json.loads(bytes(card.a2a_snapshot_bytes)), card.a2a_snapshot)
+        self.assertEqual(card.a2a_snapshot_error, '')
+
+    def test_save_rebuilds_the_snapshot(self):
+        self.card.description = '新描述'
+        self.card.save()
+
+        card = self._stored()
+        self.assertEqual(card.a2a_snapshot['description'], '新描述')
+        self.assertEqual(json.loads(bytes(card.a2a_snapshot_bytes))['description'], '新描述')
+
+    def test_partial_save_of_a_content_field_rebuilds_the_snapshot(self):
+        self.card.description = '新描述'
+        self.card.save(update_fields=['description'])
+
+        self.assertEqual(self._stored().a2a_snapshot['description'], '新描述')
+
+    def test_metadata_only_save_skips_the_rebuild(self):
+        snapshot_bytes = bytes(self._stored().a2a_snapshot_bytes)
+        self.card.is_active = False
+
+        with mock.patch.object(AgentCard, 'refresh_snapshot') as refresh:
+            self.card.save(update_fields=['is_active', 'updated_at'])
+
+        refresh.assert_not_called()
+        card = self._stored()
+        self.assertFalse(card.is_active)
+        self.assertEqual(bytes(card.a2a_snapshot_bytes), snapshot_bytes)
+
+    def test_metadata_only_save_without_a_snapshot_builds_one(self):
+        AgentCard.objects.filter(pk=self.card.pk).update(
+            a2a_snapshot=None, a2a_snapshot_bytes=None, a2a_snapshot_error=''
+        )
+        card = self._stored()
+        card.is_active = False
+
+        card.save(update_fields=['is_active'])
+
+        self.assertEqual(self._stored().a2a_snapshot['name'], 'hplc')
+
+
+class StandardJSONTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.card = make_card(make_namespace())
+        self.url = f'/api/agentcards/{self.card.pk}/standard_json/'
+
+    def test_returns_the_stored_snapshot_bytes(self):
+        # 直接返回存储的字节，而不是重新渲染
+        marker = AgentCard.encode_snapshot({'name': 'stored', 'description': '快照'})
+        AgentCard.objects.filter(pk=self.card.pk).update(a2a_snapshot_bytes=marker)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, marker)
+
+    def test_include_metadata_renders_from_the_snapshot(self):
+        response = self.client.get(self.url, {'include_metadata': 'true'})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['name'], 'hplc')
+        self.assertEqual(data['_metadata']['namespace'], 'dev')
+        self.assertFalse(data['_metadata']['isDefaultVersion'])
+
+    def test_card_without_a_snapshot_is_backfilled_on_read(self):
+        AgentCard.objects.filter(pk=self.card.pk).update(
+            a2a_snapshot=None, a2a_snapshot_bytes=None, a2a_snapshot_error=''
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'hplc')
+        self.assertEqual(bytes(AgentCard.objects.get(pk=self.card.pk).a2a_snapshot_bytes), response.content)
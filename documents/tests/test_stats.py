@@ -0,0 +1,85 @@
+"""
+命名空间计数 NamespaceStats（增量维护，与重新统计的结果一致）
+"""
+
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCase, NamespaceStats
+
+from .utils import make_card, make_namespace, make_user
+
+
+class NamespaceStatsTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(make_user())
+        self.dev = make_namespace('dev')
+        self.prod = make_namespace('prod')
+        self.card = make_card(self.dev, is_default_version=True)
+        self.other = make_card(self.dev, version='2.0.0', is_active=False)
+        for index in range(2):
+            AgentCase.objects.create(
+                agent_card=self.card, case_name=f'case-{index}', query_key='sample', agent_version='1.0.0'
+            )
+
+    def _counts(self, namespace_id) -> dict:
+        stats = NamespaceStats.objects.get(pk=namespace_id)
+        return {field: getattr(stats, field) for field in NamespaceStats.COUNTER_FIELDS}
+
+    def assertStatsConsistent(self):
+        computed = NamespaceStats.compute()
+        for namespace_id in ['dev', 'prod']:
+            expected = {field: computed.get(namespace_id, {}).get(field, 0) for field in NamespaceStats.COUNTER_FIELDS}
+            self.assertEqual(self._counts(namespace_id), expected, namespace_id)
+
+    def test_counts_after_create(self):
+        self.assertEqual(self._counts('dev'), {
+            'agent_card_count': 2, 'active_card_count': 1, 'default_card_count': 1, 'case_count': 2,
+        })
+        self.assertStatsConsistent()
+
+    def test_move_to_another_namespace_moves_counts_and_cases(self):
+        response = self.client.patch(f'/api/agentcards/{self.card.pk}/', {'namespace': 'prod'}, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(self._counts('dev'), {
+            'agent_card_count': 1, 'active_card_count': 0, 'default_card_count': 0, 'case_count': 0,
+        })
+        self.assertEqual(self._counts('prod'), {
+            'agent_card_count': 1, 'active_card_count': 1, 'default_card_count': 1, 'case_count': 2,
+        })
+        self.assertStatsConsistent()
+
+    def test_flag_changes_adjust_counts(self):
+        response = self.client.patch(f'/api/agentcards/{self.other.pk}/', {'is_active': True}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.client.post(f'/api/agentcards/{self.other.pk}/make-default/')
+
+        self.assertEqual(self._counts('dev')['active_card_count'], 2)
+        self.assertEqual(self._counts('dev')['default_card_count'], 1)
+        self.assertStatsConsistent()
+
+    def test_delete_card_and_case(self):
+        AgentCase.objects.filter(agent_card=self.card).first().delete()
+        self.assertEqual(self._counts('dev')['case_count'], 1)
+
+        response = self.client.delete(f'/api/agentcards/{self.card.pk}/')
+
+        self.assertEqual(response.status_code, 204)
+        # Case 保留（agent_card 置空），不再计入命名空间
+        self.assertEqual(AgentCase.objects.count(), 1)
+        self.assertEqual(self._counts('dev'), {
+            'agent_card_count': 1, 'active_card_count': 0, 'default_card_count': 0, 'case_count': 0,
+        })
+        self.assertStatsConsistent()
+
+    def test_reassigning_a_case_moves_its_count(self):
+        prod_card = make_card(self.prod, name='router')
+        case = AgentCase.objects.filter(agent_card=self.card).first()
+
+        case.agent_card = prod_card
+        case.save()
+
+        self.assertEqual(self._counts('dev')['case_count'], 1)
+        self.assertEqual(self._counts('prod')['case_count'], 1)
+        self.assertStatsConsistent()
@@ -0,0 +1,119 @@
+"""
+批量 upsert（POST /api/agentcards/bulk-upsert/）
+"""
+
+import json
+
+from rest_framework.test import APITestCase
+
+from documents.models import AgentCard, AgentCardChange, NamespaceStats
+
+from .utils import card_payload, make_card, make_namespace, make_user
+
+URL = '/api/agentcards/bulk-upsert/?namespace=dev'
+
+
+class BulkUpsertTests(APITestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_authenticate(self.user)
+        self.namespace = make_namespace()
+
+    def upsert(self, payloads, url=URL):
+        response = self.client.post(url, payloads, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_ndjson_with_charset_parameter(self):
+        body = '\n'.join(json.dumps(payload) for payload in [card_payload('a'), card_payload('b')]) + '\n{bad\n'
+
+        response = self.client.post(
+            URL, body.encode('utf-8'), content_type='application/x-ndjson; charset=utf-8'
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([item['status'] for item in response.data['results']], ['created', 'created', 'invalid'])
+
+    def test_validate_accepts_ndjson_with_charset_parameter(self):
+        body = json.dumps(card_payload('a')) + '\n' + json.dumps(card_payload('b')) + '\n'
+
+        response = self.client.post(
+            '/api/agentcards/validate/', body.encode('utf-8'), content_type='application/x-ndjson; charset=utf-8'
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['stats'], {'total': 2, 'valid': 2, 'invalid': 0})
+
+    def test_created_updated_unchanged_counts(self):
+        existing = make_card(self.namespace, 'a', '1.0.0', description='旧的描述')
+        payloads = [card_payload('a'), card_payload('b'), card_payload('c')]
+
+        data = self.upsert(payloads)
+
+        self.assertEqual(data['stats'], {'total': 3, 'created': 2, 'updated': 1, 'unchanged': 0, 'invalid': 0})
+        self.assertEqual([item['key'] for item in data['results']], ['dev::a@1.0.0', 'dev::b@1.0.0', 'dev::c@1.0.0'])
+        existing_after = AgentCard.objects.get(pk=existing.pk)
+        self.assertEqual(existing_after.description, card_payload()['description'])
+        self.assertEqual(existing_after.a2a_snapshot['description'], card_payload()['description'])
+
+        # 相同内容再次提交：不写入，不产生变更记录
+        changes = AgentCardChange.objects.count()
+        data = self.upsert(payloads)
+        self.assertEqual(data['stats'], {'total': 3, 'created': 0, 'updated': 0, 'unchanged': 3, 'invalid': 0})
+        self.assertEqual(AgentCardChange.objects.count(), changes)
+
+        payloads[1]['description'] = '修改后的描述'
+        data = self.upsert(payloads)
+        self.assertEqual([item['status'] for item in data['results']], ['unchanged', 'updated', 'unchanged'])
+        self.assertEqual(AgentCard.objects.get(name='b').description, '修改后的描述')
+
+    def test_edit_through_api_clears_digest(self):
+        self.upsert([card_payload('a')])
+        card = AgentCard.objects.get(name='a')
+
+        self.client.patch(f'/api/agentcards/{card.pk}/', {'description': '手工修改'}, format='json')
+        data = self.upsert([card_payload('a')])
+
+        self.assertEqual(data['stats']['updated'], 1)
+        self.assertEqual(AgentCard.objects.get(name='a').description, card_payload()['description'])
+
+    def test_default_version_moves_within_one_request(self):
+        make_card(self.namespace, 'a', '1.0.0', is_default_version=True)
+        payloads = [
+            card_payload('a', '2.0.0', _metadata={'isDefaultVersion': True}),
+            card_payload('a', '1.0.0', _metadata={'isDefaultVersion': False}),
+        ]
+
+        data = self.upsert(payloads)
+
+        self.assertEqual(data['stats']['invalid'], 0)
+        self.assertEqual(
+            list(AgentCard.objects.filter(name='a').order_by('version').values_list('version', 'is_default_version')),
+            [('1.0.0', False), ('2.0.0', True)],
+        )
+        stats = NamespaceStats.objects.get(pk='dev')
+        self.assertEqual((stats.agent_card_count, stats.default_card_count), (2, 1))
+
+    def test_second_default_without_demotion_is_invalid(self):
+        make_card(self.namespace, 'a', '1.0.0', is_default_version=True)
+
+        data = self.upsert([card_payload('a', '2.0.0', _metadata={'isDefaultVersion': True})])
+
+        self.assertEqual(data['results'][0]['status'], 'invalid')
+        self.assertIn('is_default_version', data['results'][0]['errors'])
+        self.assertFalse(AgentCard.objects.filter(name='a', version='2.0.0').exists())
+
+    def test_duplicate_and_invalid_items_do_not_block_others(self):
+        payloads = [card_payload('a'), card_payload('a'), card_payload('b', url='ftp://example.com')]
+
+        data = self.upsert(payloads)
+
+        self.assertEqual([item['status'] for item in data['results']], ['created', 'invalid', 'invalid'])
+        self.assertIn('url', data['results'][2]['errors'])
+
+    def test_dry_run_writes_nothing(self):
+        data = self.upsert([card_payload('a')], url=URL + '&dry_run=true')
+
+        self.assertEqual(data['results'][0]['status'], 'created')
+        self.assertFalse(AgentCard.objects.exists())
@@ -0,0 +1,75 @@
+"""
+编译的扩展验证器按 Schema 版本缓存（validation.get_validator / get_validators）
+"""
+
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+
+from documents import validation
+from documents.models import SchemaField, SchemaRegistry
+from documents.validation import discard_validator, get_validator, get_validators
+
+from .utils import make_asset_schema
+
+
+class ValidatorCacheTests(TestCase):
+
+    def setUp(self):
+        self.schema = make_asset_schema()
+        discard_validator(self.schema.pk)
+        self.addCleanup(discard_validator, self.schema.pk)
+
+    def _fresh(self):
+        return SchemaRegistry.objects.get(pk=self.schema.pk)
+
+    def test_same_version_is_compiled_once(self):
+        with mock.patch.object(validation, 'SchemaValidator', wraps=validation.SchemaValidator) as compile_validator:
+            first = get_validator(self._fresh())
+            second = get_validator(self._fresh())
+
+        self.assertIs(first, second)
+        self.assertEqual(compile_validator.call_count, 1)
+
+    def test_cached_validator_does_not_query(self):
+        get_validator(self._fresh())
+        schema = self._fresh()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_validator(schema).validate({'assetId': 'AB-1'}), (True, ''))
+
+    def test_field_change_recompiles(self):
+        before = get_validator(self._fresh())
+        SchemaField.objects.create(schema=self.schema, field_name='room', field_type='string', is_required=True)
+
+        after = get_validator(self._fresh())
+
+        self.assertIsNot(before, after)
+        self.assertGreater(after.updated_at, before.updated_at)
+        self.assertFalse(after.validate({'assetId': 'AB-1'})[0])
+
+    def test_newer_updated_at_from_another_process_recompiles(self):
+        # 其他进程修改 Schema：本进程的缓存未被丢弃，但 updated_at 不一致
+        before = get_validator(self._fresh())
+        SchemaRegistry.objects.filter(pk=self.schema.pk).update(updated_at=before.updated_at + timedelta(seconds=1))
+
+        after = get_validator(self._fresh())
+
+        self.assertIsNot(before, after)
+        self.assertIs(get_validator(self._fresh()), after)
+
+    def test_get_validators_loads_stale_fields_in_one_query(self):
+        other = SchemaRegistry.objects.create(schema_uri='https://schemas.example.com/room/v1', schema_type='room', version='v1')
+        SchemaField.objects.create(schema=other, field_name='roomId', field_type='string', is_required=True)
+        self.addCleanup(discard_validator, other.pk)
+        schemas = list(SchemaRegistry.objects.filter(pk__in=[self.schema.pk, other.pk]))
+
+        with self.assertNumQueries(1):
+            validators = get_validators(schemas)
+        with self.assertNumQueries(0):
+            cached = get_validators(schemas)
+
+        self.assertEqual(set(validators), {self.schema.pk, other.pk})
+        self.assertEqual({pk: id(v) for pk, v in validators.items()}, {pk: id(v) for pk, v in cached.items()})
+        self.assertFalse(validators[other.pk].validate({})[0])
@@ -0,0 +1,136 @@
+"""
+语义化版本（versioning.py）、版本排序（SEMVER_DESC_ORDERING）与版本解析（resolution.py）
+"""
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from documents.models import SEMVER_DESC_ORDERING, AgentCard
+from documents.resolution import _cache_key, resolve_version, version_candidates
+from documents.versioning import in_range, parse_range, parse_semver, semver_key
+
+from .utils import make_card, make_namespace
+
+
+class SemverTests(SimpleTestCase):
+
+    def test_parse(self):
+        self.assertEqual(parse_semver('1.2.3'), (1, 2, 3, None))
+        self.assertEqual(parse_semver('v1.2'), (1, 2, 0, None))
+        self.assertEqual(parse_semver('2.1.3-beta.1+build.5'), (2, 1, 3, 'beta.1'))
+        for version in ['latest', '1.2.3.4', '01.2.3', '', None, f'{2 ** 31}.0.0']:
+            with self.subTest(version=version):
+                self.assertIsNone(parse_semver(version))
+
+    def test_precedence(self):
+        versions = ['1.0.0', '1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta', '1.0.0-beta',
+                    '1.0.0-beta.2', '1.0.0-beta.11', '1.0.0-rc.1', '10.0.0', '9.0.0']
+        ordered = sorted(versions, key=lambda version: semver_key(parse_semver(version)))
+
+        # SemVer 2.0.0 第 11 条的示例顺序；数字段按数值比较
+        self.assertEqual(ordered, [
+            '1.0.0-alpha', '1.0.0-alpha.1', '1.0.0-alpha.beta', '1.0.0-beta', '1.0.0-beta.2',
+            '1.0.0-beta.11', '1.0.0-rc.1', '1.0.0', '9.0.0', '10.0.0',
+        ])
+
+    def test_ranges(self):
+        cases = {
+            '^1.2': ((1, 2, 0), (2, 0, 0)),
+            '^0.2': ((0, 2, 0), (0, 3, 0)),
+            '^0.0.3': ((0, 0, 3), (0, 0, 4)),
+            '~2.0': ((2, 0, 0), (2, 1, 0)),
+            '1.x': ((1, 0, 0), (2, 0, 0)),
+            '1.2': ((1, 2, 0), (1, 3, 0)),
+            '1.2.3': ((1, 2, 3), (1, 2, 4)),
+            '*': ((0, 0, 0), None),
+        }
+        for spec, bounds in cases.items():
+            with self.subTest(spec=spec):
+                self.assertEqual(parse_range(spec), bounds)
+        self.assertTrue(in_range((1, 9, 0, None), parse_range('^1.2')))
+        self.assertFalse(in_range((2, 0, 0, None), parse_range('^1.2')))
+        with self.assertRaises(ValueError):
+            parse_range('>=1.0')
+
+
+class VersionOrderingTests(APITestCase):
+
+    def test_semver_descending_with_release_before_prerelease_and_non_semver_last(self):
+        namespace = make_namespace()
+        for version in ['9.0.0', '10.0.0', '10.0.0-rc.1', 'nightly', '1.2']:
+            make_card(namespace, version=version)
+
+        versions = list(
+            AgentCard.objects.order_by(*SEMVER_DESC_ORDERING).values_list('version', flat=True)
+        )
+
+        self.assertEqual(versions, ['10.0.0', '10.0.0-rc.1', '9.0.0', '1.2', 'nightly'])
+
+
+class ResolveTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.namespace = make_namespace()
+        for version in ['1.2.0', '1.10.0', '2.0.0-beta.1', 'nightly']:
+            make_card(self.namespace, version=version, is_default_version=version == '1.2.0')
+
+    def _resolve(self, **params):
+        return self.client.get('/api/agentcards/resolve/dev/hplc/', params)
+
+    def test_specs(self):
+        cases = {
+            'default': '1.2.0',
+            'latest': '1.10.0',
+            '^1.2': '1.10.0',
+            '1.2': '1.2.0',
+            'nightly': 'nightly',
+        }
+        for spec, expected in cases.items():
+            with self.subTest(spec=spec):
+                response = self._resolve(version=spec)
+                self.assertEqual(response.status_code, 200, response.data)
+                self.assertEqual(response.data['version'], expected)
+
+        self.assertEqual(self._resolve(version='latest', include_prerelease='true').data['version'], '2.0.0-beta.1')
+        self.assertEqual(self._resolve(version='^3').status_code, 404)
+        self.assertEqual(self._resolve(version='>=1').status_code, 400)
+
+    def test_non_semver_versions_only_resolve_exactly(self):
+        candidates = [
+            {'id': 1, 'version': 'nightly', 'is_default_version': False,
+             'version_major': None, 'version_minor': None, 'version_patch': None, 'version_prerelease': None},
+        ]
+
+        self.assertIsNone(resolve_version(candidates, 'latest'))
+        self.assertEqual(resolve_version(candidates, 'nightly')['id'], 1)
+
+    def test_cache_is_invalidated_on_save(self):
+        self.assertEqual(self._resolve(version='latest').data['version'], '1.10.0')
+        self.assertIsNotNone(cache.get(_cache_key('dev', 'hplc')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_card(self.namespace, version='1.11.0')
+
+        self.assertIsNone(cache.get(_cache_key('dev', 'hplc')))
+        self.assertEqual(self._resolve(version='latest').data['version'], '1.11.0')
+
+    def test_cache_is_invalidated_on_delete(self):
+        version_candidates('dev', 'hplc')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AgentCard.objects.get(version='1.10.0').delete()
+
+        self.assertIsNone(cache.get(_cache_key('dev', 'hplc')))
+        self.assertEqual(self._resolve(version='latest').data['version'], '1.2.0')
+
+    def test_cache_is_invalidated_when_deactivated(self):
+        version_candidates('dev', 'hplc')
+        card = AgentCard.objects.get(version='1.10.0')
+        card.is_active = False
+
+        with self.captureOnCommitCallbacks(execute=True):
+            card.save(update_fields=['is_active'])
+
+        self.assertEqual(self._resolve(version='latest').data['version'], '1.2.0')
@@ -0,0 +1,60 @@
+"""
+测试共用的数据构造
+"""
+
+from django.contrib.auth.models import User
+
+from documents.models import AgentCard, Namespace, SchemaField, SchemaRegistry
+
+ASSET_SCHEMA_URI = 'https://schemas.example.com/asset/v1'
+
+CARD_DEFAULTS = {
+    'description': 'HPLC 分析 Agent',
+    'url': 'https://agents.example.com/hplc',
+    'default_input_modes': ['text/plain'],
+    'default_output_modes': ['application/json'],
+    'skills': [{'id': 'analyze', 'name': '分析', 'description': '分析样品', 'tags': ['hplc', 'lab']}],
+}
+
+
+def make_namespace(namespace_id='dev', **kwargs) -> Namespace:
+    kwargs.setdefault('name', namespace_id)
+    return Namespace.objects.create(id=namespace_id, **kwargs)
+
+
+def make_user(username='admin') -> User:
+    return User.objects.create_superuser(username, f'{username}@example.com', 'password')
+
+
+def make_card(namespace, name='hplc', version='1.0.0', **kwargs) -> AgentCard:
+    """通过 save() 创建 AgentCard（派生数据由信号维护）"""
+    fields = {**CARD_DEFAULTS, **kwargs}
+    return AgentCard.objects.create(namespace=namespace, name=name, version=version, **fields)
+
+
+def card_payload(name='hplc', version='1.0.0', **kwargs) -> dict:
+    """A2A 标准格式的 AgentCard JSON（导入、upsert、试验证的请求体）"""
+    payload = {
+        'protocolVersion': '0.3.0',
+        'name': name,
+        'version': version,
+        'description': CARD_DEFAULTS['description'],
+        'url': CARD_DEFAULTS['url'],
+        'defaultInputModes': ['text/plain'],
+        'defaultOutputModes': ['application/json'],
+        'capabilities': {'streaming': False},
+        'skills': CARD_DEFAULTS['skills'],
+    }
+    payload.update(kwargs)
+    return payload
+
+
+def make_asset_schema():
+    """带一个必填字段（assetId，格式 ^[A-Z]+-\\d+$）的已注册 Schema"""
+    schema = SchemaRegistry.objects.create(
+        schema_uri=ASSET_SCHEMA_URI, schema_type='asset', version='v1', description='实验设备'
+    )
+    SchemaField.objects.create(
+        schema=schema, field_name='assetId', field_type='string', is_required=True, pattern=r'^[A-Z]+-\d+$'
+    )
+    return schema
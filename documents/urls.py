@@ -2,8 +2,9 @@
 API URL Configuration for documents app
 """
 
-from django.urls import path, include
+from django.urls import include, path
 from rest_framework.routers import DefaultRouter
+
 from . import views
 
 # 创建 DRF Router
@@ -14,6 +15,8 @@ router.register(r'namespaces', views.NamespaceViewSet, basename='namespace')
 router.register(r'schemas', views.SchemaRegistryViewSet, basename='schema')
 router.register(r'agentcards', views.AgentCardViewSet, basename='agentcard')
 router.register(r'cases', views.AgentCaseViewSet, basename='agentcase')
+router.register(r'skills', views.SkillViewSet, basename='skill')
+router.register(r'route', views.RouteViewSet, basename='route')
 
 # URL patterns
 urlpatterns = [
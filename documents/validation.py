@@ -0,0 +1,433 @@
+"""
+扩展数据验证（编译并缓存的 JSON Schema 验证器）
+
+SchemaRegistry.generate_json_schema() 生成的 draft-07 Schema（含 SchemaField.nested_schema
+定义的嵌套对象 / 数组）编译为嵌套的检查函数：类型检查、枚举集合、预编译的正则表达式在
+编译时确定，验证时不查询数据库，并返回所有错误及其路径（如 location.building、readings[2].value）。
+
+支持的 draft-07 关键字（子集）：
+- 通用：type（字符串或数组）、enum、const
+- 对象：properties、required、additionalProperties（布尔或 Schema）、minProperties、maxProperties
+- 数组：items（单个 Schema 或元组形式）、minItems、maxItems、uniqueItems
+- 字符串：minLength、maxLength、pattern（搜索匹配，与 JSON Schema 一致）
+- 数值：minimum、maximum、exclusiveMinimum、exclusiveMaximum
+- 注释性关键字（title、description、default、examples、format、$schema、$comment）忽略
+其他关键字（$ref、oneOf 等）在编译时报错，而不是静默放行。
+
+缓存：
+- 按 Schema ID 保存，并记录编译时的 updated_at；SchemaField 增删改会更新
+  SchemaRegistry.updated_at（见 signals.py），因此读取到新版本 Schema 的任何进程都会重新编译
+- 本进程内的 SchemaField 变更同时直接丢弃对应的缓存（discard_validator）
+- 编译需要 Schema 的全部字段：已 prefetch_related('fields') 时不查询，否则一次查询；
+  批量验证使用 get_validators()，未缓存的 Schema 一次查询加载
+
+SchemaRegistry.validate_extension_data()、AgentCard.set_extension()、
+AgentExtensionForm.clean()、批量导入和 API 都通过这里验证。
+"""
+
+import json
+import re
+import threading
+from typing import NamedTuple
+
+from django.db.models import prefetch_related_objects
+
+
+class SchemaCompileError(ValueError):
+    """JSON Schema 无效或使用了不支持的关键字"""
+
+
+class SchemaError(NamedTuple):
+    """单个验证错误：path 为空表示数据根"""
+    path: str
+    message: str
+
+    def __str__(self):
+        return f"字段 '{self.path}': {self.message}" if self.path else self.message
+
+
+def _is_integer(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+TYPE_CHECKS = {
+    'string': lambda value: isinstance(value, str),
+    'integer': _is_integer,
+    'number': _is_number,
+    'boolean': lambda value: isinstance(value, bool),
+    'array': lambda value: isinstance(value, list),
+    'object': lambda value: isinstance(value, dict),
+    'null': lambda value: value is None,
+}
+
+# 与 SchemaField.FIELD_TYPES 的显示名称一致
+TYPE_LABELS = {
+    'string': '文本',
+    'integer': '整数',
+    'number': '数字（含小数）',
+    'boolean': '布尔值',
+    'array': '数组',
+    'object': '对象',
+    'null': '空值',
+}
+
+ANNOTATION_KEYWORDS = {'title', 'description', 'default', 'examples', 'format', '$schema', '$comment'}
+SUPPORTED_KEYWORDS = ANNOTATION_KEYWORDS | {
+    'type', 'enum', 'const',
+    'properties', 'required', 'additionalProperties', 'minProperties', 'maxProperties',
+    'items', 'minItems', 'maxItems', 'uniqueItems',
+    'minLength', 'maxLength', 'pattern',
+    'minimum', 'maximum', 'exclusiveMinimum', 'exclusiveMaximum',
+}
+
+
+def _child_path(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+
+def _canonical(value) -> str:
+    """enum / const / uniqueItems 比较用的规范化 JSON（区分 true 与 1）"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False)
+
+
+def _normalize_number(value):
+    """JSON Schema 中 1 与 1.0 是相同的值"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _require(condition, message):
+    if not condition:
+        raise SchemaCompileError(message)
+
+
+# ========================================
+# 编译
+# ========================================
+
+def compile_schema(schema, location: str = '#'):
+    """
+    编译 JSON Schema
+
+    Returns:
+        check(value, path, errors)：把 SchemaError 追加到 errors
+
+    Raises:
+        SchemaCompileError: Schema 无效或包含不支持的关键字
+    """
+    if schema is True or schema == {}:
+        return lambda value, path, errors: None
+    if schema is False:
+        return lambda value, path, errors: errors.append(SchemaError(path, '不允许出现该值'))
+    _require(isinstance(schema, dict), f"{location}: Schema 必须是对象或布尔值")
+
+    unsupported = sorted(set(schema) - SUPPORTED_KEYWORDS)
+    _require(not unsupported, f"{location}: 不支持的关键字 {', '.join(unsupported)}")
+
+    checks = []
+    checks.extend(_compile_type(schema, location))
+    checks.extend(_compile_enum(schema, location))
+    checks.extend(_compile_object(schema, location))
+    checks.extend(_compile_array(schema, location))
+    checks.extend(_compile_string(schema, location))
+    checks.extend(_compile_number(schema, location))
+
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(value, path, errors):
+        for item in checks:
+            item(value, path, errors)
+    return check
+
+
+def _compile_type(schema, location):
+    if 'type' not in schema:
+        return []
+    types = schema['type']
+    types = [types] if isinstance(types, str) else types
+    _require(
+        isinstance(types, list) and types and all(t in TYPE_CHECKS for t in types),
+        f"{location}/type: 无效的类型 {schema['type']!r}"
+    )
+    type_checks = [TYPE_CHECKS[t] for t in types]
+    message = f"类型错误，期望 {' 或 '.join(TYPE_LABELS[t] for t in types)}"
+
+    def check(value, path, errors):
+        if not any(type_check(value) for type_check in type_checks):
+            errors.append(SchemaError(path, message))
+    return [check]
+
+
+def _compile_enum(schema, location):
+    checks = []
+    if 'enum' in schema:
+        choices = schema['enum']
+        _require(isinstance(choices, list) and choices, f"{location}/enum: 必须是非空数组")
+        strings = frozenset(choice for choice in choices if isinstance(choice, str))
+        others = {_canonical(_normalize_number(choice)) for choice in choices if not isinstance(choice, str)}
+        message = f"值必须是以下之一：{', '.join(map(str, choices))}"
+
+        def check_enum(value, path, errors):
+            if isinstance(value, str):
+                matched = value in strings
+            else:
+                matched = _canonical(_normalize_number(value)) in others
+            if not matched:
+                errors.append(SchemaError(path, message))
+        checks.append(check_enum)
+
+    if 'const' in schema:
+        expected = _canonical(_normalize_number(schema['const']))
+        message = f"值必须是 {json.dumps(schema['const'], ensure_ascii=False)}"
+
+        def check_const(value, path, errors):
+            if _canonical(_normalize_number(value)) != expected:
+                errors.append(SchemaError(path, message))
+        checks.append(check_const)
+    return checks
+
+
+def _compile_object(schema, location):
+    checks = []
+    properties = schema.get('properties', {})
+    _require(isinstance(properties, dict), f"{location}/properties: 必须是对象")
+    compiled = {
+        name: compile_schema(sub, f"{location}/properties/{name}")
+        for name, sub in properties.items()
+    }
+
+    required = schema.get('required', [])
+    _require(
+        isinstance(required, list) and all(isinstance(name, str) for name in required),
+        f"{location}/required: 必须是字符串数组"
+    )
+
+    additional = schema.get('additionalProperties', True)
+    additional_check = None if additional is True else compile_schema(
+        additional, f"{location}/additionalProperties"
+    )
+
+    if compiled or required or additional_check is not None:
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(SchemaError(path, f"缺少必填字段：{name}"))
+            for name, item in value.items():
+                child = compiled.get(name)
+                if child is not None:
+                    child(item, _child_path(path, name), errors)
+                elif additional is False:
+                    errors.append(SchemaError(path, f"不允许的字段：{name}"))
+                elif additional_check is not None:
+                    additional_check(item, _child_path(path, name), errors)
+        checks.append(check_object)
+
+    min_properties = schema.get('minProperties')
+    max_properties = schema.get('maxProperties')
+    if min_properties is not None or max_properties is not None:
+        def check_size(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            if min_properties is not None and len(value) < min_properties:
+                errors.append(SchemaError(path, f"字段数不能少于 {min_properties}"))
+            if max_properties is not None and len(value) > max_properties:
+                errors.append(SchemaError(path, f"字段数不能多于 {max_properties}"))
+        checks.append(check_size)
+    return checks
+
+
+def _compile_array(schema, location):
+    checks = []
+    items = schema.get('items')
+    if items is not None:
+        if isinstance(items, list):
+            # 元组形式：按位置验证，多出的元素不限制
+            positional = [compile_schema(sub, f"{location}/items/{i}") for i, sub in enumerate(items)]
+
+            def check_tuple(value, path, errors):
+                if not isinstance(value, list):
+                    return
+                for index, (item, item_check) in enumerate(zip(value, positional)):
+                    item_check(item, _child_path(path, index), errors)
+            checks.append(check_tuple)
+        else:
+            item_check = compile_schema(items, f"{location}/items")
+
+            def check_items(value, path, errors):
+                if not isinstance(value, list):
+                    return
+                for index, item in enumerate(value):
+                    item_check(item, _child_path(path, index), errors)
+            checks.append(check_items)
+
+    min_items = schema.get('minItems')
+    max_items = schema.get('maxItems')
+    unique = schema.get('uniqueItems', False)
+    if min_items is not None or max_items is not None or unique:
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(SchemaError(path, f"元素数不能少于 {min_items}"))
+            if max_items is not None and len(value) > max_items:
+                errors.append(SchemaError(path, f"元素数不能多于 {max_items}"))
+            if unique and len({_canonical(item) for item in value}) != len(value):
+                errors.append(SchemaError(path, "元素不能重复"))
+        checks.append(check_array)
+    return checks
+
+
+def _compile_string(schema, location):
+    min_length = schema.get('minLength')
+    max_length = schema.get('maxLength')
+    regex = None
+    pattern = schema.get('pattern')
+    if pattern is not None:
+        try:
+            regex = re.compile(pattern)
+        except (re.error, TypeError) as e:
+            raise SchemaCompileError(f"{location}/pattern: 无效的正则表达式（{e}）")
+    if min_length is None and max_length is None and regex is None:
+        return []
+
+    def check(value, path, errors):
+        if not isinstance(value, str):
+            return
+        if min_length is not None and len(value) < min_length:
+            errors.append(SchemaError(path, f"长度不能小于 {min_length}"))
+        if max_length is not None and len(value) > max_length:
+            errors.append(SchemaError(path, f"长度不能大于 {max_length}"))
+        if regex is not None and not regex.search(value):
+            errors.append(SchemaError(path, f"格式不匹配，应符合正则表达式 {pattern}"))
+    return [check]
+
+
+def _compile_number(schema, location):
+    bounds = []
+    for keyword, compare, template in (
+        ('minimum', lambda v, b: v >= b, "值不能小于 {}"),
+        ('maximum', lambda v, b: v <= b, "值不能大于 {}"),
+        ('exclusiveMinimum', lambda v, b: v > b, "值必须大于 {}"),
+        ('exclusiveMaximum', lambda v, b: v < b, "值必须小于 {}"),
+    ):
+        bound = schema.get(keyword)
+        if bound is None:
+            continue
+        _require(_is_number(bound), f"{location}/{keyword}: 必须是数值")
+        bounds.append((bound, compare, template.format(bound)))
+    if not bounds:
+        return []
+
+    def check(value, path, errors):
+        if not _is_number(value):
+            return
+        for bound, compare, message in bounds:
+            if not compare(value, bound):
+                errors.append(SchemaError(path, message))
+    return [check]
+
+
+# ========================================
+# Schema 验证器
+# ========================================
+
+class SchemaValidator:
+    """SchemaRegistry 编译后的验证器"""
+
+    def __init__(self, schema):
+        self.schema_id = schema.pk
+        self.updated_at = schema.updated_at
+        self.json_schema = schema.generate_json_schema()
+        self.compile_error = None
+        try:
+            self._check = compile_schema(self.json_schema)
+        except SchemaCompileError as e:
+            # 嵌套定义由 SchemaField.clean() 校验，这里只兜底绕过验证写入的数据
+            self.compile_error = f"Schema 定义无效：{e}"
+            self._check = None
+
+    def errors(self, data) -> list[SchemaError]:
+        """返回全部验证错误（带路径），数据有效时为空列表"""
+        if self._check is None:
+            return [SchemaError('', self.compile_error)]
+        if not isinstance(data, dict):
+            return [SchemaError('', "扩展数据必须是一个对象")]
+        errors = []
+        self._check(data, '', errors)
+        return errors
+
+    def validate(self, data) -> tuple[bool, str]:
+        """
+        验证扩展数据（允许 Schema 未定义的额外字段）
+
+        Returns:
+            (is_valid, error_message)：error_message 每行一个错误
+        """
+        errors = self.errors(data)
+        if errors:
+            return False, "\n".join(map(str, errors))
+        return True, ""
+
+
+_validators = {}
+_lock = threading.Lock()
+
+
+def _cached(schema):
+    validator = _validators.get(schema.pk)
+    if validator is not None and validator.updated_at == schema.updated_at:
+        return validator
+    return None
+
+
+def get_validator(schema) -> SchemaValidator:
+    """返回 Schema 的验证器（schema.updated_at 与缓存不一致时重新编译）"""
+    validator = _cached(schema)
+    if validator is None:
+        validator = SchemaValidator(schema)
+        if schema.pk is not None:
+            with _lock:
+                _validators[schema.pk] = validator
+    return validator
+
+
+def get_validators(schemas) -> dict:
+    """
+    批量获取验证器（用于成批验证扩展数据）
+
+    Args:
+        schemas: SchemaRegistry 实例（updated_at 用于判断缓存是否有效）
+
+    Returns:
+        {schema_id: SchemaValidator}；需要编译的 Schema 的字段一次查询加载
+    """
+    schemas = {schema.pk: schema for schema in schemas}
+    validators = {}
+    stale = []
+    for pk, schema in schemas.items():
+        validator = _cached(schema)
+        if validator is None:
+            stale.append(schema)
+        else:
+            validators[pk] = validator
+    if stale:
+        prefetch_related_objects(stale, 'fields')
+        for schema in stale:
+            validators[schema.pk] = get_validator(schema)
+    return validators
+
+
+def discard_validator(schema_id):
+    """丢弃 Schema 的缓存验证器（下次使用时重新编译）"""
+    with _lock:
+        _validators.pop(schema_id, None)
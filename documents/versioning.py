@@ -0,0 +1,114 @@
+"""
+语义化版本（SemVer）解析与范围匹配
+
+AgentCard.version 是自由文本，按字符串排序时 '10.0.0' < '9.0.0'。
+保存时解析出 major / minor / patch / prerelease 存入独立的索引列，
+列表排序和版本解析（resolve 端点）都基于这些列。
+
+支持的写法：
+- 版本：'1.2.3'、'v1.2.3'、'1.2'（= 1.2.0）、'2.1.3-beta.1'、'1.0.0+build.5'（构建元数据忽略）
+- 范围：'^1.2'（>=1.2.0 <2.0.0）、'~2.0'（>=2.0.0 <2.1.0）、'1.x' / '1.2.x' / '1' / '1.2'、'*'
+"""
+
+import re
+
+SEMVER_RE = re.compile(
+    r'^v?(?P<major>0|[1-9]\d*)(?:\.(?P<minor>0|[1-9]\d*))?(?:\.(?P<patch>0|[1-9]\d*))?'
+    r'(?:-(?P<prerelease>[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*))?'
+    r'(?:\+[0-9A-Za-z-]+(?:\.[0-9A-Za-z-]+)*)?$'
+)
+
+RANGE_RE = re.compile(
+    r'^(?P<operator>[\^~]?)v?(?P<major>0|[1-9]\d*)'
+    r'(?:\.(?P<minor>0|[1-9]\d*|[xX*]))?(?:\.(?P<patch>0|[1-9]\d*|[xX*]))?$'
+)
+
+# 超过此值的数字不写入整数列（视为无法解析）
+MAX_COMPONENT = 2 ** 31 - 1
+
+
+def parse_semver(version: str):
+    """
+    解析版本号
+
+    Returns:
+        (major, minor, patch, prerelease)，prerelease 为 None 表示正式版；
+        无法解析时返回 None
+    """
+    match = SEMVER_RE.match((version or '').strip())
+    if not match:
+        return None
+    major, minor, patch = (int(match.group(name) or 0) for name in ('major', 'minor', 'patch'))
+    if max(major, minor, patch) > MAX_COMPONENT:
+        return None
+    return major, minor, patch, match.group('prerelease')
+
+
+def semver_key(components) -> tuple:
+    """
+    SemVer 优先级排序键（用于 max() / sorted()）
+
+    同一 major.minor.patch 下正式版高于预发布版；预发布标识逐段比较，
+    数字段按数值比较且低于字母段（SemVer 2.0.0 第 11 条）。
+    """
+    major, minor, patch, prerelease = components
+    if prerelease is None:
+        return (major, minor, patch, 1, ())
+    identifiers = tuple(
+        (0, int(part), '') if part.isdigit() else (1, 0, part)
+        for part in prerelease.split('.')
+    )
+    return (major, minor, patch, 0, identifiers)
+
+
+def parse_range(spec: str):
+    """
+    解析版本范围
+
+    Returns:
+        (lower, upper)：满足 lower <= (major, minor, patch) < upper，upper 为 None 表示无上限
+
+    Raises:
+        ValueError: 无法识别的范围写法
+    """
+    spec = (spec or '').strip()
+    if spec in ('*', 'x', 'X'):
+        return (0, 0, 0), None
+
+    match = RANGE_RE.match(spec)
+    if not match:
+        raise ValueError(f"无法识别的版本范围：'{spec}'")
+    operator = match.group('operator')
+    major = int(match.group('major'))
+    minor = match.group('minor')
+    patch = match.group('patch')
+    minor = None if minor is None or minor in 'xX*' else int(minor)
+    patch = None if patch is None or patch in 'xX*' or minor is None else int(patch)
+    lower = (major, minor or 0, patch or 0)
+
+    if operator == '^':
+        # 不改变最左侧的非零段
+        if major > 0 or minor is None:
+            upper = (major + 1, 0, 0)
+        elif minor > 0 or patch is None:
+            upper = (0, minor + 1, 0)
+        else:
+            upper = (0, 0, patch + 1)
+    elif operator == '~':
+        upper = (major + 1, 0, 0) if minor is None else (major, minor + 1, 0)
+    else:
+        # 部分版本即 x 范围：'1' = 1.x，'1.2' = 1.2.x；完整版本只匹配自身
+        if minor is None:
+            upper = (major + 1, 0, 0)
+        elif patch is None:
+            upper = (major, minor + 1, 0)
+        else:
+            upper = (major, minor, patch + 1)
+    return lower, upper
+
+
+def in_range(components, bounds) -> bool:
+    """(major, minor, patch, prerelease) 是否落在 parse_range() 返回的范围内"""
+    lower, upper = bounds
+    triple = components[:3]
+    return triple >= lower and (upper is None or triple < upper)
@@ -4,27 +4,166 @@ DRF ViewSets for AgentCard Management System
 提供 REST API 端点
 """
 
-from rest_framework import viewsets, status
+import json
+import zlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, IntegerField, Max, Prefetch, Q
+from django.db.models.expressions import RawSQL
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
-from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from django.db.models import Count
-
-from django.db.models import Q
-
-from .models import Namespace, SchemaRegistry, AgentCard, AgentCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .catalog import field_count_subquery, get_catalog, usage_count_subquery
+from .changefeed import head_cursor, read_changes
+from .conditional import ConditionalGetMixin, conditional_get, conditional_write
+from .dryrun import validate_payloads
+from .extensions import load_schemas, params_errors, replace_extensions, save_extension
+from .importing import AgentCardImporter, AgentCardUpserter
+from .models import (
+    SEMVER_DESC_ORDERING,
+    AgentCard,
+    AgentCase,
+    AgentExtension,
+    AgentSkill,
+    AgentSkillTag,
+    Namespace,
+    SchemaRegistry,
+)
+from .pagination import KeysetPaginationMixin
+from .parsers import JSONPatchParser, MergePatchParser
+from .patching import (
+    JSON_PATCH_MEDIA_TYPE,
+    MERGE_PATCH_MEDIA_TYPE,
+    PatchConflict,
+    PatchError,
+    apply_patch,
+)
+from .renderers import NDJSONRenderer
+from .rendering import (
+    AgentCardRenderer,
+    decode_export_cursor,
+    iter_ndjson,
+    materialize_missing_snapshots,
+)
+from .resolution import resolve_version, version_candidates
+from .revalidation import revalidator
+from .routing import RouteQuery, routing_index
+from .search import search
 from .serializers import (
-    NamespaceSerializer,
-    SchemaRegistryListSerializer,
-    SchemaRegistryDetailSerializer,
-    AgentCardListSerializer,
-    AgentCardDetailSerializer,
     AgentCardCreateUpdateSerializer,
+    AgentCardDetailSerializer,
+    AgentCardListSerializer,
     AgentCardStandardSerializer,
-    SchemaCatalogSerializer,
-    AgentCaseListSerializer,
-    AgentCaseDetailSerializer,
     AgentCaseCreateUpdateSerializer,
+    AgentCaseDetailSerializer,
+    AgentCaseListSerializer,
+    AgentExtensionSerializer,
+    ExtensionViolationSerializer,
+    NamespaceSerializer,
+    SchemaCatalogSerializer,
+    SchemaRegistryDetailSerializer,
+    SchemaRegistryListSerializer,
+    SkillCatalogSerializer,
+)
+from .validation import get_validator
+
+
+def _media_type(request) -> str:
+    """请求体的媒体类型（不含参数）"""
+    return (request.content_type or '').split(';')[0].strip().lower()
+
+
+def _apply_patch(document, media_type, patch):
+    """
+    应用补丁
+
+    Returns:
+        (结果, None)；补丁格式错误时返回 (None, 400 响应)，无法应用到当前数据时返回 (None, 409 响应)
+    """
+    try:
+        return apply_patch(document, media_type, patch), None
+    except PatchConflict as e:
+        return None, Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+    except PatchError as e:
+        return None, Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _read_payloads(request, max_items: int):
+    """
+    读取 AgentCard 载荷列表：JSON 数组（application/json，也接受单个对象），
+    或每行一个 AgentCard JSON（application/x-ndjson，无法解析的行以 ValidationError 占位）
+
+    Returns:
+        (载荷列表, None)；请求体无效、为空或超过 max_items 时返回 (None, 400 响应)
+    """
+    body = request.body
+    if _media_type(request) == 'application/x-ndjson':
+        payloads = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                payloads.append(json.loads(line))
+            except ValueError as e:
+                payloads.append(ValidationError(f'无效的 JSON：{e}'))
+    else:
+        try:
+            payloads = json.loads(body)
+        except ValueError as e:
+            return None, Response({'detail': f'无效的 JSON：{e}'}, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+        if not isinstance(payloads, list):
+            return None, Response(
+                {'detail': '请求体必须是 AgentCard JSON 数组或对象'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+    if not payloads:
+        return None, Response({'detail': '请求体为空'}, status=status.HTTP_400_BAD_REQUEST)
+    if len(payloads) > max_items:
+        return None, Response(
+            {'detail': f'单次最多提交 {max_items} 个载荷'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    return payloads, None
+
+
+def _split_param(value) -> list:
+    """逗号分隔的查询参数 -> 去重后的非空值列表"""
+    return list(dict.fromkeys(v.strip() for v in (value or '').split(',') if v.strip()))
+
+
+# bigint 主键的最大值
+BIGINT_MAX = 2 ** 63 - 1
+
+
+def _parse_int(raw: str, maximum: int = BIGINT_MAX):
+    """
+    解析非负十进制整数参数
+
+    只接受 ASCII 数字（str.isdigit() 对 '²' 等字符也为真，但 int() 无法解析）。
+
+    Returns:
+        整数；格式无效或大于 maximum 时返回 None
+    """
+    if not (raw.isascii() and raw.isdigit()):
+        return None
+    value = int(raw)
+    return value if value <= maximum else None
+
+
+# domain_extensions 的顶层键数量（在数据库中计算，列表不读取 JSON 列本身）
+EXTENSION_COUNT_SQL = (
+    "SELECT CASE jsonb_typeof(agent_cards.domain_extensions) "
+    "WHEN 'object' THEN (SELECT count(*) FROM jsonb_object_keys(agent_cards.domain_extensions)) "
+    "ELSE 0 END"
 )
 
 
@@ -44,8 +183,10 @@ class NamespaceViewSet(viewsets.ModelViewSet):
     update: PUT /api/namespaces/{id}/
     partial_update: PATCH /api/namespaces/{id}/
     destroy: DELETE /api/namespaces/{id}/
+
+    AgentCard / Case 计数读取反规范化的 NamespaceStats（随列表一次 JOIN 取回）
     """
-    queryset = Namespace.objects.all().order_by('id')
+    queryset = Namespace.objects.all().select_related('stats').order_by('id')
     serializer_class = NamespaceSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -54,7 +195,7 @@ class NamespaceViewSet(viewsets.ModelViewSet):
 # Schema ViewSet
 # ========================================
 
-class SchemaRegistryViewSet(viewsets.ModelViewSet):
+class SchemaRegistryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     Schema 定义 API
 
@@ -69,9 +210,30 @@ class SchemaRegistryViewSet(viewsets.ModelViewSet):
 
     额外端点：
     catalog: GET /api/schemas/catalog/ - Schema 目录（发现机制）
+    violations: GET /api/schemas/{id}/violations/ - 不符合当前定义的扩展（后台重新验证的结果）
+
+    retrieve 支持条件请求（ETag / Last-Modified）：字段变更会更新 Schema 的 updated_at；
+    详情中的 usage_count 随扩展增删变化、revalidated_at 在后台重新验证完成时写入，都不更新 updated_at，
+    因此也参与 ETag 计算
+
+    usage_count 按 AgentExtension.schema 统计（见 catalog.py），列表和详情以子查询注解，
+    详情的字段一次预取。
     """
     queryset = SchemaRegistry.objects.filter(is_active=True).order_by('schema_type', '-version')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    # usage_count 为 retrieve 查询集上的注解
+    conditional_fields = ['updated_at', 'usage_count', 'revalidated_at']
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = queryset.annotate(
+                field_count=field_count_subquery(),
+                usage_count=usage_count_subquery(),
+            )
+        elif self.action == 'retrieve':
+            queryset = queryset.annotate(usage_count=usage_count_subquery()).prefetch_related('fields')
+        return queryset
 
     def get_serializer_class(self):
         """
@@ -81,6 +243,10 @@ class SchemaRegistryViewSet(viewsets.ModelViewSet):
             return SchemaRegistryListSerializer
         return SchemaRegistryDetailSerializer
 
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     @action(detail=False, methods=['get'])
     def catalog(self, request):
         """
@@ -106,43 +272,50 @@ class SchemaRegistryViewSet(viewsets.ModelViewSet):
           "categories": ["physicalAsset", "instrument"],
           "total_schemas": 2
         }
+
+        目录以固定 3 次查询构建并缓存，Schema、字段或扩展写入后失效（见 catalog.py）
         """
-        schemas = SchemaRegistry.objects.filter(is_active=True).order_by('schema_type', '-version')
-
-        catalog = {}
-        for schema in schemas:
-            if schema.schema_type not in catalog:
-                catalog[schema.schema_type] = []
-
-            # 计算使用数量
-            usage_count = AgentCard.objects.filter(
-                domain_extensions__has_key=schema.schema_uri
-            ).count()
-
-            catalog[schema.schema_type].append({
-                'uri': schema.schema_uri,
-                'version': schema.version,
-                'description': schema.description,
-                'fields': schema.get_field_definitions(),
-                'usage_count': usage_count,
-                'example_data': schema.example_data,
-            })
+        serializer = SchemaCatalogSerializer(get_catalog())
+        return Response(serializer.data)
 
-        data = {
-            'catalog': catalog,
-            'categories': list(catalog.keys()),
-            'total_schemas': schemas.count(),
-        }
+    @action(detail=True, methods=['get'])
+    def violations(self, request, pk=None):
+        """
+        扩展违规记录 API
 
-        serializer = SchemaCatalogSerializer(data)
-        return Response(serializer.data)
+        GET /api/schemas/{id}/violations/
+
+        修改 Schema / 字段后，后台任务用新定义重新验证引用该 Schema 的扩展（见 revalidation.py），
+        这里分页返回验证失败的扩展及全部错误（带数据路径）：
+        {
+          "schema_version": "...",       // Schema 当前版本（updated_at）
+          "revalidated_at": "...",       // 最近一次完成重新验证时的 Schema 版本
+          "up_to_date": true,            // 两者一致：结果已反映当前定义
+          "pending": false,              // 本进程中是否有排队的重新验证任务
+          "count": 2, "next": null, "previous": null,
+          "results": [{extension_id, agent_card_id, namespace_id, name, version, uri, errors, ...}]
+        }
+        """
+        schema = self.get_object()
+        queryset = schema.violations.select_related('extension__agent_card').order_by('extension_id')
+        page = self.paginate_queryset(queryset)
+        serializer = ExtensionViolationSerializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data = {
+            'schema_version': schema.updated_at,
+            'revalidated_at': schema.revalidated_at,
+            'up_to_date': schema.revalidated_at == schema.updated_at,
+            'pending': schema.pk in revalidator.pending(),
+            **response.data,
+        }
+        return response
 
 
 # ========================================
 # AgentCard ViewSet
 # ========================================
 
-class AgentCardViewSet(viewsets.ModelViewSet):
+class AgentCardViewSet(KeysetPaginationMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     AgentCard API
 
@@ -157,12 +330,62 @@ class AgentCardViewSet(viewsets.ModelViewSet):
 
     额外端点：
     standard_json: GET /api/agentcards/{id}/standard-json/ - 返回符合 A2A 协议的标准格式
+    make_default: POST /api/agentcards/{id}/make-default/ - 设为默认版本（单个事务内切换）
+    extensions: GET/POST/PUT /api/agentcards/{id}/extensions/ - 扩展列表 / 新建 / 整组替换
+    extension_detail: GET/PUT/PATCH/DELETE /api/agentcards/{id}/extensions/{extension_id}/ - 单个扩展
+    extension_params: PATCH /api/agentcards/{id}/extensions/{extension_id}/params/ - 补丁修改扩展 params
     by_namespace: GET /api/agentcards/by-namespace/{namespace_id}/ - 按命名空间查询
+    batch: GET /api/agentcards/batch/?ids=1,2&keys=dev::agent@1.0.0 - 批量获取
+    export: GET /api/agentcards/export/?namespace=dev&format=ndjson - 流式导出（NDJSON）
+    import: POST /api/agentcards/import/?namespace=dev - 批量导入（NDJSON 请求体）
+    validate: POST /api/agentcards/validate/ - 批量试验证（JSON 数组或 NDJSON，不写入）
+    changes: GET /api/agentcards/changes/?since=<cursor> - 增量变更流（含删除墓碑）
+
+    retrieve 和 standard_json 支持条件请求（ETag / Last-Modified / 304），
+    扩展变更会更新 AgentCard 的 updated_at。
+    PUT / PATCH 支持 If-Match（与 retrieve 的 ETag 比较，不一致时返回 412）；PATCH 还接受
+    application/merge-patch+json 和 application/json-patch+json 请求体，在服务端合并到当前数据。
+
+    列表支持键集分页（?pagination=cursor / ?cursor=），按 (namespace, name, version, id) 排序。
+
+    list / retrieve / by_namespace 支持稀疏字段集（?fields= / ?omit= / ?expand=extensions），
+    未输出的字段对应的列不会被查询（.only()），列表默认不读取任何大 JSON 列。
     """
     queryset = AgentCard.objects.all().select_related('namespace').order_by(
-        'namespace', 'name', '-version'
+        'namespace', 'name', *SEMVER_DESC_ORDERING
     )
     permission_classes = [IsAuthenticatedOrReadOnly]
+    parser_classes = [*api_settings.DEFAULT_PARSER_CLASSES, MergePatchParser, JSONPatchParser]
+    conditional_fields = ['updated_at', 'namespace__updated_at']
+    # 键集分页排序（唯一索引 (namespace, name, version) 覆盖）
+    keyset_ordering = ('namespace_id', 'name', 'version', 'id')
+
+    # 支持稀疏字段集的操作
+    sparse_field_actions = ('list', 'retrieve', 'by_namespace')
+
+    # 批量获取单次请求的最大条目数
+    batch_max_size = 1000
+
+    # 流式导出每块读取/渲染的卡片数量
+    export_chunk_size = 500
+
+    # 批量导入每批（每个事务）的行数，以及响应中最多返回的错误条数
+    import_batch_size = 500
+    import_max_errors = 100
+
+    # 变更流每页的默认/最大变更记录数
+    changes_page_size = 100
+    changes_max_page_size = 1000
+
+    # 试验证（validate）单次请求的最大载荷数
+    validate_max_items = 5000
+
+    # 整组替换扩展（PUT extensions/）单次请求的最大扩展数
+    extensions_max_items = 200
+
+    # 批量 upsert（bulk-upsert）单次请求的最大载荷数，以及每块（每个事务）写入的卡片数
+    upsert_max_items = 5000
+    upsert_chunk_size = 500
 
     def get_serializer_class(self):
         """
@@ -176,6 +399,66 @@ class AgentCardViewSet(viewsets.ModelViewSet):
             return AgentCardStandardSerializer
         return AgentCardDetailSerializer
 
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    # ========================================
+    # 稀疏字段集
+    # ========================================
+
+    def get_sparse_fields(self):
+        """
+        本次请求输出的字段（?fields= / ?omit= / ?expand=），不支持稀疏字段集的操作返回 None
+
+        Raises:
+            ValidationError: 未知字段（400）
+        """
+        if self.action not in self.sparse_field_actions:
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            params = self.request.query_params
+            self._sparse_fields = self.get_serializer_class().select_fields(
+                fields=_split_param(params.get('fields')),
+                omit=_split_param(params.get('omit')),
+                expand=_split_param(params.get('expand')),
+            )
+        return self._sparse_fields
+
+    def apply_sparse_fields(self, queryset, fields):
+        """
+        只查询输出字段依赖的列
+
+        - 未请求 namespace_name 时不再 JOIN namespace
+        - extension_count 由 SQL 注解计算
+        - extensions 展开时预取 AgentExtension（一次查询）
+        """
+        serializer_class = self.get_serializer_class()
+        columns = serializer_class.model_columns(fields)
+        # 键集分页的游标需要读取排序字段
+        if self.use_keyset_pagination():
+            columns.extend(field for field in self.keyset_ordering if field not in columns)
+        if 'namespace__name' not in columns:
+            queryset = queryset.select_related(None)
+        queryset = queryset.only(*columns)
+
+        if 'extension_count' in fields:
+            queryset = queryset.annotate(
+                extension_count=RawSQL(EXTENSION_COUNT_SQL, (), output_field=IntegerField())
+            )
+        if 'extensions' in fields:
+            queryset = queryset.prefetch_related(
+                Prefetch('extensions', queryset=AgentExtension.objects.order_by('order', 'uri'))
+            )
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            context['fields'] = fields
+        return context
+
     def get_queryset(self):
         """
         支持查询参数过滤
@@ -185,9 +468,25 @@ class AgentCardViewSet(viewsets.ModelViewSet):
         - name: 按名称过滤
         - is_default_version: 只返回默认版本
         - is_active: 只返回激活的
+        - q: 全文检索（列表），按相关度排序（见 search.py）
+        - skill_id: 提供指定技能（逗号分隔多个时满足任一）
+        - tag: 技能带有指定标签（逗号分隔多个时满足任一）
+        - tag__all: 技能带有全部指定标签（逗号分隔，可分布在不同技能上）
+        - fields / omit / expand: 稀疏字段集（list / retrieve / by_namespace）
         """
         queryset = super().get_queryset()
 
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            queryset = self.apply_sparse_fields(queryset, fields)
+
+        # standard-json 只读取快照和元数据列，不加载大字段
+        if self.action == 'standard_json':
+            queryset = queryset.select_related(None).only(
+                'id', 'namespace', 'is_default_version', 'is_active',
+                'created_at', 'updated_at', *AgentCard.SNAPSHOT_FIELDS
+            )
+
         # 按命名空间过滤
         namespace = self.request.query_params.get('namespace')
         if namespace:
@@ -208,6 +507,32 @@ class AgentCardViewSet(viewsets.ModelViewSet):
         if is_active and is_active.lower() == 'true':
             queryset = queryset.filter(is_active=True)
 
+        # 技能 / 标签（通过 AgentSkill / AgentSkillTag 索引反查）
+        skill_ids = _split_param(self.request.query_params.get('skill_id'))
+        if skill_ids:
+            queryset = queryset.filter(
+                pk__in=AgentSkill.objects.filter(skill_id__in=skill_ids).values('agent_card_id')
+            )
+
+        tags = _split_param(self.request.query_params.get('tag'))
+        if tags:
+            queryset = queryset.filter(
+                pk__in=AgentSkillTag.objects.filter(tag__in=tags).values('agent_card_id')
+            )
+
+        all_tags = _split_param(self.request.query_params.get('tag__all'))
+        if all_tags:
+            queryset = queryset.filter(
+                pk__in=AgentSkillTag.objects.filter(tag__in=all_tags).values('agent_card_id').annotate(
+                    matched=Count('tag', distinct=True)
+                ).filter(matched=len(all_tags)).values('agent_card_id')
+            )
+
+        # 全文检索（名称、描述、技能）
+        q = self.request.query_params.get('q')
+        if q and self.action == 'list':
+            queryset = search(queryset, q)
+
         return queryset
 
     def perform_create(self, serializer):
@@ -228,7 +553,223 @@ class AgentCardViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    # ========================================
+    # 条件更新与补丁
+    # ========================================
+
+    @conditional_write
+    def update(self, request, *args, **kwargs):
+        """
+        PUT / PATCH（partial_update 也经过这里）
+
+        带 If-Match 时与卡片当前 ETag 比较，不一致返回 412（见 conditional_write）。
+        PATCH 请求体为 application/merge-patch+json 或 application/json-patch+json 时，
+        补丁应用到锁定的当前数据上（见 _patch_card），其他请求体按 DRF 的部分更新处理。
+        """
+        media_type = _media_type(request)
+        if kwargs.get('partial') and media_type in (MERGE_PATCH_MEDIA_TYPE, JSON_PATCH_MEDIA_TYPE):
+            return self._patch_card(request, media_type)
+        return super().update(request, *args, **kwargs)
+
+    def _patch_card(self, request, media_type):
+        """
+        把补丁应用到卡片的可写字段文档（与 PUT 的请求体格式相同）
+
+        只有值发生变化的顶层字段作为部分更新提交给序列化器，因此修改一个技能只写入 skills 列，
+        验证规则也只涉及 skills（见 AgentCard.clean_update()）。
+        """
+        card = self.get_object()
+        document = dict(self.get_serializer(card).data)
+        patched, error = _apply_patch(document, media_type, request.data)
+        if error is not None:
+            return error
+        if not isinstance(patched, dict):
+            return Response({'detail': '补丁结果必须是对象'}, status=status.HTTP_400_BAD_REQUEST)
+        unknown = sorted(set(patched) - set(document))
+        if unknown:
+            return Response(
+                {'detail': f"未知字段：{', '.join(unknown)}"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        changes = {name: patched.get(name) for name, value in document.items() if patched.get(name) != value}
+        serializer = self.get_serializer(card, data=changes, partial=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    @action(
+        detail=True, methods=['patch'], url_path=r'extensions/(?P<extension_id>\d+)/params',
+        parser_classes=[MergePatchParser, JSONPatchParser],
+    )
+    @conditional_write
+    def extension_params(self, request, pk=None, extension_id=None):
+        """
+        以补丁修改扩展的 params
+
+        PATCH /api/agentcards/{id}/extensions/{extension_id}/params/
+        请求体：application/merge-patch+json 或 application/json-patch+json（路径相对于 params）
+
+        If-Match 与卡片的 ETag 比较（扩展变更会更新卡片的 updated_at）。扩展关联了启用的 Schema 时，
+        补丁结果用编译的验证器验证，不符合时返回 400 且不写入。
+
+        返回：{id, uri, params}
+        """
+        card = self.get_object()
+        extension = self._get_extension(card, extension_id)
+
+        params, error = _apply_patch(extension.params, _media_type(request), request.data)
+        if error is not None:
+            return error
+        if not isinstance(params, dict):
+            return Response({'params': ['params 必须是对象']}, status=status.HTTP_400_BAD_REQUEST)
+        if extension.schema is not None:
+            errors = get_validator(extension.schema).errors(params)
+            if errors:
+                return Response(
+                    {'params': [str(error) for error in errors]}, status=status.HTTP_400_BAD_REQUEST
+                )
+
+        if params != extension.params:
+            extension.params = params
+            extension.save(update_fields=['params'])
+        return Response({'id': extension.pk, 'uri': extension.uri, 'params': extension.params})
+
+    # ========================================
+    # 扩展子资源
+    # ========================================
+
+    @staticmethod
+    def _get_extension(card, extension_id):
+        return get_object_or_404(card.extensions.select_related('schema'), pk=extension_id)
+
+    @action(detail=True, methods=['get'], url_path='extensions')
+    def extensions(self, request, pk=None):
+        """
+        卡片的扩展（AgentCapabilities.extensions）
+
+        GET /api/agentcards/{id}/extensions/    - 列表（按 order 排序）
+        POST /api/agentcards/{id}/extensions/   - 新建一个扩展
+        PUT /api/agentcards/{id}/extensions/    - 用请求体中的数组替换全部扩展（见 replace_extensions）
+
+        URI 与已注册的 Schema 匹配时自动关联并验证 params。写操作支持 If-Match（与卡片的 ETag 比较）。
+        """
+        card = self.get_object()
+        return Response(AgentExtensionSerializer(card.extensions.all(), many=True).data)
+
+    @extensions.mapping.post
+    @conditional_write
+    def create_extension(self, request, pk=None):
+        card = self.get_object()
+        serializer = AgentExtensionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        item = serializer.validated_data
+        if card.extensions.filter(uri=item['uri']).exists():
+            return Response({'uri': [f"扩展 URI 已存在：{item['uri']}"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        schemas = load_schemas([item['uri']])
+        errors = params_errors([item], schemas)[0]
+        if errors:
+            return Response({'params': errors}, status=status.HTTP_400_BAD_REQUEST)
+        extension = save_extension(card, item, schemas)
+        return Response(AgentExtensionSerializer(extension).data, status=status.HTTP_201_CREATED)
+
+    @extensions.mapping.put
+    @conditional_write
+    def replace_extensions(self, request, pk=None):
+        """
+        整组替换扩展
+
+        请求体为扩展数组（顺序即 capabilities.extensions 的顺序），按 URI 与现有扩展比较：
+        新增的 bulk_create、有变化的 bulk_update、不在数组中的删除，没有变化的不写入，全部在一个事务中完成。
+        任何一项无效时返回 400（与请求数组一一对应的错误列表），不做任何修改。
+
+        返回：{created, updated, deleted, unchanged, results: [扩展]}
+        """
+        card = self.get_object()
+        if not isinstance(request.data, list):
+            return Response({'detail': '请求体必须是扩展数组'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.extensions_max_items:
+            return Response(
+                {'detail': f'单张卡片最多 {self.extensions_max_items} 个扩展'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = AgentExtensionSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data
+
+        schemas = load_schemas(item['uri'] for item in items)
+        errors = [{} for _ in items]
+        seen = set()
+        for index, item in enumerate(items):
+            if item['uri'] in seen:
+                errors[index]['uri'] = [f"重复的扩展 URI：{item['uri']}"]
+            seen.add(item['uri'])
+        for index, messages in enumerate(params_errors(items, schemas)):
+            if messages:
+                errors[index]['params'] = messages
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        result = replace_extensions(card, items, schemas)
+        return Response({
+            'created': result.created,
+            'updated': result.updated,
+            'deleted': result.deleted,
+            'unchanged': result.unchanged,
+            'results': AgentExtensionSerializer(result.extensions, many=True).data,
+        })
+
+    @action(detail=True, methods=['get'], url_path=r'extensions/(?P<extension_id>\d+)')
+    def extension_detail(self, request, pk=None, extension_id=None):
+        """
+        单个扩展
+
+        GET / PUT / PATCH / DELETE /api/agentcards/{id}/extensions/{extension_id}/
+        """
+        extension = self._get_extension(self.get_object(), extension_id)
+        return Response(AgentExtensionSerializer(extension).data)
+
+    @extension_detail.mapping.put
+    @conditional_write
+    def update_extension(self, request, pk=None, extension_id=None):
+        return self._update_extension(request, extension_id, partial=False)
+
+    @extension_detail.mapping.patch
+    @conditional_write
+    def partial_update_extension(self, request, pk=None, extension_id=None):
+        return self._update_extension(request, extension_id, partial=True)
+
+    def _update_extension(self, request, extension_id, partial):
+        card = self.get_object()
+        extension = self._get_extension(card, extension_id)
+        serializer = AgentExtensionSerializer(extension, data=request.data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        item = {
+            'uri': extension.uri,
+            'description': extension.description,
+            'required': extension.required,
+            'params': extension.params,
+            'order': extension.order,
+            **serializer.validated_data,
+        }
+        if card.extensions.filter(uri=item['uri']).exclude(pk=extension.pk).exists():
+            return Response({'uri': [f"扩展 URI 已存在：{item['uri']}"]}, status=status.HTTP_400_BAD_REQUEST)
+
+        schemas = load_schemas([item['uri']])
+        errors = params_errors([item], schemas)[0]
+        if errors:
+            return Response({'params': errors}, status=status.HTTP_400_BAD_REQUEST)
+        extension = save_extension(card, item, schemas, extension)
+        return Response(AgentExtensionSerializer(extension).data)
+
+    @extension_detail.mapping.delete
+    @conditional_write
+    def delete_extension(self, request, pk=None, extension_id=None):
+        self._get_extension(self.get_object(), extension_id).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=True, methods=['get'])
+    @conditional_get
     def standard_json(self, request, pk=None):
         """
         返回符合 A2A 协议的标准 AgentCard JSON
@@ -240,16 +781,436 @@ class AgentCardViewSet(viewsets.ModelViewSet):
         - include_metadata: 是否包含内部元数据（默认 false）
 
         返回：符合 A2A 0.3.0 协议的 AgentCard JSON
+
+        数据来自保存时物化的快照；请求 JSON 且不含元数据时直接返回预编码字节。
         """
         agentcard = self.get_object()
         include_metadata = request.query_params.get('include_metadata', 'false').lower() == 'true'
 
+        if not include_metadata and isinstance(request.accepted_renderer, JSONRenderer):
+            agentcard.ensure_snapshot()
+            if agentcard.a2a_snapshot_bytes is not None:
+                return HttpResponse(
+                    bytes(agentcard.a2a_snapshot_bytes),
+                    content_type='application/json'
+                )
+
         serializer = AgentCardStandardSerializer(
             agentcard,
             context={'include_metadata': include_metadata}
         )
         return Response(serializer.data)
 
+    @action(detail=True, methods=['post'], url_path='make-default')
+    def make_default(self, request, pk=None):
+        """
+        设为默认版本
+
+        POST /api/agentcards/{id}/make-default/
+
+        在单个事务内取消同一 namespace::name 原来的默认版本并设置本版本（见 AgentCard.make_default()），
+        不需要先 PATCH 取消再 PATCH 设置。"每个 namespace::name 只有一个默认版本"由数据库部分唯一约束保证，
+        并发切换同一 Agent 时依次执行，最后一次生效。本版本已是默认版本时不做修改。
+
+        返回：{id, namespace_id, name, version, is_default_version, previous_default: [{id, version}]}
+        """
+        card = self.get_object()
+        updated_by = request.user if request.user.is_authenticated else None
+        try:
+            card, demoted = card.make_default(updated_by=updated_by)
+        except ValidationError as e:
+            return Response({'detail': e.messages}, status=status.HTTP_409_CONFLICT)
+        return Response({
+            'id': card.pk,
+            'namespace_id': card.namespace_id,
+            'name': card.name,
+            'version': card.version,
+            'is_default_version': card.is_default_version,
+            'previous_default': [{'id': old.pk, 'version': old.version} for old in demoted],
+        })
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        批量获取多个 AgentCard
+
+        GET /api/agentcards/batch/?ids=1,2,3
+        GET /api/agentcards/batch/?keys=dev::hplc-agent@1.0.0,prod::router@2.1.0
+        GET /api/agentcards/batch/?ids=1,2&view=detail
+
+        查询参数：
+        - ids: 逗号分隔的 AgentCard ID
+        - keys: 逗号分隔的自然键 namespace::name@version（version 取最后一个 @ 之后的部分）
+        - view: standard（默认，A2A 标准 JSON）或 detail（详情 API 格式）
+        - include_metadata: view=standard 时是否包含内部元数据（默认 false）
+
+        返回：按请求顺序排列的逐项结果，单项失败（不存在、A2A 验证失败）不影响其他条目。
+        无论批量大小，查询次数固定。
+        """
+        view = request.query_params.get('view', 'standard')
+        if view not in ('standard', 'detail'):
+            return Response(
+                {'detail': "view 必须是 'standard' 或 'detail'"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        include_metadata = request.query_params.get('include_metadata', 'false').lower() == 'true'
+
+        refs = []
+        errors = {}
+        ids = {}
+        keys = set()
+        for raw in filter(None, request.query_params.get('ids', '').split(',')):
+            raw = raw.strip()
+            refs.append(raw)
+            card_id = _parse_int(raw)
+            if card_id is not None:
+                ids[raw] = card_id
+            else:
+                errors[raw] = f"无效的 ID：'{raw}'"
+        for raw in filter(None, request.query_params.get('keys', '').split(',')):
+            raw = raw.strip()
+            refs.append(raw)
+            key = self._parse_natural_key(raw)
+            if key:
+                keys.add(key)
+            else:
+                errors[raw] = f"无效的自然键：'{raw}'（格式应为 namespace::name@version）"
+
+        if not refs:
+            return Response(
+                {'detail': '请通过 ids 或 keys 参数指定要获取的 AgentCard'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(refs) > self.batch_max_size:
+            return Response(
+                {'detail': f'单次最多获取 {self.batch_max_size} 个 AgentCard，本次请求 {len(refs)} 个'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 一次查询取回所有条目（ID 与自然键合并为一个 OR 条件）
+        condition = Q(pk__in=set(ids.values()))
+        for namespace_id, name, version in keys:
+            condition |= Q(namespace_id=namespace_id, name=name, version=version)
+
+        queryset = self.get_queryset().filter(condition)
+        if view == 'standard':
+            queryset = queryset.select_related(None).only(
+                'id', 'namespace', 'name', 'version', 'is_default_version', 'is_active',
+                'created_at', 'updated_at', *AgentCard.SNAPSHOT_FIELDS
+            )
+        else:
+            queryset = queryset.select_related('created_by', 'updated_by')
+        cards = list(queryset)
+
+        by_id = {card.pk: card for card in cards}
+        by_key = {(card.namespace_id, card.name, card.version): card for card in cards}
+
+        # 详情格式：共享渲染器，所有卡片的 Schema 一次查询加载
+        if view == 'detail':
+            context = self.get_serializer_context()
+            context['renderer'] = AgentCardRenderer(cards)
+        else:
+            materialize_missing_snapshots(cards)
+
+        results = []
+        seen = set()
+        for raw in refs:
+            if raw in seen:
+                continue
+            seen.add(raw)
+
+            if raw in errors:
+                results.append({'ref': raw, 'status': 'error', 'errors': errors[raw]})
+                continue
+
+            card = by_id.get(ids[raw]) if raw in ids else by_key.get(self._parse_natural_key(raw))
+            if card is None:
+                results.append({'ref': raw, 'status': 'not_found'})
+                continue
+
+            item = {
+                'ref': raw,
+                'id': card.pk,
+                'key': f"{card.namespace_id}::{card.name}@{card.version}",
+            }
+            if view == 'detail':
+                item['status'] = 'ok'
+                item['data'] = AgentCardDetailSerializer(card, context=context).data
+            else:
+                try:
+                    item['data'] = card.get_a2a_snapshot(include_metadata=include_metadata)
+                    item['status'] = 'ok'
+                except ValidationError as e:
+                    item['status'] = 'error'
+                    item['errors'] = '\n'.join(e.messages)
+            results.append(item)
+
+        return Response({'count': len(results), 'results': results})
+
+    @staticmethod
+    def _parse_natural_key(raw):
+        """
+        解析自然键 namespace::name@version
+
+        Returns:
+            (namespace_id, name, version) 元组，格式无效时返回 None
+        """
+        namespace_id, sep, rest = raw.partition('::')
+        name, at, version = rest.rpartition('@')
+        if not (sep and at and namespace_id and name and version):
+            return None
+        return namespace_id, name, version
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer])
+    def export(self, request):
+        """
+        流式导出 AgentCard（NDJSON，每行一个卡片）
+
+        GET /api/agentcards/export/?namespace=dev&format=ndjson
+        GET /api/agentcards/export/?namespace=dev&format=ndjson&raw=true
+        GET /api/agentcards/export/?namespace=dev&format=ndjson&gzip=true
+        GET /api/agentcards/export/?namespace=dev&format=ndjson&cursor=<上次最后一行的 cursor>
+
+        查询参数：
+        - namespace / name / is_default_version / is_active: 与列表端点相同的过滤
+        - raw: true 时导出原始数据（to_dict_raw 格式，包括草稿）；默认导出 A2A 标准 JSON，跳过不完整的卡片
+        - gzip: true 时返回 gzip 压缩的文件（application/gzip）
+        - cursor: 续传游标（每行 _metadata.cursor），只导出该卡片之后的数据
+        - limit: 最多导出的卡片数量
+
+        按 ID 顺序输出，每行都带 _metadata（含 id 和 cursor）。
+        数据按块从服务端游标读取并逐块写出，不会在内存中构建完整列表。
+        """
+        raw = request.query_params.get('raw', 'false').lower() == 'true'
+        use_gzip = request.query_params.get('gzip', 'false').lower() == 'true'
+
+        queryset = self.get_queryset()
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                queryset = queryset.filter(pk__gt=decode_export_cursor(cursor))
+            except ValueError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = request.query_params.get('limit')
+        if limit:
+            limit = _parse_int(limit)
+            if not limit:
+                return Response({'detail': 'limit 必须是正整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        lines = iter_ndjson(
+            queryset, raw=raw, chunk_size=self.export_chunk_size, limit=limit or None,
+        )
+        filename = f"agentcards-{request.query_params.get('namespace') or 'all'}.ndjson"
+        if use_gzip:
+            response = StreamingHttpResponse(self._gzip_stream(lines), content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(lines, content_type='application/x-ndjson; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='import')
+    def import_cards(self, request):
+        """
+        批量导入 AgentCard（NDJSON 请求体，每行一个 AgentCard JSON）
+
+        POST /api/agentcards/import/?namespace=dev
+        POST /api/agentcards/import/?namespace=dev&dry_run=true
+
+        查询参数：
+        - namespace: 目标命名空间（为空时使用每行 _metadata.namespace）
+        - dry_run: true 时只验证，不写入
+
+        请求体按行流式读取、分批验证和写入（bulk_create），export 端点的输出可直接导入。
+        已存在的 namespace::name@version 跳过。
+        """
+        if request.stream is None:
+            return Response({'detail': '请求体为空'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run', 'false').lower() == 'true'
+        importer = AgentCardImporter(
+            namespace_id=request.query_params.get('namespace'),
+            created_by=request.user,
+            dry_run=dry_run,
+            batch_size=self.import_batch_size,
+        )
+        result = importer.import_lines(iter(request.stream.readline, b''))
+
+        return Response({
+            'dry_run': dry_run,
+            'stats': result['stats'],
+            'errors': result['errors'][:self.import_max_errors],
+            'errors_truncated': len(result['errors']) > self.import_max_errors,
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """
+        按自然键 (namespace, name, version) 批量创建或覆盖 AgentCard（幂等）
+
+        POST /api/agentcards/bulk-upsert/?namespace=dev
+        POST /api/agentcards/bulk-upsert/?namespace=dev&dry_run=true
+        请求体：AgentCard JSON 数组（application/json，也接受单个对象），
+        或每行一个 AgentCard JSON（application/x-ndjson）；_metadata 的 namespace、isDefaultVersion、
+        isActive 与 import 端点相同
+
+        查询参数：
+        - namespace: 目标命名空间（为空时使用每个载荷的 _metadata.namespace）
+        - dry_run: true 时只验证并报告每项将如何处理，不写入
+
+        已存在的版本用提交的内容覆盖（扩展整组替换），内容与上次 upsert 相同的跳过（见 importing.AgentCardUpserter）：
+        {
+          "dry_run": false,
+          "stats": {"total": 3, "created": 1, "updated": 1, "unchanged": 1, "invalid": 0},
+          "results": [
+            {"index": 0, "key": "dev::HPLC-001@1.0.0", "status": "unchanged", "errors": {}},
+            ...
+          ]
+        }
+        """
+        payloads, error = _read_payloads(request, self.upsert_max_items)
+        if error is not None:
+            return error
+
+        dry_run = request.query_params.get('dry_run', 'false').lower() == 'true'
+        upserter = AgentCardUpserter(
+            namespace_id=request.query_params.get('namespace'),
+            created_by=request.user,
+            dry_run=dry_run,
+            batch_size=self.upsert_chunk_size,
+        )
+        result = upserter.upsert(payloads)
+        return Response({'dry_run': dry_run, **result})
+
+    @action(detail=False, methods=['post'])
+    def validate(self, request):
+        """
+        批量试验证 AgentCard 载荷（不写入数据库）
+
+        POST /api/agentcards/validate/
+        请求体：AgentCard JSON 数组（application/json，也接受单个对象），
+        或每行一个 AgentCard JSON（application/x-ndjson）
+
+        对每个载荷执行 AgentCard.clean() 的格式规则、to_agentcard_json(validate=True) 的
+        A2A 必填字段规则和扩展 Schema 验证，返回每个载荷的全部错误（见 dryrun.py）：
+        {
+          "stats": {"total": 2, "valid": 1, "invalid": 1},
+          "results": [
+            {"index": 0, "key": "HPLC-001@1.0.0", "valid": true, "errors": {}},
+            {"index": 1, "key": "x@1", "valid": false, "errors": {"skills": ["..."], "url": ["..."]}}
+          ]
+        }
+        index 为载荷在数组中的位置（NDJSON 为第几个非空行，从 0 开始）。
+        载荷较多时在进程池中并行验证。
+        """
+        payloads, error = _read_payloads(request, self.validate_max_items)
+        if error is not None:
+            return error
+
+        results = validate_payloads(payloads)
+        valid = sum(1 for report in results if report['valid'])
+        return Response({
+            'stats': {'total': len(results), 'valid': valid, 'invalid': len(results) - valid},
+            'results': results,
+        })
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        增量变更流
+
+        GET /api/agentcards/changes/                       - 从保留的最早变更开始
+        GET /api/agentcards/changes/?since=<cursor>        - 上一页返回的 cursor 之后的变更
+        GET /api/agentcards/changes/?since=latest          - 只返回当前游标（全量同步后从此开始）
+
+        查询参数：
+        - since: 游标
+        - namespace: 只返回指定命名空间的变更
+        - limit: 每页最多读取的变更记录数（默认 100，最大 1000）
+
+        返回：{'cursor': ..., 'has_more': bool, 'results': [...]}
+        results 中 op=upsert 的条目带卡片当前数据，op=delete 的条目为墓碑（type=agentcard 或 extension）。
+        """
+        namespace_id = request.query_params.get('namespace')
+        since = request.query_params.get('since')
+
+        if since == 'latest':
+            return Response({
+                'cursor': head_cursor(namespace_id),
+                'has_more': False,
+                'results': [],
+            })
+
+        limit = _parse_int(
+            request.query_params.get('limit', str(self.changes_page_size)), maximum=self.changes_max_page_size
+        )
+        if not limit:
+            return Response(
+                {'detail': f'limit 必须是 1 到 {self.changes_max_page_size} 之间的整数'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            page = read_changes(since=since, namespace_id=namespace_id, limit=limit)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(page)
+
+    @staticmethod
+    def _gzip_stream(chunks):
+        """逐块 gzip 压缩（流式，不缓存完整内容）"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='resolve/(?P<namespace_id>[^/.]+)/(?P<agent_name>[^/]+)',
+    )
+    def resolve(self, request, namespace_id=None, agent_name=None):
+        """
+        解析 Agent 版本
+
+        GET /api/agentcards/resolve/{namespace}/{name}/
+        GET /api/agentcards/resolve/{namespace}/{name}/?version=latest
+        GET /api/agentcards/resolve/{namespace}/{name}/?version=^1.2
+
+        查询参数：
+        - version: default（默认）/ latest / 具体版本 / 范围（^1.2、~2.0、1.x）
+        - include_prerelease=true: latest 和范围也选择预发布版本
+
+        只在启用的版本中选择，结果按 (namespace, name) 缓存（见 resolution.py）。
+        """
+        spec = request.query_params.get('version') or 'default'
+        include_prerelease = request.query_params.get('include_prerelease', '').lower() == 'true'
+        try:
+            card = resolve_version(
+                version_candidates(namespace_id, agent_name), spec, include_prerelease=include_prerelease
+            )
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if card is None:
+            return Response(
+                {'detail': f"Agent '{namespace_id}::{agent_name}' 没有满足 '{spec}' 的启用版本"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({
+            'id': card['id'],
+            'namespace': namespace_id,
+            'name': agent_name,
+            'version': card['version'],
+            'is_default_version': card['is_default_version'],
+            'url': card['url'],
+            'preferred_transport': card['preferred_transport'],
+            'updated_at': card['updated_at'],
+        })
+
     @action(detail=False, methods=['get'], url_path='by-namespace/(?P<namespace_id>[^/.]+)')
     def by_namespace(self, request, namespace_id=None):
         """
@@ -270,11 +1231,166 @@ class AgentCardViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
+# ========================================
+# Skill 目录
+# ========================================
+
+class SkillViewSet(viewsets.GenericViewSet):
+    """
+    技能目录（只读）
+
+    list: GET /api/skills/
+
+    基于 AgentSkill / AgentSkillTag 索引按 skill_id 分组统计，不加载 AgentCard。
+    默认只统计可被发现的 Agent（默认版本、启用、所属命名空间启用）。
+    """
+    serializer_class = SkillCatalogSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_card_filter(self) -> dict:
+        """参与统计的 AgentCard 条件（作用于 agent_card__ 关联）"""
+        params = self.request.query_params
+        conditions = {}
+        if params.get('all_versions', '').lower() != 'true':
+            conditions.update({
+                'agent_card__is_default_version': True,
+                'agent_card__is_active': True,
+                'agent_card__namespace__is_active': True,
+            })
+        if params.get('namespace'):
+            conditions['agent_card__namespace_id'] = params['namespace']
+        return conditions
+
+    def get_queryset(self):
+        """
+        查询参数：
+        - namespace: 只统计指定命名空间
+        - tag: 只返回带有指定标签的技能（逗号分隔多个时满足任一）
+        - all_versions=true: 统计所有版本（默认只统计默认版本）
+        """
+        card_filter = self.get_card_filter()
+        queryset = AgentSkill.objects.filter(**card_filter)
+
+        tags = _split_param(self.request.query_params.get('tag'))
+        if tags:
+            queryset = queryset.filter(
+                skill_id__in=AgentSkillTag.objects.filter(tag__in=tags, **card_filter).values('skill_id')
+            )
+
+        # agent_card 与 skill_id 联合唯一，Count 无需 distinct
+        return queryset.values('skill_id').annotate(
+            name=Max('name'),
+            agent_count=Count('agent_card'),
+        ).order_by('-agent_count', 'skill_id')
+
+    def list(self, request):
+        """
+        GET /api/skills/?namespace=prod&tag=chromatography
+
+        响应（分页）：
+        {
+          "count": 12,
+          "results": [
+            {
+              "skill_id": "peak-integration",
+              "name": "Peak integration",
+              "agent_count": 3,
+              "tags": [{"tag": "chromatography", "agent_count": 3}]
+            }
+          ]
+        }
+        """
+        page = self.paginate_queryset(self.get_queryset())
+        rows = page if page is not None else list(self.get_queryset())
+
+        # 当前页技能的标签统计（一次查询）
+        tags = {}
+        for row in AgentSkillTag.objects.filter(
+            skill_id__in=[row['skill_id'] for row in rows], **self.get_card_filter()
+        ).values('skill_id', 'tag').annotate(
+            agent_count=Count('agent_card')
+        ).order_by('skill_id', '-agent_count', 'tag'):
+            tags.setdefault(row['skill_id'], []).append({'tag': row['tag'], 'agent_count': row['agent_count']})
+
+        for row in rows:
+            row['tags'] = tags.get(row['skill_id'], [])
+
+        serializer = self.get_serializer(rows, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
+# ========================================
+# 能力路由
+# ========================================
+
+class RouteViewSet(viewsets.ViewSet):
+    """
+    能力路由：根据任务描述返回排序后的候选 Agent（默认版本）
+
+    GET  /api/route/?tags=chromatography&input_modes=image/*&transport=GRPC
+    POST /api/route/  {"tags": [...], "input_modes": [...], ...}
+
+    使用进程内索引（见 routing.py），两次刷新之间不访问数据库。
+    与其他端点相同的权限：GET 允许匿名访问，POST 需要登录。
+    """
+
+    def list(self, request):
+        return self._route(request.query_params)
+
+    def create(self, request):
+        if not isinstance(request.data, dict):
+            return Response({'detail': '请求体必须是 JSON 对象'}, status=status.HTTP_400_BAD_REQUEST)
+        return self._route(request.data)
+
+    def _route(self, data):
+        """
+        任务描述（列表参数可用数组或逗号分隔字符串）：
+        - namespace: 只在指定命名空间中选择
+        - tags: 必须具备的技能标签（全部）
+        - skills: 必须具备的技能 ID（全部）
+        - input_modes / output_modes: 任务的输入/输出 MIME 类型（全部），双方都可使用通配符
+        - transport: 首选传输协议（不作为过滤条件，参与排序）
+        - extensions: 必须声明的扩展 URI（全部）
+        - streaming / push_notifications: 必须支持的能力
+        - limit: 返回的候选数量（默认 10，最大 100）
+
+        响应：
+        {
+          "total": 3,
+          "candidates": [
+            {"id": 1, "key": "prod::HPLC-001@1.0.0", "score": 3.5,
+             "endpoint": {"transport": "GRPC", "url": "..."}, ...}
+          ]
+        }
+        """
+        try:
+            query = RouteQuery.parse(data)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        total, matches = routing_index.route(query)
+        candidates = []
+        for score, entry in matches:
+            transport = query.transport if query.transport in entry.endpoints else entry.preferred_transport
+            candidates.append({
+                'id': entry.id,
+                'key': f"{entry.namespace_id}::{entry.name}@{entry.version}",
+                'namespace': entry.namespace_id,
+                'name': entry.name,
+                'version': entry.version,
+                'score': score,
+                'endpoint': {'transport': transport, 'url': entry.endpoints[transport]},
+            })
+        return Response({'total': total, 'candidates': candidates})
+
+
 # ========================================
 # AgentCase ViewSet
 # ========================================
 
-class AgentCaseViewSet(viewsets.ModelViewSet):
+class AgentCaseViewSet(KeysetPaginationMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     AgentCase API
 
@@ -286,11 +1402,18 @@ class AgentCaseViewSet(viewsets.ModelViewSet):
     update: PUT /api/cases/{id}/
     partial_update: PATCH /api/cases/{id}/
     destroy: DELETE /api/cases/{id}/
+
+    retrieve 支持条件请求（ETag / Last-Modified / 304）
+
+    列表支持键集分页（?pagination=cursor / ?cursor=），按 (created_at, id) 倒序。
     """
     queryset = AgentCase.objects.all().select_related(
         'agent_card', 'agent_card__namespace', 'created_by', 'updated_by'
     ).order_by('-created_at')
     permission_classes = [IsAuthenticatedOrReadOnly]
+    conditional_fields = ['updated_at', 'agent_card__updated_at']
+    # 键集分页排序（索引 (created_at, id)）
+    keyset_ordering = ('-created_at', '-id')
 
     def get_serializer_class(self):
         """
@@ -302,6 +1425,10 @@ class AgentCaseViewSet(viewsets.ModelViewSet):
             return AgentCaseCreateUpdateSerializer
         return AgentCaseDetailSerializer
 
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def get_queryset(self):
         """
         支持查询参数过滤
@@ -312,6 +1439,7 @@ class AgentCaseViewSet(viewsets.ModelViewSet):
         - is_ground_truth: 只返回ground truth cases
         - query_key: 按查询问题标识过滤
         - unassigned: 只返回未分配agent的cases
+        - q: 全文检索（列表），按相关度排序（见 search.py）
         """
         queryset = super().get_queryset()
 
@@ -340,6 +1468,11 @@ class AgentCaseViewSet(viewsets.ModelViewSet):
         if query_key:
             queryset = queryset.filter(query_key__icontains=query_key)
 
+        # 全文检索（case_name、query_key、query_description）
+        q = self.request.query_params.get('q')
+        if q and self.action == 'list':
+            queryset = search(queryset, q)
+
         # 只返回未分配的cases
         unassigned = self.request.query_params.get('unassigned')
         if unassigned and unassigned.lower() == 'true':
@@ -63,7 +63,7 @@ if [ ! -f "$ENV_FILE" ]; then
 fi
 
 # 步骤 1: 更新代码
-echo -e "${YELLOW}[1/6] 更新代码...${NC}"
+echo -e "${YELLOW}[1/7] 更新代码...${NC}"
 git fetch origin
 git checkout "$BRANCH"
 git pull origin "$BRANCH"
@@ -71,35 +71,41 @@ echo -e "${GREEN}✓ 代码更新完成${NC}"
 echo ""
 
 # 步骤 2: 构建镜像
-echo -e "${YELLOW}[2/6] 构建 Docker 镜像...${NC}"
+echo -e "${YELLOW}[2/7] 构建 Docker 镜像...${NC}"
 docker-compose -f "$COMPOSE_FILE" build
 echo -e "${GREEN}✓ 镜像构建完成${NC}"
 echo ""
 
 # 步骤 3: 启动服务
-echo -e "${YELLOW}[3/6] 启动服务...${NC}"
+echo -e "${YELLOW}[3/7] 启动服务...${NC}"
 docker-compose -f "$COMPOSE_FILE" up -d
 echo -e "${GREEN}✓ 服务启动完成${NC}"
 echo ""
 
 # 步骤 4: 等待数据库就绪
-echo -e "${YELLOW}[4/6] 等待数据库就绪...${NC}"
+echo -e "${YELLOW}[4/7] 等待数据库就绪...${NC}"
 sleep 5
 echo -e "${GREEN}✓ 数据库已就绪${NC}"
 echo ""
 
 # 步骤 5: 运行数据库迁移
-echo -e "${YELLOW}[5/6] 运行数据库迁移...${NC}"
+echo -e "${YELLOW}[5/7] 运行数据库迁移...${NC}"
 docker-compose -f "$COMPOSE_FILE" exec -T web python manage.py migrate --noinput
 echo -e "${GREEN}✓ 数据库迁移完成${NC}"
 echo ""
 
 # 步骤 6: 收集静态文件
-echo -e "${YELLOW}[6/6] 收集静态文件...${NC}"
+echo -e "${YELLOW}[6/7] 收集静态文件...${NC}"
 docker-compose -f "$COMPOSE_FILE" exec -T web python manage.py collectstatic --noinput
 echo -e "${GREEN}✓ 静态文件收集完成${NC}"
 echo ""
 
+# 步骤 7: 发布 AgentCard（.well-known/agent.json，由 Caddy 直接提供服务）
+echo -e "${YELLOW}[7/7] 发布 AgentCard...${NC}"
+docker-compose -f "$COMPOSE_FILE" exec -T web python manage.py publish_agentcards
+echo -e "${GREEN}✓ AgentCard 发布完成${NC}"
+echo ""
+
 # 显示服务状态
 echo -e "${GREEN}============================================================${NC}"
 echo -e "${GREEN}部署完成！${NC}"